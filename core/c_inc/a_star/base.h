@@ -1,7 +1,11 @@
 #pragma once
 
+#include <stdbool.h>
 #include "c_inc/a_star/variable.h"
 
+// 鄰居方向 (前 4 個是直線，後 4 個是斜向)
+extern const int8_t dirs[8][2];
+
 FORM_LEN get_index(FORM_POINT x, FORM_POINT y, FORM_W_H width);
 FORM_LEN calc_h(FORM_POINT start_x, FORM_POINT start_y, FORM_POINT end_x, FORM_POINT end_y);
 bool is_valid(
@@ -10,3 +14,4 @@ bool is_valid(
     const FORM_MAP* map
 );
 
+bool in_bounds(FORM_POINT x, FORM_POINT y, const Bounds* bounds);
@@ -0,0 +1,7 @@
+#pragma once
+
+#include "c_inc/a_star/variable.h"
+
+Node* ctx_node(AStarContext* ctx, FORM_LEN idx);
+void ctx_begin_search(AStarContext* ctx);
+int ctx_write_path(AStarContext* ctx, FORM_LEN end_idx, FORM_OUT_BUFFER* out_buffer, FORM_LEN out_capacity);
@@ -0,0 +1,9 @@
+#pragma once
+
+#include <stdbool.h>
+#include "c_inc/a_star/variable.h"
+
+void heap_push(OpenList* open, Node* nodes, uint32_t node_idx);
+uint32_t heap_pop(OpenList* open, Node* nodes);
+void heap_decrease(OpenList* open, Node* nodes, uint32_t node_idx);
+bool heap_is_empty(const OpenList* open);
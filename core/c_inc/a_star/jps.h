@@ -0,0 +1,11 @@
+#pragma once
+
+#include "c_inc/a_star/variable.h"
+
+int search_jps(
+    AStarContext* ctx,
+    FORM_POINT start_x  , FORM_POINT start_y,
+    FORM_POINT end_x    , FORM_POINT end_y,
+    const Bounds* bounds,
+    FORM_OUT_BUFFER* out_buffer, FORM_LEN out_capacity
+);
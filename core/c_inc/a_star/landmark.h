@@ -0,0 +1,7 @@
+#pragma once
+
+#include "c_inc/a_star/variable.h"
+
+void landmark_goal_reset(const AStarContext* ctx, LandmarkGoal* goal);
+void landmark_goal_add(const AStarContext* ctx, LandmarkGoal* goal, FORM_LEN idx);
+FORM_LEN landmark_h(const AStarContext* ctx, const LandmarkGoal* goal, FORM_LEN idx);
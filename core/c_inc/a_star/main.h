@@ -1,5 +1,7 @@
 #pragma once
 
+#include "c_inc/a_star/variable.h"
+
 // 確保你的函式在 Windows 系統下能被外部程式（如 Python）看見並呼叫
 #ifdef _WIN32
 #define EXPORT __declspec(dllexport)
@@ -14,3 +16,75 @@ EXPORT int solve_astar(
     FORM_POINT end_x    , FORM_POINT end_y,
     FORM_OUT_BUFFER* out_buffer
 );
+
+// --- 常駐 Context ---
+EXPORT AStarContext* astar_create(FORM_W_H width, FORM_W_H height);
+EXPORT void astar_destroy(AStarContext* ctx);
+EXPORT void astar_load_map(AStarContext* ctx, const FORM_MAP* map);
+EXPORT void astar_set_cell(AStarContext* ctx, FORM_POINT x, FORM_POINT y, FORM_MAP value);
+EXPORT void astar_set_rect(
+    AStarContext* ctx,
+    FORM_POINT x, FORM_POINT y,
+    FORM_W_H w, FORM_W_H h,
+    FORM_MAP value
+);
+EXPORT void astar_set_algorithm(AStarContext* ctx, int algorithm);
+EXPORT uint32_t astar_get_expanded(const AStarContext* ctx);
+EXPORT int astar_set_landmarks(AStarContext* ctx, const FORM_DIST* tables, int count);
+EXPORT int astar_solve(
+    AStarContext* ctx,
+    FORM_POINT start_x  , FORM_POINT start_y,
+    FORM_POINT end_x    , FORM_POINT end_y,
+    FORM_OUT_BUFFER* out_buffer
+);
+EXPORT int astar_solve_batch(
+    AStarContext* ctx,
+    const FORM_POINT* queries, int count,
+    FORM_OUT_BUFFER* out_buffer, FORM_LEN out_capacity,
+    int32_t* out_lengths
+);
+EXPORT int astar_solve_batch_bounded(
+    AStarContext* ctx,
+    const FORM_POINT* queries, int count,
+    FORM_OUT_BUFFER* out_buffer, FORM_LEN out_capacity,
+    int32_t* out_lengths
+);
+EXPORT int astar_solve_multi_batch(
+    AStarContext* ctx,
+    const FORM_POINT* cells,
+    const FORM_POINT* queries, int count,
+    FORM_OUT_BUFFER* out_buffer, FORM_LEN out_capacity,
+    int32_t* out_lengths
+);
+EXPORT int astar_solve_multi_cost(
+    AStarContext* ctx,
+    const FORM_POINT* cells,
+    const FORM_POINT* queries, int count,
+    uint32_t max_cost,
+    FORM_DIST* out_costs
+);
+EXPORT int astar_flow_field(
+    AStarContext* ctx,
+    const FORM_POINT* goals, int goal_count,
+    FORM_DIST* out_dist, FORM_DIR* out_dir
+);
+EXPORT int astar_flow_field_until(
+    AStarContext* ctx,
+    const FORM_POINT* goals, int goal_count,
+    const FORM_POINT* stops, int stop_count,
+    FORM_DIST* out_dist, FORM_DIR* out_dir
+);
+EXPORT int astar_flow_field_repair(
+    AStarContext* ctx,
+    FORM_POINT x, FORM_POINT y,
+    FORM_W_H w, FORM_W_H h,
+    FORM_DIST* dist, FORM_DIR* dir
+);
+EXPORT int astar_graph_search(
+    const FORM_POINT* node_xy, int node_count,
+    const FORM_GRAPH* edge_offsets, const FORM_GRAPH* edge_targets, const FORM_GRAPH* edge_costs,
+    const FORM_GRAPH* start_edges, int start_count,
+    const FORM_GRAPH* goal_edges, int goal_count,
+    FORM_POINT goal_x, FORM_POINT goal_y,
+    FORM_GRAPH* out_nodes, int out_capacity
+);
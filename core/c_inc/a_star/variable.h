@@ -11,23 +11,83 @@
 #define COST_DIAGONAL 14
 #define COST_STRAIGHT 10
 
+// 無父節點 / 不在 Open List 內
+#define NO_PARENT -1
+#define NOT_IN_HEAP UINT32_MAX
 
+// 搜尋結果：out_buffer 空間不足
+#define PATH_NO_SPACE -2
 
-typedef int FORM_MAP;
+// 搜尋演算法 (對應 Python 端 SearchAlgorithm)
+#define ALGO_A_STAR 0
+#define ALGO_JPS 1
+
+// 流場：無法抵達的距離 / 沒有下一步的方向 (終點或無法抵達)
+// 也作為 "不限代價" 的上限
+#define DIST_UNREACHABLE UINT32_MAX
+#define DIR_NONE -1
+// 流場搜尋中「等待抵達的停止格」的暫存標記 (搜尋結束前會換回實際距離或 DIST_UNREACHABLE)
+#define DIST_PENDING (UINT32_MAX - 1)
+
+// 地標 (ALT heuristic) 的數量上限
+#define LANDMARK_MAX 16
+
+
+
+// 地圖與輸出 buffer 的型別需與 Python 端的 array 一致 (透過 buffer protocol 直接傳入)
+typedef int8_t FORM_MAP;            // array('b')
 typedef int FORM_W_H;
 typedef int FORM_POINT;
-typedef int FORM_OUT_BUFFER;
+typedef int16_t FORM_OUT_BUFFER;    // array('h')
 typedef uint32_t FORM_LEN;
+typedef uint32_t FORM_DIST;         // array('I')
+typedef int8_t FORM_DIR;            // array('b')
+typedef uint32_t FORM_GRAPH;        // array('I')，抽象圖的節點索引 / 邊
 
 typedef struct Point {
     int x, y;
 } Point;
 
+// 搜尋範圍 [x0, x1) x [y0, y1)
+typedef struct Bounds {
+    FORM_POINT x0, y0;
+    FORM_POINT x1, y1;
+} Bounds;
+
 typedef struct Node {
     uint32_t g;
     uint32_t h;
     uint32_t f;
-    Point parent;
+    int32_t parent;         // 父節點的 1D 索引 (NO_PARENT 代表起點)
+    uint32_t heap_index;    // 在 Open List (Binary Heap) 中的位置
+    uint32_t stamp;         // 所屬的搜尋編號 (與 context 不同代表本次搜尋尚未走過)
     uint8_t state;
 } Node;
 
+// Open List：以 Binary Heap 存放節點的 1D 索引
+typedef struct OpenList {
+    uint32_t* items;
+    uint32_t size;
+} OpenList;
+
+// 常駐的尋路 Context：地圖與節點池在多次搜尋之間重複使用
+typedef struct AStarContext {
+    FORM_W_H width;
+    FORM_W_H height;
+    FORM_MAP* map;          // 地圖副本 (0 = 路, 1 = 牆)
+    Node* nodes;            // 節點池 (width * height)
+    OpenList open;          // Open List 緩衝區 (width * height)
+    uint32_t search_id;     // 每次搜尋遞增，用來取代整個節點池的重置
+    uint32_t* goal_mark;    // 多終點搜尋：等於 search_id 代表該格是本次搜尋的終點 (width * height)
+    uint8_t algorithm;      // ALGO_A_STAR / ALGO_JPS
+    uint32_t expanded;      // 上一次搜尋展開 (從 Open List 取出) 的節點數
+    uint32_t last_cost;     // 上一次搜尋找到的路徑代價 (找不到為 DIST_UNREACHABLE)
+    FORM_DIST* landmarks;   // 地標距離表，每格連續存放 landmark_count 個距離 ([格子 * landmark_count + k])
+    uint32_t landmark_count;
+} AStarContext;
+
+// 終點 (或多終點的集合) 在每張地標距離表上的距離範圍 [lo, hi]，lo > hi 代表該地標不使用
+typedef struct LandmarkGoal {
+    FORM_DIST lo[LANDMARK_MAX];
+    FORM_DIST hi[LANDMARK_MAX];
+} LandmarkGoal;
@@ -3,6 +3,13 @@
 #include "c_inc/a_star/base.h"
 
 
+
+// 鄰居方向
+const int8_t dirs[8][2] = {
+    {0, -1}, {0, 1}, {-1, 0}, {1, 0},   // 直線
+    {-1, -1}, {1, -1}, {-1, 1}, {1, 1}  // 斜向
+};
+
 // 輔助函式：計算 ID 陣列索引 (因為從 Python 傳入通常是攤平的陣列)
 FORM_LEN get_index(FORM_POINT x, FORM_POINT y, FORM_W_H width) {
     return y * width + x;
@@ -29,3 +36,8 @@ bool is_valid(
     // map 中 0 是路，其他是非路 (1 是牆)
     return map[get_index(x, y, width)] == 0;
 }
+
+// 範圍檢查 [x0, x1) x [y0, y1)
+bool in_bounds(FORM_POINT x, FORM_POINT y, const Bounds* bounds) {
+    return x >= bounds->x0 && x < bounds->x1 && y >= bounds->y0 && y < bounds->y1;
+}
@@ -0,0 +1,172 @@
+#include <stdlib.h>
+#include <string.h>
+#include "c_inc/a_star/base.h"
+#include "c_inc/a_star/context.h"
+#include "c_inc/a_star/main.h"
+#include "c_inc/debug.h"
+
+
+
+// --- Context 生命週期 ---
+// 建立常駐 Context (地圖預設全部為路)
+// 回傳值: Context 指標 (記憶體不足回傳 NULL)
+AStarContext* astar_create(FORM_W_H width, FORM_W_H height) {
+    if (width <= 0 || height <= 0) {
+        DBG_ERR("Invalid map size %d x %d", width, height);
+        return NULL;
+    }
+
+    FORM_LEN total = width * height;
+
+    AStarContext* ctx = (AStarContext*)calloc(1, sizeof(AStarContext));
+    if (!ctx) {
+        DBG_ERR("Insufficient memory");
+        return NULL;
+    }
+
+    ctx->width = width;
+    ctx->height = height;
+    ctx->map = (FORM_MAP*)calloc(total, sizeof(FORM_MAP));
+    ctx->nodes = (Node*)calloc(total, sizeof(Node));
+    ctx->open.items = (uint32_t*)malloc(total * sizeof(uint32_t));
+    ctx->goal_mark = (uint32_t*)calloc(total, sizeof(uint32_t));
+
+    if (!ctx->map || !ctx->nodes || !ctx->open.items || !ctx->goal_mark) {
+        DBG_ERR("Insufficient memory");
+        astar_destroy(ctx);
+        return NULL;
+    }
+
+    return ctx;
+}
+
+void astar_destroy(AStarContext* ctx) {
+    if (!ctx) return;
+
+    free(ctx->map);
+    free(ctx->nodes);
+    free(ctx->open.items);
+    free(ctx->goal_mark);
+    free(ctx->landmarks);
+    free(ctx);
+}
+
+// --- 地圖編輯 ---
+// 整張地圖覆寫 (map 為 NULL 代表全部清成路)
+// 地標距離表屬於舊的地圖，一併停用 (需要時再以 astar_set_landmarks 設定)
+void astar_load_map(AStarContext* ctx, const FORM_MAP* map) {
+    FORM_LEN total = ctx->width * ctx->height;
+    ctx->landmark_count = 0;
+
+    if (map) memcpy(ctx->map, map, total * sizeof(FORM_MAP));
+    else memset(ctx->map, 0, total * sizeof(FORM_MAP));
+}
+
+// 修改單一格子
+void astar_set_cell(AStarContext* ctx, FORM_POINT x, FORM_POINT y, FORM_MAP value) {
+    if (x < 0 || x >= ctx->width || y < 0 || y >= ctx->height) return;
+
+    ctx->map[get_index(x, y, ctx->width)] = value;
+}
+
+// 修改矩形範圍 (超出地圖的部分會被裁掉)
+void astar_set_rect(
+    AStarContext* ctx,
+    FORM_POINT x, FORM_POINT y,
+    FORM_W_H w, FORM_W_H h,
+    FORM_MAP value
+) {
+    FORM_POINT x0 = x < 0 ? 0 : x;
+    FORM_POINT y0 = y < 0 ? 0 : y;
+    FORM_POINT x1 = x + w > ctx->width ? ctx->width : x + w;
+    FORM_POINT y1 = y + h > ctx->height ? ctx->height : y + h;
+
+    for (FORM_POINT row = y0; row < y1; row++) {
+        for (FORM_POINT col = x0; col < x1; col++) {
+            ctx->map[get_index(col, row, ctx->width)] = value;
+        }
+    }
+}
+
+// --- 搜尋設定 ---
+// 選擇搜尋演算法 (ALGO_A_STAR / ALGO_JPS)，之後所有搜尋都使用此演算法
+void astar_set_algorithm(AStarContext* ctx, int algorithm) {
+    ctx->algorithm = algorithm == ALGO_JPS ? ALGO_JPS : ALGO_A_STAR;
+}
+
+// 上一次搜尋展開的節點數 (效能分析用)
+uint32_t astar_get_expanded(const AStarContext* ctx) {
+    return ctx->expanded;
+}
+
+// --- 節點池 ---
+// 開始新的搜尋：只遞增搜尋編號，不需要重置整個節點池
+void ctx_begin_search(AStarContext* ctx) {
+    ctx->open.size = 0;
+    ctx->expanded = 0;
+    ctx->last_cost = DIST_UNREACHABLE;
+    ctx->search_id++;
+
+    // 編號溢位時才真的清一次 (stamp 0 永遠代表未使用)
+    if (ctx->search_id == 0) {
+        memset(ctx->nodes, 0, ctx->width * ctx->height * sizeof(Node));
+        memset(ctx->goal_mark, 0, ctx->width * ctx->height * sizeof(uint32_t));
+        ctx->search_id = 1;
+    }
+}
+
+// 取得節點，若不屬於本次搜尋則先初始化
+Node* ctx_node(AStarContext* ctx, FORM_LEN idx) {
+    Node* node = &ctx->nodes[idx];
+
+    if (node->stamp != ctx->search_id) {
+        node->stamp = ctx->search_id;
+        node->state = NONE;
+        node->parent = NO_PARENT;
+        node->heap_index = NOT_IN_HEAP;
+    }
+    return node;
+}
+
+// --- 路徑輸出 ---
+// 從終點沿 parent 回溯，先計算長度，再由尾端往前填入 out_buffer (Start -> End)
+// 格式為: [x0, y0, x1, y1, x2, y2...]
+// 相鄰兩個節點不一定相鄰 (JPS 的跳點)，中間以直線 / 斜線逐格補齊
+// 回傳值: 路徑的格子數量 (out_buffer 不夠大回傳 PATH_NO_SPACE)
+int ctx_write_path(AStarContext* ctx, FORM_LEN end_idx, FORM_OUT_BUFFER* out_buffer, FORM_LEN out_capacity) {
+    FORM_W_H width = ctx->width;
+    Node* nodes = ctx->nodes;
+
+    int path_len = 1;
+    for (int32_t idx = end_idx; nodes[idx].parent != NO_PARENT; idx = nodes[idx].parent) {
+        int32_t parent = nodes[idx].parent;
+        int dx = abs((int)(idx % width) - (int)(parent % width));
+        int dy = abs((int)(idx / width) - (int)(parent / width));
+        path_len += dx > dy ? dx : dy;
+    }
+    if ((FORM_LEN)path_len > out_capacity) return PATH_NO_SPACE;
+
+    int i = path_len - 1;
+    int32_t idx = end_idx;
+    FORM_POINT x = idx % width;
+    FORM_POINT y = idx / width;
+    out_buffer[i * 2] = (FORM_OUT_BUFFER)x;
+    out_buffer[i * 2 + 1] = (FORM_OUT_BUFFER)y;
+
+    while (nodes[idx].parent != NO_PARENT) {
+        int32_t parent = nodes[idx].parent;
+        FORM_POINT px = parent % width;
+        FORM_POINT py = parent / width;
+
+        while (x != px || y != py) {
+            x += (px > x) - (px < x);
+            y += (py > y) - (py < y);
+            i--;
+            out_buffer[i * 2] = (FORM_OUT_BUFFER)x;
+            out_buffer[i * 2 + 1] = (FORM_OUT_BUFFER)y;
+        }
+        idx = parent;
+    }
+
+    return path_len;
+}
@@ -0,0 +1,329 @@
+#include <stdbool.h>
+#include <stdlib.h>
+#include "c_inc/a_star/base.h"
+#include "c_inc/a_star/context.h"
+#include "c_inc/a_star/heap.h"
+#include "c_inc/a_star/main.h"
+#include "c_inc/debug.h"
+
+
+
+// 反方向 (dirs[i] 的相反方向是 dirs[opposite[i]])
+static const int8_t opposite[8] = { 1, 0, 3, 2, 7, 6, 5, 4 };
+
+// --- 流場 (多起點 Dijkstra) ---
+// 從所有 goals 同時往外擴散，算出每一格走到最近 goal 的距離與下一步方向
+// 代價與防切角規則和 A* 相同 (規則是對稱的，所以反向擴散的結果等同正向尋路)
+// stops 不為 NULL 時，所有 (可走的) stops 都確定距離後就提早停止
+static int flow_expand(
+    AStarContext* ctx,
+    const FORM_POINT* goals, int goal_count,
+    const FORM_POINT* stops, int stop_count,
+    FORM_DIST* out_dist, FORM_DIR* out_dir
+) {
+    FORM_W_H width = ctx->width;
+    FORM_W_H height = ctx->height;
+    const FORM_MAP* map = ctx->map;
+    Node* nodes = ctx->nodes;
+    OpenList* open = &ctx->open;
+    FORM_LEN total = width * height;
+
+    for (FORM_LEN i = 0; i < total; i++) {
+        out_dist[i] = DIST_UNREACHABLE;
+        out_dir[i] = DIR_NONE;
+    }
+
+    // 停止格先標記為 DIST_PENDING (重複的只算一次)
+    int pending = 0;
+    for (int i = 0; stops && i < stop_count; i++) {
+        FORM_POINT x = stops[i * 2];
+        FORM_POINT y = stops[i * 2 + 1];
+        if (!is_valid(x, y, width, height, map)) continue;
+
+        FORM_LEN idx = get_index(x, y, width);
+        if (out_dist[idx] == DIST_PENDING) continue;
+        out_dist[idx] = DIST_PENDING;
+        pending++;
+    }
+
+    ctx_begin_search(ctx);
+
+    // 所有 goal 都是距離 0 的起點 (h 固定為 0，Binary Heap 就等同 Dijkstra)
+    for (int i = 0; i < goal_count; i++) {
+        FORM_POINT x = goals[i * 2];
+        FORM_POINT y = goals[i * 2 + 1];
+        if (!is_valid(x, y, width, height, map)) continue;
+
+        FORM_LEN idx = get_index(x, y, width);
+        Node* node = ctx_node(ctx, idx);
+        if (node->state != NONE) continue;
+
+        node->g = 0;
+        node->h = 0;
+        node->f = 0;
+        node->state = OPEN;
+        heap_push(open, nodes, idx);
+    }
+
+    int reached = 0;
+
+    while (!heap_is_empty(open)) {
+        FORM_LEN current_idx = heap_pop(open, nodes);
+        Node* current = &nodes[current_idx];
+        Point current_pos = { current_idx % width, current_idx / width };
+
+        current->state = CLOSED;
+        if (out_dist[current_idx] == DIST_PENDING) pending--;
+        out_dist[current_idx] = current->g;
+        reached++;
+
+        // 停止格全部抵達 (Open List 內剩下的格子不會影響已確定的距離)
+        if (stops && pending == 0) break;
+
+        for (uint8_t i = 0; i < 8; i++) {
+            FORM_POINT new_x = current_pos.x + dirs[i][0];
+            FORM_POINT new_y = current_pos.y + dirs[i][1];
+
+            bool is_diagonal = (dirs[i][0] != 0 && dirs[i][1] != 0);
+            int movement_cost = is_diagonal ? COST_DIAGONAL : COST_STRAIGHT;
+
+            if (!is_valid(new_x, new_y, width, height, map)) continue;
+
+            FORM_LEN n_idx = get_index(new_x, new_y, width);
+            Node* neighbor = ctx_node(ctx, n_idx);
+            if (neighbor->state == CLOSED) continue;
+
+            // 防切角檢查 (兩格相同，正反方向皆適用)
+            if (is_diagonal) {
+                if (!is_valid(current_pos.x + dirs[i][0], current_pos.y, width, height, map) ||
+                    !is_valid(current_pos.x, current_pos.y + dirs[i][1], width, height, map))
+                {
+                    continue;
+                }
+            }
+
+            uint32_t new_g = current->g + movement_cost;
+
+            if (neighbor->state != OPEN) {
+                neighbor->g = new_g;
+                neighbor->h = 0;
+                neighbor->f = new_g;
+                neighbor->state = OPEN;
+                out_dir[n_idx] = opposite[i];
+                heap_push(open, nodes, n_idx);
+            }
+            else if (new_g < neighbor->g) {
+                neighbor->g = new_g;
+                neighbor->f = new_g;
+                out_dir[n_idx] = opposite[i];
+                heap_decrease(open, nodes, n_idx);
+            }
+        }
+    }
+
+    // 沒抵達的停止格換回無法抵達
+    for (int i = 0; stops && pending > 0 && i < stop_count; i++) {
+        FORM_POINT x = stops[i * 2];
+        FORM_POINT y = stops[i * 2 + 1];
+        if (!is_valid(x, y, width, height, map)) continue;
+
+        FORM_LEN idx = get_index(x, y, width);
+        if (out_dist[idx] == DIST_PENDING) out_dist[idx] = DIST_UNREACHABLE;
+    }
+
+    return reached;
+}
+
+// goals: [x0, y0, x1, y1...] (牆壁或超出地圖的 goal 會被忽略)
+// out_dist: width * height，無法抵達為 DIST_UNREACHABLE
+// out_dir: width * height，往 goal 的下一步 (dirs 的索引)，goal 本身與無法抵達為 DIR_NONE
+// 回傳值: 可抵達的格子數量 (含 goal)
+int astar_flow_field(
+    AStarContext* ctx,
+    const FORM_POINT* goals, int goal_count,
+    FORM_DIST* out_dist, FORM_DIR* out_dir
+) {
+    if (!ctx) return 0;
+    return flow_expand(ctx, goals, goal_count, NULL, 0, out_dist, out_dir);
+}
+
+// --- 反向多起點搜尋 ---
+// 與 astar_flow_field 相同，但 stops (例如多棟出兵建築的出入口) 全部確定距離後就停止
+// 停止時尚未確定的格子為 DIST_UNREACHABLE，從任一 stop 沿 out_dir 走都會抵達 goal
+// stops: [x0, y0, x1, y1...]，牆壁或超出地圖的 stop 會被忽略，走不到的 stop 為 DIST_UNREACHABLE
+// 回傳值: 確定距離的格子數量 (含 goal)
+int astar_flow_field_until(
+    AStarContext* ctx,
+    const FORM_POINT* goals, int goal_count,
+    const FORM_POINT* stops, int stop_count,
+    FORM_DIST* out_dist, FORM_DIR* out_dir
+) {
+    if (!ctx) return 0;
+    return flow_expand(ctx, goals, goal_count, stops, stop_count, out_dist, out_dir);
+}
+
+// --- 流場局部修補 ---
+// 從 (x, y) 往 dirs[i] 走一步是否合法 (目標格可走 + 斜走防切角，規則對稱所以反方向也成立)
+static bool can_step(const AStarContext* ctx, FORM_POINT x, FORM_POINT y, uint8_t i) {
+    FORM_W_H width = ctx->width;
+    FORM_W_H height = ctx->height;
+    const FORM_MAP* map = ctx->map;
+
+    if (!is_valid(x + dirs[i][0], y + dirs[i][1], width, height, map)) return false;
+    if (dirs[i][0] == 0 || dirs[i][1] == 0) return true;
+
+    return is_valid(x + dirs[i][0], y, width, height, map) && is_valid(x, y + dirs[i][1], width, height, map);
+}
+
+// 加入 Open List，已在 Open List 內則更新代價 (呼叫前 out_dist 已寫入新的距離)
+static void repair_push(AStarContext* ctx, FORM_LEN idx, uint32_t g) {
+    Node* node = ctx_node(ctx, idx);
+    if (node->state == CLOSED) return;
+
+    node->g = g;
+    node->h = 0;
+    node->f = g;
+    if (node->state == OPEN) {
+        heap_decrease(&ctx->open, ctx->nodes, idx);
+        return;
+    }
+
+    node->state = OPEN;
+    heap_push(&ctx->open, ctx->nodes, idx);
+}
+
+// 從相鄰格子取得比目前更短的距離 (有的話放進 Open List)
+static void repair_seed(AStarContext* ctx, FORM_LEN idx, FORM_DIST* dist, FORM_DIR* dir) {
+    if (ctx->map[idx] != 0) return;
+
+    FORM_POINT x = idx % ctx->width;
+    FORM_POINT y = idx / ctx->width;
+    uint32_t best = dist[idx];
+    int8_t best_dir = DIR_NONE;
+
+    for (uint8_t i = 0; i < 8; i++) {
+        if (!can_step(ctx, x, y, i)) continue;
+
+        FORM_LEN n_idx = get_index(x + dirs[i][0], y + dirs[i][1], ctx->width);
+        if (dist[n_idx] == DIST_UNREACHABLE) continue;
+
+        uint32_t cost = dist[n_idx] + ((dirs[i][0] != 0 && dirs[i][1] != 0) ? COST_DIAGONAL : COST_STRAIGHT);
+        if (cost < best) {
+            best = cost;
+            best_dir = i;
+        }
+    }
+
+    if (best_dir == DIR_NONE) return;
+
+    dist[idx] = best;
+    dir[idx] = best_dir;
+    repair_push(ctx, idx, best);
+}
+
+// 地圖矩形 (x, y, w, h) 被編輯後，就地修正 astar_flow_field 算出的 dist / dir (Context 的地圖必須已更新)
+// 1. 自己變成牆、下一步變成牆或被切角的格子，連同沿 dir 會經過它們的格子 (子樹) 一起作廢
+// 2. 作廢的格子與編輯範圍 (含外圍一圈) 從相鄰格子重新取得距離
+// 3. Dijkstra 只在距離變小時往外擴散 (變成路時也會找到更短的路)
+// 只處理距離會改變的格子，結果與重新整張擴散的距離相同 (同代價時方向可能不同)
+// goal (距離 0) 變成牆時視為移除該 goal；新增 goal (建築出入口改變) 需要整張重建
+// 回傳值: 重新確定距離的格子數量 (記憶體不足回傳 -1)
+int astar_flow_field_repair(
+    AStarContext* ctx,
+    FORM_POINT x, FORM_POINT y,
+    FORM_W_H w, FORM_W_H h,
+    FORM_DIST* dist, FORM_DIR* dir
+) {
+    if (!ctx) return 0;
+
+    FORM_W_H width = ctx->width;
+    FORM_W_H height = ctx->height;
+    const FORM_MAP* map = ctx->map;
+
+    // 編輯範圍 + 外圍一圈 (斜走防切角)，裁切到地圖內
+    FORM_POINT x0 = x - 1 < 0 ? 0 : x - 1;
+    FORM_POINT y0 = y - 1 < 0 ? 0 : y - 1;
+    FORM_POINT x1 = x + w >= width ? width - 1 : x + w;
+    FORM_POINT y1 = y + h >= height ? height - 1 : y + h;
+    if (x0 > x1 || y0 > y1) return 0;
+
+    // 作廢的格子 (每格最多一次)
+    FORM_LEN* invalid = (FORM_LEN*)malloc(width * height * sizeof(FORM_LEN));
+    if (!invalid) {
+        DBG_ERR("Insufficient memory");
+        return -1;
+    }
+    FORM_LEN invalid_count = 0;
+
+    for (FORM_POINT cy = y0; cy <= y1; cy++) {
+        for (FORM_POINT cx = x0; cx <= x1; cx++) {
+            FORM_LEN idx = get_index(cx, cy, width);
+            if (dist[idx] == DIST_UNREACHABLE) continue;
+
+            bool broken = map[idx] != 0 || (dir[idx] != DIR_NONE && !can_step(ctx, cx, cy, dir[idx]));
+            if (!broken) continue;
+
+            dist[idx] = DIST_UNREACHABLE;
+            dir[idx] = DIR_NONE;
+            invalid[invalid_count++] = idx;
+        }
+    }
+
+    // 子樹：指向已作廢格子的鄰居也跟著作廢
+    for (FORM_LEN k = 0; k < invalid_count; k++) {
+        FORM_POINT px = invalid[k] % width;
+        FORM_POINT py = invalid[k] / width;
+
+        for (uint8_t i = 0; i < 8; i++) {
+            FORM_POINT nx = px + dirs[i][0];
+            FORM_POINT ny = py + dirs[i][1];
+            if (nx < 0 || nx >= width || ny < 0 || ny >= height) continue;
+
+            FORM_LEN n_idx = get_index(nx, ny, width);
+            if (dir[n_idx] != opposite[i]) continue;
+
+            dist[n_idx] = DIST_UNREACHABLE;
+            dir[n_idx] = DIR_NONE;
+            invalid[invalid_count++] = n_idx;
+        }
+    }
+
+    ctx_begin_search(ctx);
+
+    for (FORM_POINT cy = y0; cy <= y1; cy++) {
+        for (FORM_POINT cx = x0; cx <= x1; cx++) {
+            repair_seed(ctx, get_index(cx, cy, width), dist, dir);
+        }
+    }
+    for (FORM_LEN k = 0; k < invalid_count; k++) {
+        repair_seed(ctx, invalid[k], dist, dir);
+    }
+    free(invalid);
+
+    int settled = 0;
+    OpenList* open = &ctx->open;
+
+    while (!heap_is_empty(open)) {
+        FORM_LEN current_idx = heap_pop(open, ctx->nodes);
+        Node* current = &ctx->nodes[current_idx];
+        FORM_POINT cx = current_idx % width;
+        FORM_POINT cy = current_idx / width;
+
+        current->state = CLOSED;
+        settled++;
+
+        for (uint8_t i = 0; i < 8; i++) {
+            if (!can_step(ctx, cx, cy, i)) continue;
+
+            FORM_LEN n_idx = get_index(cx + dirs[i][0], cy + dirs[i][1], width);
+            uint32_t new_g = current->g + ((dirs[i][0] != 0 && dirs[i][1] != 0) ? COST_DIAGONAL : COST_STRAIGHT);
+            if (new_g >= dist[n_idx]) continue;
+
+            dist[n_idx] = new_g;
+            dir[n_idx] = opposite[i];
+            repair_push(ctx, n_idx, new_g);
+        }
+    }
+
+    return settled;
+}
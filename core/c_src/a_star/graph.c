@@ -0,0 +1,149 @@
+#include <stdbool.h>
+#include <stdlib.h>
+#include "c_inc/a_star/base.h"
+#include "c_inc/a_star/heap.h"
+#include "c_inc/a_star/main.h"
+#include "c_inc/debug.h"
+
+
+
+// --- 抽象圖 A* (給 HPA* 用) ---
+// 圖以 CSR 格式傳入：節點 i 的鄰居為 edge_targets[edge_offsets[i] .. edge_offsets[i + 1])
+// 起點與終點不在圖內，而是以暫時的邊接上 (起點 -> 節點 / 節點 -> 終點)
+// node_xy: [x0, y0, x1, y1...] 每個節點的格子座標 (計算啟發值)
+// start_edges / goal_edges: [node, cost, node, cost...]
+// out_nodes: 依序寫入經過的節點 (不含起終點)
+// 回傳值: 經過的節點數量 (找不到路徑回傳 -1，out_nodes 不夠大回傳 PATH_NO_SPACE)
+int astar_graph_search(
+    const FORM_POINT* node_xy, int node_count,
+    const FORM_GRAPH* edge_offsets, const FORM_GRAPH* edge_targets, const FORM_GRAPH* edge_costs,
+    const FORM_GRAPH* start_edges, int start_count,
+    const FORM_GRAPH* goal_edges, int goal_count,
+    FORM_POINT goal_x, FORM_POINT goal_y,
+    FORM_GRAPH* out_nodes, int out_capacity
+) {
+    if (node_count <= 0 || start_count <= 0 || goal_count <= 0) return -1;
+
+    // 終點是最後一個虛擬節點
+    FORM_GRAPH goal_idx = (FORM_GRAPH)node_count;
+    FORM_GRAPH total = goal_idx + 1;
+
+    Node* nodes = (Node*)calloc(total, sizeof(Node));
+    uint32_t* goal_cost = (uint32_t*)malloc(node_count * sizeof(uint32_t));
+    OpenList open = { (uint32_t*)malloc(total * sizeof(uint32_t)), 0 };
+
+    if (!nodes || !goal_cost || !open.items) {
+        DBG_ERR("Insufficient memory");
+        free(nodes);
+        free(goal_cost);
+        free(open.items);
+        return -1;
+    }
+
+    for (FORM_GRAPH i = 0; i < total; i++) {
+        nodes[i].parent = NO_PARENT;
+        nodes[i].heap_index = NOT_IN_HEAP;
+    }
+    for (int i = 0; i < node_count; i++) goal_cost[i] = DIST_UNREACHABLE;
+    for (int i = 0; i < goal_count; i++) {
+        FORM_GRAPH node = goal_edges[i * 2];
+        if (node < goal_idx) goal_cost[node] = goal_edges[i * 2 + 1];
+    }
+
+    // 起點的暫時邊：直接把鄰居放進 Open List
+    for (int i = 0; i < start_count; i++) {
+        FORM_GRAPH idx = start_edges[i * 2];
+        uint32_t g = start_edges[i * 2 + 1];
+        if (idx >= goal_idx) continue;
+
+        Node* node = &nodes[idx];
+        if (node->state == OPEN && g >= node->g) continue;
+
+        node->g = g;
+        node->h = calc_h(node_xy[idx * 2], node_xy[idx * 2 + 1], goal_x, goal_y);
+        node->f = node->g + node->h;
+        if (node->state == OPEN) {
+            heap_decrease(&open, nodes, idx);
+        } else {
+            node->state = OPEN;
+            heap_push(&open, nodes, idx);
+        }
+    }
+
+    bool found = false;
+
+    while (!heap_is_empty(&open)) {
+        FORM_GRAPH current_idx = heap_pop(&open, nodes);
+        Node* current = &nodes[current_idx];
+
+        if (current_idx == goal_idx) {
+            found = true;
+            break;
+        }
+        current->state = CLOSED;
+
+        // 圖內的邊 + 接到終點的暫時邊
+        FORM_GRAPH begin = edge_offsets[current_idx];
+        FORM_GRAPH end = edge_offsets[current_idx + 1];
+        bool to_goal = goal_cost[current_idx] != DIST_UNREACHABLE;
+
+        for (FORM_GRAPH e = begin; e < end || to_goal; e++) {
+            FORM_GRAPH n_idx;
+            uint32_t new_g;
+
+            if (e < end) {
+                n_idx = edge_targets[e];
+                new_g = current->g + edge_costs[e];
+            } else {
+                n_idx = goal_idx;
+                new_g = current->g + goal_cost[current_idx];
+                to_goal = false;
+            }
+
+            Node* neighbor = &nodes[n_idx];
+            if (neighbor->state == CLOSED) continue;
+
+            if (neighbor->state != OPEN) {
+                neighbor->g = new_g;
+                neighbor->h = n_idx == goal_idx
+                    ? 0
+                    : calc_h(node_xy[n_idx * 2], node_xy[n_idx * 2 + 1], goal_x, goal_y);
+                neighbor->f = neighbor->g + neighbor->h;
+                neighbor->parent = current_idx;
+                neighbor->state = OPEN;
+                heap_push(&open, nodes, n_idx);
+            }
+            else if (new_g < neighbor->g) {
+                neighbor->g = new_g;
+                neighbor->f = neighbor->g + neighbor->h;
+                neighbor->parent = current_idx;
+                heap_decrease(&open, nodes, n_idx);
+            }
+        }
+    }
+
+    int path_len = -1;
+
+    if (found) {
+        // 回溯 (不含虛擬終點)
+        path_len = 0;
+        for (int32_t idx = nodes[goal_idx].parent; idx != NO_PARENT; idx = nodes[idx].parent) {
+            path_len++;
+        }
+
+        if (path_len > out_capacity) {
+            path_len = PATH_NO_SPACE;
+        } else {
+            int32_t idx = nodes[goal_idx].parent;
+            for (int i = path_len - 1; i >= 0; i--) {
+                out_nodes[i] = (FORM_GRAPH)idx;
+                idx = nodes[idx].parent;
+            }
+        }
+    }
+
+    free(nodes);
+    free(goal_cost);
+    free(open.items);
+    return path_len;
+}
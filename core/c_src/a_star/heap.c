@@ -0,0 +1,79 @@
+#include <stdbool.h>
+#include "c_inc/a_star/heap.h"
+
+
+// 節點優先順序：F 小優先，F 相同時 H 小 (離終點近) 優先，再相同則比索引
+// 全序比較，確保不論 heap 內部排列如何，彈出順序都是確定的
+static bool node_less(const Node* nodes, uint32_t a, uint32_t b) {
+    if (nodes[a].f != nodes[b].f) return nodes[a].f < nodes[b].f;
+    if (nodes[a].h != nodes[b].h) return nodes[a].h < nodes[b].h;
+    return a < b;
+}
+
+// 將 pos 位置放入 node_idx，並同步更新節點上記錄的 heap 位置
+static void heap_place(OpenList* open, Node* nodes, uint32_t pos, uint32_t node_idx) {
+    open->items[pos] = node_idx;
+    nodes[node_idx].heap_index = pos;
+}
+
+// 往上浮：子節點比父節點小就交換
+static void sift_up(OpenList* open, Node* nodes, uint32_t pos) {
+    uint32_t node_idx = open->items[pos];
+
+    while (pos > 0) {
+        uint32_t parent = (pos - 1) / 2;
+        if (!node_less(nodes, node_idx, open->items[parent])) break;
+
+        heap_place(open, nodes, pos, open->items[parent]);
+        pos = parent;
+    }
+    heap_place(open, nodes, pos, node_idx);
+}
+
+// 往下沉：與較小的子節點交換
+static void sift_down(OpenList* open, Node* nodes, uint32_t pos) {
+    uint32_t node_idx = open->items[pos];
+
+    while (true) {
+        uint32_t child = pos * 2 + 1;
+        if (child >= open->size) break;
+
+        if (child + 1 < open->size && node_less(nodes, open->items[child + 1], open->items[child])) {
+            child++;
+        }
+        if (!node_less(nodes, open->items[child], node_idx)) break;
+
+        heap_place(open, nodes, pos, open->items[child]);
+        pos = child;
+    }
+    heap_place(open, nodes, pos, node_idx);
+}
+
+// 加入新節點
+void heap_push(OpenList* open, Node* nodes, uint32_t node_idx) {
+    heap_place(open, nodes, open->size, node_idx);
+    open->size++;
+    sift_up(open, nodes, open->size - 1);
+}
+
+// 取出 F 最小的節點
+uint32_t heap_pop(OpenList* open, Node* nodes) {
+    uint32_t top = open->items[0];
+    nodes[top].heap_index = NOT_IN_HEAP;
+
+    open->size--;
+    if (open->size > 0) {
+        heap_place(open, nodes, 0, open->items[open->size]);
+        sift_down(open, nodes, 0);
+    }
+    return top;
+}
+
+// 節點的 F 值變小後 (找到更短的路)，重新調整位置 (decrease-key)
+void heap_decrease(OpenList* open, Node* nodes, uint32_t node_idx) {
+    sift_up(open, nodes, nodes[node_idx].heap_index);
+}
+
+bool heap_is_empty(const OpenList* open) {
+    return open->size == 0;
+}
@@ -0,0 +1,249 @@
+#include <stdbool.h>
+#include <stdlib.h>
+#include "c_inc/a_star/base.h"
+#include "c_inc/a_star/context.h"
+#include "c_inc/a_star/heap.h"
+#include "c_inc/a_star/jps.h"
+
+
+
+// --- Jump Point Search ---
+// 與 A* 相同的代價與防切角規則 (斜走時兩個直向鄰居都必須是路)
+// 在空曠地圖上只展開 "跳點"，中間的格子由 ctx_write_path 補齊
+
+// 搜尋範圍內且可走
+static bool walkable(const AStarContext* ctx, const Bounds* bounds, FORM_POINT x, FORM_POINT y) {
+    return in_bounds(x, y, bounds) && ctx->map[get_index(x, y, ctx->width)] == 0;
+}
+
+// 範圍內且為牆 (範圍外也視為牆)
+static bool blocked_at(const FORM_MAP* row, FORM_POINT x, const Bounds* bounds) {
+    return x < bounds->x0 || x >= bounds->x1 || row[x] != 0;
+}
+
+// 橫向跳躍：沿 row 往 dx 方向逐格掃描，直接以列指標存取 (空曠地圖上大部分時間都在這裡)
+// 回傳值: 跳點的 1D 索引 (沒有跳點回傳 -1)
+static int32_t jump_horizontal(
+    const AStarContext* ctx, const Bounds* bounds,
+    FORM_POINT x, FORM_POINT y, int dx,
+    FORM_POINT end_x, FORM_POINT end_y
+) {
+    if (y < bounds->y0 || y >= bounds->y1) return -1;
+
+    FORM_W_H width = ctx->width;
+    const FORM_MAP* row = ctx->map + y * width;
+    const FORM_MAP* up = y - 1 >= bounds->y0 ? row - width : NULL;
+    const FORM_MAP* down = y + 1 < bounds->y1 ? row + width : NULL;
+
+    for (; !blocked_at(row, x, bounds); x += dx) {
+        if (x == end_x && y == end_y) return get_index(x, y, width);
+
+        // 側邊變成可走 (後方被擋住) 代表有強制鄰居
+        if (up && up[x] == 0 && blocked_at(up, x - dx, bounds)) return get_index(x, y, width);
+        if (down && down[x] == 0 && blocked_at(down, x - dx, bounds)) return get_index(x, y, width);
+    }
+    return -1;
+}
+
+// 縱向跳躍
+static int32_t jump_vertical(
+    const AStarContext* ctx, const Bounds* bounds,
+    FORM_POINT x, FORM_POINT y, int dy,
+    FORM_POINT end_x, FORM_POINT end_y
+) {
+    if (x < bounds->x0 || x >= bounds->x1) return -1;
+
+    FORM_W_H width = ctx->width;
+    const FORM_MAP* map = ctx->map;
+    bool has_left = x - 1 >= bounds->x0;
+    bool has_right = x + 1 < bounds->x1;
+
+    for (; y >= bounds->y0 && y < bounds->y1; y += dy) {
+        const FORM_MAP* row = map + y * width;
+        if (row[x] != 0) return -1;
+        if (x == end_x && y == end_y) return get_index(x, y, width);
+
+        bool back_inside = y - dy >= bounds->y0 && y - dy < bounds->y1;
+        const FORM_MAP* back = row - dy * width;
+        if (has_left && row[x - 1] == 0 && (!back_inside || back[x - 1] != 0)) return get_index(x, y, width);
+        if (has_right && row[x + 1] == 0 && (!back_inside || back[x + 1] != 0)) return get_index(x, y, width);
+    }
+    return -1;
+}
+
+// 從 (x, y) 沿 (dx, dy) 方向跳躍 ((x, y) 是剛踏入的格子)
+// 回傳值: 跳點的 1D 索引 (沒有跳點回傳 -1)
+static int32_t jump(
+    const AStarContext* ctx, const Bounds* bounds,
+    FORM_POINT x, FORM_POINT y, int dx, int dy,
+    FORM_POINT end_x, FORM_POINT end_y
+) {
+    if (dy == 0) return jump_horizontal(ctx, bounds, x, y, dx, end_x, end_y);
+    if (dx == 0) return jump_vertical(ctx, bounds, x, y, dy, end_x, end_y);
+
+    while (walkable(ctx, bounds, x, y)) {
+        if (x == end_x && y == end_y) return get_index(x, y, ctx->width);
+
+        // 斜向：兩個直向分支任一找到跳點，這格就是跳點
+        if (jump_horizontal(ctx, bounds, x + dx, y, dx, end_x, end_y) != -1 ||
+            jump_vertical(ctx, bounds, x, y + dy, dy, end_x, end_y) != -1)
+        {
+            return get_index(x, y, ctx->width);
+        }
+
+        // 防切角：繼續斜走前兩個直向鄰居都必須是路
+        if (!walkable(ctx, bounds, x + dx, y) || !walkable(ctx, bounds, x, y + dy)) return -1;
+
+        x += dx;
+        y += dy;
+    }
+    return -1;
+}
+
+// 依父節點方向修剪鄰居 (沒有父節點時 8 方向都要試)
+// 回傳值: 寫入 out_dirs 的方向數量
+static int prune_dirs(
+    const AStarContext* ctx, const Bounds* bounds,
+    FORM_POINT x, FORM_POINT y, int32_t parent,
+    int8_t out_dirs[8][2]
+) {
+    int count = 0;
+
+    if (parent == NO_PARENT) {
+        for (uint8_t i = 0; i < 8; i++) {
+            int dx = dirs[i][0], dy = dirs[i][1];
+            if (dx != 0 && dy != 0 &&
+                (!walkable(ctx, bounds, x + dx, y) || !walkable(ctx, bounds, x, y + dy)))
+            {
+                continue;
+            }
+            out_dirs[count][0] = dx;
+            out_dirs[count][1] = dy;
+            count++;
+        }
+        return count;
+    }
+
+    FORM_POINT px = parent % ctx->width;
+    FORM_POINT py = parent / ctx->width;
+    int dx = (x > px) - (x < px);
+    int dy = (y > py) - (y < py);
+
+    #define PUSH_DIR(a, b) do { out_dirs[count][0] = (a); out_dirs[count][1] = (b); count++; } while (0)
+
+    if (dx != 0 && dy != 0) {
+        bool vertical = walkable(ctx, bounds, x, y + dy);
+        bool horizontal = walkable(ctx, bounds, x + dx, y);
+        if (vertical) PUSH_DIR(0, dy);
+        if (horizontal) PUSH_DIR(dx, 0);
+        if (vertical && horizontal) PUSH_DIR(dx, dy);
+    }
+    else if (dx != 0) {
+        bool next = walkable(ctx, bounds, x + dx, y);
+        bool up = walkable(ctx, bounds, x, y - 1);
+        bool down = walkable(ctx, bounds, x, y + 1);
+        if (next) {
+            PUSH_DIR(dx, 0);
+            if (up) PUSH_DIR(dx, -1);
+            if (down) PUSH_DIR(dx, 1);
+        }
+        if (up) PUSH_DIR(0, -1);
+        if (down) PUSH_DIR(0, 1);
+    }
+    else {
+        bool next = walkable(ctx, bounds, x, y + dy);
+        bool left = walkable(ctx, bounds, x - 1, y);
+        bool right = walkable(ctx, bounds, x + 1, y);
+        if (next) {
+            PUSH_DIR(0, dy);
+            if (left) PUSH_DIR(-1, dy);
+            if (right) PUSH_DIR(1, dy);
+        }
+        if (left) PUSH_DIR(-1, 0);
+        if (right) PUSH_DIR(1, 0);
+    }
+
+    #undef PUSH_DIR
+    return count;
+}
+
+// 回傳值: 路徑的節點數量 (若無路徑回傳 -1，out_buffer 不夠大回傳 PATH_NO_SPACE)
+int search_jps(
+    AStarContext* ctx,
+    FORM_POINT start_x  , FORM_POINT start_y,
+    FORM_POINT end_x    , FORM_POINT end_y,
+    const Bounds* bounds,
+    FORM_OUT_BUFFER* out_buffer, FORM_LEN out_capacity
+) {
+    FORM_W_H width = ctx->width;
+    Node* nodes = ctx->nodes;
+    OpenList* open = &ctx->open;
+
+    // 起點超出範圍 / 終點不可走，不需要搜尋 (與 A* 相同，起點本身可以是牆)
+    if (!in_bounds(start_x, start_y, bounds) || !in_bounds(end_x, end_y, bounds)) return -1;
+    if (!walkable(ctx, bounds, end_x, end_y)) return -1;
+
+    ctx_begin_search(ctx);
+
+    FORM_LEN start_idx = get_index(start_x, start_y, width);
+    FORM_LEN end_idx = get_index(end_x, end_y, width);
+    Node* start = ctx_node(ctx, start_idx);
+    start->g = 0;
+    start->h = calc_h(start_x, start_y, end_x, end_y);
+    start->f = start->g + start->h;
+    start->state = OPEN;
+    heap_push(open, nodes, start_idx);
+
+    bool found = false;
+    int8_t next_dirs[8][2];
+
+    while (!heap_is_empty(open)) {
+        FORM_LEN current_idx = heap_pop(open, nodes);
+        Node* current = &nodes[current_idx];
+
+        ctx->expanded++;
+
+        if (current_idx == end_idx) {
+            found = true;
+            break;
+        }
+        current->state = CLOSED;
+
+        FORM_POINT x = current_idx % width;
+        FORM_POINT y = current_idx / width;
+        int count = prune_dirs(ctx, bounds, x, y, current->parent, next_dirs);
+
+        for (int i = 0; i < count; i++) {
+            int dx = next_dirs[i][0], dy = next_dirs[i][1];
+            int32_t jp_idx = jump(ctx, bounds, x + dx, y + dy, dx, dy, end_x, end_y);
+            if (jp_idx == -1) continue;
+
+            Node* neighbor = ctx_node(ctx, jp_idx);
+            if (neighbor->state == CLOSED) continue;
+
+            // 跳點與目前節點在同一條直線 / 斜線上，代價等於八方向距離
+            FORM_POINT jx = jp_idx % width;
+            FORM_POINT jy = jp_idx / width;
+            uint32_t new_g = current->g + calc_h(x, y, jx, jy);
+
+            if (neighbor->state != OPEN) {
+                neighbor->g = new_g;
+                neighbor->h = calc_h(jx, jy, end_x, end_y);
+                neighbor->f = neighbor->g + neighbor->h;
+                neighbor->parent = current_idx;
+                neighbor->state = OPEN;
+                heap_push(open, nodes, jp_idx);
+            }
+            else if (new_g < neighbor->g) {
+                neighbor->g = new_g;
+                neighbor->f = neighbor->g + neighbor->h;
+                neighbor->parent = current_idx;
+                heap_decrease(open, nodes, jp_idx);
+            }
+        }
+    }
+
+    if (!found) return -1;
+
+    return ctx_write_path(ctx, end_idx, out_buffer, out_capacity);
+}
@@ -0,0 +1,83 @@
+#include <stdlib.h>
+#include "c_inc/a_star/landmark.h"
+#include "c_inc/a_star/main.h"
+#include "c_inc/debug.h"
+
+
+
+// --- 地標 (ALT heuristic) ---
+// 對任一地標 L，三角不等式給出 d(n, goal) >= |d(L, n) - d(L, goal)|
+// 多終點時取 n 到 [min d(L, goal), max d(L, goal)] 區間的距離 (對每個終點都不會高估)
+// 這個下界與 calc_h 取較大值，仍然滿足一致性 (兩者都是一致的 heuristic)
+// 距離表由 Python 端以流場 (Dijkstra) 計算，地圖只新增牆壁時距離只會變長，下界仍然成立
+
+// 設定地標距離表
+// tables: count 張距離表依序排列 (每張 width * height，與 astar_flow_field 的 out_dist 相同)
+// count 為 0 (或 tables 為 NULL) 代表不使用地標，超過 LANDMARK_MAX 的部分會被忽略
+// 回傳值: 實際使用的地標數量 (記憶體不足回傳 -1，此時不使用地標)
+int astar_set_landmarks(AStarContext* ctx, const FORM_DIST* tables, int count) {
+    if (!ctx) return -1;
+
+    if (!tables || count <= 0) {
+        ctx->landmark_count = 0;
+        return 0;
+    }
+    if (count > LANDMARK_MAX) count = LANDMARK_MAX;
+
+    FORM_LEN total = ctx->width * ctx->height;
+    if ((uint32_t)count != ctx->landmark_count || !ctx->landmarks) {
+        free(ctx->landmarks);
+        ctx->landmark_count = 0;
+        ctx->landmarks = (FORM_DIST*)malloc((size_t)total * count * sizeof(FORM_DIST));
+        if (!ctx->landmarks) {
+            DBG_ERR("Insufficient memory");
+            return -1;
+        }
+    }
+
+    // 改成每格連續存放，計算 heuristic 時只讀一段連續記憶體
+    for (int k = 0; k < count; k++) {
+        const FORM_DIST* table = &tables[(size_t)k * total];
+        for (FORM_LEN idx = 0; idx < total; idx++) {
+            ctx->landmarks[(size_t)idx * count + k] = table[idx];
+        }
+    }
+    ctx->landmark_count = count;
+    return count;
+}
+
+// 開始收集終點 (每個地標的範圍先設成空的)
+void landmark_goal_reset(const AStarContext* ctx, LandmarkGoal* goal) {
+    for (uint32_t k = 0; k < ctx->landmark_count; k++) {
+        goal->lo[k] = DIST_UNREACHABLE;
+        goal->hi[k] = 0;
+    }
+}
+
+// 加入一個終點 (地標走不到的終點不列入範圍，它與地標不連通，只有同樣走不到地標的格子能抵達)
+void landmark_goal_add(const AStarContext* ctx, LandmarkGoal* goal, FORM_LEN idx) {
+    uint32_t count = ctx->landmark_count;
+    const FORM_DIST* dist = &ctx->landmarks[(size_t)idx * count];
+
+    for (uint32_t k = 0; k < count; k++) {
+        if (dist[k] == DIST_UNREACHABLE) continue;
+        if (dist[k] < goal->lo[k]) goal->lo[k] = dist[k];
+        if (dist[k] > goal->hi[k]) goal->hi[k] = dist[k];
+    }
+}
+
+// idx 到終點的下界 (沒有地標時為 0)
+FORM_LEN landmark_h(const AStarContext* ctx, const LandmarkGoal* goal, FORM_LEN idx) {
+    uint32_t count = ctx->landmark_count;
+    const FORM_DIST* dist = &ctx->landmarks[(size_t)idx * count];
+    FORM_LEN best = 0;
+
+    for (uint32_t k = 0; k < count; k++) {
+        FORM_DIST d = dist[k];
+        if (d == DIST_UNREACHABLE || goal->lo[k] > goal->hi[k]) continue;
+
+        FORM_LEN bound = d < goal->lo[k] ? goal->lo[k] - d : (d > goal->hi[k] ? d - goal->hi[k] : 0);
+        if (bound > best) best = bound;
+    }
+    return best;
+}
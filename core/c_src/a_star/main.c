@@ -1,77 +1,85 @@
 #include <stdbool.h>
 #include <stdlib.h>
 #include "c_inc/a_star/base.h"
+#include "c_inc/a_star/context.h"
+#include "c_inc/a_star/heap.h"
+#include "c_inc/a_star/jps.h"
+#include "c_inc/a_star/landmark.h"
 #include "c_inc/a_star/main.h"
-#include "c_inc/debug.h"
 
 
 
-// --- 通用型 A* 函式 ---
-// 參數說明:
-// map: 地圖數據 (0 = 路, 1 = 牆)
-// width, height: 地圖寬高
-// start_x, start_y: 起點
-// end_x, end_y: 終點
-// out_buffer: 用來存結果的陣列 [x0, y0, x1, y1...]
-// 回傳值: 路徑的節點數量 (若無路徑回傳 -1)
-int solve_astar(
-    const FORM_MAP* map ,
-    FORM_W_H width      , FORM_W_H height,
+// 整張地圖的範圍
+static Bounds full_bounds(const AStarContext* ctx) {
+    Bounds bounds = { 0, 0, ctx->width, ctx->height };
+    return bounds;
+}
+
+// 單一終點的 heuristic：八方向距離，有地標時再與地標下界取較大值
+static FORM_LEN heuristic(
+    const AStarContext* ctx, const LandmarkGoal* goal,
+    FORM_POINT x, FORM_POINT y,
+    FORM_POINT end_x, FORM_POINT end_y
+) {
+    FORM_LEN h = calc_h(x, y, end_x, end_y);
+    if (!ctx->landmark_count) return h;
+
+    FORM_LEN bound = landmark_h(ctx, goal, get_index(x, y, ctx->width));
+    return bound > h ? bound : h;
+}
+
+// --- A* 核心 ---
+// 使用 Context 的節點池與 Open List 進行搜尋
+// bounds: 只在此範圍內搜尋 (起終點需在範圍內)
+// out_capacity: out_buffer 可容納的點數
+// 回傳值: 路徑的節點數量 (若無路徑回傳 -1，out_buffer 不夠大回傳 PATH_NO_SPACE)
+static int search_astar(
+    AStarContext* ctx,
     FORM_POINT start_x  , FORM_POINT start_y,
     FORM_POINT end_x    , FORM_POINT end_y,
-    FORM_OUT_BUFFER* out_buffer
+    const Bounds* bounds,
+    FORM_OUT_BUFFER* out_buffer, FORM_LEN out_capacity
 ) {
-    // 動態配置 Node 陣列
-    Node* nodes = (Node*)malloc(width * height * sizeof(Node));
-    if (!nodes){
-        DBG_ERR("Insufficient memory");
-        return -1;
-    }
+    FORM_W_H width = ctx->width;
+    FORM_W_H height = ctx->height;
+    const FORM_MAP* map = ctx->map;
+    Node* nodes = ctx->nodes;
+    OpenList* open = &ctx->open;
 
-    // 初始化
-    for (uint32_t i = 0; i < width * height; i++) {
-        nodes[i].state = NONE;
-        nodes[i].parent = (Point){-1, -1};
-    }
+    // 起點超出範圍 / 終點不可走，不需要搜尋
+    if (!in_bounds(start_x, start_y, bounds) || !in_bounds(end_x, end_y, bounds)) return -1;
+    if (!is_valid(end_x, end_y, width, height, map)) return -1;
+
+    ctx_begin_search(ctx);
 
     // 設定起點
     FORM_LEN start_idx = get_index(start_x, start_y, width);
-    nodes[start_idx].g = 0;
-    nodes[start_idx].h = calc_h(start_x, start_y, end_x, end_y);
-    nodes[start_idx].f = nodes[start_idx].g + nodes[start_idx].h;
-    nodes[start_idx].state = OPEN;
+    FORM_LEN end_idx = get_index(end_x, end_y, width);
+
+    // 有地標時 heuristic 取 calc_h 與地標下界的較大值
+    LandmarkGoal goal;
+    landmark_goal_reset(ctx, &goal);
+    if (ctx->landmark_count) landmark_goal_add(ctx, &goal, end_idx);
+
+    Node* start = ctx_node(ctx, start_idx);
+    start->g = 0;
+    start->h = heuristic(ctx, &goal, start_x, start_y, end_x, end_y);
+    start->f = start->g + start->h;
+    start->state = OPEN;
+    heap_push(open, nodes, start_idx);
 
     bool found = false;
 
-    while (true) {
-        // 尋找 Open List 中 F 最小的節點
-        int min_f = 999999999; // MAX_INT
-        Node* current = NULL;
-        Point current_pos = {-1, -1};
-        FORM_POINT current_idx = -1;
-
-        for (FORM_POINT y = 0; y < height; y++) {
-            for (FORM_POINT x = 0; x < width; x++) {
-                FORM_POINT idx = get_index(x, y, width);
-                if (nodes[idx].state == OPEN) {
-                    if (nodes[idx].f < min_f) {
-                        min_f = nodes[idx].f;
-                        current = &nodes[idx];
-                        current_pos = (Point){x, y};
-                        current_idx = idx;
-                    }
-                }
-            }
-        }
+    while (!heap_is_empty(open)) {
+        // 從 Open List 取出 F 最小的節點 (O(log N))
+        FORM_LEN current_idx = heap_pop(open, nodes);
+        Node* current = &nodes[current_idx];
 
-        if (current == NULL) {
-            DBG_ERR("There is no road");
-            free(nodes);
-            return -1;
-        }
+        ctx->expanded++;
+        Point current_pos = { current_idx % width, current_idx / width };
 
         // 判斷是否到終點
-        if (current_pos.x == end_x && current_pos.y == end_y) {
+        if (current_idx == end_idx) {
             found = true;
             break;
         }
@@ -79,12 +87,6 @@ int solve_astar(
         // 關閉當前節點
         current->state = CLOSED;
 
-        // 檢查鄰居
-        int8_t dirs[8][2] = {
-            {0, -1}, {0, 1}, {-1, 0}, {1, 0},   // 直線
-            {-1, -1}, {1, -1}, {-1, 1}, {1, 1}  // 斜向
-        };
-
         for (uint8_t i = 0; i < 8; i++) {
             FORM_POINT new_x = current_pos.x + dirs[i][0];
             FORM_POINT new_y = current_pos.y + dirs[i][1];
@@ -94,10 +96,12 @@ int solve_astar(
             int movement_cost = is_diagonal ? COST_DIAGONAL : COST_STRAIGHT;
 
             // 基本檢查
+            if (!in_bounds(new_x, new_y, bounds)) continue;
             if (!is_valid(new_x, new_y, width, height, map)) continue;
 
             FORM_POINT n_idx = get_index(new_x, new_y, width);
-            if (nodes[n_idx].state == CLOSED) continue;
+            Node* neighbor = ctx_node(ctx, n_idx);
+            if (neighbor->state == CLOSED) continue;
 
             // 防切角檢查
             if (is_diagonal) {
@@ -109,49 +113,352 @@ int solve_astar(
             }
 
             // 計算 G 值
-            int new_g = current->g + movement_cost;
-
-            if (nodes[n_idx].state != OPEN || new_g < nodes[n_idx].g)
-            {
-                nodes[n_idx].g = new_g;
-                nodes[n_idx].h = calc_h(new_x, new_y, end_x, end_y);
-                nodes[n_idx].f = nodes[n_idx].g + nodes[n_idx].h;
-                nodes[n_idx].parent = current_pos;
-                nodes[n_idx].state = OPEN;
+            uint32_t new_g = current->g + movement_cost;
+
+            if (neighbor->state != OPEN) {
+                neighbor->g = new_g;
+                neighbor->h = heuristic(ctx, &goal, new_x, new_y, end_x, end_y);
+                neighbor->f = neighbor->g + neighbor->h;
+                neighbor->parent = current_idx;
+                neighbor->state = OPEN;
+                heap_push(open, nodes, n_idx);
+            }
+            else if (new_g < neighbor->g) {
+                // 已在 Open List 中，找到更短的路 -> decrease-key
+                neighbor->g = new_g;
+                neighbor->f = neighbor->g + neighbor->h;
+                neighbor->parent = current_idx;
+                heap_decrease(open, nodes, n_idx);
             }
         }
     }
 
-    // 回溯路徑
-    FORM_LEN path_len = 0;
-    if (found) {
-        // 先暫存路徑 (這是倒序的: End -> Start)
-        Point* temp_path = (Point*)malloc(width * height * sizeof(Point));
-        Point p = {end_x, end_y};
-
-        while (p.x != -1 && p.y != -1) {
-            temp_path[path_len++] = p;
-            FORM_LEN idx = get_index(p.x, p.y, width);
-            p = nodes[idx].parent;
-
-            // 安全檢查：若回到起點的前一個 (-1, -1) 則停止
-            if (p.x == -1 && p.y == -1) break;
-            // 若路徑過長超過 buffer
-            if (path_len >= (width * height / 2)) break;
+    // 走不到是正常結果，不輸出 log (批次與背景執行緒會大量呼叫，LOG_TIME 的 localtime 也不是 thread-safe)
+    if (!found) return -1;
+
+    return ctx_write_path(ctx, end_idx, out_buffer, out_capacity);
+}
+
+// 依 Context 選擇的演算法搜尋
+static int search_path(
+    AStarContext* ctx,
+    FORM_POINT start_x  , FORM_POINT start_y,
+    FORM_POINT end_x    , FORM_POINT end_y,
+    const Bounds* bounds,
+    FORM_OUT_BUFFER* out_buffer, FORM_LEN out_capacity
+) {
+    if (ctx->algorithm == ALGO_JPS) {
+        return search_jps(ctx, start_x, start_y, end_x, end_y, bounds, out_buffer, out_capacity);
+    }
+    return search_astar(ctx, start_x, start_y, end_x, end_y, bounds, out_buffer, out_capacity);
+}
+
+
+// 到終點包圍盒的距離 (點到凸集合的距離仍滿足三角不等式，所以 heuristic 保持一致性)
+// 有地標時再與地標下界 (終點集合的距離範圍) 取較大值
+static FORM_LEN calc_h_box(const AStarContext* ctx, const LandmarkGoal* goal, FORM_POINT x, FORM_POINT y, const Bounds* box) {
+    FORM_POINT cx = x < box->x0 ? box->x0 : (x > box->x1 ? box->x1 : x);
+    FORM_POINT cy = y < box->y0 ? box->y0 : (y > box->y1 ? box->y1 : y);
+    FORM_LEN h = calc_h(x, y, cx, cy);
+    if (!ctx->landmark_count) return h;
+
+    FORM_LEN bound = landmark_h(ctx, goal, get_index(x, y, ctx->width));
+    return bound > h ? bound : h;
+}
+
+// --- 多起點 / 多終點 A* ---
+// 所有 starts 同時作為起點 (G = 0)，抵達任一 goal 即停止，找到的是兩組格子之間的最短路徑
+// 例如建築周圍一圈 -> 另一棟建築周圍一圈，不需要先挑出入口
+// heuristic 為到 goals 包圍盒的距離；不論 Context 選擇的演算法，一律使用 A* 展開
+// starts / goals: [x0, y0, x1, y1...] (牆壁或超出地圖的格子會被忽略)
+// max_cost: 代價上限，超過就停止並視為找不到 (DIST_UNREACHABLE 代表不限)
+// out_buffer 為 NULL 時只計算代價 (存入 ctx->last_cost)，不回溯路徑
+// 回傳值: 路徑的節點數量 (若無路徑回傳 -1，out_buffer 不夠大回傳 PATH_NO_SPACE，只算代價時回傳 0)
+static int search_multi(
+    AStarContext* ctx,
+    const FORM_POINT* starts, int start_count,
+    const FORM_POINT* goals, int goal_count,
+    uint32_t max_cost,
+    FORM_OUT_BUFFER* out_buffer, FORM_LEN out_capacity
+) {
+    FORM_W_H width = ctx->width;
+    FORM_W_H height = ctx->height;
+    const FORM_MAP* map = ctx->map;
+    Node* nodes = ctx->nodes;
+    OpenList* open = &ctx->open;
+
+    ctx_begin_search(ctx);
+
+    // 標記終點並計算包圍盒 ([x0, x1] x [y0, y1]，含邊界) 與地標距離範圍
+    Bounds box = { width, height, -1, -1 };
+    LandmarkGoal goal;
+    landmark_goal_reset(ctx, &goal);
+    for (int i = 0; i < goal_count; i++) {
+        FORM_POINT x = goals[i * 2];
+        FORM_POINT y = goals[i * 2 + 1];
+        if (!is_valid(x, y, width, height, map)) continue;
+
+        FORM_LEN idx = get_index(x, y, width);
+        ctx->goal_mark[idx] = ctx->search_id;
+        if (ctx->landmark_count) landmark_goal_add(ctx, &goal, idx);
+        if (x < box.x0) box.x0 = x;
+        if (y < box.y0) box.y0 = y;
+        if (x > box.x1) box.x1 = x;
+        if (y > box.y1) box.y1 = y;
+    }
+    if (box.x1 < 0) return -1;
+
+    for (int i = 0; i < start_count; i++) {
+        FORM_POINT x = starts[i * 2];
+        FORM_POINT y = starts[i * 2 + 1];
+        if (!is_valid(x, y, width, height, map)) continue;
+
+        FORM_LEN idx = get_index(x, y, width);
+        Node* node = ctx_node(ctx, idx);
+        if (node->state != NONE) continue;
+
+        node->g = 0;
+        node->h = calc_h_box(ctx, &goal, x, y, &box);
+        node->f = node->h;
+        node->state = OPEN;
+        heap_push(open, nodes, idx);
+    }
+
+    bool found = false;
+    FORM_LEN end_idx = 0;
+
+    while (!heap_is_empty(open)) {
+        FORM_LEN current_idx = heap_pop(open, nodes);
+        Node* current = &nodes[current_idx];
+
+        // F 是路徑代價的下界，超過上限代表上限內不可能有路徑
+        if (current->f > max_cost) break;
+
+        ctx->expanded++;
+        Point current_pos = { current_idx % width, current_idx / width };
+
+        if (ctx->goal_mark[current_idx] == ctx->search_id) {
+            found = true;
+            end_idx = current_idx;
+            break;
         }
 
-        // 將路徑反轉存入 out_buffer (變成 Start -> End)
-        // 格式為: [x0, y0, x1, y1, x2, y2...]
-        for (int i = 0; i < path_len; i++) {
-            out_buffer[i * 2] = temp_path[path_len - 1 - i].x;
-            out_buffer[i * 2 + 1] = temp_path[path_len - 1 - i].y;
+        current->state = CLOSED;
+
+        for (uint8_t i = 0; i < 8; i++) {
+            FORM_POINT new_x = current_pos.x + dirs[i][0];
+            FORM_POINT new_y = current_pos.y + dirs[i][1];
+
+            bool is_diagonal = (dirs[i][0] != 0 && dirs[i][1] != 0);
+            int movement_cost = is_diagonal ? COST_DIAGONAL : COST_STRAIGHT;
+
+            if (!is_valid(new_x, new_y, width, height, map)) continue;
+
+            FORM_POINT n_idx = get_index(new_x, new_y, width);
+            Node* neighbor = ctx_node(ctx, n_idx);
+            if (neighbor->state == CLOSED) continue;
+
+            // 防切角檢查
+            if (is_diagonal) {
+                if (!is_valid(current_pos.x + dirs[i][0], current_pos.y, width, height, map) ||
+                    !is_valid(current_pos.x, current_pos.y + dirs[i][1], width, height, map))
+                {
+                    continue;
+                }
+            }
+
+            uint32_t new_g = current->g + movement_cost;
+
+            if (neighbor->state != OPEN) {
+                neighbor->g = new_g;
+                neighbor->h = calc_h_box(ctx, &goal, new_x, new_y, &box);
+                neighbor->f = neighbor->g + neighbor->h;
+                neighbor->parent = current_idx;
+                neighbor->state = OPEN;
+                heap_push(open, nodes, n_idx);
+            }
+            else if (new_g < neighbor->g) {
+                neighbor->g = new_g;
+                neighbor->f = neighbor->g + neighbor->h;
+                neighbor->parent = current_idx;
+                heap_decrease(open, nodes, n_idx);
+            }
         }
-        free(temp_path);
-    } else {
-        DBG_NOR("Could not find the way");
-        path_len = -1;
     }
 
-    free(nodes);
+    if (!found) return -1;
+
+    // 只要代價時不回溯路徑
+    ctx->last_cost = nodes[end_idx].g;
+    if (!out_buffer) return 0;
+
+    return ctx_write_path(ctx, end_idx, out_buffer, out_capacity);
+}
+
+
+// --- 通用型 A* 函式 (單次呼叫，內部建立暫時的 Context) ---
+// 參數說明:
+// map: 地圖數據 (0 = 路, 1 = 牆)
+// width, height: 地圖寬高
+// start_x, start_y: 起點
+// end_x, end_y: 終點
+// out_buffer: 用來存結果的陣列 [x0, y0, x1, y1...]
+// 回傳值: 路徑的節點數量 (若無路徑回傳 -1)
+int solve_astar(
+    const FORM_MAP* map ,
+    FORM_W_H width      , FORM_W_H height,
+    FORM_POINT start_x  , FORM_POINT start_y,
+    FORM_POINT end_x    , FORM_POINT end_y,
+    FORM_OUT_BUFFER* out_buffer
+) {
+    AStarContext* ctx = astar_create(width, height);
+    if (!ctx) return -1;
+
+    astar_load_map(ctx, map);
+    Bounds bounds = full_bounds(ctx);
+    int path_len = search_path(ctx, start_x, start_y, end_x, end_y, &bounds, out_buffer, width * height);
+
+    astar_destroy(ctx);
     return path_len;
 }
+
+// --- 常駐 Context 版 A* ---
+// ctx: astar_create 建立的 Context (地圖由 astar_load_map / astar_set_cell 維護)
+// out_buffer: 至少 width * height * 2 的空間
+// 回傳值: 路徑的節點數量 (若無路徑回傳 -1)
+int astar_solve(
+    AStarContext* ctx,
+    FORM_POINT start_x  , FORM_POINT start_y,
+    FORM_POINT end_x    , FORM_POINT end_y,
+    FORM_OUT_BUFFER* out_buffer
+) {
+    if (!ctx) return -1;
+
+    Bounds bounds = full_bounds(ctx);
+    return search_path(ctx, start_x, start_y, end_x, end_y, &bounds, out_buffer, ctx->width * ctx->height);
+}
+
+// --- 批次 A* ---
+// 一次呼叫解多組起終點，所有路徑依序緊密排在同一個 out_buffer
+// queries: [sx0, sy0, ex0, ey0, sx1, sy1, ex1, ey1...]
+// count: 查詢數量
+// out_buffer: 路徑輸出 [x, y, x, y...]，out_capacity 為可容納的點數
+// out_lengths: 每組查詢的路徑節點數量 (無路徑為 -1)，路徑 i 緊接在路徑 i-1 之後
+// 回傳值: 實際處理完的查詢數量 (buffer 不夠時會提早停止，呼叫端可把剩下的再送一次)
+int astar_solve_batch(
+    AStarContext* ctx,
+    const FORM_POINT* queries, int count,
+    FORM_OUT_BUFFER* out_buffer, FORM_LEN out_capacity,
+    int32_t* out_lengths
+) {
+    if (!ctx) return 0;
+
+    Bounds bounds = full_bounds(ctx);
+    FORM_LEN used = 0;
+    for (int i = 0; i < count; i++) {
+        const FORM_POINT* q = &queries[i * 4];
+        int path_len = search_path(
+            ctx,
+            q[0], q[1], q[2], q[3],
+            &bounds,
+            &out_buffer[used * 2], out_capacity - used
+        );
+
+        // 剩下的空間放不下這條路徑
+        if (path_len == PATH_NO_SPACE) return i;
+
+        out_lengths[i] = path_len;
+        if (path_len > 0) used += path_len;
+    }
+    return count;
+}
+
+// --- 限定範圍的批次 A* ---
+// 與 astar_solve_batch 相同，但每組查詢只在自己的矩形範圍內搜尋 (給階層式尋路的區塊內搜尋用)
+// queries: [sx, sy, ex, ey, bx, by, bw, bh, ...] (範圍超出地圖的部分會被裁掉)
+int astar_solve_batch_bounded(
+    AStarContext* ctx,
+    const FORM_POINT* queries, int count,
+    FORM_OUT_BUFFER* out_buffer, FORM_LEN out_capacity,
+    int32_t* out_lengths
+) {
+    if (!ctx) return 0;
+
+    FORM_LEN used = 0;
+    for (int i = 0; i < count; i++) {
+        const FORM_POINT* q = &queries[i * 8];
+        Bounds bounds = {
+            q[4] < 0 ? 0 : q[4],
+            q[5] < 0 ? 0 : q[5],
+            q[4] + q[6] > ctx->width ? ctx->width : q[4] + q[6],
+            q[5] + q[7] > ctx->height ? ctx->height : q[5] + q[7],
+        };
+        int path_len = search_path(
+            ctx,
+            q[0], q[1], q[2], q[3],
+            &bounds,
+            &out_buffer[used * 2], out_capacity - used
+        );
+
+        if (path_len == PATH_NO_SPACE) return i;
+
+        out_lengths[i] = path_len;
+        if (path_len > 0) used += path_len;
+    }
+    return count;
+}
+
+// --- 多起點 / 多終點的批次 A* ---
+// cells: 所有查詢共用的格子 [x0, y0, x1, y1...]
+// queries: [start_offset, start_count, goal_offset, goal_count, ...] (以格子為單位索引 cells)
+// 同一棟建築的周圍一圈只需要放進 cells 一次，多組查詢可以重複引用
+// out_buffer / out_lengths / 回傳值與 astar_solve_batch 相同
+int astar_solve_multi_batch(
+    AStarContext* ctx,
+    const FORM_POINT* cells,
+    const FORM_POINT* queries, int count,
+    FORM_OUT_BUFFER* out_buffer, FORM_LEN out_capacity,
+    int32_t* out_lengths
+) {
+    if (!ctx) return 0;
+
+    FORM_LEN used = 0;
+    for (int i = 0; i < count; i++) {
+        const FORM_POINT* q = &queries[i * 4];
+        int path_len = search_multi(
+            ctx,
+            &cells[q[0] * 2], q[1],
+            &cells[q[2] * 2], q[3],
+            DIST_UNREACHABLE,
+            &out_buffer[used * 2], out_capacity - used
+        );
+
+        if (path_len == PATH_NO_SPACE) return i;
+
+        out_lengths[i] = path_len;
+        if (path_len > 0) used += path_len;
+    }
+    return count;
+}
+
+// --- 多起點 / 多終點的批次代價查詢 ---
+// 與 astar_solve_multi_batch 相同的 cells / queries，但只計算代價，不回溯路徑也不寫 out_buffer
+// max_cost: 代價上限 (超過視為找不到，DIST_UNREACHABLE 代表不限)
+// out_costs: 每組查詢的代價 (找不到或超過上限為 DIST_UNREACHABLE)
+// 回傳值: 處理完的查詢數量
+int astar_solve_multi_cost(
+    AStarContext* ctx,
+    const FORM_POINT* cells,
+    const FORM_POINT* queries, int count,
+    uint32_t max_cost,
+    FORM_DIST* out_costs
+) {
+    if (!ctx) return 0;
+
+    for (int i = 0; i < count; i++) {
+        const FORM_POINT* q = &queries[i * 4];
+        search_multi(ctx, &cells[q[0] * 2], q[1], &cells[q[2] * 2], q[3], max_cost, NULL, 0);
+        out_costs[i] = ctx->last_cost;
+    }
+    return count;
+}
@@ -9,6 +9,7 @@ if getattr(sys, 'frozen', False):
 import py.init
 import py.input.mouse.interaction
 import pygame
+from py.a_star.service import path_service
 from py.base import central_mg
 from py.debug import dbg, simple_pro
 from py.input.keyboard.manager import keyboard_mg
@@ -45,5 +46,6 @@ while central_mg.running:
 
     pygame.display.flip()  # 更新整個畫面
 
+path_service.shutdown()
 pygame.quit()
 sys.exit()
@@ -0,0 +1,559 @@
+"""
+[尋路效能量測]
+- 地圖：空地圖、每個 GAME_OBJ_CONFIG 關卡 (障礙物與建築都已畫進 collision_map)、
+  不同解析度的隨機迷宮 / 隨機雜物密度
+- 量測：solve_astar (單次呼叫，每次建立 Context)、常駐 Context 的 astar_solve、
+  逐組 main_a_star 與一次 a_star_mg.find_paths 的批次尋路、整個 execute_dispatch_army
+- 輸出：p50 / p99 延遲、展開節點數、ctypes 呼叫開銷佔比、記憶體，並寫成 JSON (方便比較不同版本)
+執行方式 (於 core 目錄):
+    python -m py.a_star.benchmark [--out result.json] [--quick] [--jps]
+"""
+import argparse
+import array
+import ctypes
+import gc
+import json
+import os
+import platform
+import random
+import time
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass, field
+
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+os.environ.setdefault('SDL_AUDIODRIVER', 'dummy')
+
+import py.init
+from py.a_star.hpa import grid_path_cost, raw_path_cost
+from py.a_star.main import main_a_star
+from py.a_star.manage import ManageAStar, a_star_mg
+from py.a_star.service import path_service
+from py.a_star.variable import LandmarkVar
+from py.debug import dbg
+from py.game.building.preset import GAME_OBJ_CONFIG
+from py.game.context import GameContext
+from py.game.jelly.action import execute_dispatch_army
+from py.game.manager import game_mg
+from py.game.map.connectivity import ComponentLabels
+from py.game.map.variable import GridMapMarking
+from py.trans.a_star import AStarInterface
+from py.trans.base import CInterfaceBase
+from py.trans.variable import ArrayTypecode, FunctionName, SearchAlgorithm, VarConfig
+from py.variable import GridPoint
+
+# 每張地圖抽樣的隨機起終點數量 (固定亂數種子，結果可重現)
+RANDOM_QUERIES = 200
+RANDOM_SEED = 0
+# 合成地圖的解析度 (寬, 高)，quick 模式只跑前兩個
+RESOLUTIONS = ((66, 36), (132, 72), (264, 144))
+# 隨機雜物佔地圖的比例
+CLUTTER_DENSITIES = (0.1, 0.2, 0.3)
+# 迷宮打通的牆比例 (0 = 完美迷宮，只有一條路)
+MAZE_BRAID = 0.1
+# 每個關卡量測的出兵次數上限
+DISPATCH_PAIRS = 60
+# 等待背景尋路交付的上限 (秒)
+DISPATCH_DRAIN_SECONDS = 10.0
+# C 端每格的固定記憶體：Node (28 bytes) + Open List (4) + goal_mark (4) + 地圖 (1)
+CONTEXT_BYTES_PER_CELL = 28 + 4 + 4 + 1
+DEFAULT_OUTPUT = "pathfinding_benchmark.json"
+
+
+@dataclass
+class BenchMap:
+    """ 量測用的地圖 (欄位與 GameWorldMap 相容，可直接交給 ManageAStar) """
+    name: str
+    kind: str
+    width: int
+    height: int
+    collision_map: array.array
+    version: int = 0
+
+    @property
+    def wall_ratio(self) -> float:
+        return sum(1 for v in self.collision_map if v) / len(self.collision_map)
+
+@dataclass
+class LatencyStats:
+    """ 延遲統計 (微秒) """
+    count: int = 0
+    mean_us: float = 0.0
+    p50_us: float = 0.0
+    p99_us: float = 0.0
+    max_us: float = 0.0
+
+    @classmethod
+    def from_ns(cls, samples: list[int]) -> "LatencyStats":
+        if not samples: return cls()
+        ordered = sorted(samples)
+        return cls(
+            count = len(ordered),
+            mean_us = sum(ordered) / len(ordered) / 1000,
+            p50_us = percentile(ordered, 50) / 1000,
+            p99_us = percentile(ordered, 99) / 1000,
+            max_us = ordered[-1] / 1000,
+        )
+
+@dataclass
+class MapResult:
+    name: str
+    kind: str
+    width: int
+    height: int
+    wall_ratio: float
+    queries: int
+    solve_astar: LatencyStats | None
+    astar_solve: LatencyStats
+    expanded_mean: float
+    expanded_p50: float
+    expanded_p99: float
+    # 同一個 Context 上幾乎不做事的查詢 (起點 = 終點) 的中位數，視為一次 ctypes 呼叫的固定成本
+    ctypes_call_us: float
+    ctypes_share: float
+    memory: dict = field(default_factory = dict)
+
+
+def percentile(ordered: list, q: float) -> float:
+    """ 最近排名法 (ordered 需已排序) """
+    if not ordered: return 0.0
+    rank = max(1, -(-len(ordered) * q // 100))
+    return ordered[int(rank) - 1]
+
+@contextmanager
+def timing():
+    """ 計時期間暫停 GC (與 timeit 相同)，避免回收造成的停頓混進 p99 """
+    gc.collect()
+    gc.disable()
+    try:
+        yield
+    finally:
+        gc.enable()
+
+def max_rss_kb() -> int | None:
+    """ 行程最高常駐記憶體 (KB)，不支援的平台回傳 None """
+    try:
+        import resource
+    except ImportError:
+        return None
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # macOS 的單位是 bytes
+    return rss // 1024 if platform.system() == "Darwin" else rss
+
+
+# =========================================================================
+# 地圖產生
+# =========================================================================
+
+def empty_map(width: int, height: int) -> BenchMap:
+    return BenchMap(f"empty_{width}x{height}", "empty", width, height, array.array(ArrayTypecode.A_STAR_MAP.value, [0]) * (width * height))
+
+def maze_map(width: int, height: int, seed: int) -> BenchMap:
+    """ 走廊寬 1 格的迷宮 (深度優先挖通)，再隨機打通 MAZE_BRAID 比例的牆製造迴路 """
+    rng = random.Random(seed)
+    grid = array.array(ArrayTypecode.A_STAR_MAP.value, [GridMapMarking.WALL]) * (width * height)
+    cells_w, cells_h = (width - 1) // 2, (height - 1) // 2
+
+    def carve(col: int, row: int):
+        grid[row * width + col] = GridMapMarking.VACUITY
+
+    start = (0, 0)
+    carve(1, 1)
+    stack = [start]
+    visited = {start}
+    while stack:
+        cx, cy = stack[-1]
+        options = [
+            (cx + dx, cy + dy) for dx, dy in ((0, -1), (0, 1), (-1, 0), (1, 0))
+            if 0 <= cx + dx < cells_w and 0 <= cy + dy < cells_h and (cx + dx, cy + dy) not in visited
+        ]
+        if not options:
+            stack.pop()
+            continue
+
+        nx, ny = rng.choice(options)
+        carve(cx + nx + 1, cy + ny + 1)
+        carve(nx * 2 + 1, ny * 2 + 1)
+        visited.add((nx, ny))
+        stack.append((nx, ny))
+
+    # 內部的牆 (不含外框) 隨機打通
+    for row in range(1, height - 1):
+        for col in range(1, width - 1):
+            if grid[row * width + col] and rng.random() < MAZE_BRAID:
+                carve(col, row)
+
+    return BenchMap(f"maze_{width}x{height}", "maze", width, height, grid)
+
+def clutter_map(width: int, height: int, density: float, seed: int) -> BenchMap:
+    """ 隨機擺放 1~3 格見方的障礙物，直到牆的比例達到 density """
+    rng = random.Random(seed)
+    grid = array.array(ArrayTypecode.A_STAR_MAP.value, [0]) * (width * height)
+    walls, target = 0, int(width * height * density)
+
+    while walls < target:
+        w, h = rng.randint(1, 3), rng.randint(1, 3)
+        col, row = rng.randrange(width - w + 1), rng.randrange(height - h + 1)
+        for r in range(row, row + h):
+            for c in range(col, col + w):
+                if not grid[r * width + c]:
+                    grid[r * width + c] = GridMapMarking.WALL
+                    walls += 1
+
+    return BenchMap(f"clutter{int(density * 100)}_{width}x{height}", "clutter", width, height, grid)
+
+def level_map(level: int) -> BenchMap:
+    """ 載入關卡後複製 collision_map (障礙物與建築都已註冊) """
+    world_map = GameContext.world_map
+    return BenchMap(
+        f"level_{level}", "level", world_map.width, world_map.height,
+        array.array(ArrayTypecode.A_STAR_MAP.value, world_map.collision_map)
+    )
+
+def random_queries(bench_map: BenchMap, count: int, seed: int) -> list[tuple[GridPoint, GridPoint]]:
+    """ 同一個連通區塊內的隨機起終點 (遊戲中不相連的組合在進 C 之前就被擋下) """
+    rng = random.Random(seed)
+    labels = ComponentLabels(bench_map.width, bench_map.height, bench_map.collision_map)
+    free = [
+        GridPoint(idx % bench_map.width, idx // bench_map.width)
+        for idx, value in enumerate(bench_map.collision_map) if value == 0
+    ]
+    if not free: return []
+
+    queries = []
+    for _ in range(count * 20):
+        if len(queries) >= count: break
+        start, end = rng.choice(free), rng.choice(free)
+        if labels.is_connected(start, end):
+            queries.append((start, end))
+    return queries
+
+
+# =========================================================================
+# 單張地圖：C 端搜尋
+# =========================================================================
+
+def bind_solve_astar(inf):
+    """ 取得單次呼叫版 solve_astar (純 Python 版本沒有，回傳 None) """
+    if not isinstance(inf, AStarInterface): return None
+
+    w_h, point = VarConfig.A_STAR_W_H.value, VarConfig.A_STAR_POINT.value
+    return inf.bind(
+        FunctionName.SOLVE_A_STAR.value,
+        [
+            ctypes.POINTER(VarConfig.A_STAR_MAP.value),
+            w_h, w_h,
+            point, point,
+            point, point,
+            ctypes.POINTER(VarConfig.A_STAR_OUT_BUFFER.value),
+        ],
+        VarConfig.A_STAR_REBACK.value
+    )
+
+def bench_map(bench: BenchMap, queries: list[tuple[GridPoint, GridPoint]], solver: ManageAStar, solve_astar) -> MapResult:
+    solver.map_synced = False
+    solver.update_map_from_grid_data(bench, bench.name)
+    solver.landmarks.build(solver, bench)
+    inf = solver.inf
+
+    with timing():
+        # 單次呼叫：每次都建立 Context 並複製整張地圖
+        one_shot = None
+        if solve_astar is not None:
+            c_map = CInterfaceBase.buffer_to_c_array(bench.collision_map, VarConfig.A_STAR_MAP.value)
+            samples = []
+            for start, end in queries:
+                begin = time.perf_counter_ns()
+                solve_astar(c_map, bench.width, bench.height, start.col, start.row, end.col, end.row, solver.c_out_buffer)
+                samples.append(time.perf_counter_ns() - begin)
+            one_shot = LatencyStats.from_ns(samples)
+
+        # 常駐 Context
+        samples, expanded = [], []
+        for start, end in queries:
+            begin = time.perf_counter_ns()
+            inf.find_path(solver, start, end)
+            samples.append(time.perf_counter_ns() - begin)
+            expanded.append(inf.get_expanded(solver.ctx))
+        resident = LatencyStats.from_ns(samples)
+
+        # 起點 = 終點：C 端只展開一個節點，剩下的幾乎都是 ctypes 轉換參數與切片的成本
+        trivial = []
+        for start, _ in queries:
+            begin = time.perf_counter_ns()
+            inf.find_path(solver, start, start)
+            trivial.append(time.perf_counter_ns() - begin)
+        call_us = percentile(sorted(trivial), 50) / 1000
+
+    expanded.sort()
+    cells = bench.width * bench.height
+    landmark_bytes = len(solver.landmarks.tables) * 4 if solver.landmarks.tables else 0
+    return MapResult(
+        name = bench.name,
+        kind = bench.kind,
+        width = bench.width,
+        height = bench.height,
+        wall_ratio = round(bench.wall_ratio, 4),
+        queries = len(queries),
+        solve_astar = one_shot,
+        astar_solve = resident,
+        expanded_mean = sum(expanded) / len(expanded) if expanded else 0.0,
+        expanded_p50 = percentile(expanded, 50),
+        expanded_p99 = percentile(expanded, 99),
+        ctypes_call_us = call_us,
+        ctypes_share = min(1.0, call_us / resident.mean_us) if resident.mean_us else 0.0,
+        memory = {
+            "context_bytes": cells * CONTEXT_BYTES_PER_CELL,
+            "out_buffer_bytes": len(solver.out_buffer) * solver.out_buffer.itemsize,
+            # Python 端一份 + C 端一份
+            "landmark_bytes": landmark_bytes * 2,
+            "landmarks": len(solver.landmarks.cells),
+        },
+    )
+
+
+# =========================================================================
+# 關卡：批次尋路 / 出兵
+# =========================================================================
+
+def level_queries(level: int) -> list[tuple[GridPoint, GridPoint]]:
+    """ 關卡的查詢組合：所有建築兩兩出兵的門口 + 隨機空格 """
+    world_map = GameContext.world_map
+    buildings = game_mg.building_mg.get_all_buildings()
+
+    queries = []
+    for source in buildings:
+        for target in buildings:
+            if source is target: continue
+            start = world_map.get_access_point(source.stats.grid_point, source.stats.grid_size, target.stats.grid_point)
+            end = world_map.get_access_point(target.stats.grid_point, target.stats.grid_size, source.stats.grid_point)
+            if start and end: queries.append((start, end))
+
+    queries.extend(random_queries(level_map(level), RANDOM_QUERIES, RANDOM_SEED + level))
+    return queries
+
+def bench_batch(level: int, queries: list[tuple[GridPoint, GridPoint]]) -> dict:
+    """ 逐組呼叫 main_a_star 與一次 a_star_mg.find_paths 解完同一批查詢 (路徑代價必須相同) """
+    world_map, map_tag = GameContext.world_map, GameContext.map_tag()
+
+    samples = []
+    with timing():
+        singles = []
+        for start, end in queries:
+            begin = time.perf_counter_ns()
+            singles.append(main_a_star(world_map, start, end, map_tag))
+            samples.append(time.perf_counter_ns() - begin)
+
+        begin = time.perf_counter_ns()
+        batch = a_star_mg.find_paths(world_map, queries, map_tag)
+        batch_ns = time.perf_counter_ns() - begin
+
+    if [grid_path_cost(p) if p else -1 for p in singles] != [grid_path_cost(p) if p else -1 for p in batch]:
+        raise AssertionError(f"level {level}: find_paths path cost differs from main_a_star")
+
+    return {
+        "level": level,
+        "queries": len(queries),
+        "single": asdict(LatencyStats.from_ns(samples)),
+        "single_total_ms": sum(samples) / 1e6,
+        "batch_ms": batch_ns / 1e6,
+    }
+
+def bench_dispatch(level: int) -> dict:
+    """ 建築兩兩出兵：execute_dispatch_army 本身的延遲，加上交給背景尋路的組合等到交付的時間 """
+    buildings = game_mg.building_mg.get_all_buildings()
+    pairs = [(s, t) for s in buildings for t in buildings if s is not t]
+    random.Random(RANDOM_SEED + level).shuffle(pairs)
+    pairs = pairs[:DISPATCH_PAIRS]
+
+    samples = []
+    pending_before = path_service.pending
+    with timing():
+        for source, target in pairs:
+            army = source.stats.army
+            source.stats.army = max(army, 2)
+            begin = time.perf_counter_ns()
+            execute_dispatch_army(source, target)
+            samples.append(time.perf_counter_ns() - begin)
+            source.stats.army = army
+    deferred = path_service.pending - pending_before
+
+    # 背景尋路：每次 deliver 相當於下一幀的開頭
+    begin = time.perf_counter()
+    deliver_samples = []
+    while path_service.pending and time.perf_counter() - begin < DISPATCH_DRAIN_SECONDS:
+        start = time.perf_counter_ns()
+        path_service.deliver()
+        deliver_samples.append(time.perf_counter_ns() - start)
+        time.sleep(0.001)
+    drain = time.perf_counter() - begin
+
+    spawned = len(game_mg.army_mg.jellies)
+    game_mg.army_mg.clear_all()
+    return {
+        "level": level,
+        "dispatches": len(pairs),
+        "deferred": deferred,
+        "spawned": spawned,
+        "dispatch": asdict(LatencyStats.from_ns(samples)),
+        "deliver": asdict(LatencyStats.from_ns(deliver_samples)),
+        "drain_ms": drain * 1000,
+    }
+
+
+# =========================================================================
+# A* / JPS 比較
+# =========================================================================
+
+def run_algorithm(algorithm: SearchAlgorithm, queries) -> tuple[float, int, list[int]]:
+    """ 回傳 (總耗時, 總展開節點數, 每組查詢的路徑代價) """
+    inf = a_star_mg.inf
+    inf.set_algorithm(a_star_mg.ctx, algorithm)
+
+    elapsed = 0.0
+    expanded = 0
+    costs = []
+    for start, end in queries:
+        begin = time.perf_counter()
+        raw_path = inf.find_path(a_star_mg, start, end)
+        elapsed += time.perf_counter() - begin
+
+        expanded += inf.get_expanded(a_star_mg.ctx)
+        costs.append(raw_path_cost(raw_path) if raw_path else -1)
+
+    return elapsed, expanded, costs
+
+def benchmark_jps():
+    dbg.enable = False
+    original = a_star_mg.inf.algorithm
+
+    print(f"{'level':>5} {'queries':>7} | {'A* ms':>8} {'A* exp':>9} | {'JPS ms':>8} {'JPS exp':>9} | {'exp ratio':>9} {'speedup':>7}")
+    total = {SearchAlgorithm.A_STAR: [0.0, 0], SearchAlgorithm.JPS: [0.0, 0]}
+
+    for level in GAME_OBJ_CONFIG:
+        game_mg.load_level(level)
+        a_star_mg.update_map_from_grid_data(GameContext.world_map, GameContext.map_tag())
+        queries = level_queries(level)
+
+        a_time, a_exp, a_costs = run_algorithm(SearchAlgorithm.A_STAR, queries)
+        j_time, j_exp, j_costs = run_algorithm(SearchAlgorithm.JPS, queries)
+
+        # JPS 只改變展開方式，路徑代價必須與 A* 完全相同
+        if a_costs != j_costs:
+            raise AssertionError(f"level {level}: JPS path cost differs from A*")
+
+        total[SearchAlgorithm.A_STAR][0] += a_time
+        total[SearchAlgorithm.A_STAR][1] += a_exp
+        total[SearchAlgorithm.JPS][0] += j_time
+        total[SearchAlgorithm.JPS][1] += j_exp
+
+        print(
+            f"{level:>5} {len(queries):>7} | {a_time * 1000:>8.2f} {a_exp:>9} | {j_time * 1000:>8.2f} {j_exp:>9} | "
+            f"{j_exp / max(1, a_exp):>9.3f} {a_time / max(j_time, 1e-9):>6.2f}x"
+        )
+
+    a_time, a_exp = total[SearchAlgorithm.A_STAR]
+    j_time, j_exp = total[SearchAlgorithm.JPS]
+    print(
+        f"{'all':>5} {'':>7} | {a_time * 1000:>8.2f} {a_exp:>9} | {j_time * 1000:>8.2f} {j_exp:>9} | "
+        f"{j_exp / max(1, a_exp):>9.3f} {a_time / max(j_time, 1e-9):>6.2f}x"
+    )
+
+    a_star_mg.inf.set_algorithm(a_star_mg.ctx, original)
+
+
+# =========================================================================
+# 整套量測
+# =========================================================================
+
+def benchmark_suite(output: str = DEFAULT_OUTPUT, quick: bool = False) -> dict:
+    dbg.enable = False
+    inf = a_star_mg.inf
+    native = isinstance(inf, AStarInterface)
+    if not native:
+        print("!! C 模組無法使用，量測的是純 Python 版本")
+
+    queries_per_map = RANDOM_QUERIES // 4 if quick else RANDOM_QUERIES
+    resolutions = RESOLUTIONS[:2] if quick else RESOLUTIONS
+
+    # 合成地圖用獨立的求解器 (不影響 a_star_mg 與關卡的狀態)
+    solver = ManageAStar()
+    solver.inf = inf
+    solve_astar = bind_solve_astar(inf)
+
+    maps: list[BenchMap] = []
+    for i, (width, height) in enumerate(resolutions):
+        maps.append(empty_map(width, height))
+        maps.append(maze_map(width, height, RANDOM_SEED + i))
+        for density in CLUTTER_DENSITIES:
+            maps.append(clutter_map(width, height, density, RANDOM_SEED + i))
+
+    map_results, batch_results, dispatch_results = [], [], []
+    print(f"{'map':>18} {'size':>8} {'wall':>5} | {'one-shot p50/p99 us':>20} | {'ctx p50/p99 us':>18} | {'exp p50/p99':>13} | {'ctypes':>6}")
+
+    def report(result: MapResult):
+        one_shot = f"{result.solve_astar.p50_us:>9.1f}/{result.solve_astar.p99_us:<9.1f}" if result.solve_astar else f"{'-':^19}"
+        print(
+            f"{result.name:>18} {result.width:>3}x{result.height:<4} {result.wall_ratio:>5.2f} | {one_shot:>20} | "
+            f"{result.astar_solve.p50_us:>8.1f}/{result.astar_solve.p99_us:<9.1f} | "
+            f"{result.expanded_p50:>6}/{result.expanded_p99:<6} | {result.ctypes_share:>6.1%}"
+        )
+        map_results.append(result)
+
+    for i, bench in enumerate(maps):
+        report(bench_map(bench, random_queries(bench, queries_per_map, RANDOM_SEED + i), solver, solve_astar))
+
+    for level in GAME_OBJ_CONFIG:
+        game_mg.load_level(level)
+        a_star_mg.update_map_from_grid_data(GameContext.world_map, GameContext.map_tag())
+        bench = level_map(level)
+        report(bench_map(bench, random_queries(bench, queries_per_map, RANDOM_SEED + level), solver, solve_astar))
+
+        batch_results.append(bench_batch(level, level_queries(level)))
+        dispatch_results.append(bench_dispatch(level))
+
+    solver.release()
+
+    print(f"\n{'level':>5} | {'single total ms':>15} | {'batch ms':>8} | {'dispatch p50/p99 us':>20} | {'deferred':>8}")
+    for batch, dispatch in zip(batch_results, dispatch_results):
+        print(
+            f"{dispatch['level']:>5} | {batch['single_total_ms']:>15.2f} | {batch['batch_ms']:>8.2f} | "
+            f"{dispatch['dispatch']['p50_us']:>9.1f}/{dispatch['dispatch']['p99_us']:<10.1f} | {dispatch['deferred']:>8}"
+        )
+
+    result = {
+        "meta": {
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "native": native,
+            "algorithm": SearchAlgorithm(inf.algorithm).name,
+            "landmarks": int(LandmarkVar.COUNT),
+            "path_service_workers": path_service.workers,
+            "random_seed": RANDOM_SEED,
+            "queries_per_map": queries_per_map,
+            "quick": quick,
+            "unit": "microseconds",
+        },
+        "maps": [asdict(result) for result in map_results],
+        "batch": batch_results,
+        "dispatch": dispatch_results,
+        "memory": {"max_rss_kb": max_rss_kb()},
+    }
+
+    with open(output, "w", encoding = "utf-8") as f:
+        json.dump(result, f, ensure_ascii = False, indent = 2)
+    print(f"\n結果已寫入 {output} (延遲單位為微秒)")
+    return result
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description = "尋路效能量測")
+    parser.add_argument("--out", default = DEFAULT_OUTPUT, help = "JSON 結果的輸出路徑")
+    parser.add_argument("--quick", action = "store_true", help = "較少的查詢與解析度 (快速檢查用)")
+    parser.add_argument("--jps", action = "store_true", help = "只跑 A* 與 JPS 的比較")
+    args = parser.parse_args()
+
+    if args.jps:
+        benchmark_jps()
+    else:
+        benchmark_suite(args.out, args.quick)
@@ -0,0 +1,170 @@
+from collections import OrderedDict
+from dataclasses import dataclass
+
+from py.a_star.hpa import grid_path_cost
+from py.a_star.invalidation import expand_rect, rects_overlap, route_invalidated
+from py.a_star.route_table import perimeter_rect
+from py.a_star.variable import PathCacheVar, RouteKey
+from py.game.map.variable import GridMapMarking
+from py.variable import GridPoint, Size
+
+# (來源建築, 目標建築)
+BuildingPair = tuple[RouteKey, RouteKey]
+
+
+@dataclass
+class PathCacheEntry:
+    # 周圍一圈 -> 周圍一圈的路徑 (無法抵達為空 list)
+    path: list[GridPoint]
+    # 路徑代價 (直 10 / 斜 14，無法抵達為 None)，變成路時判斷是否可能出現更短的路
+    cost: int | None
+    # 反方向路徑 (第一次被反向取用時才建立)
+    reverse_path: list[GridPoint] | None = None
+
+    @property
+    def cells(self) -> int:
+        """ 佔用的格子數 (計入快取上限，無法抵達的組合也算一格) """
+        return max(1, len(self.path)) + (len(self.reverse_path) if self.reverse_path else 0)
+
+
+@dataclass
+class PathCacheStats:
+    hits: int = 0
+    reverse_hits: int = 0       # 由反方向路徑取得 (包含在 hits 內)
+    misses: int = 0
+    evictions: int = 0          # 超出上限被 LRU 淘汰
+    invalidations: int = 0      # 地圖編輯導致作廢
+
+    def reset(self):
+        self.hits = self.reverse_hits = self.misses = self.evictions = self.invalidations = 0
+
+
+class PathCache:
+    """
+    [建築間路徑快取] 路線表以外的 (來源建築, 目標建築) -> 路徑，有上限的 LRU
+    - A->B 的路徑可直接反轉給 B->A 使用 (周圍一圈之間的最短路徑是對稱的)
+    - 地圖編輯時只作廢可能失效的路徑 (與路線表相同的 route_invalidated)，而不是全部清空
+    - 無法抵達 (空 list) 也會存，直到有格子變成路
+    """
+    def __init__(self, max_cells: int = PathCacheVar.MAX_CELLS):
+        self.max_cells = max_cells
+        self.cells = 0
+        self.stats = PathCacheStats()
+
+        self._entries: OrderedDict[BuildingPair, PathCacheEntry] = OrderedDict()
+        # 格子 -> 經過該格的組合
+        self._cell_index: dict[tuple[int, int], set[BuildingPair]] = {}
+        # 建築 -> 以它為起點或終點的組合
+        self._building_index: dict[RouteKey, set[BuildingPair]] = {}
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, pair: BuildingPair) -> bool:
+        return pair in self._entries or (pair[1], pair[0]) in self._entries
+
+    def get(self, source: RouteKey, target: RouteKey) -> list[GridPoint] | None:
+        """ 取得路徑 (含反方向重用)，沒有回傳 None """
+        pair = (source, target)
+
+        entry = self._entries.get(pair)
+        if entry is not None:
+            self._entries.move_to_end(pair)
+            self.stats.hits += 1
+            return entry.path
+
+        reverse_pair = (target, source)
+        entry = self._entries.get(reverse_pair)
+        if entry is not None:
+            self._entries.move_to_end(reverse_pair)
+            if entry.reverse_path is None:
+                entry.reverse_path = entry.path[::-1]
+                self.cells += len(entry.reverse_path)
+                self._evict_over_limit()
+
+            self.stats.hits += 1
+            self.stats.reverse_hits += 1
+            return entry.reverse_path
+
+        self.stats.misses += 1
+        return None
+
+    def put(self, source: RouteKey, target: RouteKey, path: list[GridPoint]):
+        """ 存入路徑 (空 list = 無法抵達)，已有反方向的組合時取代它 """
+        pair = (source, target)
+        for key in (pair, (target, source)):
+            if key in self._entries:
+                self._remove(key)
+
+        entry = PathCacheEntry(path, grid_path_cost(path) if path else None)
+
+        self._entries[pair] = entry
+        self.cells += entry.cells
+        for p in path:
+            self._cell_index.setdefault((p.col, p.row), set()).add(pair)
+        for key in pair:
+            self._building_index.setdefault(key, set()).add(pair)
+
+        self._evict_over_limit()
+
+    def invalidate_rect(self, start_grid: GridPoint, size: Size, marking: int):
+        """
+        地圖區域被編輯時呼叫，作廢可能失效的路徑 (route_invalidated)
+        變成牆只可能影響碰到建築周圍一圈或經過外圍一圈的路徑，先用索引縮小範圍
+        """
+        area = (int(start_grid.col), int(start_grid.row), size.width, size.height)
+
+        if marking == GridMapMarking.WALL:
+            candidates = set()
+            for key, pairs in self._building_index.items():
+                if rects_overlap(area, perimeter_rect(key)):
+                    candidates.update(pairs)
+
+            col, row, width, height = expand_rect(area, 1)
+            for c in range(col, col + width):
+                for r in range(row, row + height):
+                    candidates.update(self._cell_index.get((c, r), ()))
+        else:
+            candidates = list(self._entries)
+
+        stale = []
+        for pair in candidates:
+            entry = self._entries[pair]
+            raw = [v for p in entry.path for v in (p.col, p.row)] if marking == GridMapMarking.WALL else None
+            if route_invalidated(area, marking, perimeter_rect(pair[0]), perimeter_rect(pair[1]), raw, entry.cost):
+                stale.append(pair)
+
+        for pair in stale:
+            self._remove(pair)
+        self.stats.invalidations += len(stale)
+
+    def clear(self):
+        self._entries.clear()
+        self._cell_index.clear()
+        self._building_index.clear()
+        self.cells = 0
+
+    def _evict_over_limit(self):
+        """ 超出上限時，從最久沒用的開始淘汰 """
+        while self.cells > self.max_cells and self._entries:
+            oldest = next(iter(self._entries))
+            self._remove(oldest)
+            self.stats.evictions += 1
+
+    def _remove(self, pair: BuildingPair):
+        entry = self._entries.pop(pair)
+        self.cells -= entry.cells
+
+        for p in entry.path:
+            pairs = self._cell_index.get((p.col, p.row))
+            if pairs is None: continue
+            pairs.discard(pair)
+            if not pairs:
+                del self._cell_index[(p.col, p.row)]
+
+        for key in pair:
+            pairs = self._building_index.get(key)
+            if pairs is None: continue
+            pairs.discard(pair)
+            if not pairs:
+                del self._building_index[key]
@@ -0,0 +1,61 @@
+import array
+from dataclasses import dataclass
+
+from py.variable import GridPoint
+
+# 與 C 端 dirs 相同順序 (前 4 個直線，後 4 個斜向)
+FLOW_DIRS = (
+    (0, -1), (0, 1), (-1, 0), (1, 0),
+    (-1, -1), (1, -1), (-1, 1), (1, 1),
+)
+# 與 C 端 DIST_UNREACHABLE / DIR_NONE 相同
+FLOW_UNREACHABLE = 0xFFFFFFFF
+FLOW_DIR_NONE = -1
+
+
+@dataclass
+class FlowField:
+    """
+    [流場] 某個目標 (建築出入口一圈) 的距離 / 方向場
+    同一個目標的所有士兵共用同一張，只需要一次擴散
+    地圖編輯時由 ManageAStar 就地修補 (持有這張場的士兵不需要換)，無法修補時標記為 stale
+    """
+    width: int
+    height: int
+    dist: array.array       # array('I')：到最近出入口的代價 (直 10 / 斜 14)
+    dirs: array.array       # array('b')：下一步方向 (FLOW_DIRS 的索引)
+    # 已從快取移除 (出入口改變)，持有者需要重新取得
+    stale: bool = False
+
+    def _idx(self, grid: GridPoint) -> int | None:
+        if not (0 <= grid.col < self.width and 0 <= grid.row < self.height): return None
+        return grid.row * self.width + grid.col
+
+    def distance(self, grid: GridPoint) -> int | None:
+        """ 到目標的代價，無法抵達回傳 None """
+        idx = self._idx(grid)
+        if idx is None or self.dist[idx] == FLOW_UNREACHABLE: return None
+        return self.dist[idx]
+
+    def is_goal(self, grid: GridPoint) -> bool:
+        return self.distance(grid) == 0
+
+    def next_cell(self, grid: GridPoint) -> GridPoint | None:
+        """ 沿著流場的下一格，已在目標或無法抵達回傳 None """
+        idx = self._idx(grid)
+        if idx is None: return None
+
+        d = self.dirs[idx]
+        if d == FLOW_DIR_NONE: return None
+
+        dc, dr = FLOW_DIRS[d]
+        return GridPoint(grid.col + dc, grid.row + dr)
+
+    def trace(self, start: GridPoint) -> list[GridPoint]:
+        """ 從 start 沿流場走到目標的完整路徑 (含起終點)，無法抵達回傳空 list """
+        if self.distance(start) is None: return []
+
+        path = [start]
+        while (step := self.next_cell(path[-1])) is not None:
+            path.append(step)
+        return path
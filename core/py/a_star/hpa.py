@@ -0,0 +1,314 @@
+import array
+import itertools
+from dataclasses import dataclass, field
+
+from py.a_star.variable import COST_DIAGONAL, COST_STRAIGHT, HpaVar
+from py.variable import GridPoint, Size
+
+# 區塊邊界 (cx, cy, axis)：axis 0 = 與右邊區塊的邊界，1 = 與下方區塊的邊界
+BorderKey = tuple[int, int, int]
+ClusterKey = tuple[int, int]
+
+
+def raw_path_cost(raw_path) -> int:
+    """ C 回傳的路徑 [x0, y0, x1, y1...] 的代價 (直 10 / 斜 14)，不建立 GridPoint """
+    cols, rows = raw_path[0::2], raw_path[1::2]
+    diagonal = sum(1 for i in range(1, len(cols)) if cols[i] != cols[i - 1] and rows[i] != rows[i - 1])
+    return COST_DIAGONAL * diagonal + COST_STRAIGHT * (len(cols) - 1 - diagonal)
+
+def grid_path_cost(path: list[GridPoint]) -> int:
+    """ 同 raw_path_cost，給已轉成 GridPoint 的路徑 """
+    diagonal = sum(1 for a, b in zip(path, path[1:]) if a.col != b.col and a.row != b.row)
+    return COST_DIAGONAL * diagonal + COST_STRAIGHT * (len(path) - 1 - diagonal)
+
+@dataclass
+class AbstractGraph:
+    """ 抽象圖攤平成 CSR 格式，直接透過 buffer protocol 交給 C 搜尋 """
+    nodes: list[GridPoint] = field(default_factory = list)
+    index: dict[GridPoint, int] = field(default_factory = dict)
+    node_xy: array.array = field(default_factory = lambda: array.array('i'))
+    offsets: array.array = field(default_factory = lambda: array.array('I', [0]))
+    targets: array.array = field(default_factory = lambda: array.array('I'))
+    costs: array.array = field(default_factory = lambda: array.array('I'))
+
+    @property
+    def node_count(self) -> int:
+        return len(self.nodes)
+
+
+class HierarchicalMap:
+    """
+    [階層式尋路 HPA*]
+    把地圖切成固定大小的區塊，區塊邊界上相鄰的空格對作為入口 (轉換點)
+    - 抽象圖：轉換點之間的區塊內代價 (intra) + 跨邊界代價 (inter)
+    - 查詢：先在抽象圖上規劃，再只對經過的區塊做限定範圍的 A* 補齊
+    - 地圖編輯：只把受影響的區塊標記為 dirty，下次查詢前局部重建
+    區塊內搜尋都透過 a_star_mg 的 C 端 Context (限定範圍批次 A*)
+    """
+    def __init__(self, cluster_size: int = HpaVar.CLUSTER_SIZE):
+        self.cluster_size = cluster_size
+        self.grid_data = None
+        self.width = 0
+        self.height = 0
+        self.cluster_cols = 0
+        self.cluster_rows = 0
+        self.ready = False
+
+        # 每條邊界上的轉換點對 (靠左/上的格子, 靠右/下的格子)
+        self.transitions: dict[BorderKey, list[tuple[GridPoint, GridPoint]]] = {}
+        # 跨邊界的邊 (相鄰兩格，代價固定為直走)
+        self.inter: dict[GridPoint, dict[GridPoint, int]] = {}
+        # 區塊內轉換點之間的邊
+        self.intra: dict[ClusterKey, dict[GridPoint, dict[GridPoint, int]]] = {}
+
+        self._dirty: set[ClusterKey] = set()
+        # 攤平後的抽象圖 (抽象圖有變動時設為 None，查詢前重建)
+        self._graph: AbstractGraph | None = None
+
+    # =========================================================================
+    # [Build] 建立 / 局部重建
+    # =========================================================================
+
+    def build(self, a_star_mg, grid_data):
+        """ 建立整張抽象圖 (呼叫前 a_star_mg 的 Context 必須已同步地圖) """
+        self.reset()
+        self.grid_data = grid_data
+        self.width = grid_data.width
+        self.height = grid_data.height
+
+        size = self.cluster_size
+        self.cluster_cols = (self.width + size - 1) // size
+        self.cluster_rows = (self.height + size - 1) // size
+
+        clusters = list(itertools.product(range(self.cluster_cols), range(self.cluster_rows)))
+        for cx, cy in clusters:
+            self._build_border((cx, cy, 0))
+            self._build_border((cx, cy, 1))
+
+        self._connect_clusters(a_star_mg, clusters)
+        self.ready = True
+
+    def reset(self):
+        self.ready = False
+        self.grid_data = None
+        self.transitions.clear()
+        self.inter.clear()
+        self.intra.clear()
+        self._dirty.clear()
+        self._graph = None
+
+    def mark_dirty(self, start_grid: GridPoint, size: Size):
+        """ 地圖編輯時呼叫，只記錄受影響的區塊 (等到下次查詢才重建) """
+        if not self.ready: return
+
+        cs = self.cluster_size
+        col, row = int(start_grid.col), int(start_grid.row)
+        for cx in range(max(0, col // cs), min(self.cluster_cols, (col + size.width - 1) // cs + 1)):
+            for cy in range(max(0, row // cs), min(self.cluster_rows, (row + size.height - 1) // cs + 1)):
+                self._dirty.add((cx, cy))
+
+    def repair(self, a_star_mg):
+        """ 重建 dirty 區塊的邊界與區塊內的邊 (入口有變的鄰居區塊也要重連) """
+        if not self._dirty: return
+
+        to_connect = set(self._dirty)
+        for cx, cy in self._dirty:
+            for key, neighbor in (
+                ((cx, cy, 0), (cx + 1, cy)), ((cx - 1, cy, 0), (cx - 1, cy)),
+                ((cx, cy, 1), (cx, cy + 1)), ((cx, cy - 1, 1), (cx, cy - 1)),
+            ):
+                if self._build_border(key):
+                    to_connect.add(neighbor)
+
+        self._dirty.clear()
+        self._connect_clusters(a_star_mg, to_connect)
+        self._graph = None
+
+    def _build_border(self, key: BorderKey) -> bool:
+        """ 重新掃描一條邊界上的入口，回傳轉換點是否有變化 """
+        cx, cy, axis = key
+        if not (0 <= cx < self.cluster_cols and 0 <= cy < self.cluster_rows): return False
+        if axis == 0 and cx + 1 >= self.cluster_cols: return False
+        if axis == 1 and cy + 1 >= self.cluster_rows: return False
+
+        old = self.transitions.get(key, [])
+        new = self._scan_border(cx, cy, axis)
+        if new == old: return False
+
+        for a, b in old:
+            self.inter.get(a, {}).pop(b, None)
+            self.inter.get(b, {}).pop(a, None)
+        for a, b in new:
+            self.inter.setdefault(a, {})[b] = COST_STRAIGHT
+            self.inter.setdefault(b, {})[a] = COST_STRAIGHT
+
+        self.transitions[key] = new
+        return True
+
+    def _scan_border(self, cx: int, cy: int, axis: int) -> list[tuple[GridPoint, GridPoint]]:
+        """ 找出邊界兩側都是空格的連續段 (入口)，每段放 1~2 個轉換點 """
+        cs = self.cluster_size
+        width, collision = self.width, self.grid_data.collision_map
+
+        if axis == 0:
+            # 左區塊最右一欄 / 右區塊最左一欄
+            x = cx * cs + cs - 1
+            cells = [(GridPoint(x, y), GridPoint(x + 1, y)) for y in range(cy * cs, min(self.height, cy * cs + cs))]
+        else:
+            y = cy * cs + cs - 1
+            cells = [(GridPoint(x, y), GridPoint(x, y + 1)) for x in range(cx * cs, min(self.width, cx * cs + cs))]
+
+        transitions = []
+        run: list[tuple[GridPoint, GridPoint]] = []
+        for a, b in cells + [(None, None)]:
+            if a is not None and collision[a.row * width + a.col] == 0 and collision[b.row * width + b.col] == 0:
+                run.append((a, b))
+                continue
+            if run:
+                if len(run) >= HpaVar.ENTRANCE_SPLIT:
+                    transitions.extend((run[0], run[-1]))
+                else:
+                    transitions.append(run[len(run) // 2])
+                run = []
+        return transitions
+
+    def _connect_clusters(self, a_star_mg, clusters):
+        """ 計算區塊內每對轉換點的代價 (所有區塊一次批次送進 C) """
+        queries = []
+        owners = []
+        for cluster in clusters:
+            nodes = self._cluster_nodes(cluster)
+            self.intra[cluster] = {node: {} for node in nodes}
+
+            bounds = self._cluster_bounds(cluster)
+            for a, b in itertools.combinations(nodes, 2):
+                queries.append((a, b, bounds))
+                owners.append(cluster)
+
+        if not queries: return
+
+        costs = a_star_mg.bounded_costs(queries)
+        for (a, b, _), cluster, cost in zip(queries, owners, costs):
+            if cost is None: continue
+            self.intra[cluster][a][b] = cost
+            self.intra[cluster][b][a] = cost
+
+    def _cluster_nodes(self, cluster: ClusterKey) -> list[GridPoint]:
+        """ 區塊內的轉換點 (來自四條邊界，依座標排序以確保結果穩定) """
+        cx, cy = cluster
+        nodes = set()
+        for a, _ in self.transitions.get((cx, cy, 0), ()): nodes.add(a)
+        for _, b in self.transitions.get((cx - 1, cy, 0), ()): nodes.add(b)
+        for a, _ in self.transitions.get((cx, cy, 1), ()): nodes.add(a)
+        for _, b in self.transitions.get((cx, cy - 1, 1), ()): nodes.add(b)
+        return sorted(nodes, key = lambda p: (p.row, p.col))
+
+    # =========================================================================
+    # [Query] 查詢
+    # =========================================================================
+
+    def find_path(self, a_star_mg, start: GridPoint, end: GridPoint) -> list[GridPoint] | None:
+        """
+        先在抽象圖上規劃，再逐段補齊成完整路徑
+        回傳 None 代表抽象圖上找不到 (呼叫端應改用整張地圖的 A* 確認)
+        """
+        self.repair(a_star_mg)
+
+        start_cluster = self._cluster_of(start)
+        end_cluster = self._cluster_of(end)
+
+        # 同一區塊：先試區塊內直接走
+        if start_cluster == end_cluster:
+            direct = a_star_mg.solve_bounded([(start, end, self._cluster_bounds(start_cluster))])[0]
+            if direct: return direct
+
+        # 把起終點暫時接到所在區塊的轉換點上
+        start_nodes = self._cluster_nodes(start_cluster)
+        end_nodes = self._cluster_nodes(end_cluster)
+        queries = [(start, n, self._cluster_bounds(start_cluster)) for n in start_nodes]
+        queries += [(n, end, self._cluster_bounds(end_cluster)) for n in end_nodes]
+        costs = a_star_mg.bounded_costs(queries)
+
+        start_edges = {}
+        end_edges = {}
+        for (a, b, _), cost in zip(queries, costs):
+            if cost is None: continue
+            if a == start: start_edges[b] = cost
+            else: end_edges[a] = cost
+
+        abstract_path = self._search_abstract(a_star_mg, start, end, start_edges, end_edges)
+        if abstract_path is None: return None
+
+        return self._refine(a_star_mg, abstract_path)
+
+    def _search_abstract(self, a_star_mg, start, end, start_edges, end_edges) -> list[GridPoint] | None:
+        """ 抽象圖上的 A* (在 C 端執行，啟發值與格子 A* 相同) """
+        graph = self._ensure_graph()
+        index = graph.index
+
+        nodes = a_star_mg.inf.graph_search(
+            graph,
+            [(index[n], cost) for n, cost in start_edges.items()],
+            [(index[n], cost) for n, cost in end_edges.items()],
+            end,
+        )
+        if nodes is None: return None
+
+        return [start] + [graph.nodes[i] for i in nodes] + [end]
+
+    def _ensure_graph(self) -> AbstractGraph:
+        """ 把 intra / inter 兩種邊攤平成 CSR (節點依座標排序，確保結果穩定) """
+        if self._graph is not None: return self._graph
+
+        graph = AbstractGraph()
+        graph.nodes = sorted(
+            {n for edges in self.intra.values() for n in edges} | set(self.inter),
+            key = lambda p: (p.row, p.col)
+        )
+        graph.index = {n: i for i, n in enumerate(graph.nodes)}
+
+        for node in graph.nodes:
+            graph.node_xy.extend((node.col, node.row))
+
+            edges = dict(self.intra.get(self._cluster_of(node), {}).get(node, {}))
+            edges.update(self.inter.get(node, {}))
+            for neighbor, cost in sorted(edges.items(), key = lambda e: graph.index[e[0]]):
+                graph.targets.append(graph.index[neighbor])
+                graph.costs.append(cost)
+            graph.offsets.append(len(graph.targets))
+
+        self._graph = graph
+        return graph
+
+    def _refine(self, a_star_mg, abstract_path: list[GridPoint]) -> list[GridPoint] | None:
+        """ 把抽象路徑補成逐格路徑：跨邊界直接相連，區塊內的段落一次批次搜尋 """
+        segments = []
+        for a, b in zip(abstract_path, abstract_path[1:]):
+            if a == b: continue
+            cluster = self._cluster_of(a)
+            if cluster == self._cluster_of(b):
+                segments.append((a, b, self._cluster_bounds(cluster)))
+            else:
+                segments.append((a, b, None))
+
+        queries = [seg for seg in segments if seg[2] is not None]
+        sub_paths = iter(a_star_mg.solve_bounded(queries))
+
+        path = [abstract_path[0]]
+        for a, b, bounds in segments:
+            if bounds is None:
+                path.append(b)
+                continue
+
+            sub_path = next(sub_paths)
+            if not sub_path: return None
+            path.extend(sub_path[1:])
+        return path
+
+    def _cluster_of(self, grid: GridPoint) -> ClusterKey:
+        return (int(grid.col) // self.cluster_size, int(grid.row) // self.cluster_size)
+
+    def _cluster_bounds(self, cluster: ClusterKey) -> tuple[int, int, int, int]:
+        cs = self.cluster_size
+        return (cluster[0] * cs, cluster[1] * cs, cs, cs)
+
@@ -0,0 +1,68 @@
+from py.a_star.variable import COST_DIAGONAL, COST_STRAIGHT
+from py.game.map.variable import GridMapMarking
+
+# 矩形範圍 (col, row, width, height)
+Rect = tuple[int, int, int, int]
+
+
+def octile(dx: int, dy: int) -> int:
+    """ 沒有牆壁時的最短代價 (直 10 / 斜 14) """
+    dx, dy = abs(dx), abs(dy)
+    return COST_DIAGONAL * min(dx, dy) + COST_STRAIGHT * abs(dx - dy)
+
+def expand_rect(rect: Rect, margin: int) -> Rect:
+    col, row, width, height = rect
+    return (col - margin, row - margin, width + margin * 2, height + margin * 2)
+
+def rects_overlap(a: Rect, b: Rect) -> bool:
+    return a[0] < b[0] + b[2] and b[0] < a[0] + a[2] and a[1] < b[1] + b[3] and b[1] < a[1] + a[3]
+
+def rect_octile(a: Rect, b: Rect) -> int:
+    """ 兩個矩形中最近的兩格之間的 octile 代價 (重疊為 0) """
+    dx = max(0, b[0] - (a[0] + a[2] - 1), a[0] - (b[0] + b[2] - 1))
+    dy = max(0, b[1] - (a[1] + a[3] - 1), a[1] - (b[1] + b[3] - 1))
+    return octile(dx, dy)
+
+def freed_may_shorten(area: Rect, source: Rect, target: Rect, cost: int | None) -> bool:
+    """
+    area 變成路之後，source -> target (起終點為矩形內任一格) 是否可能出現比 cost 更短的路
+    新的路一定經過 area 或外圍一圈 (area 變成路也會讓外圍的斜走不再切角)，
+    代價至少是 source -> 外圍 + 外圍 -> target 的 octile 代價，不小於 cost 就不可能更短
+    cost 為 None (原本走不到) 一律視為可能
+    """
+    if cost is None: return True
+
+    ring = expand_rect(area, 1)
+    return rect_octile(source, ring) + rect_octile(ring, target) < cost
+
+def wall_blocks_path(area: Rect, raw) -> bool:
+    """ area 變成牆之後，路徑 [x0, y0, x1, y1...] 是否經過 area 或外圍一圈 (斜走防切角會用到) """
+    col, row, width, height = area
+    min_c, min_r, max_c, max_r = col - 1, row - 1, col + width, row + height
+    return any(min_c <= c <= max_c and min_r <= r <= max_r for c, r in zip(raw[0::2], raw[1::2]))
+
+def route_invalidated(area: Rect, marking: int, source: Rect, target: Rect, raw, cost: int | None) -> bool:
+    """
+    [局部作廢規則] area 被編輯 (marking) 後，source -> target 的路徑 raw (代價 cost，走不到為空 / None) 是否可能失效
+    source / target 為起終點所在的範圍 (建築周圍一圈)
+    - 編輯碰到起終點範圍：出入口改變
+    - 變成牆：路徑經過 area 或外圍一圈
+    - 變成路：可能出現更短的路 (freed_may_shorten)，原本走不到的一律作廢
+    """
+    if rects_overlap(area, source) or rects_overlap(area, target): return True
+    if marking == GridMapMarking.WALL:
+        return bool(raw) and wall_blocks_path(area, raw)
+    return freed_may_shorten(area, source, target, cost)
+
+def route_region(source: Rect, target: Rect, cost: int | None) -> Rect | None:
+    """
+    [區塊版本用] 會讓 route_invalidated 成立的編輯一定碰到這個範圍 (None 代表整張地圖)
+    路徑與可能的捷徑都在起點範圍 cost / 10 格以內 (octile 代價不小於 10 * 兩格的最大座標差)
+    """
+    if cost is None: return None
+
+    reach = cost // COST_STRAIGHT + 1
+    col, row = min(source[0], target[0]), min(source[1], target[1])
+    right = max(source[0] + source[2], target[0] + target[2])
+    bottom = max(source[1] + source[3], target[1] + target[3])
+    return expand_rect((col, row, right - col, bottom - row), reach)
@@ -0,0 +1,138 @@
+import array
+
+from py.a_star.variable import LandmarkVar
+from py.game.map.variable import GridMapMarking
+from py.trans.a_star_py import DIST_UNREACHABLE
+from py.trans.variable import ArrayTypecode
+from py.variable import GridPoint, Size
+
+
+class LandmarkTable:
+    """
+    [地標距離表 (ALT heuristic)]
+    關卡載入時挑出少數地標格，各自做一次整張地圖的流場 (Dijkstra)，存下地標到每一格的精確距離
+    A* 以三角不等式 |d(L, n) - d(L, goal)| 作為下界，與八方向距離取較大值：
+    障礙物多 (需要繞路) 的地圖展開的節點少很多，找到的路徑代價不變
+    - 地標以最遠點挑選：每次挑離現有地標最遠的格子 (地標落在地圖邊緣、死路底端時下界最緊)
+    - 距離表對應 world_map.version：地圖編輯時以流場修補就地更新後重新交給 C 端，
+      地標本身變成牆時直接捨棄該地標
+    """
+    def __init__(self, count: int = LandmarkVar.COUNT):
+        self.count = count
+        self.world_map = None
+
+        self.cells: list[GridPoint] = []
+        # 各地標的流場 (距離 / 方向，方向只給修補使用)
+        self.dist: list[array.array] = []
+        self.dirs: list[array.array] = []
+        # 距離表對應的地圖版本 (None = 沒有距離表)
+        self.version: int | None = None
+        # 依序相接的距離表 (交給 C 端與背景執行緒，只會整個替換不會就地修改)
+        self.tables: array.array | None = None
+
+    @property
+    def ready(self) -> bool:
+        return self.version is not None
+
+    def bind_world_map(self, world_map):
+        self.world_map = world_map
+
+    def build(self, a_star_mg, grid_data):
+        """ 挑選地標並計算距離表，交給 a_star_mg 的 Context (呼叫前地圖必須已同步) """
+        self.reset()
+        if self.count <= 0: return
+
+        seed = self._seed(grid_data)
+        if seed is None: return
+
+        # 第一個地標是離 seed 最遠的格子，之後每次挑離所有地標最遠的格子
+        # nearest: 每格到最近地標的距離 (走不到的格子記為 0，不會被挑中)
+        nearest = self._reachable(a_star_mg.inf.flow_field(a_star_mg, [seed])[0])
+        for _ in range(self.count):
+            best = max(nearest)
+            if best == 0: break
+
+            idx = nearest.index(best)
+            cell = GridPoint(idx % grid_data.width, idx // grid_data.width)
+            dist, dirs = a_star_mg.inf.flow_field(a_star_mg, [cell])
+            nearest = self._reachable(dist) if not self.dist else list(map(min, nearest, dist))
+            self.cells.append(cell)
+            self.dist.append(dist)
+            self.dirs.append(dirs)
+
+        self._upload(a_star_mg, grid_data.version)
+
+    def restore(self, a_star_mg, cells: list[GridPoint], dist: list[array.array], dirs: list[array.array], version: int):
+        """ [關卡包] 直接使用編譯好的距離表，交給 a_star_mg 的 Context (呼叫前地圖必須已同步) """
+        self.reset()
+        if self.count <= 0: return
+
+        self.cells = cells[:self.count]
+        self.dist = dist[:self.count]
+        self.dirs = dirs[:self.count]
+        self._upload(a_star_mg, version)
+
+    def on_map_edit(self, a_star_mg, start_grid: GridPoint, size: Size, value: int):
+        """ Context 的地圖已更新後呼叫：修補每張距離表，並重新交給 C 端 """
+        if not self.ready: return
+
+        col, row = int(start_grid.col), int(start_grid.row)
+        keep = []
+        for k, cell in enumerate(self.cells):
+            if value == GridMapMarking.WALL and col <= cell.col < col + size.width and row <= cell.row < row + size.height:
+                continue
+
+            if a_star_mg.inf.flow_field_repair(a_star_mg, self.dist[k], self.dirs[k], col, row, size.width, size.height) < 0:
+                self.dist[k], self.dirs[k] = a_star_mg.inf.flow_field(a_star_mg, [cell])
+            keep.append(k)
+
+        self.cells = [self.cells[k] for k in keep]
+        self.dist = [self.dist[k] for k in keep]
+        self.dirs = [self.dirs[k] for k in keep]
+
+        version = self.world_map.version if self.world_map is not None else self.version + 1
+        self._upload(a_star_mg, version)
+
+    def tables_for(self, version: int) -> array.array | None:
+        """ 指定地圖版本的距離表 (版本不同或沒有地標時為 None) """
+        return self.tables if self.version == version else None
+
+    def load(self, a_star_mg, tables: array.array | None):
+        """ [背景執行緒 / 子行程] 把主執行緒的距離表交給自己的 Context (地圖必須是同一個版本) """
+        if tables and a_star_mg.map_synced:
+            a_star_mg.inf.set_landmarks(a_star_mg, tables)
+
+    def reset(self):
+        self.cells = []
+        self.dist = []
+        self.dirs = []
+        self.version = None
+        self.tables = None
+
+    def _upload(self, a_star_mg, version: int):
+        tables = array.array(ArrayTypecode.A_STAR_DIST.value)
+        for dist in self.dist:
+            tables += dist
+
+        if not self.dist or a_star_mg.inf.set_landmarks(a_star_mg, tables) <= 0:
+            a_star_mg.inf.set_landmarks(a_star_mg, None)
+            self.reset()
+            return
+
+        self.tables = tables
+        self.version = version
+
+    @staticmethod
+    def _seed(grid_data) -> GridPoint | None:
+        """ 離地圖中心最近 (依索引順序) 的空格 """
+        collision_map = grid_data.collision_map
+        center = (grid_data.height // 2) * grid_data.width + grid_data.width // 2
+        for idx in range(center, center + len(collision_map)):
+            idx %= len(collision_map)
+            if collision_map[idx] == GridMapMarking.VACUITY:
+                return GridPoint(idx % grid_data.width, idx // grid_data.width)
+        return None
+
+    @staticmethod
+    def _reachable(dist: array.array) -> list[int]:
+        return [0 if d == DIST_UNREACHABLE else d for d in dist]
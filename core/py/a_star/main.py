@@ -1,5 +1,4 @@
 from py.a_star.manage import a_star_mg
-from py.a_star.variable import PositionSamePath
 from py.debug import dbg
 from py.variable import GridPoint
 
@@ -46,29 +45,16 @@ def main_a_star(grid_data, start_pos: GridPoint, end_pos: GridPoint, map_tag: st
     map_name:該地圖名稱
     return:最短路徑經過座標
     '''
-    # 檢查是否已經計算過此地圖的此路徑
-    path_key = PositionSamePath(map_tag, start_pos, end_pos)
-    if path_key in a_star_mg.store_paths:
-        return a_star_mg.store_paths[path_key]
+    # 單組的批次尋路 (不相連的直接回傳空路徑，大地圖會先走 HPA* 的抽象圖)
+    final_path = a_star_mg.find_paths(grid_data, [(start_pos, end_pos)], map_tag)[0]
 
-    # 更新 C 端地圖數據，確保牆壁資料是最新的
-    a_star_mg.update_map_from_grid_data(grid_data, map_tag)
-
-    raw_path = a_star_mg.inf.find_path(a_star_mg, start_pos, end_pos)
-    final_path = []
-
-    if raw_path:
-        final_path = [GridPoint(p[0], p[1]) for p in raw_path]
-
-    if final_path:
-        a_star_mg.store_paths[path_key] = final_path
-
-        # if dbg.enable:
-        #     print(f"請求路徑: {start_pos} -> {end_pos}")
-        #     print(f"路徑長度: {len(final_path)} 步")
-        #     print(f"路徑節點: {final_path}")
-        #     print_map_with_path(grid_data, final_path, start_pos, end_pos)
-    else:
+    if not final_path:
         dbg.error("找不到路徑 (或是發生錯誤)")
 
+    # if dbg.enable:
+    #     print(f"請求路徑: {start_pos} -> {end_pos}")
+    #     print(f"路徑長度: {len(final_path)} 步")
+    #     print(f"路徑節點: {final_path}")
+    #     print_map_with_path(grid_data, final_path, start_pos, end_pos)
+
     return final_path
@@ -1,61 +1,529 @@
+import array
+
+from py.a_star.cache import PathCache
+from py.a_star.flow_field import FlowField
+from py.a_star.hpa import HierarchicalMap, grid_path_cost, raw_path_cost
+from py.a_star.invalidation import octile
+from py.a_star.landmark import LandmarkTable
+from py.a_star.route_table import RouteEntry, RouteTable, perimeter_query
+from py.a_star.variable import HpaVar, RouteKey
 from py.debug import dbg
-from py.trans.a_star import AStarInterface
+from py.game.map.variable import GridMapMarking
+from py.trans.a_star import load_a_star_interface
 from py.trans.base import CInterfaceBase
-from py.trans.variable import VarConfig
-from py.variable import GridPoint
+from py.trans.variable import ArrayTypecode, SearchAlgorithm, VarConfig
+from py.variable import GridPoint, Size
 
 
 class ManageAStar():
     def __init__(self) -> None:
         self.last_map_name = None
+        # 監聽中的 GameWorldMap (整張地圖換掉時重新上傳)
+        self.world_map = None
         self.width = 0
         self.height = 0
 
-        # 存 C 的指標
-        self.c_map = None
-        # 存 C 的結果 buffer
+        # C 端常駐 Context (保存地圖與節點池，多次搜尋之間不重新配置)
+        self.ctx = None
+        # Context 內的地圖是否已與 GameWorldMap 同步 (之後只靠增量編輯維護)
+        self.map_synced = False
+        # 存 C 的結果 buffer (array('h'))，以及共用同一塊記憶體的 C 視圖
         self.out_buffer = None
+        self.c_out_buffer = None
 
-        self.store_paths = {}
+        # 流場快取 (目標建築的範圍 -> 流場)，地圖編輯時就地修補
+        self.flow_fields: dict[RouteKey, FlowField] = {}
+        # 階層式尋路 (大地圖才啟用，於 build_hierarchy 建立)
+        self.hpa = HierarchicalMap()
+        # 地標距離表 (A* 的 ALT heuristic，關卡載入時建立，地圖編輯時就地修補)
+        self.landmarks = LandmarkTable()
+        # 建築間路線表 (關卡載入時建立，地圖編輯時只重算受影響的組合)
+        self.routes = RouteTable()
+        # 路線表以外的建築間路線 (來源建築, 目標建築) -> 路徑，有上限的 LRU (地圖編輯時只作廢受影響的路徑)
+        self.building_paths = PathCache()
 
-        # AStarInterface 實體
+        # AStarInterface (C) 或 PyAStarInterface (純 Python) 實體
         self.inf = None
 
-    def setup(self):
-        try:
-            self.inf = AStarInterface()
-        except Exception as e:
-            dbg.error("a_star 初始化失敗:", e)
+    def setup(self, algorithm: SearchAlgorithm = SearchAlgorithm.A_STAR):
+        # 找不到可用的 C 模組時會退回純 Python 版本，inf 不會是 None
+        self.inf = load_a_star_interface(algorithm)
+
+    def bind_world_map(self, world_map):
+        """ 監聽 GameWorldMap 的格子編輯，同步到 C 端 Context """
+        self.world_map = world_map
+        world_map.add_edit_listener(self.on_map_edit, self.on_map_reset)
+        self.landmarks.bind_world_map(world_map)
 
     def update_map_from_grid_data(self, grid_data, map_name_tag: str):
         """
-        直接從 GridMapData 讀取 1D 物理碰撞表
+        確保 C 端 Context 的地圖與 GameWorldMap 一致
         grid_data: GridMapData 實體
         map_name_tag: 地圖版本標籤 (例如 "Level_1_v5")
         """
-        # 檢查快取：如果地圖版本沒變，就不需要重新 allocate 記憶體
-        if self.last_map_name == map_name_tag: return
+        # 地圖本身由 on_map_edit 增量同步，快取也由 on_map_edit 局部作廢
+        self.last_map_name = map_name_tag
 
-        self.clear_cache()
+        if self.map_synced and self.width == grid_data.width and self.height == grid_data.height:
+            return
 
-        self.last_map_name = map_name_tag
-        self.width = grid_data.width
-        self.height = grid_data.height
+        # 第一次使用或地圖尺寸改變：建立 Context 並整張上傳一次
+        if not self._ensure_context(grid_data.width, grid_data.height): return
+
+        self.inf.load_map(self.ctx, grid_data.collision_map)
+        self.map_synced = True
+
+        dbg.log(f"[A*] Map uploaded: {map_name_tag} ({self.width}x{self.height})")
+
+    def find_paths(self, grid_data, pairs: list[tuple[GridPoint, GridPoint]], map_name_tag: str) -> list[list[GridPoint]]:
+        """
+        [批次尋路] 一次解完多組 (起點, 終點)
+        不相連的組合直接回傳空路徑，重複的組合只算一次，其餘交給 solve_paths (大地圖先走 HPA*)
+        return: 與 pairs 對齊的路徑列表 (找不到路徑為空 list)
+        """
+        results: list[list[GridPoint]] = [[] for _ in pairs]
+        missing: dict[tuple[GridPoint, GridPoint], list[int]] = {}
+
+        for i, (start, end) in enumerate(pairs):
+            # 不同連通區塊一定走不到，不需要搜尋
+            if not grid_data.is_connected(start, end): continue
+            missing.setdefault((start, end), []).append(i)
+
+        if not missing: return results
+
+        self.update_map_from_grid_data(grid_data, map_name_tag)
+        if not self.map_synced: return results
+
+        for pair, path in zip(missing, self.solve_paths(list(missing))):
+            for i in missing[pair]:
+                results[i] = path
+
+        return results
+
+    def solve_paths(self, pairs: list[tuple[GridPoint, GridPoint]]) -> list[list[GridPoint]]:
+        """
+        實際尋路 (不經過快取，呼叫前地圖必須已同步)
+        有階層式抽象圖時先走 HPA*，抽象圖上找不到的再用整張地圖 A* 確認
+        """
+        if not self.hpa.ready:
+            return [raw_to_grid_path(raw) for raw in self.inf.find_paths(self, pairs)]
+
+        results = [self.hpa.find_path(self, start, end) for start, end in pairs]
+
+        fallback = [i for i, path in enumerate(results) if path is None]
+        if fallback:
+            raw_paths = self.inf.find_paths(self, [pairs[i] for i in fallback])
+            for i, raw in zip(fallback, raw_paths):
+                results[i] = raw_to_grid_path(raw)
+
+        return results
+
+    def solve_building_paths(self, queries: list[tuple[list[GridPoint], list[GridPoint]]]) -> list[array.array]:
+        """
+        [建築間尋路] 兩棟建築周圍一圈之間的多起點 / 多終點查詢 (不經過快取，呼叫前地圖必須已同步)
+        有階層式抽象圖時，距離遠的組合挑出兩圈中最接近的一對出入口，一起交給 find_paths (HPA*)
+        其餘組合與找不到路徑的組合一次 C 呼叫
+        return: 與 queries 對齊的 [x0, y0, x1, y1...] (無法抵達為空)
+        """
+        raws: list[array.array | None] = [None] * len(queries)
+
+        far = []
+        if self.hpa.ready:
+            for i, (starts, goals) in enumerate(queries):
+                endpoints = self._hpa_endpoints(starts, goals)
+                if endpoints is not None:
+                    far.append((i, endpoints))
+
+        if far:
+            paths = self.find_paths(self.hpa.grid_data, [endpoints for _, endpoints in far], self.last_map_name)
+            for (i, _), path in zip(far, paths):
+                if path:
+                    raws[i] = grid_to_raw_path(path)
+
+        rest = [i for i, raw in enumerate(raws) if raw is None]
+        if rest:
+            for i, raw in zip(rest, self.inf.find_paths_multi(self, [queries[i] for i in rest])):
+                raws[i] = raw
+
+        return raws
+
+    def _hpa_endpoints(self, starts: list[GridPoint], goals: list[GridPoint]) -> tuple[GridPoint, GridPoint] | None:
+        """ HPA* 的起終點：最靠近終點圈中心的起點，與離它最近且相連的終點 (距離太近回傳 None) """
+        center_col = sum(p.col for p in goals) / len(goals)
+        center_row = sum(p.row for p in goals) / len(goals)
+        start = min(starts, key = lambda p: octile(p.col - center_col, p.row - center_row))
 
-        self.c_map = CInterfaceBase.list_to_c_array(
-            grid_data.collision_map,
-            VarConfig.A_STAR_POINT.value
+        for end in sorted(goals, key = lambda p: octile(p.col - start.col, p.row - start.row)):
+            if not self.hpa.grid_data.is_connected(start, end): continue
+            if octile(end.col - start.col, end.row - start.row) < HpaVar.MIN_ROUTE_COST: return None
+            return start, end
+        return None
+
+    def solve_bounded(self, queries: list[tuple[GridPoint, GridPoint, tuple[int, int, int, int]]]) -> list[list[GridPoint]]:
+        """ 限定範圍的批次尋路 (給 HPA* 的區塊內搜尋用) """
+        if not queries: return []
+        return [raw_to_grid_path(raw) for raw in self.inf.find_paths_bounded(self, queries)]
+
+    def bounded_costs(self, queries: list[tuple[GridPoint, GridPoint, tuple[int, int, int, int]]]) -> list[int | None]:
+        """ 同 solve_bounded，但只回傳路徑代價 (找不到為 None) """
+        if not queries: return []
+        return [
+            raw_path_cost(raw) if raw else None
+            for raw in self.inf.find_paths_bounded(self, queries)
+        ]
+
+    def build_hierarchy(self, grid_data, map_name_tag: str):
+        """
+        [HPA*] 關卡載入完成後建立階層式抽象圖
+        小地圖直接整張 A* 就夠快，不建立
+        """
+        self.hpa.reset()
+        if grid_data.width * grid_data.height < HpaVar.MIN_CELLS: return
+
+        self.update_map_from_grid_data(grid_data, map_name_tag)
+        if not self.map_synced: return
+
+        self.hpa.build(self, grid_data)
+        dbg.log(
+            f"[A*] HPA* built: {self.hpa.cluster_cols}x{self.hpa.cluster_rows} clusters, "
+            f"{sum(len(edges) for edges in self.hpa.intra.values())} nodes"
         )
 
+    def build_landmarks(self, grid_data, map_name_tag: str):
+        """ [ALT] 關卡載入完成後挑選地標並計算距離表 (之後的 A* 都以此加強 heuristic) """
+        self.update_map_from_grid_data(grid_data, map_name_tag)
+        if not self.map_synced: return
+
+        self.landmarks.build(self, grid_data)
+        if self.landmarks.ready:
+            dbg.log(f"[A*] Landmarks built: {len(self.landmarks.cells)} tables (v{self.landmarks.version})")
+
+    def restore_landmarks(
+        self, grid_data, cells: list[GridPoint], dist: list[array.array], dirs: list[array.array], map_name_tag: str
+    ):
+        """ [關卡包] 使用編譯好的地標距離表 (取代 build_landmarks) """
+        self.update_map_from_grid_data(grid_data, map_name_tag)
+        if not self.map_synced: return
+
+        self.landmarks.restore(self, cells, dist, dirs, grid_data.version)
+
+    def restore_route_table(self, grid_data, keys: list[RouteKey], routes: dict, map_name_tag: str):
+        """ [關卡包] 使用編譯好的建築間路線 (取代 build_route_table) """
+        self.update_map_from_grid_data(grid_data, map_name_tag)
+        if not self.map_synced: return
+
+        self.routes.restore(keys, routes, grid_data.version)
+        dbg.log(f"[A*] Route table restored: {len(self.routes.keys)} buildings, {len(self.routes)} routes")
+
+    def build_route_table(self, grid_data, keys: list[RouteKey], map_name_tag: str):
+        """ [路線表] 關卡載入完成後預先計算所有建築之間的路線 """
+        self.update_map_from_grid_data(grid_data, map_name_tag)
+        if not self.map_synced: return
+
+        self.routes.build(self, grid_data, keys)
+        dbg.log(f"[A*] Route table built: {len(self.routes.keys)} buildings, {len(self.routes)} routes")
+
+    def get_route(
+        self, grid_data, source: RouteKey, target: RouteKey, map_name_tag: str, wait: bool = True
+    ) -> list[GridPoint] | None:
+        """
+        [路線表] 取得兩棟建築之間預先算好的路線
+        None = 路線表沒有這組建築 (呼叫端自行尋路)，空 list = 無法抵達
+        """
+        entry, reverse = self.get_route_entry(grid_data, source, target, map_name_tag, wait)
+        if entry is None: return None
+        return entry.path(reverse)
+
+    def get_route_entry(
+        self, grid_data, source: RouteKey, target: RouteKey, map_name_tag: str, wait: bool = True
+    ) -> tuple[RouteEntry | None, bool]:
+        """
+        [路線表] 同 get_route，但回傳 (路線, 是否需要反轉)
+        只需要代價時可直接讀 entry.cost，不必建立 GridPoint 路徑
+        wait = False 時不在這一幀重算被地圖編輯影響的組合 (由 PathService 在背景重算)，這些組合回傳 None
+        """
+        if not self.routes.ready: return None, False
+
+        if wait and self.routes.dirty:
+            self.update_map_from_grid_data(grid_data, map_name_tag)
+            self.routes.refresh(self, grid_data)
+
+        return self.routes.get_entry(source, target)
+
+    def plan_converging_paths(
+        self, grid_data, target: RouteKey, sources: list[RouteKey], map_name_tag: str
+    ) -> dict[RouteKey, list[GridPoint]]:
+        """
+        [多對一] 從目標建築周圍一圈做一次反向 Dijkstra，所有來源建築的出入口都確定距離就停止
+        每棟來源建築取自己出入口中實際代價最小的一格，沿流場走到目標 (N 棟建築只需一次搜尋)
+        結果同時存入 building_paths，空 list = 無法抵達
+        """
+        col, row, width, height = target
+        goal_candidates = grid_data.get_access_candidates(GridPoint(col, row), Size(width, height))
+        goal_components = {component for _, component in goal_candidates}
+
+        # 只有與目標相連的出入口需要等 (走不到的會讓搜尋擴散到整個區塊)
+        source_cells: dict[RouteKey, list[GridPoint]] = {}
+        for key in sources:
+            if key == target or key in source_cells: continue
+            col, row, width, height = key
+            source_cells[key] = [
+                p for p, component in grid_data.get_access_candidates(GridPoint(col, row), Size(width, height))
+                if component in goal_components
+            ]
+
+        field = None
+        stops = [p for cells in source_cells.values() for p in cells]
+        if stops:
+            self.update_map_from_grid_data(grid_data, map_name_tag)
+            if not self.map_synced: return {}
+
+            dist, dirs = self.inf.flow_field(self, [p for p, _ in goal_candidates], stops)
+            field = FlowField(self.width, self.height, dist, dirs)
+
+        plans: dict[RouteKey, list[GridPoint]] = {}
+        for key, cells in source_cells.items():
+            path = []
+            if field is not None:
+                reachable = [(field.distance(p), i, p) for i, p in enumerate(cells) if field.distance(p) is not None]
+                if reachable:
+                    path = field.trace(min(reachable)[2])
+
+            plans[key] = path
+            self.building_paths.put(key, target, path)
+
+        return plans
+
+    def get_building_path(self, source: RouteKey, target: RouteKey) -> list[GridPoint] | None:
+        """ 已算過的建築間路線 (不含路線表，含反方向)，None = 還沒算過 (或已被地圖編輯作廢) """
+        return self.building_paths.get(source, target)
+
+    def find_building_paths(self, grid_data, pairs: list[tuple[RouteKey, RouteKey]], map_name_tag: str) -> list[list[GridPoint]]:
+        """
+        [建築間尋路] 來源建築周圍一圈 -> 目標建築周圍一圈的最短路徑
+        多起點 / 多終點搜尋，不需要先挑出入口，所有組合一次 C 呼叫 (大地圖上距離遠的走 HPA*，見 solve_building_paths)
+        結果存入 building_paths (地圖編輯時只作廢受影響的組合)
+        return: 與 pairs 對齊的路徑列表 (無法抵達為空 list)
+        """
+        results: list[list[GridPoint]] = [None] * len(pairs)
+        missing: dict[tuple[RouteKey, RouteKey], list[int]] = {}
+        queries = []
+        perimeters = {}
+
+        for i, pair in enumerate(pairs):
+            cached = self.building_paths.get(*pair)
+            if cached is not None:
+                results[i] = cached
+            elif pair in missing:
+                missing[pair].append(i)
+            else:
+                query = perimeter_query(grid_data, pair[0], pair[1], perimeters)
+                if query is None:
+                    results[i] = []
+                    self.building_paths.put(*pair, [])
+                    continue
+
+                missing[pair] = [i]
+                queries.append(query)
+
+        if not missing: return results
+
+        self.update_map_from_grid_data(grid_data, map_name_tag)
+        if self.map_synced:
+            paths = [raw_to_grid_path(raw) for raw in self.solve_building_paths(queries)]
+        else:
+            paths = [[] for _ in queries]
+
+        for pair, path in zip(missing, paths):
+            self.building_paths.put(*pair, path)
+            for i in missing[pair]:
+                results[i] = path
+
+        return results
+
+    def find_building_costs(
+        self, grid_data, pairs: list[tuple[RouteKey, RouteKey]], map_name_tag: str, max_cost: int | None = None
+    ) -> list[int | None]:
+        """
+        [建築間代價] 與 find_building_paths 相同的組合，但只計算代價 (不回溯路徑，也不寫入 building_paths)
+        building_paths 已有的組合直接取用，其餘一次 C 呼叫
+        max_cost: 代價上限，搜尋超過就停止 (None 代表不限)
+        return: 與 pairs 對齊的代價列表 (無法抵達或超過上限為 None)
+        """
+        results: list[int | None] = [None] * len(pairs)
+        missing: dict[tuple[RouteKey, RouteKey], list[int]] = {}
+        queries = []
+        perimeters = {}
+
+        for i, pair in enumerate(pairs):
+            cached = self.building_paths.get(*pair)
+            if cached is not None:
+                cost = grid_path_cost(cached) if cached else None
+                if cost is not None and (max_cost is None or cost <= max_cost):
+                    results[i] = cost
+            elif pair in missing:
+                missing[pair].append(i)
+            else:
+                query = perimeter_query(grid_data, pair[0], pair[1], perimeters)
+                if query is None: continue
+
+                missing[pair] = [i]
+                queries.append(query)
+
+        if not missing: return results
+
+        self.update_map_from_grid_data(grid_data, map_name_tag)
+        if not self.map_synced: return results
+
+        for pair, cost in zip(missing, self.inf.find_costs_multi(self, queries, max_cost)):
+            for i in missing[pair]:
+                results[i] = cost
+
+        return results
+
+    def get_flow_field(self, grid_data, key: RouteKey, goals: list[GridPoint], map_name_tag: str) -> FlowField | None:
+        """
+        [流場] 取得 (或建立) 以 goals 為終點的距離 / 方向場
+        key: 目標建築的範圍 (goals 為建築周圍一圈的出入口)
+        只在第一次取用時整張擴散，之後的地圖編輯由 on_map_edit 局部修補
+        """
+        field = self.flow_fields.get(key)
+        if field is not None: return field
+
+        self.update_map_from_grid_data(grid_data, map_name_tag)
+        if not self.map_synced: return None
+
+        dist, dirs = self.inf.flow_field(self, goals)
+        field = FlowField(self.width, self.height, dist, dirs)
+        self.flow_fields[key] = field
+        return field
+
+    def on_map_edit(self, start_grid: GridPoint, size: Size, value: int):
+        """ GameWorldMap 註冊/移除物件時呼叫，只修改受影響的格子與路徑 """
+        self.building_paths.invalidate_rect(start_grid, size, value)
+        self.hpa.mark_dirty(start_grid, size)
+        self.routes.mark_dirty(start_grid, size, value)
+
+        if not self.map_synced:
+            self._drop_flow_fields(list(self.flow_fields))
+            self.landmarks.reset()
+            return
+
+        if size.width == 1 and size.height == 1:
+            self.inf.set_cell(self.ctx, start_grid.col, start_grid.row, value)
+        else:
+            self.inf.set_rect(self.ctx, start_grid.col, start_grid.row, size.width, size.height, value)
+
+        self._repair_flow_fields(start_grid, size, value)
+        self.landmarks.on_map_edit(self, start_grid, size, value)
+
+    def _repair_flow_fields(self, start_grid: GridPoint, size: Size, value: int):
+        """
+        在 C 端就地修補所有快取中的流場 (只重算距離會改變的格子)
+        變成路且碰到建築外圍一圈時出入口會增加，修補無法新增終點，改為整張作廢
+        """
+        if not self.flow_fields: return
+
+        col, row = int(start_grid.col), int(start_grid.row)
+        max_c, max_r = col + size.width - 1, row + size.height - 1
+
+        stale = []
+        for key, field in self.flow_fields.items():
+            if value != GridMapMarking.WALL and (
+                key[0] - 1 <= max_c and key[0] + key[2] >= col
+                and key[1] - 1 <= max_r and key[1] + key[3] >= row
+            ):
+                stale.append(key)
+                continue
+
+            if self.inf.flow_field_repair(self, field.dist, field.dirs, col, row, size.width, size.height) < 0:
+                stale.append(key)
+
+        self._drop_flow_fields(stale)
+
+    def _drop_flow_fields(self, keys: list[RouteKey]):
+        """ 從快取移除流場，並通知還持有它的士兵重新取得 """
+        for key in keys:
+            self.flow_fields.pop(key).stale = True
+
+    def on_map_reset(self):
+        """ GameWorldMap 清空 (或關卡包整張換掉) 時呼叫 """
+        self.clear_cache()
+        self.hpa.reset()
+        self.landmarks.reset()
+
+        if not self.map_synced: return
+
+        # 關卡包整張換掉的地圖 (version 不為 0)：下次使用前整張重新上傳
+        if self.world_map is not None and self.world_map.version:
+            self.map_synced = False
+            return
+
+        # 清空後整張地圖都是路，直接在 C 端清零即可 (地標距離表一併停用)
+        self.inf.load_map(self.ctx, None)
+
+    def _ensure_context(self, width: int, height: int) -> bool:
+        """ 尺寸相同就沿用舊 Context，否則重新建立 """
+        if self.ctx and self.width == width and self.height == height:
+            return True
+
+        self.release()
+
+        self.ctx = self.inf.create(width, height)
+        if not self.ctx:
+            dbg.error(f"[A*] Context 建立失敗 ({width}x{height})")
+            return False
+
+        self.width = width
+        self.height = height
+
         # 重設輸出 Buffer (大小 = 寬 * 高 * 2 (存 x, y))
         total_size = self.width * self.height
-        self.out_buffer = (VarConfig.A_STAR_OUT_BUFFER.value * (total_size * 2))()
+        self.out_buffer = array.array(ArrayTypecode.A_STAR_OUT_BUFFER.value, [0]) * (total_size * 2)
+        self.c_out_buffer = CInterfaceBase.buffer_to_c_array(
+            self.out_buffer,
+            VarConfig.A_STAR_OUT_BUFFER.value
+        )
+
+        dbg.log(f"[A*] Context created ({self.width}x{self.height})")
+        return True
 
-        dbg.log(f"[A*] Map updated to: {map_name_tag} ({self.width}x{self.height})")
+    def release(self):
+        """ 釋放 C 端 Context """
+        if self.ctx:
+            self.inf.destroy(self.ctx)
+
+        self.ctx = None
+        self.map_synced = False
+        self.hpa.reset()
+        self.landmarks.reset()
+        self.out_buffer = None
+        self.c_out_buffer = None
+        self.width = 0
+        self.height = 0
 
     def clear_cache(self):
-        """ 清空所有已儲存的路徑 """
-        if not self.store_paths: return
-        self.store_paths.clear()
+        """ 清空所有已儲存的路徑 (並輸出這段期間的快取統計) """
+        stats = self.building_paths.stats
+        if stats.hits or stats.misses:
+            dbg.log(
+                f"[A*] Path cache: hit {stats.hits} (reverse {stats.reverse_hits}) / miss {stats.misses}, "
+                f"evict {stats.evictions}, invalidate {stats.invalidations}, "
+                f"{len(self.building_paths)} paths / {self.building_paths.cells} cells"
+            )
+            stats.reset()
+
+        self._drop_flow_fields(list(self.flow_fields))
+        self.building_paths.clear()
+        self.routes.reset()
+
+def raw_to_grid_path(raw_path) -> list[GridPoint]:
+    """ 將 C 回傳的 [x0, y0, x1, y1...] 轉成 GridPoint 路徑 """
+    coords = iter(raw_path)
+    return [GridPoint(col, row) for col, row in zip(coords, coords)]
+
+def grid_to_raw_path(path: list[GridPoint]) -> array.array:
+    """ raw_to_grid_path 的反向 (HPA* 的路徑與 C 的結果存成相同格式) """
+    return array.array(ArrayTypecode.A_STAR_OUT_BUFFER.value, [v for p in path for v in (int(p.col), int(p.row))])
 
 a_star_mg = ManageAStar()
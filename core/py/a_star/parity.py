@@ -0,0 +1,292 @@
+"""
+[尋路正確性檢查]
+隨機地圖上以暴力 Dijkstra (8 方向、斜走不可切角) 當作標準答案，逐一比對每個尋路後端：
+C 端 A* / JPS (astar_solve、批次、多起點搜尋與只算代價的多起點搜尋) 與純 Python 版本 (PyAStarInterface) 的 A* / JPS
+- 路徑代價必須與標準答案相同 (直 10 / 斜 14)，走不到時必須回傳空路徑
+- 路徑的每一步都是相鄰格、不經過牆壁、斜走時兩個直向鄰居都必須是路
+- 一半的地圖另外建立地標距離表 (ALT heuristic)，確認下界不會讓結果變差
+另外在隨機註冊 / 移除物件的 GameWorldMap 上，以同一個 Dijkstra 檢查連通區塊 (is_connected) 的判斷
+執行方式 (於 core 目錄):
+    python -m py.a_star.parity [--maps 300] [--seed 0]
+有任何不一致時列出前幾筆並以非 0 結束 (較少地圖的版本收在 tests/test_parity.py，與其他測試一起執行)
+"""
+import argparse
+import array
+import heapq
+import random
+import sys
+from dataclasses import dataclass
+
+from py.a_star.manage import ManageAStar
+from py.a_star.variable import COST_DIAGONAL, COST_STRAIGHT
+from py.compile_dll import locate_shared_library
+from py.game.map.world_map import GameWorldMap
+from py.path.manager import PathConfig
+from py.trans.a_star import AStarInterface
+from py.trans.a_star_py import PyAStarInterface
+from py.trans.variable import ArrayTypecode, SearchAlgorithm
+from py.variable import GridPoint, Size
+
+# 8 方向 (dx, dy, 代價)
+DIRECTIONS = (
+    (0, -1, COST_STRAIGHT), (0, 1, COST_STRAIGHT), (-1, 0, COST_STRAIGHT), (1, 0, COST_STRAIGHT),
+    (-1, -1, COST_DIAGONAL), (1, -1, COST_DIAGONAL), (-1, 1, COST_DIAGONAL), (1, 1, COST_DIAGONAL),
+)
+# 每張地圖的點對點 / 多起點查詢數量
+POINT_QUERIES = 12
+MULTI_QUERIES = 4
+# 地圖尺寸範圍與牆壁比例
+MAP_SIZE = ((4, 48), (4, 32))
+WALL_DENSITIES = (0.0, 0.1, 0.2, 0.3, 0.4)
+# 連通區塊檢查：地圖數量 (相對於 --maps)、每張地圖的編輯次數、每次編輯後的查詢起點數
+COMPONENT_MAP_RATIO = 5
+COMPONENT_EDITS = 40
+COMPONENT_STARTS = 4
+# 列出的不一致筆數上限
+REPORT_LIMIT = 10
+
+
+@dataclass
+class ParityMap:
+    """ 檢查用的地圖 (欄位與 GameWorldMap 相容，可直接交給 ManageAStar) """
+    width: int
+    height: int
+    collision_map: array.array
+    version: int = 0
+
+    def free(self, col: int, row: int) -> bool:
+        return 0 <= col < self.width and 0 <= row < self.height and self.collision_map[row * self.width + col] == 0
+
+
+def random_map(rng: random.Random) -> ParityMap:
+    """ 隨機散落的牆壁 + 幾道長牆 (製造需要繞路的地形) """
+    width, height = rng.randint(*MAP_SIZE[0]), rng.randint(*MAP_SIZE[1])
+    density = rng.choice(WALL_DENSITIES)
+    cells = [1 if rng.random() < density else 0 for _ in range(width * height)]
+
+    for _ in range(rng.randint(0, 3)):
+        if rng.random() < 0.5:
+            col = rng.randrange(width)
+            for row in range(rng.randrange(height), height):
+                cells[row * width + col] = 1
+        else:
+            row = rng.randrange(height)
+            for col in range(rng.randrange(width), width):
+                cells[row * width + col] = 1
+
+    return ParityMap(width, height, array.array(ArrayTypecode.A_STAR_MAP.value, cells))
+
+def dijkstra(grid: ParityMap, starts: list[GridPoint]) -> list[int | None]:
+    """ [標準答案] 多起點 Dijkstra，回傳每格的最短代價 (走不到為 None) """
+    width = grid.width
+    dist: list[int | None] = [None] * (width * grid.height)
+    heap = []
+    for p in starts:
+        idx = p.row * width + p.col
+        if dist[idx] is None:
+            dist[idx] = 0
+            heap.append((0, idx))
+    heapq.heapify(heap)
+
+    while heap:
+        cost, idx = heapq.heappop(heap)
+        if cost > dist[idx]: continue
+
+        col, row = idx % width, idx // width
+        for dx, dy, step in DIRECTIONS:
+            n_col, n_row = col + dx, row + dy
+            if not grid.free(n_col, n_row): continue
+            if dx and dy and not (grid.free(col + dx, row) and grid.free(col, row + dy)): continue
+
+            n_idx = n_row * width + n_col
+            if dist[n_idx] is None or cost + step < dist[n_idx]:
+                dist[n_idx] = cost + step
+                heapq.heappush(heap, (cost + step, n_idx))
+
+    return dist
+
+def path_error(grid: ParityMap, raw, starts: set, goals: set, expected: int | None) -> str | None:
+    """ 檢查 [x0, y0, x1, y1...] 路徑，正確時回傳 None """
+    if expected is None:
+        return None if not raw else f"應該走不到，卻回傳 {len(raw) // 2} 步"
+    if not raw:
+        return f"回傳空路徑 (應為代價 {expected})"
+
+    cells = list(zip(raw[0::2], raw[1::2]))
+    if cells[0] not in starts: return f"起點 {cells[0]} 不在起點集合內"
+    if cells[-1] not in goals: return f"終點 {cells[-1]} 不在終點集合內"
+
+    cost = 0
+    for (x0, y0), (x1, y1) in zip(cells, cells[1:]):
+        dx, dy = x1 - x0, y1 - y0
+        if max(abs(dx), abs(dy)) != 1: return f"{(x0, y0)} -> {(x1, y1)} 不是相鄰格"
+        if not grid.free(x1, y1): return f"經過牆壁 {(x1, y1)}"
+        if dx and dy:
+            if not (grid.free(x0 + dx, y0) and grid.free(x0, y0 + dy)): return f"{(x0, y0)} -> {(x1, y1)} 切角"
+            cost += COST_DIAGONAL
+        else:
+            cost += COST_STRAIGHT
+
+    if cost != expected: return f"代價 {cost} (應為 {expected})"
+    return None
+
+def free_cells(grid: ParityMap) -> list[GridPoint]:
+    return [GridPoint(idx % grid.width, idx // grid.width) for idx, v in enumerate(grid.collision_map) if v == 0]
+
+def backends() -> list[tuple[str, object]]:
+    """ 所有可用的尋路後端 (找不到 C 模組時只檢查純 Python 版本) """
+    result = []
+    for lib_path in locate_shared_library(PathConfig.a_star):
+        try:
+            result.append(("C A*", AStarInterface(SearchAlgorithm.A_STAR, lib_path)))
+            result.append(("C JPS", AStarInterface(SearchAlgorithm.JPS, lib_path)))
+            break
+        except (OSError, AttributeError) as e:
+            print(f"無法使用 {lib_path.name}: {e}")
+    if not result:
+        print("找不到可用的 C 模組，只檢查純 Python 版本")
+
+    result.append(("Py A*", PyAStarInterface(SearchAlgorithm.A_STAR)))
+    result.append(("Py JPS", PyAStarInterface(SearchAlgorithm.JPS)))
+    return result
+
+def check_map(grid: ParityMap, rng: random.Random, inf, landmarks: bool) -> tuple[int, list[str]]:
+    """ 在一張地圖上檢查一個後端，回傳 (查詢數, 不一致的說明) """
+    cells = free_cells(grid)
+    if not cells: return 0, []
+
+    solver = ManageAStar()
+    solver.inf = inf
+    solver.update_map_from_grid_data(grid, "parity")
+    if not solver.map_synced: return 0, ["Context 建立失敗"]
+    if landmarks:
+        solver.landmarks.build(solver, grid)
+
+    errors = []
+    pairs = [(rng.choice(cells), rng.choice(cells)) for _ in range(POINT_QUERIES)]
+    singles = [inf.find_path(solver, start, end) for start, end in pairs]
+    batch = inf.find_paths(solver, pairs)
+
+    for (start, end), single, batched in zip(pairs, singles, batch):
+        expected = dijkstra(grid, [start])[end.row * grid.width + end.col]
+        for mode, raw in (("astar_solve", single), ("batch", batched)):
+            error = path_error(grid, raw, {(start.col, start.row)}, {(end.col, end.row)}, expected)
+            if error:
+                errors.append(f"{mode} {start} -> {end}: {error}")
+
+    queries = [
+        (rng.sample(cells, min(len(cells), rng.randint(1, 6))), rng.sample(cells, min(len(cells), rng.randint(1, 6))))
+        for _ in range(MULTI_QUERIES)
+    ]
+    expected_costs = []
+    for (starts, goals), raw in zip(queries, inf.find_paths_multi(solver, queries)):
+        dist = dijkstra(grid, starts)
+        reachable = [dist[p.row * grid.width + p.col] for p in goals if dist[p.row * grid.width + p.col] is not None]
+        expected = min(reachable) if reachable else None
+        expected_costs.append(expected)
+        error = path_error(grid, raw, {(p.col, p.row) for p in starts}, {(p.col, p.row) for p in goals}, expected)
+        if error:
+            errors.append(f"multi {len(starts)} -> {len(goals)}: {error}")
+
+    # 只算代價 (不限 / 有上限，超過上限視為無法抵達)
+    bounds = (None, rng.randint(0, grid.width * COST_STRAIGHT))
+    for max_cost in bounds:
+        costs = inf.find_costs_multi(solver, queries, max_cost)
+        for (starts, goals), expected, cost in zip(queries, expected_costs, costs):
+            if expected is not None and max_cost is not None and expected > max_cost:
+                expected = None
+            if cost != expected:
+                errors.append(f"cost {len(starts)} -> {len(goals)} (上限 {max_cost}): {cost}，應為 {expected}")
+
+    solver.release()
+    return len(pairs) * 2 + len(queries) * (1 + len(bounds)), errors
+
+def check_components(world_map: GameWorldMap, rng: random.Random, edits: list[tuple[bool, GridPoint, Size]]) -> tuple[int, list[str]]:
+    """ 依序套用 (是否變成牆, 起點, 大小) 的編輯，每次編輯後比對 is_connected 與 Dijkstra 是否走得到 """
+    grid = ParityMap(world_map.width, world_map.height, world_map.collision_map)
+    queries = 0
+    errors = []
+
+    for step, (wall, start_grid, size) in enumerate(edits):
+        if wall:
+            world_map.register_object(object(), start_grid, size)
+        else:
+            world_map.unregister_object(start_grid, size)
+
+        cells = free_cells(grid)
+        if not cells: continue
+        for start in rng.sample(cells, min(len(cells), COMPONENT_STARTS)):
+            dist = dijkstra(grid, [start])
+            for end in cells:
+                queries += 1
+                expected = dist[end.row * grid.width + end.col] is not None
+                if world_map.is_connected(start, end) != expected:
+                    errors.append(f"edit {step} {start} -> {end}: is_connected 應為 {expected}")
+    return queries, errors
+
+def random_edits(world_map: GameWorldMap, rng: random.Random) -> list[tuple[bool, GridPoint, Size]]:
+    edits = []
+    for _ in range(COMPONENT_EDITS):
+        col, row = rng.randrange(world_map.width), rng.randrange(world_map.height)
+        size = Size(rng.randint(1, 3), rng.randint(1, 3))
+        edits.append((rng.random() < 0.6, GridPoint(col, row), size))
+    return edits
+
+def component_errors(maps: int, seed: int) -> tuple[int, int, list[str]]:
+    """ 連通區塊 (ComponentLabels) 的增量維護與 Dijkstra 比對，回傳 (地圖數, 查詢數, 不一致的說明) """
+    rng = random.Random(seed)
+    queries = 0
+    errors = []
+
+    # 固定案例：(2, 1) 被四面的牆圍住，外圍角落的空格不能與它合併
+    world_map = GameWorldMap(5, 3)
+    count, case_errors = check_components(world_map, rng, [
+        (True, GridPoint(1, 1), Size(2, 2)), (True, GridPoint(2, 0), Size(3, 2)), (False, GridPoint(2, 1), Size(3, 1)),
+    ])
+    queries += count
+    errors += [f"fixed case {error}" for error in case_errors]
+
+    count = max(1, maps // COMPONENT_MAP_RATIO)
+    for i in range(count):
+        world_map = GameWorldMap(rng.randint(*MAP_SIZE[0]), rng.randint(*MAP_SIZE[1]))
+        queries_i, map_errors = check_components(world_map, rng, random_edits(world_map, rng))
+        queries += queries_i
+        errors += [f"map {i} ({world_map.width}x{world_map.height}) {error}" for error in map_errors]
+    return count + 1, queries, errors
+
+def backend_errors(inf, maps: int, seed: int) -> tuple[int, list[str]]:
+    """ 在 maps 張隨機地圖上檢查一個後端，回傳 (查詢數, 不一致的說明) """
+    rng = random.Random(seed)
+    queries = 0
+    errors = []
+    for i in range(maps):
+        grid = random_map(rng)
+        count, map_errors = check_map(grid, rng, inf, landmarks = i % 2 == 1)
+        queries += count
+        errors += [f"map {i} ({grid.width}x{grid.height}) {error}" for error in map_errors]
+    return queries, errors
+
+def report(name: str, maps: int, queries: int, errors: list[str]) -> bool:
+    print(f"{name:7} {maps} maps, {queries} queries: {'ok' if not errors else f'{len(errors)} mismatches'}")
+    for error in errors[:REPORT_LIMIT]:
+        print(f"    {error}")
+    return not errors
+
+def run_components(maps: int, seed: int) -> bool:
+    return report("Labels", *component_errors(maps, seed))
+
+def run_parity(maps: int, seed: int) -> bool:
+    ok = True
+    for name, inf in backends():
+        ok &= report(name, maps, *backend_errors(inf, maps, seed))
+    return ok
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description = "尋路正確性檢查 (與暴力 Dijkstra 比對)")
+    parser.add_argument("--maps", type = int, default = 300, help = "每個後端檢查的隨機地圖數量")
+    parser.add_argument("--seed", type = int, default = 0, help = "亂數種子")
+    args = parser.parse_args()
+
+    ok = run_parity(args.maps, args.seed)
+    ok &= run_components(args.maps, args.seed)
+    sys.exit(0 if ok else 1)
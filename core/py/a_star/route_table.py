@@ -0,0 +1,345 @@
+import array
+import itertools
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from dataclasses import dataclass, field
+
+from py.a_star.hpa import raw_path_cost
+from py.a_star.invalidation import expand_rect, rects_overlap, route_invalidated
+from py.a_star.variable import RouteKey, RouteTableVar
+from py.debug import dbg
+from py.game.map.variable import GridMapMarking
+from py.trans.variable import ArrayTypecode, SearchAlgorithm
+from py.variable import GridPoint, Size
+
+# 兩棟建築的 Key 依大小排序 (A->B 與 B->A 共用同一條路線)
+RoutePair = tuple[RouteKey, RouteKey]
+
+
+def route_key(grid: GridPoint, size: Size) -> RouteKey:
+    """ 建築範圍 -> 路線表 Key """
+    return (int(grid.col), int(grid.row), size.width, size.height)
+
+def perimeter_rect(key: RouteKey) -> RouteKey:
+    """ 建築周圍一圈的範圍 (路線的起終點都在這個矩形內) """
+    col, row, width, height = key
+    return (col - 1, row - 1, width + 2, height + 2)
+
+def perimeter_query(grid_data, source: RouteKey, target: RouteKey, perimeters: dict) -> tuple[list[GridPoint], list[GridPoint]] | None:
+    """
+    兩棟建築周圍一圈之間的多起點 / 多終點查詢 (只保留兩邊共同連通區塊內的格子)
+    perimeters: 建築 -> (周圍一圈的空格, 各格的連通區塊)，同一批次共用
+    兩棟建築不相連回傳 None
+    """
+    for key in (source, target):
+        if key not in perimeters:
+            col, row, width, height = key
+            points = grid_data.get_access_points(GridPoint(col, row), Size(width, height))
+            perimeters[key] = (points, [grid_data.components.component_of(p) for p in points])
+
+    (a_points, a_components), (b_points, b_components) = perimeters[source], perimeters[target]
+    shared = set(a_components) & set(b_components)
+    if not shared: return None
+
+    # 整圈都相連時直接用快取的 list (批次內同一棟建築只會上傳一次)
+    def connected(points: list[GridPoint], components: list[int]) -> list[GridPoint]:
+        if all(component in shared for component in components): return points
+        return [p for p, component in zip(points, components) if component in shared]
+
+    return connected(a_points, a_components), connected(b_points, b_components)
+
+@dataclass
+class RouteEntry:
+    """ 兩棟建築之間的路線 (Key 較小的建築 -> Key 較大的建築) """
+    # 路線實際使用的出入口 (無法抵達為 None)
+    start: GridPoint | None
+    end: GridPoint | None
+    # [x0, y0, x1, y1...]，無法抵達為空
+    raw: array.array
+    # 直 10 / 斜 14，無法抵達為 None
+    cost: int | None = None
+    # 路徑包圍盒 (min_col, min_row, max_col, max_row)
+    bbox: tuple[int, int, int, int] | None = None
+
+    # 第一次取用時才轉成 GridPoint (同一條路線的士兵共用)
+    _path: list[GridPoint] | None = field(default = None, repr = False)
+    _reverse_path: list[GridPoint] | None = field(default = None, repr = False)
+
+    @property
+    def steps(self) -> int:
+        return len(self.raw) // 2
+
+    def path(self, reverse: bool = False) -> list[GridPoint]:
+        if self._path is None:
+            coords = iter(self.raw)
+            self._path = [GridPoint(col, row) for col, row in zip(coords, coords)]
+        if not reverse: return self._path
+
+        if self._reverse_path is None:
+            self._reverse_path = self._path[::-1]
+        return self._reverse_path
+
+@dataclass
+class GridSnapshot:
+    """ 傳給其他行程的地圖 (只帶 ManageAStar 需要的欄位) """
+    width: int
+    height: int
+    collision_map: bytearray
+    # 同一個地圖版本的地標距離表 (None = 不使用)
+    landmarks: array.array | None = None
+
+
+def _solve_chunk(
+    snapshot: GridSnapshot, algorithm: SearchAlgorithm, queries: list[tuple[list[GridPoint], list[GridPoint]]]
+) -> list[array.array]:
+    """ [行程池] 在子行程建立自己的 Context 解一批路線 """
+    # 子行程才 import，避免與 manage 循環 import
+    from py.a_star.manage import ManageAStar
+
+    worker_mg = ManageAStar()
+    worker_mg.setup(algorithm)
+    worker_mg.update_map_from_grid_data(snapshot, "route_table")
+    if not worker_mg.map_synced:
+        return [array.array(ArrayTypecode.A_STAR_OUT_BUFFER.value) for _ in queries]
+    worker_mg.landmarks.load(worker_mg, snapshot.landmarks)
+
+    paths = worker_mg.inf.find_paths_multi(worker_mg, queries)
+    worker_mg.release()
+    return paths
+
+
+class RouteTable:
+    """
+    [建築間路線表]
+    建築在關卡中不會移動，任兩棟建築之間的路線在地圖沒被編輯前都不會變
+    路線是兩棟建築周圍一圈之間的最短路徑 (多起點 / 多終點搜尋，不需要先挑出入口)
+    - 載入關卡時一次算完所有組合 (數量多時可交給行程池)
+    - 地圖編輯時只把受影響的組合標記為 dirty，下次查詢前整批重算
+      (或交給 PathService 在背景重算，期間這些組合查不到路線)
+    A->B 與 B->A 是同一條路線，所以只存一個方向，另一個方向直接反轉
+    """
+    def __init__(self):
+        self.keys: list[RouteKey] = []
+        self.version = -1
+        self.ready = False
+
+        self._routes: dict[RoutePair, RouteEntry] = {}
+        # 格子 -> 經過該格的路線
+        self._cell_index: dict[tuple[int, int], set[RoutePair]] = {}
+        self._dirty: set[RoutePair] = set()
+        # 已交給背景執行緒重算、還沒寫回的組合
+        self._refreshing: set[RoutePair] = set()
+
+    def __len__(self) -> int:
+        return len(self._routes)
+
+    @property
+    def dirty(self) -> bool:
+        return bool(self._dirty or self._refreshing)
+
+    @property
+    def refresh_pending(self) -> bool:
+        """ 有還沒交給背景重算的 dirty 組合 """
+        return bool(self._dirty)
+
+    def reset(self):
+        self.keys = []
+        self.version = -1
+        self.ready = False
+        self._routes.clear()
+        self._cell_index.clear()
+        self._dirty.clear()
+        self._refreshing.clear()
+
+    def build(self, a_star_mg, grid_data, keys: list[RouteKey], workers: int = RouteTableVar.POOL_WORKERS):
+        """ 計算所有建築組合的路線 (呼叫前 a_star_mg 的地圖必須已同步) """
+        self.reset()
+        self.keys = sorted(set(keys))
+
+        self._solve(a_star_mg, grid_data, list(itertools.combinations(self.keys, 2)), workers)
+        self.version = grid_data.version
+        self.ready = True
+
+    def restore(self, keys: list[RouteKey], routes: dict[RoutePair, RouteEntry], version: int):
+        """ [關卡包] 直接使用編譯好的路線 (已帶代價 / 包圍盒的路線不重新計算) """
+        self.reset()
+        self.keys = sorted(set(keys))
+
+        for pair, entry in routes.items():
+            self._put(pair, entry)
+        self.version = version
+        self.ready = True
+
+    def items(self) -> list[tuple[RoutePair, RouteEntry]]:
+        """ 所有已算好的路線 (不含 dirty / 背景重算中的組合) """
+        return [(pair, entry) for pair, entry in self._routes.items() if pair not in self._dirty and pair not in self._refreshing]
+
+    def refresh(self, a_star_mg, grid_data):
+        """ 重算被地圖編輯影響的路線 (一次批次呼叫) """
+        if not self.dirty: return
+
+        # 背景重算中的組合也在這裡算完 (晚到的結果會被 finish_refresh 忽略)
+        pairs = sorted(self._dirty | self._refreshing)
+        self._dirty.clear()
+        self._refreshing.clear()
+        for pair in pairs:
+            self._remove(pair)
+
+        self._solve(a_star_mg, grid_data, pairs, 0)
+        self.version = grid_data.version
+
+    def begin_refresh(self, grid_data) -> tuple[list[RoutePair], list[tuple[list[GridPoint], list[GridPoint]]]]:
+        """
+        [背景重算] 取出所有 dirty 組合，回傳需要搜尋的 (組合, 查詢)
+        不相連的組合直接寫入，其餘的在 finish_refresh 寫回前都查不到路線
+        """
+        pairs = sorted(self._dirty)
+        self._dirty.clear()
+        for pair in pairs:
+            self._remove(pair)
+
+        solved_pairs, queries = self._queries(grid_data, pairs)
+        self._refreshing.update(solved_pairs)
+        return solved_pairs, queries
+
+    def finish_refresh(self, pairs: list[RoutePair], raws: list[array.array] | None, version: int, stale: set[int] = frozenset()):
+        """
+        [背景重算] 寫回結果 (已被同步 refresh 算過的組合略過)
+        raws 為 None 代表計算失敗，這些組合重新標記為 dirty
+        stale: 可能被計算期間的地圖編輯影響的組合 (在 pairs 中的位置)，同樣重新標記為 dirty
+        """
+        pairs = [(i, pair) for i, pair in enumerate(pairs) if pair in self._refreshing]
+        self._refreshing.difference_update(pair for _, pair in pairs)
+
+        if raws is None:
+            self._dirty.update(pair for _, pair in pairs)
+            return
+
+        self._dirty.update(pair for i, pair in pairs if i in stale)
+        pairs = [(i, pair) for i, pair in pairs if i not in stale]
+        self._store([pair for _, pair in pairs], [raws[i] for i, _ in pairs])
+        if not self.dirty:
+            self.version = version
+
+    def get(self, source: RouteKey, target: RouteKey) -> list[GridPoint] | None:
+        """
+        取得 source -> target 的路線
+        None = 路線表沒有這組建築 (呼叫端自行尋路)，空 list = 無法抵達
+        """
+        entry, reverse = self.get_entry(source, target)
+        if entry is None: return None
+        return entry.path(reverse)
+
+    def get_entry(self, source: RouteKey, target: RouteKey) -> tuple[RouteEntry | None, bool]:
+        """ 回傳 (路線, 是否需要反轉)，呼叫前必須先 refresh """
+        if not self.ready or source == target: return None, False
+
+        pair, reverse = ((source, target), False) if source < target else ((target, source), True)
+        # 還沒重算完的組合 (只有不等待重算的查詢會碰到)
+        if pair in self._dirty or pair in self._refreshing: return None, False
+        return self._routes.get(pair), reverse
+
+    def mark_dirty(self, start_grid: GridPoint, size: Size, marking: int):
+        """
+        地圖區域被編輯時呼叫，可能失效的路線 (route_invalidated) 記為 dirty
+        變成牆只可能影響碰到建築周圍一圈或經過外圍一圈的路線，先用格子索引縮小範圍
+        """
+        if not self.ready: return
+
+        area = (int(start_grid.col), int(start_grid.row), size.width, size.height)
+        if marking == GridMapMarking.WALL:
+            touched = {key for key in self.keys if rects_overlap(area, perimeter_rect(key))}
+            candidates = {pair for pair in self._routes if pair[0] in touched or pair[1] in touched}
+            col, row, width, height = expand_rect(area, 1)
+            for c in range(col, col + width):
+                for r in range(row, row + height):
+                    candidates.update(self._cell_index.get((c, r), ()))
+        else:
+            candidates = self._routes.keys()
+
+        for pair in candidates:
+            if pair in self._dirty: continue
+            entry = self._routes[pair]
+            if route_invalidated(area, marking, perimeter_rect(pair[0]), perimeter_rect(pair[1]), entry.raw, entry.cost):
+                self._dirty.add(pair)
+
+    def _solve(self, a_star_mg, grid_data, pairs: list[RoutePair], workers: int):
+        """ 兩棟建築周圍一圈之間批次尋路，寫入路線表 """
+        solved_pairs, queries = self._queries(grid_data, pairs)
+        self._store(solved_pairs, self._find_paths(a_star_mg, grid_data, queries, workers))
+
+    def _queries(self, grid_data, pairs: list[RoutePair]) -> tuple[list[RoutePair], list[tuple[list[GridPoint], list[GridPoint]]]]:
+        """ 建立周圍一圈之間的查詢，不相連的組合直接記為無法抵達 """
+        empty = array.array(ArrayTypecode.A_STAR_OUT_BUFFER.value)
+        queries = []
+        solved_pairs = []
+        perimeters = {}
+
+        for pair in pairs:
+            query = perimeter_query(grid_data, pair[0], pair[1], perimeters)
+
+            # 兩棟建築不相連，直接記為無法抵達
+            if query is None:
+                self._routes[pair] = RouteEntry(None, None, empty)
+                continue
+
+            queries.append(query)
+            solved_pairs.append(pair)
+
+        return solved_pairs, queries
+
+    def _store(self, pairs: list[RoutePair], raws: list[array.array]):
+        for pair, raw in zip(pairs, raws):
+            if raw:
+                self._put(pair, RouteEntry(GridPoint(raw[0], raw[1]), GridPoint(raw[-2], raw[-1]), raw))
+            else:
+                self._put(pair, RouteEntry(None, None, raw))
+
+    def _find_paths(
+        self, a_star_mg, grid_data, queries: list[tuple[list[GridPoint], list[GridPoint]]], workers: int
+    ) -> list[array.array]:
+        """
+        路線數量夠多且有設定行程數時分給行程池，否則在主行程批次計算 (距離遠的組合走 HPA*)
+        有階層式抽象圖時不使用行程池 (抽象圖只在主行程)
+        """
+        if workers > 1 and not a_star_mg.hpa.ready and len(queries) >= RouteTableVar.POOL_MIN_PAIRS:
+            snapshot = GridSnapshot(
+                grid_data.width, grid_data.height, bytearray(grid_data.collision_map), a_star_mg.landmarks.tables
+            )
+            chunk = RouteTableVar.POOL_CHUNK
+            chunks = [queries[i:i + chunk] for i in range(0, len(queries), chunk)]
+
+            try:
+                with ProcessPoolExecutor(max_workers = workers) as pool:
+                    results = pool.map(
+                        _solve_chunk,
+                        itertools.repeat(snapshot), itertools.repeat(a_star_mg.inf.algorithm), chunks
+                    )
+                    return [raw for paths in results for raw in paths]
+            except (OSError, BrokenProcessPool) as e:
+                dbg.war(f"[A*] 路線表行程池失敗，改由主行程計算: {e}")
+
+        return a_star_mg.solve_building_paths(queries)
+
+    def _put(self, pair: RoutePair, entry: RouteEntry):
+        if entry.raw:
+            cols, rows = entry.raw[0::2], entry.raw[1::2]
+            if entry.cost is None:
+                entry.cost = raw_path_cost(entry.raw)
+                entry.bbox = (min(cols), min(rows), max(cols), max(rows))
+
+            for cell in zip(cols, rows):
+                self._cell_index.setdefault(cell, set()).add(pair)
+
+        self._routes[pair] = entry
+
+    def _remove(self, pair: RoutePair):
+        entry = self._routes.pop(pair, None)
+        if entry is None or not entry.raw: return
+
+        for cell in zip(entry.raw[0::2], entry.raw[1::2]):
+            pairs = self._cell_index.get(cell)
+            if pairs is None: continue
+            pairs.discard(pair)
+            if not pairs:
+                del self._cell_index[cell]
@@ -0,0 +1,311 @@
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Callable
+
+from py.a_star.hpa import raw_path_cost
+from py.a_star.invalidation import Rect, route_invalidated, route_region
+from py.a_star.manage import ManageAStar, a_star_mg, raw_to_grid_path
+from py.a_star.route_table import GridSnapshot, perimeter_query, perimeter_rect
+from py.a_star.variable import PathRequestKind, PathServiceVar, RouteKey
+from py.debug import dbg
+from py.game.map.changes import ChangeToken
+from py.variable import GridPoint, Size
+
+
+class PathRequest:
+    """
+    [非同步尋路請求]
+    背景算完後不會立刻生效，統一在下一次 GameManager.update 開頭 (PathService.deliver) 交付：
+    結果寫入 a_star_mg 的快取，再依序呼叫 callback (都在主執行緒)
+    送出後地圖又被編輯過時，只有可能被編輯影響的結果才作廢 (改用交付當下的地圖重新排入)
+    背景計算失敗時整個請求丟棄 (不寫入快取、不呼叫 callback)
+    """
+    def __init__(self, kind: PathRequestKind, keys: list, callback: Callable[["PathRequest"], None] | None):
+        self.kind = kind
+        # 與 result 對齊的查詢 (起終點或建築組合)
+        self.keys = keys
+        self.result: list | None = None
+        self.done = False
+        self.cancelled = False
+        self._callbacks = [callback] if callback else []
+
+        # 送出時的地圖 (change_token)、需要搜尋的查詢在 keys 中的位置、背景計算
+        self._map_key: ChangeToken | None = None
+        self._indices: list[int] = []
+        self._queries: list = []
+        self._future: Future | None = None
+
+    def add_done_callback(self, callback: Callable[["PathRequest"], None]):
+        """ 已交付時立即呼叫 """
+        if self.done:
+            callback(self)
+        else:
+            self._callbacks.append(callback)
+
+    def cancel(self):
+        """ 不再需要結果 (背景計算照常完成，只是不交付) """
+        self.cancelled = True
+
+
+class PathService:
+    """
+    [背景尋路]
+    執行緒池的每條執行緒各自持有一個 ManageAStar (C 端 Context)，ctypes 呼叫期間會釋放 GIL，
+    搜尋與主迴圈的渲染並行
+    - 送出請求時在主執行緒準備查詢 (連通區塊、建築周圍一圈等都只在主執行緒讀取)
+    - 背景執行緒的地圖是送出當下的快照，版本不同時才重新上傳
+    - 路線表被地圖編輯影響的組合自動交給背景重算 (呼叫端以 wait = False 查詢時不會卡住這一幀)
+    """
+    def __init__(self, workers: int = PathServiceVar.WORKERS):
+        self.workers = workers
+        self._pool: ThreadPoolExecutor | None = None
+        self._pending: list[PathRequest] = []
+        # 背景計算中的建築組合 (避免每次思考都重複送出)
+        self._building_pairs: set[tuple[RouteKey, RouteKey]] = set()
+        self._route_request: PathRequest | None = None
+
+        self.world_map = None
+        self._snapshot: tuple[ChangeToken, GridSnapshot] | None = None
+
+        # 各執行緒自己的求解器 (關閉時統一釋放 Context)
+        self._local = threading.local()
+        self._solvers: list[ManageAStar] = []
+        self._solvers_lock = threading.Lock()
+
+    @property
+    def pending(self) -> int:
+        return len(self._pending)
+
+    def bind_world_map(self, world_map):
+        """ 地圖清空 (換關卡) 時丟棄所有還沒交付的請求 """
+        self.world_map = world_map
+        world_map.add_edit_listener(lambda start_grid, size, marking: None, self.reset)
+
+    def request_building_paths(self, pairs: list[tuple[RouteKey, RouteKey]], callback = None) -> PathRequest:
+        """ [建築間] 周圍一圈 -> 周圍一圈，結果與 pairs 對齊 (無法抵達為空 list)，同時寫入 building_paths """
+        self._building_pairs.update(pairs)
+        return self._submit(PathRequest(PathRequestKind.BUILDING_PATHS, pairs, callback))
+
+    def prefetch_building_paths(self, pairs: list[tuple[RouteKey, RouteKey]]):
+        """ 只把結果放進 building_paths (已快取或計算中的組合略過)，給 AI 下一次思考使用 """
+        missing = list(dict.fromkeys(
+            pair for pair in pairs
+            if pair not in self._building_pairs and pair not in a_star_mg.building_paths
+        ))
+        if missing:
+            self.request_building_paths(missing)
+
+    def deliver(self) -> int:
+        """ [GameManager.update 開頭] 交付已完成的請求，回傳交付數量 """
+        delivered = 0
+        if self._pending:
+            map_key = self._current_map_key()
+            pending, self._pending = self._pending, []
+
+            for request in pending:
+                if request._future is not None and not request._future.done():
+                    self._pending.append(request)
+                elif request.cancelled:
+                    self._discard(request)
+                elif self._finish(request, map_key):
+                    delivered += 1
+                else:
+                    self._retry(request)
+
+        # 路線表有新的 dirty 組合就接著在背景重算
+        if self._route_request is None and a_star_mg.routes.refresh_pending:
+            self._submit_route_refresh()
+
+        return delivered
+
+    def reset(self):
+        """ 丟棄所有還沒交付的請求 (背景計算中的結果交付時會被忽略) """
+        for request in self._pending:
+            request.cancel()
+        self._pending.clear()
+        self._building_pairs.clear()
+        self._route_request = None
+        self._snapshot = None
+
+    def shutdown(self):
+        """ 結束遊戲時呼叫：等待背景執行緒結束並釋放各自的 Context """
+        self.reset()
+        if self._pool is not None:
+            self._pool.shutdown(wait = True, cancel_futures = True)
+            self._pool = None
+
+        with self._solvers_lock:
+            for solver in self._solvers:
+                solver.release()
+            self._solvers.clear()
+
+    # =========================================================================
+    # 主執行緒：準備查詢 / 交付
+    # =========================================================================
+
+    def _submit(self, request: PathRequest) -> PathRequest:
+        """ 準備查詢並交給執行緒池 (沒有執行緒時直接由主執行緒計算) """
+        grid_data = self.world_map
+        request._map_key = self._current_map_key()
+        request._indices, request._queries = [], []
+        request.result = [[] for _ in request.keys]
+
+        perimeters = {}
+        for i, (source, target) in enumerate(request.keys):
+            query = perimeter_query(grid_data, source, target, perimeters)
+            if query is not None:
+                request._indices.append(i)
+                request._queries.append(query)
+
+        request._future = None
+        if request._queries:
+            request._future = self._start(request._map_key, request._queries)
+
+        self._pending.append(request)
+        return request
+
+    def _submit_route_refresh(self):
+        pairs, queries = a_star_mg.routes.begin_refresh(self.world_map)
+        request = PathRequest(PathRequestKind.ROUTE_REFRESH, pairs, None)
+        request._map_key = self._current_map_key()
+        request._indices, request._queries = list(range(len(pairs))), queries
+        if queries:
+            request._future = self._start(request._map_key, queries)
+
+        self._route_request = request
+        self._pending.append(request)
+
+    def _start(self, map_key, queries: list) -> Future:
+        # 階層式抽象圖只在主執行緒的 a_star_mg 上：大地圖直接由主執行緒計算 (距離遠的組合走 HPA*)
+        if self.workers <= 0 or a_star_mg.hpa.ready:
+            future = Future()
+            try:
+                a_star_mg.update_map_from_grid_data(self.world_map, "path_service")
+                future.set_result(self._solve(a_star_mg, queries) if a_star_mg.map_synced else [[] for _ in queries])
+            except Exception as e:
+                future.set_exception(e)
+            return future
+
+        if self._pool is None:
+            self._pool = ThreadPoolExecutor(max_workers = self.workers, thread_name_prefix = "path_service")
+        return self._pool.submit(self._run, map_key, self._map_snapshot(map_key), queries)
+
+    def _finish(self, request: PathRequest, map_key: ChangeToken) -> bool:
+        """ 寫入快取並呼叫 callback (回傳 False 代表結果可能被送出後的編輯影響，需要重新排入) """
+        try:
+            raws = request._future.result() if request._future is not None else []
+        except Exception as e:
+            dbg.error(f"[A*] 背景尋路失敗: {e}")
+            raws = None
+
+        stale = self._stale_results(request, raws, map_key) if raws is not None else set()
+
+        if request.kind == PathRequestKind.ROUTE_REFRESH:
+            # 失敗或被編輯影響的組合交回 dirty，下一次查詢 (或下一幀) 再算
+            self._route_request = None
+            a_star_mg.routes.finish_refresh(request.keys, raws, self.world_map.version, stale)
+            return True
+
+        if stale: return False
+
+        if raws is None:
+            # 背景計算失敗不等於無法抵達：不寫入快取也不呼叫 callback，下一次出兵 / 思考時重新送出
+            self._discard(request)
+            return True
+
+        for i, raw in zip(request._indices, raws):
+            request.result[i] = raw_to_grid_path(raw)
+
+        for pair, path in zip(request.keys, request.result):
+            a_star_mg.building_paths.put(*pair, path)
+            self._building_pairs.discard(pair)
+
+        request.done = True
+        for callback in request._callbacks:
+            callback(request)
+        return True
+
+    def _stale_results(self, request: PathRequest, raws: list, map_key: ChangeToken) -> set[int]:
+        """
+        送出後的編輯可能影響到的結果 (在 keys 中的位置)，規則與路線表的局部作廢相同 (route_invalidated)
+        編輯紀錄已被丟棄時退回區塊版本判斷 (以區塊為單位，可能多報)
+        """
+        token = request._map_key
+        if token == map_key: return set()
+
+        world_map = self.world_map
+        changes = world_map.changes_since(token)
+        solved = dict(zip(request._indices, raws))
+
+        stale = set()
+        for i, (source, target) in enumerate(request.keys):
+            # 沒有送出搜尋的組合 (兩棟建築不相連) 視為走不到
+            raw = solved.get(i) or []
+            cost = raw_path_cost(raw) if raw else None
+            source_rect, target_rect = perimeter_rect(source), perimeter_rect(target)
+
+            if changes.full:
+                if self._region_changed(route_region(source_rect, target_rect, cost), token):
+                    stale.add(i)
+                continue
+
+            if any(route_invalidated(rect.area, rect.marking, source_rect, target_rect, raw, cost) for rect in changes.rects):
+                stale.add(i)
+        return stale
+
+    def _region_changed(self, region: Rect | None, token: ChangeToken) -> bool:
+        """ [區塊版本] 範圍所在的區塊是否被編輯過 (None 代表整張地圖) """
+        world_map = self.world_map
+        col, row, width, height = region if region is not None else (0, 0, world_map.width, world_map.height)
+        return world_map.region_changed_since(token, GridPoint(col, row), Size(width, height))
+
+    def _retry(self, request: PathRequest):
+        """ 結果可能被送出後的編輯影響：以目前的地圖重新排入 """
+        self._submit(request)
+
+    def _discard(self, request: PathRequest):
+        if request.kind == PathRequestKind.BUILDING_PATHS:
+            self._building_pairs.difference_update(request.keys)
+
+    def _current_map_key(self) -> ChangeToken:
+        return self.world_map.change_token if self.world_map else (0, 0)
+
+    def _map_snapshot(self, map_key) -> GridSnapshot:
+        """ 同一個地圖版本只複製一次 (執行緒之間共用，唯讀) """
+        if self._snapshot is None or self._snapshot[0] != map_key:
+            grid_data = self.world_map
+            self._snapshot = (map_key, GridSnapshot(
+                grid_data.width, grid_data.height, bytearray(grid_data.collision_map),
+                a_star_mg.landmarks.tables_for(grid_data.version)
+            ))
+        return self._snapshot[1]
+
+    # =========================================================================
+    # 背景執行緒
+    # =========================================================================
+
+    def _run(self, map_key, snapshot: GridSnapshot, queries: list) -> list:
+        solver = getattr(self._local, "solver", None)
+        if solver is None:
+            solver = self._local.solver = ManageAStar()
+            solver.inf = a_star_mg.inf
+            self._local.map_key = None
+            with self._solvers_lock:
+                self._solvers.append(solver)
+
+        # 與上一次請求的地圖版本不同才重新上傳
+        if self._local.map_key != map_key:
+            solver.map_synced = False
+            solver.update_map_from_grid_data(snapshot, "path_service")
+            solver.landmarks.load(solver, snapshot.landmarks)
+            self._local.map_key = map_key if solver.map_synced else None
+
+        if not solver.map_synced: return [[] for _ in queries]
+        return self._solve(solver, queries)
+
+    @staticmethod
+    def _solve(solver: ManageAStar, queries: list) -> list:
+        return solver.solve_building_paths(queries)
+
+
+path_service = PathService()
@@ -0,0 +1,70 @@
+import array
+
+from py.trans.variable import ArrayTypecode
+
+
+def line_of_sight(collision_map, width: int, col0: int, row0: int, col1: int, row1: int) -> bool:
+    """
+    兩格中心點之間的直線是否可走 (不含起點格)
+    逐格走過直線碰到的每一格 (supercover)，恰好穿過格子角落時套用與 A* 相同的防切角規則：
+    角落兩側的直向鄰居都必須是路
+    """
+    d_col, d_row = col1 - col0, row1 - row0
+    n_col, n_row = abs(d_col), abs(d_row)
+    s_col = 1 if d_col > 0 else -1
+    s_row = 1 if d_row > 0 else -1
+
+    col, row = col0, row0
+    i_col = i_row = 0
+    while i_col < n_col or i_row < n_row:
+        # 直線下一次跨越的是直線 (< 0)、橫線 (> 0) 還是角落 (== 0)
+        decision = (1 + 2 * i_col) * n_row - (1 + 2 * i_row) * n_col
+        if decision == 0:
+            if collision_map[row * width + col + s_col] != 0 or collision_map[(row + s_row) * width + col] != 0:
+                return False
+            col += s_col
+            row += s_row
+            i_col += 1
+            i_row += 1
+        elif decision < 0:
+            col += s_col
+            i_col += 1
+        else:
+            row += s_row
+            i_row += 1
+
+        if collision_map[row * width + col] != 0: return False
+    return True
+
+def path_blocked(raw, start: int, collision_map, width: int) -> bool:
+    """ 從第 start 個路徑點開始的剩餘路徑 ([c0, r0, c1, r1...]) 是否有一段被牆擋住 (相鄰格或化簡後的直線都適用) """
+    for i in range(start * 2 + 2, len(raw), 2):
+        if not line_of_sight(collision_map, width, raw[i - 2], raw[i - 1], raw[i], raw[i + 1]):
+            return True
+    return False
+
+def simplify_raw(raw, collision_map, width: int, keep: int = 0) -> array.array:
+    """
+    把逐格路徑 [c0, r0, c1, r1...] 化簡成最少的直線路徑點 (貪婪拉直：從目前的路徑點盡量看遠)
+    keep: 前幾個路徑點原樣保留 (士兵從建築內出發時直接走向 path[1]，這一段不拉直)
+    起點與終點一定保留，路徑本身必須是可走的 (相鄰格之間符合防切角規則)
+    """
+    steps = len(raw) // 2
+    out = array.array(ArrayTypecode.A_STAR_OUT_BUFFER.value, raw[:min(keep + 1, steps) * 2])
+    anchor = len(out) // 2 - 1
+    if anchor + 2 >= steps:
+        return array.array(ArrayTypecode.A_STAR_OUT_BUFFER.value, raw)
+
+    while anchor < steps - 1:
+        a_col, a_row = raw[anchor * 2], raw[anchor * 2 + 1]
+
+        # 找出從 anchor 看得到的最遠一格 (相鄰的下一格一定看得到)
+        reach = anchor + 1
+        while reach + 1 < steps and line_of_sight(
+            collision_map, width, a_col, a_row, raw[reach * 2 + 2], raw[reach * 2 + 3]
+        ):
+            reach += 1
+
+        out.extend(raw[reach * 2:reach * 2 + 2])
+        anchor = reach
+    return out
@@ -1,10 +1,43 @@
-from dataclasses import dataclass
+from enum import IntEnum
 
-from py.variable import GridPoint
 
+class PathCacheVar(IntEnum):
+    # 建築間路徑快取上限 (以路徑格子總數計算，一格約 80 bytes)
+    MAX_CELLS = 100_000
 
-@dataclass(frozen = True)
-class PositionSamePath:
-    map_name: str
-    start: GridPoint
-    end: GridPoint
+class HpaVar(IntEnum):
+    # 區塊邊長 (格)
+    CLUSTER_SIZE = 16
+    # 入口長度達到此值時在兩端各放一個轉換點，否則只放中間一個
+    ENTRANCE_SPLIT = 6
+    # 地圖格子數達到此值才啟用階層式尋路 (小地圖直接整張 A* 比較快)
+    MIN_CELLS = 100_000
+    # 建築間出入口的直線代價 (直 10 / 斜 14) 達到此值才走 HPA* (約兩個區塊，近的直接多起點 A*)
+    MIN_ROUTE_COST = 320
+
+class LandmarkVar(IntEnum):
+    # 地標 (ALT heuristic) 數量，每個地標多一張整張地圖的距離表 (0 = 不使用；C 端上限 16)
+    COUNT = 8
+
+class RouteTableVar(IntEnum):
+    # 建築間路線表：平行計算使用的行程數 (0 = 只在主行程計算)
+    POOL_WORKERS = 0
+    # 路線數量達到此值才啟用行程池 (行程啟動成本比小地圖的整批 A* 還高)
+    POOL_MIN_PAIRS = 4_000
+    # 送給每個行程的路線數量
+    POOL_CHUNK = 512
+
+class PathServiceVar(IntEnum):
+    # 背景尋路的執行緒數 (0 = 在送出請求時直接由主執行緒計算，仍於下一次 update 交付)
+    WORKERS = 2
+
+class PathRequestKind(IntEnum):
+    BUILDING_PATHS = 0  # 建築周圍一圈之間的路徑 (寫入 building_paths)
+    ROUTE_REFRESH = 1   # 路線表中被地圖編輯影響的組合
+
+# 建築範圍 (col, row, width, height)，作為路線表 / 流場的 Key
+RouteKey = tuple[int, int, int, int]
+
+# 與 C 端相同的移動代價
+COST_STRAIGHT = 10
+COST_DIAGONAL = 14
@@ -1,14 +1,21 @@
+import hashlib
+import os
+import shutil
 import subprocess
+import sys
+from pathlib import Path
 
 from py.debug import dbg
 from py.path.manager import PathBase, PathConfig
+from py.path.variable import MixPath
 
 
 class CompileAndLoadDll:
     def __init__(self):
         self.run(PathConfig.a_star.c, PathConfig.a_star.dll)
 
-    def run(self, c_source_paths, dll_output_path, base_path = PathBase.core):
+    @staticmethod
+    def run(c_source_paths, dll_output_path, base_path = PathBase.core) -> bool:
         '''
         c_source_path: c檔案位置
         dll_output_path: .dll生成位置
@@ -18,16 +25,20 @@ class CompileAndLoadDll:
         for src in c_source_paths:
             if not src.exists():
                 dbg.error(f"找不到原始碼: {src}")
-                return
+                return False
 
         # [防呆] 確保 DLL 的輸出資料夾存在，不然 GCC 會報錯
         if not dll_output_path.parent.exists():
             dll_output_path.parent.mkdir(parents=True, exist_ok=True)
 
+        compiler = find_compiler()
+        if compiler is None:
+            dbg.war("找不到 C 編譯器 (gcc / cc / clang)，略過編譯")
+            return False
 
         # 組合編譯指令 (前半部)
         cmd = [
-            "gcc",
+            compiler,
             "-shared",
             "-o", str(dll_output_path)
         ]
@@ -35,19 +46,88 @@ class CompileAndLoadDll:
         for src in c_source_paths:
             cmd.append(str(src))
         # 組合編譯指令 (後半部)
-        cmd.extend([
-            "-I", str(base_path),
-            "-std=c99",
-            "-static-libgcc",
-            "-O2"
-        ])
+        cmd.extend(["-I", str(base_path)])
+        cmd.extend(compile_flags(compiler))
 
 
         # 執行編譯
-        result = subprocess.run(cmd, capture_output = True, text = True)
+        try:
+            result = subprocess.run(cmd, capture_output = True, text = True)
+        except OSError as e:
+            dbg.error("編譯失敗！", e)
+            return False
 
         if result.returncode != 0:
             dbg.error("編譯失敗！", result.stderr)
-            return
+            return False
         else:
             dbg.log(f"編譯成功！DLL 已生成於: {dll_output_path}")
+            return True
+
+def shared_lib_suffix() -> str:
+    """ 目前平台的共享函式庫副檔名 """
+    if sys.platform == "win32": return ".dll"
+    if sys.platform == "darwin": return ".dylib"
+    return ".so"
+
+def find_compiler() -> str | None:
+    """ 依序尋找可用的 C 編譯器 (可用環境變數 CC 指定) """
+    for name in (os.environ.get("CC"), "gcc", "cc", "clang"):
+        if name and shutil.which(name):
+            return name
+    return None
+
+def compile_flags(compiler: str) -> list[str]:
+    flags = ["-std=c99", "-O2"]
+    if sys.platform == "win32":
+        # Windows 上讓 DLL 不依賴 libgcc 的 DLL
+        if "gcc" in Path(compiler).name: flags.append("-static-libgcc")
+    else:
+        flags.append("-fPIC")
+    return flags
+
+def source_hash(c_source_paths, base_path = PathBase.core) -> str:
+    """ 原始碼 + 所有標頭檔 + 平台的雜湊值 (任何一個改變就需要重新編譯) """
+    digest = hashlib.sha256()
+    digest.update(sys.platform.encode())
+
+    headers = sorted((base_path / "c_inc").rglob("*.h"))
+    for path in [*c_source_paths, *headers]:
+        digest.update(path.relative_to(base_path).as_posix().encode())
+        digest.update(path.read_bytes())
+
+    return digest.hexdigest()[:12]
+
+def locate_shared_library(mix_path: MixPath, base_path = PathBase.core) -> list[Path]:
+    """
+    [載入器] 回傳可嘗試載入的共享函式庫 (優先順序由高到低)
+    - <名稱>-<原始碼雜湊><副檔名>：與目前原始碼一致的編譯結果，不存在時自動編譯 (需要編譯器)
+    - 隨附的函式庫 (例如 Windows 的 a_star.dll)，可能比原始碼舊
+    """
+    candidates = []
+
+    try:
+        digest = source_hash(mix_path.c, base_path)
+    except OSError as e:
+        dbg.war(f"[Loader] 無法讀取原始碼: {e}")
+        digest = None
+
+    if digest:
+        suffix = shared_lib_suffix()
+        target = mix_path.dll.parent / f"{mix_path.dll.stem}-{digest}{suffix}"
+
+        if target.exists() or CompileAndLoadDll.run(mix_path.c, target, base_path):
+            candidates.append(target)
+
+            # 清掉舊版本的編譯結果
+            for stale in mix_path.dll.parent.glob(f"{mix_path.dll.stem}-*{suffix}"):
+                if stale != target:
+                    try:
+                        stale.unlink()
+                    except OSError:
+                        pass
+
+    if mix_path.dll.exists() and mix_path.dll.suffix == shared_lib_suffix():
+        candidates.append(mix_path.dll)
+
+    return candidates
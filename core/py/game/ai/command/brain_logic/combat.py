@@ -3,7 +3,8 @@ from typing import TYPE_CHECKING, List
 
 from py.game.ai.logic.path_analyzer import PathAnalyzer
 from py.game.ai.logic.search import TargetSelector
-from py.game.ai.variable import AIActionKey, AIActionType
+from py.game.ai.variable import AIActionKey, AIActionType, AIVar
+from py.game.jelly.action import plan_multi_dispatch
 from py.game.variable import GameType
 
 if TYPE_CHECKING:
@@ -57,9 +58,11 @@ class CombatEvaluator:
             if self.cmd.calculate_safety_margin(savior) < 3.0 : continue
             if savior.stats.army < self.profile.min_defense_reserve: continue
 
-            best_victim, path_len, path = TargetSelector.find_best_target(savior, potential_targets, top_k=3)
+            best_victim, path_len, path = TargetSelector.find_best_target(
+                savior, potential_targets, top_k=3, max_path_len=AIVar.DEFENSE_MAX_PATH_LEN
+            )
 
-            if not best_victim or not path or path_len > 30: continue
+            if not best_victim or not path: continue
 
             danger_cost = PathAnalyzer.calculate_danger_cost(path, self.cmd.enemy_buildings, savior)
             arrival_army = savior.stats.army - danger_cost
@@ -122,9 +125,9 @@ class CombatEvaluator:
                 if travel_time > self.profile.swarm_response_time: continue
 
                 # 簡單路徑評估
-                estimated_loss = PathAnalyzer.estimate_danger_linear(
-                    start = ally.grid_point,
-                    end = target.grid_point,
+                estimated_loss = PathAnalyzer.estimate_danger_route(
+                    source = ally,
+                    target = target,
                     unit_speed = unit_speed,
                     enemy_buildings = self.cmd.enemy_buildings,
                     steps = max(5, int(travel_time // 2))
@@ -139,7 +142,8 @@ class CombatEvaluator:
             required_power = enemy_defense * self.profile.swarm_win_margin
 
             if total_attack_power > required_power:
-                # 發起集結！
+                # 發起集結！所有參與的建築一次規劃路線 (指令稍後逐一執行時直接取用)
+                plan_multi_dispatch([ally for ally, _ in attackers], target)
                 score = (total_attack_power - enemy_defense) / 10 + self.cmd.get_strategic_value(target)
 
                 for ally, power in attackers:
@@ -183,16 +187,14 @@ class CombatEvaluator:
             if local_best:
                 candidates_with_path.append((local_best, local_dist, local_path))
 
-            # 強制加入高價值目標
-            for hv_target in high_value_targets:
-                if hv_target == local_best: continue
-                if hv_target == source: continue
-                if hv_target.stats.owner == source.stats.owner: continue
-
-                hv_best, hv_dist, hv_path = TargetSelector.find_best_target(source, [hv_target], top_k=1)
-
-                if hv_best and hv_path:
-                    candidates_with_path.append((hv_target, hv_dist, hv_path))
+            # 強制加入高價值目標 (一次批次尋路)
+            hv_list = [
+                hv_target for hv_target in high_value_targets
+                if hv_target != local_best
+                and hv_target != source
+                and hv_target.stats.owner != source.stats.owner
+            ]
+            candidates_with_path.extend(TargetSelector.find_target_paths(source, hv_list))
 
             # --- [評分階段] ---
             best_action_data = None
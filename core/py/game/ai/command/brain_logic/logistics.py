@@ -116,11 +116,11 @@ class LogisticsEvaluator:
 
                 travel_time = (dist_sq ** 0.5) / unit_speed
 
-                # --- 快速危險評估 (使用直線採樣) ---
+                # --- 快速危險評估 (沿建築間路線採樣) ---
                 steps = max(5, int(travel_time // 2))
-                estimated_loss = PathAnalyzer.estimate_danger_linear(
-                    start = sender.grid_point,
-                    end = receiver.grid_point,
+                estimated_loss = PathAnalyzer.estimate_danger_route(
+                    source = sender,
+                    target = receiver,
                     unit_speed = unit_speed,
                     enemy_buildings = self.cmd.enemy_buildings,
                     steps = steps
@@ -213,7 +213,7 @@ class LogisticsEvaluator:
                 busy_entities.add(source)
             else:
                 # 沒倉庫可存 -> 強制進攻最近的敵人 (Total War)
-                enemy, _, _ = TargetSelector.find_best_target(source, self.cmd.enemy_buildings, top_k=1)
+                enemy, _, _ = TargetSelector.find_best_target(source, self.cmd.enemy_buildings, top_k=1, with_path=False)
                 if enemy:
                     atk_score = 5.0
 
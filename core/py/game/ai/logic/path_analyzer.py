@@ -1,6 +1,9 @@
 from typing import TYPE_CHECKING, List
 
+from py.a_star.manage import a_star_mg
+from py.a_star.route_table import route_key
 from py.game.ai.variable import AIVar
+from py.game.context import GameContext
 from py.variable import GridPoint
 
 if TYPE_CHECKING:
@@ -79,6 +82,33 @@ class PathAnalyzer:
 
         return total_damage * 1.2
 
+    @staticmethod
+    def estimate_danger_route(
+            source: "BuildingEntity", target: "BuildingEntity",
+            unit_speed: float,
+            enemy_buildings: List["BuildingEntity"],
+            steps: int = AIVar.PATH_STEP_STRIDE
+        ) -> float:
+        """
+        [路線表路徑評估]
+        建築間路線表有這組建築時沿真實路線採樣 (不需要額外尋路)，否則 (或路線正在背景重算) 退回直線採樣
+        無法抵達回傳 inf
+        """
+        path = a_star_mg.get_route(
+            GameContext.world_map,
+            route_key(source.stats.grid_point, source.stats.grid_size),
+            route_key(target.stats.grid_point, target.stats.grid_size),
+            GameContext.map_tag(),
+            wait = False
+        )
+        if path is None:
+            return PathAnalyzer.estimate_danger_linear(
+                source.grid_point, target.grid_point, unit_speed, enemy_buildings, steps
+            )
+        if not path: return float('inf')
+
+        return PathAnalyzer.calculate_danger_cost(path, enemy_buildings, source)
+
     @staticmethod
     def estimate_danger_linear(
             start: "GridPoint", end: "GridPoint",
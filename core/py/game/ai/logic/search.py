@@ -1,7 +1,11 @@
 import heapq
 from typing import TYPE_CHECKING, List, Optional, Tuple
 
-from py.a_star.main import main_a_star
+from py.a_star.hpa import grid_path_cost
+from py.a_star.manage import a_star_mg
+from py.a_star.route_table import route_key
+from py.a_star.service import path_service
+from py.a_star.variable import COST_STRAIGHT
 from py.game.context import GameContext
 
 if TYPE_CHECKING:
@@ -11,19 +15,26 @@ if TYPE_CHECKING:
 class TargetSelector:
     """
     負責處理高階的索敵邏輯
-    包含：兩階段篩選 (直線距離快篩 -> A* 路徑精算)
+    包含：兩階段篩選 (直線距離快篩 -> A* 代價精算)
+    代價：路線表以外的組合用有上限的代價查詢當場算出 (不回溯路徑，超過上限就停止搜尋)
+    路徑：不在思考的這一幀尋路，路線表以外的組合交給背景尋路，結果下一次思考才會用到
+    路徑長度以代價換算成格數 (直走 1、斜走 1.4)
     """
 
     @staticmethod
     def find_best_target(
         source: "BuildingEntity",
         targets: List["BuildingEntity"],
-        top_k: int = 3
+        top_k: int = 3,
+        max_path_len: Optional[float] = None,
+        with_path: bool = True
     ) -> Tuple[Optional["BuildingEntity"], float, Optional[List["GridPoint"]]]:
         """
         :param source: 發起攻擊的建築
         :param targets: 候選目標列表
         :param top_k: 初選要保留前幾名 (建議 3~5)
+        :param max_path_len: 路徑長度上限 (grid)，超過視為無法到達 (None 代表不限)
+        :param with_path: False 時只比較代價，不取得路徑 (回傳的路徑為 None)
         :return: (最佳目標, 真實路徑長度(grid), 真實路徑(grid))
         """
         if not targets: return None, 0.0, None
@@ -45,37 +56,99 @@ class TargetSelector:
         # 取出前 K 名
         top_candidates = heapq.nsmallest(top_k, candidates)
 
-        # 決選 (A* 真實尋路)
-        world_map = GameContext.world_map
-        min_path_len = float('inf')
-        best_target = None
-        best_path = None
+        # 決選 (路線表的代價或有上限的代價查詢，超過上限的候選剔除)
+        max_cost = None if max_path_len is None else int(max_path_len * COST_STRAIGHT)
+        costs = TargetSelector.find_target_costs(source, [c[2] for c in top_candidates], max_cost)
 
-        for _, _, target in top_candidates:
-            # 取得建築物邊緣的「出入口」，避免起點終點在牆壁內
-            start_node = world_map.get_access_point(
-                source.stats.grid_point, source.stats.grid_size, target.stats.grid_point
-            )
-            end_node = world_map.get_access_point(
-                target.stats.grid_point, target.stats.grid_size, source.stats.grid_point
-            )
-
-            if not start_node or not end_node: continue
-
-            path = main_a_star(world_map, start_node, end_node, GameContext.map_tag())
-
-            if path:
-                real_dist = len(path)
-                if real_dist < min_path_len:
-                    min_path_len = real_dist
-                    best_target = target
-                    best_path = path
-
-        # 如果 A* 全滅 (都被圍死)，回退到直線距離最近的
-        if best_target is None and top_candidates:
-            best_target = top_candidates[0][2]
-            best_path = None
+        best_index = None
+        for i, cost in enumerate(costs):
+            if cost is None: continue
+            if best_index is None or cost < costs[best_index]:
+                best_index = i
+
+        # 如果 A* 全滅 (都被圍死或超過上限)，回退到直線距離最近的
+        if best_index is None:
             # 這裡回傳 inf 代表無法到達，但在 AICommander 中會被過濾掉
-            min_path_len = float('inf')
+            return top_candidates[0][2], float('inf'), None
+
+        best_target = top_candidates[best_index][2]
+        min_path_len = costs[best_index] / COST_STRAIGHT
+        if not with_path: return best_target, min_path_len, None
+
+        # 只有勝出的目標需要完整路徑 (路線表或路徑快取通常已經有了)
+        best_path = None
+        for _, _, path in TargetSelector.find_target_paths(source, [best_target]):
+            best_path = path
+
+        return best_target, min_path_len, best_path
+
+    @staticmethod
+    def find_target_costs(
+        source: "BuildingEntity",
+        targets: List["BuildingEntity"],
+        max_cost: Optional[int] = None
+    ) -> List[Optional[int]]:
+        """
+        [批次代價] 計算 source 到每個目標的路徑代價 (直 10 / 斜 14)，不建立路徑
+        優先讀建築間路線表的代價，表內沒有 (或正在背景重算) 的組合一次批次代價查詢
+        (已算過路徑的直接取用，其餘只算代價，超過 max_cost 就停止搜尋)
+        :param max_cost: 代價上限 (None 代表不限)
+        :return: 與 targets 對齊的代價列表 (無法抵達或超過上限為 None)
+        """
+        world_map = GameContext.world_map
+        map_tag = GameContext.map_tag()
+        source_key = route_key(source.stats.grid_point, source.stats.grid_size)
+
+        costs: list = [None] * len(targets)
+        missing, slots = [], []
+        for i, target in enumerate(targets):
+            target_key = route_key(target.stats.grid_point, target.stats.grid_size)
+            if target_key == source_key: continue
+
+            entry, _ = a_star_mg.get_route_entry(world_map, source_key, target_key, map_tag, wait = False)
+            if entry is None:
+                missing.append((source_key, target_key))
+                slots.append(i)
+                continue
+
+            if entry.cost is not None and (max_cost is None or entry.cost <= max_cost):
+                costs[i] = entry.cost
+
+        if missing:
+            for i, cost in zip(slots, a_star_mg.find_building_costs(world_map, missing, map_tag, max_cost)):
+                costs[i] = cost
+
+        return costs
+
+    @staticmethod
+    def find_target_paths(
+        source: "BuildingEntity",
+        targets: List["BuildingEntity"]
+    ) -> List[Tuple["BuildingEntity", float, List["GridPoint"]]]:
+        """
+        [批次尋路] 計算 source 到每個目標的真實路徑 (兩棟建築周圍一圈之間的最短路徑)
+        優先使用建築間路線表，表內沒有的讀背景算好的建築間路線，還沒算過的交給背景尋路 (這次略過)
+        :return: [(目標, 真實路徑長度(grid), 真實路徑(grid)), ...] (只包含走得到的目標)
+        """
+        world_map = GameContext.world_map
+        map_tag = GameContext.map_tag()
+        source_key = route_key(source.stats.grid_point, source.stats.grid_size)
+
+        target_keys = [route_key(target.stats.grid_point, target.stats.grid_size) for target in targets]
+        paths = [a_star_mg.get_route(world_map, source_key, key, map_tag, wait = False) for key in target_keys]
+
+        missing = []
+        for i, path in enumerate(paths):
+            if path is not None or target_keys[i] == source_key: continue
+
+            paths[i] = a_star_mg.get_building_path(source_key, target_keys[i])
+            if paths[i] is None:
+                missing.append((source_key, target_keys[i]))
+
+        if missing:
+            path_service.prefetch_building_paths(missing)
 
-        return best_target, min_path_len, best_path
\ No newline at end of file
+        return [
+            (target, grid_path_cost(path) / COST_STRAIGHT, path)
+            for target, path in zip(targets, paths) if path
+        ]
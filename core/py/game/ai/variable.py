@@ -30,3 +30,5 @@ class AIStrategicState(Enum):
 
 class AIVar(IntEnum):
     PATH_STEP_STRIDE = 5
+    # 防守支援的路徑長度上限 (grid)，超過的目標在尋路時提早放棄
+    DEFENSE_MAX_PATH_LEN = 30
@@ -64,29 +64,5 @@ class CastleLogic(BuildingLogic):
         return dist_sq <= self.attack_range_sq
 
     def _find_best_target_optimized(self):
-        """ 遍歷敵人列表，找出最近的一個 """
-        enemies = GameContext.army_mg.jellies
-
-        best_target = None
-        min_dist_sq = self.attack_range_sq
-
-        my_pos = self.center_pos
-        my_owner = self.building.stats.owner
-
-        for jelly in enemies:
-            if jelly.stats.owner == my_owner: continue
-            if jelly.stats.is_dead: continue
-
-            # 距離快篩 (先算 X 軸，太遠直接跳過)
-            dx = jelly.stats.pos.x - my_pos.x
-            if dx**2 > min_dist_sq: continue
-
-            dy = jelly.stats.pos.y - my_pos.y
-            dist_sq = dx**2 + dy**2
-
-            # 更新最近目標
-            if dist_sq <= min_dist_sq:
-                min_dist_sq = dist_sq
-                best_target = jelly
-
-        return best_target
+        """ 找出攻擊範圍內最近的敵方士兵 """
+        return GameContext.army_mg.find_nearest_enemy(self.center_pos, self.attack_range_sq, self.building.stats.owner)
@@ -28,13 +28,18 @@ if TYPE_CHECKING:
 class BuildingManager:
     def __init__(self):
         self.building_map: dict[GridPoint, BuildingEntity] = {}
+        # 關卡載入時成功擺放的建築 (設定檔索引 -> 實體，編譯關卡包使用)
+        self.level_buildings: dict[int, BuildingEntity] = {}
 
     # =========================================================================
     # [Level Management] 關卡載入與清空
     # =========================================================================
 
-    def load_level(self):
-        """ 載入關卡：讀取設定檔 -> 查找工廠 -> 生成物件 -> 計算 UI """
+    def load_level(self, owners: dict[int, int] | None = None):
+        """
+        載入關卡：讀取設定檔 -> 查找工廠 -> 生成物件 -> 計算 UI
+        owners: [關卡包] 設定檔索引 -> 物件編號 (格子已由 world_map.restore 寫入，不再檢查 / 註冊佔用)
+        """
         self._clear_level()
 
         if GameContext.level not in GAME_OBJ_CONFIG:
@@ -47,7 +52,8 @@ class BuildingManager:
 
         # 遍歷建築清單
         for index, data_value in enumerate(arch_list):
-            self._create_entity_from_data(data_value, index)
+            owner = owners.get(index) if owners is not None else None
+            self._create_entity_from_data(data_value, index, owner)
 
         dbg.log(f"Level {GameContext.level} loaded. Total buildings: {len(self.building_map)}")
 
@@ -62,8 +68,9 @@ class BuildingManager:
 
         # 清空管理器自己的字典
         self.building_map.clear()
+        self.level_buildings.clear()
 
-    def _create_entity_from_data(self, data: dict, index: int):
+    def _create_entity_from_data(self, data: dict, index: int, owner: int | None = None):
         """ 根據資料生成單一建築並註冊 UI """
         genre = data.get(BuildingStatsKey.ARCH)
 
@@ -102,7 +109,14 @@ class BuildingManager:
             # 註冊到 LayoutManager
             layout_mg.add_item(entity.layout_ui)
 
-        self.add_building(entity)
+        if owner is not None:
+            # 關卡包：佔用格子已在地圖上，只綁定物件編號
+            GameContext.world_map.bind_owner(owner, entity)
+            self.building_map[entity.grid_point] = entity
+        elif not self.add_building(entity):
+            return
+
+        self.level_buildings[index] = entity
 
     # =========================================================================
     # [Object Management] 物件增刪
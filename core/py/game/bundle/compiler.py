@@ -0,0 +1,47 @@
+"""
+[關卡包離線編譯]
+依序以原流程載入每個關卡並寫成關卡包 (遊戲第一次載入關卡時也會自動編譯，這裡只是預先做完)
+執行方式 (於 core 目錄):
+    python -m py.game.bundle.compiler [--force]
+"""
+
+import argparse
+import os
+import time
+
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+os.environ.setdefault('SDL_AUDIODRIVER', 'dummy')
+
+import py.init
+from py.game.building.preset import GAME_OBJ_CONFIG
+from py.game.bundle.manager import level_bundle_mg
+from py.game.manager import game_mg
+
+
+def compile_all(force: bool = False):
+    """ 編譯所有關卡 (force: 先刪除既有的關卡包) """
+    if force:
+        for path in level_bundle_mg.directory.glob("*.bin"):
+            path.unlink()
+
+    for level in sorted(GAME_OBJ_CONFIG):
+        fingerprint = level_bundle_mg.fingerprint(
+            game_mg.current_page, level, game_mg.world_map, game_mg.grid_cvt, game_mg.obstacle_mg
+        )
+        path = level_bundle_mg.path_for(game_mg.current_page, level, fingerprint)
+        cached = path.exists()
+
+        start = time.perf_counter()
+        game_mg.load_level(level)
+        elapsed = (time.perf_counter() - start) * 1000
+
+        state = "up to date" if cached else "compiled"
+        print(f"Level {level}: {state} ({elapsed:.1f} ms) -> {path.name}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description = "關卡包離線編譯")
+    parser.add_argument("--force", action = "store_true", help = "刪除既有的關卡包後全部重新編譯")
+    args = parser.parse_args()
+
+    compile_all(args.force)
@@ -0,0 +1,178 @@
+import array
+import mmap
+import os
+import struct
+from pathlib import Path
+
+import numpy as np
+from py.debug import dbg
+from py.game.bundle.variable import BundleObstacle, BundleRoute, BundleSection, LevelBundle, LevelBundleVar
+from py.trans.variable import ArrayTypecode
+
+# 檔頭：識別碼, 格式版本, 區段數, 指紋
+MAGIC = b"JLVB"
+HEADER = struct.Struct("<4sHH16s")
+# 區段表：名稱, 位移, 長度 (bytes)
+SECTION = struct.Struct("<8sQQ")
+# 區段資料的對齊 (讀取時可直接以 numpy 檢視)
+ALIGN = 8
+
+# 各區段的元素型別與每列的欄數 (一律 little-endian)
+SECTION_LAYOUT: dict[BundleSection, tuple[np.dtype, int]] = {
+    BundleSection.META:             (np.dtype("<i8"), 3),
+    BundleSection.COLLISION:        (np.dtype("i1"), 1),
+    BundleSection.OWNERS:           (np.dtype("<i4"), 1),
+    BundleSection.LABELS:           (np.dtype("<i4"), 1),
+    BundleSection.BUILDINGS:        (np.dtype("<i4"), 2),
+    BundleSection.OBSTACLES:        (np.dtype("<i4"), 6),
+    BundleSection.OBSTACLE_CELLS:   (np.dtype("<i4"), 2),
+    BundleSection.OBSTACLE_RECTS:   (np.dtype("<i4"), 4),
+    BundleSection.LANDMARK_CELLS:   (np.dtype("<i4"), 2),
+    BundleSection.LANDMARK_DIST:    (np.dtype("<u4"), 1),
+    BundleSection.LANDMARK_DIRS:    (np.dtype("i1"), 1),
+    BundleSection.ROUTE_KEYS:       (np.dtype("<i4"), 4),
+    BundleSection.ROUTES:           (np.dtype("<i4"), 9),
+    BundleSection.ROUTE_RAW:        (np.dtype("<i2"), 1),
+}
+
+
+def write_bundle(path: Path, fingerprint: str, bundle: LevelBundle):
+    """ 寫入關卡包 (先寫暫存檔再取代，中途失敗不會留下半個檔案) """
+    sections = _pack(bundle)
+
+    offset = HEADER.size + SECTION.size * len(sections)
+    table = []
+    for section, data in sections.items():
+        offset = -(-offset // ALIGN) * ALIGN
+        table.append((section, offset, data))
+        offset += len(data)
+
+    path.parent.mkdir(parents = True, exist_ok = True)
+    temp = path.with_suffix(".tmp")
+    with open(temp, "wb") as f:
+        f.write(HEADER.pack(MAGIC, LevelBundleVar.FORMAT, len(table), fingerprint.encode()))
+        for section, position, data in table:
+            f.write(SECTION.pack(section.value.encode(), position, len(data)))
+        for section, position, data in table:
+            f.write(b"\0" * (position - f.tell()))
+            f.write(data)
+    os.replace(temp, path)
+
+def read_bundle(path: Path, fingerprint: str) -> LevelBundle | None:
+    """
+    以 memory map 讀取關卡包 (格式或指紋不符、檔案損毀回傳 None)
+    碰撞格子 / 物件編號是 memory map 上的唯讀檢視 (不複製)，LevelBundle 不再使用時才關閉
+    """
+    try:
+        with open(path, "rb") as f:
+            view = mmap.mmap(f.fileno(), 0, access = mmap.ACCESS_READ)
+        return _unpack(view, fingerprint)
+    except (OSError, ValueError, struct.error) as e:
+        dbg.war(f"[Bundle] 無法讀取關卡包 {path.name}: {e}")
+        return None
+
+# =========================================================================
+# 內部：LevelBundle <-> 區段
+# =========================================================================
+
+def _pack(bundle: LevelBundle) -> dict[BundleSection, bytes]:
+    obstacles, obstacle_cells, obstacle_rects = [], [], []
+    for obs in bundle.obstacles:
+        obstacles.append((obs.spawn_index, obs.owner, len(obstacle_cells), len(obs.cells), len(obstacle_rects), len(obs.rects)))
+        obstacle_cells.extend(obs.cells)
+        obstacle_rects.extend(obs.rects)
+
+    rows = {
+        BundleSection.META:             [(bundle.width, bundle.height, bundle.version)],
+        BundleSection.COLLISION:        bundle.collision.ravel(),
+        BundleSection.OWNERS:           bundle.owners.ravel(),
+        BundleSection.LABELS:           bundle.labels,
+        BundleSection.BUILDINGS:        sorted(bundle.buildings.items()),
+        BundleSection.OBSTACLES:        obstacles,
+        BundleSection.OBSTACLE_CELLS:   obstacle_cells,
+        BundleSection.OBSTACLE_RECTS:   obstacle_rects,
+        BundleSection.LANDMARK_CELLS:   bundle.landmark_cells,
+        BundleSection.LANDMARK_DIST:    [d for dist in bundle.landmark_dist for d in dist],
+        BundleSection.LANDMARK_DIRS:    [d for dirs in bundle.landmark_dirs for d in dirs],
+    }
+
+    if bundle.route_keys is not None:
+        index = {key: i for i, key in enumerate(bundle.route_keys)}
+        routes, raws = [], []
+        for route in bundle.routes:
+            cost = -1 if route.cost is None else route.cost
+            bbox = route.bbox or (0, 0, -1, -1)
+            routes.append((index[route.source], index[route.target], len(raws), len(route.raw), cost, *bbox))
+            raws.extend(route.raw)
+
+        rows[BundleSection.ROUTE_KEYS] = bundle.route_keys
+        rows[BundleSection.ROUTES] = routes
+        rows[BundleSection.ROUTE_RAW] = raws
+
+    sections = {}
+    for section, values in rows.items():
+        dtype, columns = SECTION_LAYOUT[section]
+        data = np.asarray(values, dtype = dtype)
+        sections[section] = data.reshape(-1, columns).tobytes() if columns > 1 else data.tobytes()
+    return sections
+
+def _unpack(view: mmap.mmap, fingerprint: str) -> LevelBundle | None:
+    magic, version, count, stored = HEADER.unpack_from(view, 0)
+    if magic != MAGIC or version != LevelBundleVar.FORMAT or stored.decode() != fingerprint:
+        return None
+
+    table = {}
+    for i in range(count):
+        name, offset, size = SECTION.unpack_from(view, HEADER.size + SECTION.size * i)
+        table[name.rstrip(b"\0").decode()] = (offset, size)
+
+    def read(section: BundleSection) -> np.ndarray | None:
+        """ 區段內容 (memory map 上的唯讀檢視) """
+        if section.value not in table: return None
+        offset, size = table[section.value]
+        dtype, columns = SECTION_LAYOUT[section]
+        data = np.frombuffer(view, dtype = dtype, count = size // dtype.itemsize, offset = offset)
+        return data.reshape(-1, columns) if columns > 1 else data
+
+    (width, height, map_version), = read(BundleSection.META).tolist()
+    bundle = LevelBundle(
+        width = width,
+        height = height,
+        version = map_version,
+        collision = read(BundleSection.COLLISION).reshape(height, width),
+        owners = read(BundleSection.OWNERS).reshape(height, width),
+        labels = array.array('i', read(BundleSection.LABELS).astype(np.intc).tobytes()),
+        buildings = dict(read(BundleSection.BUILDINGS).tolist()),
+    )
+
+    cells = [tuple(cell) for cell in read(BundleSection.OBSTACLE_CELLS).tolist()]
+    rects = [tuple(rect) for rect in read(BundleSection.OBSTACLE_RECTS).tolist()]
+    for spawn_index, owner, cell_start, cell_count, rect_start, rect_count in read(BundleSection.OBSTACLES).tolist():
+        bundle.obstacles.append(BundleObstacle(
+            spawn_index, owner,
+            cells[cell_start:cell_start + cell_count],
+            rects[rect_start:rect_start + rect_count]
+        ))
+
+    bundle.landmark_cells = [tuple(cell) for cell in read(BundleSection.LANDMARK_CELLS).tolist()]
+    if bundle.landmark_cells:
+        total = width * height
+        dist = read(BundleSection.LANDMARK_DIST).astype(np.uintc).tobytes()
+        dirs = read(BundleSection.LANDMARK_DIRS).tobytes()
+        for k in range(len(bundle.landmark_cells)):
+            bundle.landmark_dist.append(array.array(ArrayTypecode.A_STAR_DIST.value, dist[k * total * 4:(k + 1) * total * 4]))
+            bundle.landmark_dirs.append(array.array(ArrayTypecode.A_STAR_DIR.value, dirs[k * total:(k + 1) * total]))
+
+    keys = read(BundleSection.ROUTE_KEYS)
+    if keys is not None:
+        bundle.route_keys = [tuple(key) for key in keys.tolist()]
+        raws = read(BundleSection.ROUTE_RAW).tobytes()
+        for a, b, start, length, cost, *bbox in read(BundleSection.ROUTES).tolist():
+            bundle.routes.append(BundleRoute(
+                bundle.route_keys[a], bundle.route_keys[b],
+                array.array(ArrayTypecode.A_STAR_OUT_BUFFER.value, raws[start * 2:(start + length) * 2]),
+                None if cost < 0 else cost,
+                tuple(bbox) if length else None
+            ))
+
+    return bundle
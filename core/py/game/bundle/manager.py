@@ -0,0 +1,168 @@
+import hashlib
+import time
+from pathlib import Path
+from typing import TYPE_CHECKING
+
+from py.a_star.manage import a_star_mg
+from py.a_star.route_table import RouteEntry
+from py.a_star.variable import LandmarkVar
+from py.compile_dll import source_hash
+from py.debug import dbg
+from py.game.building.preset import GAME_OBJ_CONFIG
+from py.game.bundle.data import read_bundle, write_bundle
+from py.game.bundle.variable import BundleObstacle, BundleRoute, LevelBundle, LevelBundleVar
+from py.path.manager import PathConfig
+from py.variable import GridPoint, PageTable
+
+if TYPE_CHECKING:
+    from py.game.building.manager import BuildingManager
+    from py.game.map.grid_converter import GridConverter
+    from py.game.map.world_map import GameWorldMap
+    from py.game.obstacle.manager import ObstacleManager
+
+
+class LevelBundleManager:
+    """
+    [關卡包]
+    關卡第一次載入時照原流程建立 (障礙物掃描、逐一註冊、地標與路線表)，完成後把結果寫成二進位檔：
+    碰撞格子、物件編號、連通區塊、建築 / 障礙物的物件編號、地標距離表與路線表
+    之後載入同一關直接 memory map 讀回，只需要重新建立建築與障礙物實體
+    - 檔名帶有指紋 (關卡設定、格子大小、障礙物圖片、A* 原始碼...)，任何輸入改變就視為沒有關卡包
+    - 同一關的舊檔在寫入新檔時清掉 (與 locate_shared_library 相同)
+    """
+    def __init__(self, directory: Path = PathConfig.level_bundle):
+        self.directory = directory
+        # A* 原始碼雜湊 (讀檔成本較高，只算一次)
+        self._a_star_digest: str | None = None
+
+    def fingerprint(
+        self, page: PageTable, level: int, world_map: "GameWorldMap", grid_cvt: "GridConverter", obstacle_mg: "ObstacleManager"
+    ) -> str:
+        """ 影響載入結果的所有輸入的雜湊值 """
+        if self._a_star_digest is None:
+            try:
+                self._a_star_digest = source_hash(PathConfig.a_star.c)
+            except OSError as e:
+                dbg.war(f"[Bundle] 無法讀取 A* 原始碼: {e}")
+                self._a_star_digest = ""
+
+        inputs = (
+            LevelBundleVar.FORMAT.value, LevelBundleVar.ROUTES.value, LandmarkVar.COUNT.value,
+            page.value, level, world_map.width, world_map.height,
+            (grid_cvt.origin_x, grid_cvt.origin_y, grid_cvt.cell_w, grid_cvt.cell_h),
+            repr(GAME_OBJ_CONFIG.get(level)), obstacle_mg.bundle_inputs(page, level),
+            type(a_star_mg.inf).__name__, int(a_star_mg.inf.algorithm), self._a_star_digest,
+        )
+        return hashlib.sha256(repr(inputs).encode()).hexdigest()[:16]
+
+    def path_for(self, page: PageTable, level: int, fingerprint: str) -> Path:
+        return self.directory / f"{self._stem(page, level)}-{fingerprint}.bin"
+
+    def load(self, page: PageTable, level: int, fingerprint: str) -> LevelBundle | None:
+        """ 讀取與指紋相符的關卡包 (沒有或已過期回傳 None) """
+        path = self.path_for(page, level, fingerprint)
+        if not path.exists(): return None
+
+        start = time.perf_counter()
+        bundle = read_bundle(path, fingerprint)
+        if bundle is not None:
+            dbg.log(f"[Bundle] Loaded {path.name} ({(time.perf_counter() - start) * 1000:.1f} ms)")
+        return bundle
+
+    def save(
+        self, page: PageTable, level: int, fingerprint: str,
+        world_map: "GameWorldMap", building_mg: "BuildingManager", obstacle_mg: "ObstacleManager"
+    ) -> Path | None:
+        """ 把剛以原流程載入完成的關卡寫成關卡包 (路線表 / 地標必須對應目前的地圖版本) """
+        bundle = self.compile(world_map, building_mg, obstacle_mg)
+        path = self.path_for(page, level, fingerprint)
+
+        try:
+            write_bundle(path, fingerprint, bundle)
+        except OSError as e:
+            dbg.war(f"[Bundle] 無法寫入關卡包 {path.name}: {e}")
+            return None
+
+        # 清掉同一關舊版本的關卡包
+        for stale in self.directory.glob(f"{self._stem(page, level)}-*.bin"):
+            if stale != path:
+                try:
+                    stale.unlink()
+                except OSError:
+                    pass
+
+        dbg.log(f"[Bundle] Compiled {path.name} ({path.stat().st_size} bytes)")
+        return path
+
+    @staticmethod
+    def compile(world_map: "GameWorldMap", building_mg: "BuildingManager", obstacle_mg: "ObstacleManager") -> LevelBundle:
+        """ 目前的關卡 -> LevelBundle """
+        bundle = LevelBundle(
+            width = world_map.width,
+            height = world_map.height,
+            version = world_map.version,
+            collision = world_map.collision.copy(),
+            owners = world_map.owners.copy(),
+            labels = world_map.components.resolved_labels(),
+            buildings = {index: world_map.owner_id_of(entity) for index, entity in building_mg.level_buildings.items()},
+            obstacles = [
+                BundleObstacle(
+                    obs.spawn_index, world_map.owner_id_of(obs),
+                    [(cell.col, cell.row) for cell in obs.occupied_cells],
+                    [(grid.col, grid.row, size.width, size.height) for grid, size in obs.occupied_rects]
+                )
+                for obs in obstacle_mg.obstacles
+            ],
+        )
+
+        landmarks = a_star_mg.landmarks
+        if landmarks.tables_for(world_map.version) is not None:
+            bundle.landmark_cells = [(cell.col, cell.row) for cell in landmarks.cells]
+            bundle.landmark_dist = landmarks.dist
+            bundle.landmark_dirs = landmarks.dirs
+
+        routes = a_star_mg.routes
+        if LevelBundleVar.ROUTES and routes.ready and not routes.dirty and routes.version == world_map.version:
+            bundle.route_keys = routes.keys
+            bundle.routes = [
+                BundleRoute(source, target, entry.raw, entry.cost, entry.bbox)
+                for (source, target), entry in routes.items()
+            ]
+
+        return bundle
+
+    @staticmethod
+    def restore_map(bundle: LevelBundle, world_map: "GameWorldMap"):
+        """ 地圖格子直接換成關卡包的內容 (物件之後由各管理器以 bind_owner 綁定) """
+        world_map.restore(bundle.collision, bundle.owners, bundle.labels, bundle.version)
+
+    @staticmethod
+    def apply_landmarks(bundle: LevelBundle, world_map: "GameWorldMap", map_tag: str) -> bool:
+        """ 把關卡包的地標距離表交給 a_star_mg (沒有存入時回傳 False，由呼叫端照常建立) """
+        if not bundle.landmark_cells: return False
+
+        a_star_mg.restore_landmarks(
+            world_map, [GridPoint(col, row) for col, row in bundle.landmark_cells],
+            bundle.landmark_dist, bundle.landmark_dirs, map_tag
+        )
+        return a_star_mg.landmarks.ready
+
+    @staticmethod
+    def apply_routes(bundle: LevelBundle, world_map: "GameWorldMap", map_tag: str) -> bool:
+        """ 把關卡包的路線表交給 a_star_mg (沒有存入時回傳 False，由呼叫端照常建立) """
+        if bundle.route_keys is None: return False
+
+        routes = {}
+        for route in bundle.routes:
+            start, end = (GridPoint(route.raw[0], route.raw[1]), GridPoint(route.raw[-2], route.raw[-1])) if route.raw else (None, None)
+            routes[(route.source, route.target)] = RouteEntry(start, end, route.raw, route.cost, route.bbox)
+
+        a_star_mg.restore_route_table(world_map, bundle.route_keys, routes, map_tag)
+        return a_star_mg.routes.ready
+
+    @staticmethod
+    def _stem(page: PageTable, level: int) -> str:
+        return f"level_{page.value.lower()}_{level}"
+
+
+level_bundle_mg = LevelBundleManager()
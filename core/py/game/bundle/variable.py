@@ -0,0 +1,76 @@
+import array
+from dataclasses import dataclass, field
+from enum import Enum, IntEnum
+
+import numpy as np
+from py.a_star.variable import RouteKey
+
+
+class LevelBundleVar(IntEnum):
+    # 關卡包格式版本 (區段內容或載入流程改變時遞增，舊檔會因指紋不同自動重新編譯)
+    FORMAT = 1
+    # 是否一併存入建築間路線表 (0 = 載入後照常計算)
+    ROUTES = 1
+
+
+class BundleSection(Enum):
+    """ 關卡包的區段名稱 (最長 8 bytes) """
+    META            = "meta"        # [width, height, version]
+    COLLISION       = "collide"     # 碰撞格子 (row-major)
+    OWNERS          = "owners"      # 佔用格子的物件編號
+    LABELS          = "labels"      # 連通區塊編號 (已合併)
+    BUILDINGS       = "arch"        # [設定檔索引, 物件編號]
+    OBSTACLES       = "obs"         # [生成索引, 物件編號, 格子起點, 格子數, 矩形起點, 矩形數]
+    OBSTACLE_CELLS  = "obs_cell"    # [col, row]
+    OBSTACLE_RECTS  = "obs_rect"    # [col, row, width, height]
+    LANDMARK_CELLS  = "lm_cell"     # [col, row]
+    LANDMARK_DIST   = "lm_dist"     # 各地標的距離表依序相接
+    LANDMARK_DIRS   = "lm_dirs"     # 各地標的方向表依序相接
+    ROUTE_KEYS      = "rt_key"      # [col, row, width, height]
+    ROUTES          = "rt_pair"     # [Key 索引 A, Key 索引 B, 路徑起點, 路徑長度, 代價, 包圍盒 x4]
+    ROUTE_RAW       = "rt_raw"      # 所有路徑的 [x0, y0, x1, y1...] 依序相接
+
+
+@dataclass
+class BundleObstacle:
+    """ 關卡設定的第 spawn_index 個障礙物 """
+    spawn_index: int
+    owner: int
+    cells: list[tuple[int, int]]
+    rects: list[tuple[int, int, int, int]]
+
+@dataclass
+class BundleRoute:
+    """ 路線表中的一條路線 (Key 較小的建築 -> Key 較大的建築) """
+    source: RouteKey
+    target: RouteKey
+    raw: array.array
+    cost: int | None
+    bbox: tuple[int, int, int, int] | None
+
+@dataclass
+class LevelBundle:
+    """
+    [關卡包] 一個關卡載入完成後的結果
+    地圖格子直接換上，物件只需要依索引重新建立並綁定物件編號
+    """
+    width: int
+    height: int
+    # 編譯時的地圖版本 (載入後沿用，map_tag 與原流程一致)
+    version: int
+    collision: np.ndarray
+    owners: np.ndarray
+    labels: array.array
+
+    # 建築設定檔索引 -> 物件編號
+    buildings: dict[int, int] = field(default_factory = dict)
+    obstacles: list[BundleObstacle] = field(default_factory = list)
+
+    # 地標距離表 (沒有地標時為空)
+    landmark_cells: list[tuple[int, int]] = field(default_factory = list)
+    landmark_dist: list[array.array] = field(default_factory = list)
+    landmark_dirs: list[array.array] = field(default_factory = list)
+
+    # 建築間路線表 (None = 沒有存入，載入後照常計算)
+    route_keys: list[RouteKey] | None = None
+    routes: list[BundleRoute] = field(default_factory = list)
@@ -1,48 +1,129 @@
 import math
 from typing import TYPE_CHECKING
 
-from py.a_star.main import main_a_star
+from py.a_star.manage import a_star_mg
+from py.a_star.route_table import perimeter_query, route_key
+from py.a_star.service import path_service
 from py.debug import dbg
 from py.game.context import GameContext
+from py.game.jelly.variable import (JELLY_ROUTE_MODE,
+                                   MULTI_DISPATCH_MIN_SOURCES, JellyRouteMode)
 
 if TYPE_CHECKING:
+    from py.a_star.flow_field import FlowField
     from py.game.building.entity import BuildingEntity
 
 
+def get_building_flow_field(target: "BuildingEntity") -> "FlowField | None":
+    """ 取得目標建築的流場 (以建築周圍一圈的出入口為終點，同一地圖版本只算一次) """
+    grid, size = target.stats.grid_point, target.stats.grid_size
+    goals = GameContext.world_map.get_access_points(grid, size)
+    if not goals: return None
+
+    return a_star_mg.get_flow_field(
+        grid_data = GameContext.world_map,
+        key = route_key(grid, size),
+        goals = goals,
+        map_name_tag = GameContext.map_tag()
+    )
+
+def plan_multi_dispatch(sources: list["BuildingEntity"], target: "BuildingEntity"):
+    """
+    [多對一派遣] 多棟建築同時對同一個目標出兵前呼叫
+    路線表沒有的來源建築，用一次反向搜尋一起規劃，之後 execute_dispatch_army 直接取用 (building_paths)
+    (流場模式本來就共用目標的流場，不需要規劃)
+    """
+    if JELLY_ROUTE_MODE != JellyRouteMode.PATH: return
+
+    world_map = GameContext.world_map
+    map_tag = GameContext.map_tag()
+    target_key = route_key(target.stats.grid_point, target.stats.grid_size)
+
+    missing = []
+    for source in sources:
+        if source == target or source.stats.army < 1: continue
+
+        source_key = route_key(source.stats.grid_point, source.stats.grid_size)
+        if a_star_mg.get_route(world_map, source_key, target_key, map_tag, wait = False) is not None: continue
+        if a_star_mg.get_building_path(source_key, target_key) is not None: continue
+        missing.append(source_key)
+
+    if len(missing) < MULTI_DISPATCH_MIN_SOURCES: return
+    a_star_mg.plan_converging_paths(world_map, target_key, missing, map_tag)
+
 def execute_dispatch_army(source: "BuildingEntity", target: "BuildingEntity"):
     """ 執行出兵邏輯：計算路徑 -> 生成士兵 """
     if source == target: return False
     if source.stats.army < 1: return False
 
-    # 找出 Source 的門口 (離 Target 最近的空地)
-    start_node = GameContext.world_map.get_access_point(
-        building_grid = source.stats.grid_point,
-        size = source.stats.grid_size,
-        target_grid = target.stats.grid_point
-    )
+    if JELLY_ROUTE_MODE == JellyRouteMode.FLOW_FIELD:
+        # 找出 Source 的門口 (離 Target 最近的空地)
+        start_node = GameContext.world_map.get_access_point(
+            building_grid = source.stats.grid_point,
+            size = source.stats.grid_size,
+            target_grid = target.stats.grid_point,
+            target_size = target.stats.grid_size
+        )
+        return _dispatch_by_flow_field(source, target, start_node)
 
-    # 找出 Target 的門口 (離 Source 最近的空地)
-    end_node = GameContext.world_map.get_access_point(
-        building_grid = target.stats.grid_point,
-        size = target.stats.grid_size,
-        target_grid = source.stats.grid_point
-    )
+    world_map = GameContext.world_map
+    map_tag = GameContext.map_tag()
+    source_key = route_key(source.stats.grid_point, source.stats.grid_size)
+    target_key = route_key(target.stats.grid_point, target.stats.grid_size)
 
-    if not start_node or not end_node:
-        dbg.war(f">> 無法出兵：建築物被完全包圍，無路可走")
+    # 建築間路線表 (關卡載入時已算好)，有的話不需要在這一幀尋路 (地圖剛被編輯的組合由背景重算)
+    path = a_star_mg.get_route(world_map, source_key, target_key, map_tag, wait = False)
+
+    # 路線表沒有的：Source 周圍一圈 -> Target 周圍一圈 的最短路徑 (多對一派遣時已預先規劃)
+    if path is None:
+        path = a_star_mg.get_building_path(source_key, target_key)
+
+    # 還沒算過：交給背景尋路，下一幀之後才出兵 (不相連的建築這裡就能判斷)
+    if path is None:
+        if perimeter_query(world_map, source_key, target_key, {}) is None:
+            dbg.war(">> 無法抵達目標")
+            return False
+
+        owner = source.stats.owner
+        path_service.request_building_paths(
+            [(source_key, target_key)],
+            lambda request: _dispatch_when_ready(source, target, owner, request.result[0])
+        )
+        return True
+
+    if not path:
+        dbg.war(">> 無法抵達目標")
         return False
 
-    path = main_a_star(
-        grid_data = GameContext.world_map,
-        start_pos = start_node, # 用門口當起點
-        end_pos = end_node,     # 用門口當終點
-        map_tag = GameContext.map_tag()
-    )
+    _spawn_half_army(source, target, path)
+    return True
+
+def _dispatch_when_ready(source: "BuildingEntity", target: "BuildingEntity", owner, path):
+    """ 背景尋路交付後出兵 (等待期間來源建築被佔領或兵力用完就取消) """
+    if source.stats.owner != owner or source.stats.army < 1: return
 
     if not path:
+        dbg.war(">> 無法抵達目標")
+        return
+
+    _spawn_half_army(source, target, path)
+
+def _dispatch_by_flow_field(source: "BuildingEntity", target: "BuildingEntity", start_node) -> bool:
+    """ 流場模式：士兵不帶私有路徑，沿目標建築的流場前進 """
+    field = get_building_flow_field(target)
+
+    if not start_node or field is None:
+        dbg.war(f">> 無法出兵：建築物被完全包圍，無路可走")
+        return False
+
+    if field.distance(start_node) is None:
         dbg.war(">> 無法抵達目標")
         return False
 
+    _spawn_half_army(source, target, [start_node], field)
+    return True
+
+def _spawn_half_army(source: "BuildingEntity", target: "BuildingEntity", path, flow_field = None):
     # 這裡派出一半的兵力
     send_amount = math.ceil(source.stats.army / 2)
     source.stats.army -= send_amount # 扣除建築兵量
@@ -52,6 +133,5 @@ def execute_dispatch_army(source: "BuildingEntity", target: "BuildingEntity"):
         target_building = target,
         path = path,
         army_count = send_amount,
+        flow_field = flow_field,
     )
-
-    return True
@@ -30,8 +30,9 @@ class JellyEntity(IHasLayout):
     def update(self, dt: float):
         if self.stats.is_dead: return
 
-        # 執行移動
+        # 執行移動 (SoA 模式平常由 ArmyManager 統一推進，單獨呼叫時陣列的目標點跟著更新)
         is_moving = self.move_comp.update(dt)
+        self.move_comp.retarget()
 
         # 同步 UI 位置
         self.ui.pos.x = self.stats.pos.x
@@ -51,8 +52,12 @@ class JellyEntity(IHasLayout):
         new_size = GameContext.grid_cvt.grid_to_size(self.stats.grid_size)
 
         if self.layout_ui:
-            self.stats.pos = new_pos
-            self.ui.pos = new_pos
+            if self.move_comp.arrays is not None:
+                # SoA 模式：位置檢視不換掉，直接寫回陣列
+                self.stats.pos.x, self.stats.pos.y, self.stats.pos.z = new_pos.x, new_pos.y, new_pos.z
+            else:
+                self.stats.pos = new_pos
+                self.ui.pos = new_pos
             self.ui.size = new_size
 
     @property
@@ -1,15 +1,15 @@
 from py.debug import dbg
 from py.game.building.entity import BuildingEntity
 from py.game.jelly.entity import JellyEntity
+from py.game.jelly.path import JellyPath
 from py.game.jelly.variable import ARCH_TO_JOB_MAP, JellyStats, SpawnContext
 from py.game.variable import GameType, GameTypeMap
 from py.resource.registry import ResourceRegistry
-from py.variable import GridPoint
 
 
 class JellyFactory:
     @staticmethod
-    def spawn_from_building(source_building: BuildingEntity, path: list[GridPoint], target_building, army_count):
+    def spawn_from_building(source_building: BuildingEntity, path: JellyPath, target_building, army_count, flow_field = None):
         """ [外部入口] 建立 Context 並執行生成 """
         # 建立情境物件 (打包參數)
         ctx = SpawnContext(
@@ -17,6 +17,7 @@ class JellyFactory:
             target = target_building,
             path = path,
             amount = army_count,
+            flow_field = flow_field,
         )
         return JellyFactory._spawn_by_context(ctx)
 
@@ -47,6 +48,7 @@ class JellyFactory:
             attack = source_stats.jelly_attack,
             move_speed = source_stats.jelly_speed,
             path = ctx.path,
+            flow_field = ctx.flow_field,
             target_building = ctx.target
         )
 
@@ -1,3 +1,5 @@
+import numpy as np
+from py.a_star.route_table import route_key
 from py.debug import dbg
 from py.font.manager import font_mg
 from py.font.preset import TextID
@@ -5,26 +7,53 @@ from py.game.building.entity import BuildingEntity
 from py.game.context import GameContext
 from py.game.jelly.entity import JellyEntity
 from py.game.jelly.factory import JellyFactory
+from py.game.jelly.path import JellyPathStore
+from py.game.jelly.replan import JellyReplanner
+from py.game.jelly.soa import JellyArrays
+from py.game.jelly.variable import ARMY_BACKEND, JELLY_PATH_SIMPLIFY, ArmyBackend
+from py.game.variable import GameType
 from py.screen.image.manager.core import img_mg
 from py.ui_layout.scale.manager import location_config
 from py.ui_layout.variable import PosZLayer
-from py.variable import GridPoint
+from py.variable import GridPoint, Position
 
 
 class ArmyManager:
-    def __init__(self):
-        # 存放所有活著的士兵實體
-        self.jellies: list[JellyEntity] = []
-        # 用於存放目前存在士兵的網格
+    def __init__(self, backend: ArmyBackend = ARMY_BACKEND):
+        # SoA 模式：士兵的位置 / 速度 / 路徑點 / 陣營存在 NumPy 陣列，每幀一次向量化推進
+        self.arrays = JellyArrays() if backend == ArmyBackend.SOA else None
+        # 存放所有活著的士兵實體 (SoA 模式與 arrays 共用同一個 list，順序與陣列相同)
+        self.jellies: list[JellyEntity] = self.arrays.jellies if self.arrays is not None else []
+        # 用於存放目前存在士兵的網格 (SoA 模式不建立，get_jellies_in_grid 直接查陣列)
         self.spatial_map: dict[tuple[int, int], list[JellyEntity]] = {}
+        # 士兵共用的壓縮路徑 (同一條路線只存一份)
+        self.paths = JellyPathStore(JELLY_PATH_SIMPLIFY)
+        # 地圖編輯後修正在途士兵的路徑
+        self.replanner = JellyReplanner(self.paths)
+
+    def bind_world_map(self, world_map):
+        """ 監聽 GameWorldMap 的格子編輯 (實際修正延到下一次 update) """
+        world_map.add_edit_listener(self.replanner.on_map_edit, self.replanner.reset)
+        world_map.add_edit_listener(self.paths.on_map_edit)
+        self.paths.bind_world_map(world_map)
+
+    def spawn_jelly(self, source_building: BuildingEntity, target_building, path: list[GridPoint], army_count: int, flow_field = None):
+        """ [外部入口] 生成並註冊新士兵 (flow_field 不為 None 時沿流場前進，path 只需要起點) """
+        if flow_field is None:
+            shared_path = self.paths.for_route(
+                route_key(source_building.stats.grid_point, source_building.stats.grid_size),
+                route_key(target_building.stats.grid_point, target_building.stats.grid_size),
+                path, GameContext.grid_cvt
+            )
+        else:
+            shared_path = self.paths.intern(path, GameContext.grid_cvt)
 
-    def spawn_jelly(self, source_building: BuildingEntity, target_building, path: list[GridPoint], army_count: int):
-        """ [外部入口] 生成並註冊新士兵 """
         new_jelly = JellyFactory.spawn_from_building(
             source_building = source_building,
-            path = path,
+            path = shared_path,
             target_building = target_building,
             army_count = army_count,
+            flow_field = flow_field,
         )
 
         if new_jelly:
@@ -34,19 +63,30 @@ class ArmyManager:
 
     def add_jelly(self, jelly: JellyEntity):
         """ 將士兵加入管理列表 """
-        if jelly not in self.jellies:
+        if jelly in self.jellies: return
+
+        if self.arrays is not None:
+            self.arrays.add(jelly)
+        else:
             self.jellies.append(jelly)
 
     def remove_jelly(self, jelly: JellyEntity):
         """ 移除單一士兵 """
         if jelly in self.jellies:
             GameContext.faction_mg.unregister(jelly)
-            self.jellies.remove(jelly)
+            if self.arrays is not None:
+                self.arrays.remove([self.jellies.index(jelly)])
+            else:
+                self.jellies.remove(jelly)
 
     def clear_all(self):
         """ 清空所有士兵 """
+        if self.arrays is not None:
+            self.arrays.clear()
         self.jellies.clear()
         self.spatial_map.clear()
+        self.paths.clear()
+        self.replanner.reset()
 
     def load_level(self):
         """ 載入關卡 """
@@ -61,6 +101,14 @@ class ArmyManager:
         dead_jellies = []
         self.spatial_map.clear()
 
+        # 上一幀之後地圖有被編輯：只修正受影響的士兵
+        if self.replanner.pending:
+            self.replanner.apply(self.jellies)
+
+        if self.arrays is not None:
+            self._update_arrays(dt)
+            return
+
         for jelly in self.jellies:
             # 執行士兵自己的更新邏輯 (移動、互動)
             jelly.update(dt)
@@ -83,6 +131,22 @@ class ArmyManager:
         for dead in dead_jellies:
             self.remove_jelly(dead)
 
+    def _update_arrays(self, dt: float):
+        """ [SoA] 所有士兵一次推進，只有走到終點的士兵逐一處理抵達 (順序與逐隻更新相同) """
+        jellies = self.jellies
+        dead = np.fromiter((jelly.stats.is_dead for jelly in jellies), dtype = bool, count = len(jellies))
+
+        for slot in self.arrays.step(dt, dead):
+            # 停止移動代表抵達建築
+            jellies[slot].interact_comp.on_arrival()
+            dead[slot] = jellies[slot].stats.is_dead
+
+        # 統一清理屍體
+        slots = np.flatnonzero(dead).tolist()
+        for slot in slots:
+            GameContext.faction_mg.unregister(jellies[slot])
+        self.arrays.remove(slots)
+
     def render(self):
         """ [集中渲染控制] 遍歷所有士兵並繪製 """
         for jelly in self.jellies:
@@ -99,9 +163,41 @@ class ArmyManager:
             )
 
     def reload_setup(self):
+        # 網格參數已更新：共用路徑的像素座標只需重算一次
+        self.paths.rescale(GameContext.grid_cvt, (jelly.stats.path for jelly in self.jellies))
         for jelly in self.jellies:
             jelly.update_layout(PosZLayer.UI_ELEMENT_2)
+        if self.arrays is not None:
+            self.arrays.retarget_all()
 
     def get_jellies_in_grid(self, col: int, row: int) -> list[JellyEntity]:
         """ 取得特定格子內的所有士兵 """
+        if self.arrays is not None:
+            return self.arrays.jellies_in_cell(col, row)
         return self.spatial_map.get((col, row), [])
+
+    def find_nearest_enemy(self, pos: Position, range_sq: float, owner: GameType.Owner) -> JellyEntity | None:
+        """ 範圍內最近的非 owner 陣營士兵 (距離相同時取順序較後面的)；SoA 模式一次算完所有距離 """
+        if self.arrays is not None:
+            return self.arrays.nearest_enemy(pos.x, pos.y, range_sq, owner)
+
+        best_target = None
+        min_dist_sq = range_sq
+
+        for jelly in self.jellies:
+            if jelly.stats.owner == owner: continue
+            if jelly.stats.is_dead: continue
+
+            # 距離快篩 (先算 X 軸，太遠直接跳過)
+            dx = jelly.stats.pos.x - pos.x
+            if dx**2 > min_dist_sq: continue
+
+            dy = jelly.stats.pos.y - pos.y
+            dist_sq = dx**2 + dy**2
+
+            # 更新最近目標
+            if dist_sq <= min_dist_sq:
+                min_dist_sq = dist_sq
+                best_target = jelly
+
+        return best_target
@@ -1,29 +1,114 @@
 import math
+from typing import TYPE_CHECKING
 
 from py.game.context import GameContext
 from py.game.jelly.variable import JellyStats
+from py.variable import GridPoint
+
+if TYPE_CHECKING:
+    from py.a_star.flow_field import FlowField
+    from py.game.jelly.path import JellyPath
+    from py.game.jelly.soa import JellyArrays
 
 
 class JellyMoveComponent:
     def __init__(self, stats: JellyStats):
         self.stats: JellyStats = stats
 
+        # SoA 模式：路徑點索引存在 JellyArrays 的陣列 (位置由 ArmyManager 統一推進)
+        self.arrays: "JellyArrays | None" = None
         # 當前前往的路徑點索引 (從 1 起點，因為 0 是終點)
-        self.current_path_index = 1
+        self._path_index = 1
+
+        # 流場模式：目前前往的格子 (從起點的下一格開始)
+        self.flow_target = None
+        if stats.flow_field and stats.path:
+            self.flow_target = stats.flow_field.next_cell(stats.path.cell(0))
+
+    @property
+    def current_path_index(self) -> int:
+        if self.arrays is None: return self._path_index
+        return int(self.arrays.waypoint[self.stats.pos.slot])
+
+    @current_path_index.setter
+    def current_path_index(self, index: int):
+        if self.arrays is None:
+            self._path_index = index
+        else:
+            self.arrays.waypoint[self.stats.pos.slot] = index
+
+    def bind_arrays(self, arrays: "JellyArrays"):
+        """ [SoA] 加入 JellyArrays 後路徑點索引改存在陣列 (stats.pos 已換成 JellyPosition) """
+        self.arrays = arrays
+
+    def unbind_arrays(self):
+        """ [SoA] 移出 JellyArrays 前把路徑點索引存回自己身上 """
+        if self.arrays is None: return
+        self._path_index = self.current_path_index
+        self.arrays = None
+
+    def reroute(self, path: "JellyPath"):
+        """ [重新規劃] 換成從目前所在格出發的新路徑 (先回到 path[0] 的中心點再繼續) """
+        self.stats.path = path
+        self.current_path_index = 0
+        self.retarget()
+
+    def follow_flow(self, flow_field: "FlowField", start: GridPoint):
+        """ [重新規劃] 換成新的流場 (或修補過的同一張)，從 start 重新沿流場前進 """
+        self.stats.flow_field = flow_field
+        self.flow_target = start
+        self.retarget()
+
+    def retarget(self):
+        """ [SoA] 路徑 / 流場換掉後，陣列中前往的像素座標跟著更新 """
+        if self.arrays is not None:
+            self.arrays.retarget(self.stats.pos.slot)
 
     def update(self, dt: float) -> bool:
         """
         更新移動
         回傳: True 表示還在移動, False 表示已抵達終點
         """
+        if self.stats.flow_field:
+            return self._update_flow(dt)
+
         # 如果沒有路徑或已經走完
-        if not self.stats.path or self.current_path_index >= len(self.stats.path): return False
+        path = self.stats.path
+        index = self.current_path_index
+        if path is None or index >= path.steps: return False
+
+        # 當前目標格子的像素中心點 (路徑建立時已算好)
+        pixels = path.pixels
+        if self._step_towards_pixel(pixels[index * 2], pixels[index * 2 + 1], dt):
+            # 推進到下一個路徑點
+            self.current_path_index = index + 1
+
+            # 檢查是否完全抵達終點
+            if self.current_path_index >= path.steps: return False
 
-        # 取得當前目標格子的 "像素中心點"
-        target_grid = self.stats.path[self.current_path_index]
+        return True
+
+    def _update_flow(self, dt: float) -> bool:
+        """ 流場模式：每抵達一格就查下一步方向，直到走到目標建築的出入口 """
+        if self.flow_target is None: return False
+
+        if self._step_towards(self.flow_target, dt):
+            self.flow_target = self.stats.flow_field.next_cell(self.flow_target)
+
+            # 沒有下一步 = 已經在出入口
+            if self.flow_target is None: return False
+
+        return True
+
+    def _step_towards(self, target_grid, dt: float) -> bool:
+        """ 往目標格子的 "像素中心點" 移動，回傳本幀是否抵達 """
         target_pixel = GameContext.grid_cvt.get_pixel_center(target_grid)
-        dx = target_pixel.x - self.stats.pos.x
-        dy = target_pixel.y - self.stats.pos.y
+        return self._step_towards_pixel(target_pixel.x, target_pixel.y, dt)
+
+    def _step_towards_pixel(self, target_x: float, target_y: float, dt: float) -> bool:
+        """ 往像素座標移動，回傳本幀是否抵達 """
+        dx = target_x - self.stats.pos.x
+        dy = target_y - self.stats.pos.y
         dist = math.sqrt(dx**2 + dy**2)
 
         # 本幀移動距離
@@ -32,19 +117,12 @@ class JellyMoveComponent:
         if dist <= move_step:
             # --- 抵達當前節點 ---
             # 直接瞬移到目標點 (修正誤差)
-            self.stats.pos.x = float(target_pixel.x)
-            self.stats.pos.y = float(target_pixel.y)
+            self.stats.pos.x = float(target_x)
+            self.stats.pos.y = float(target_y)
+            return True
 
-            # 推進到下一個路徑點
-            self.current_path_index += 1
-
-            # 檢查是否完全抵達終點
-            if self.current_path_index >= len(self.stats.path): return False
-
-        else:
-            # --- 移動中 ---
-            ratio = move_step / dist
-            self.stats.pos.x += dx * ratio
-            self.stats.pos.y += dy * ratio
-
-        return True
+        # --- 移動中 ---
+        ratio = move_step / dist
+        self.stats.pos.x += dx * ratio
+        self.stats.pos.y += dy * ratio
+        return False
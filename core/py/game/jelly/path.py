@@ -0,0 +1,137 @@
+import array
+
+from py.a_star.simplify import path_blocked, simplify_raw
+from py.a_star.variable import RouteKey
+from py.game.map.variable import GridMapMarking
+from py.trans.variable import ArrayTypecode
+from py.variable import GridPoint, Size
+
+# 像素座標 [x0, y0, x1, y1...]
+PIXEL_TYPECODE = 'd'
+
+
+class JellyPath:
+    """
+    [士兵共用路徑] 唯讀
+    路徑點壓縮成 bytes (以 'h' 讀取 [c0, r0, c1, r1...])，同時保存每個路徑點的像素中心點
+    化簡後相鄰兩個路徑點之間是一條可直線行走的線段，不一定是相鄰格
+    同一條路線的士兵共用同一個實體，移動時直接讀像素座標 (不必每幀換算)
+    視窗縮放時由 JellyPathStore.rescale 統一重算像素座標
+    """
+    __slots__ = ("raw", "steps", "pixels")
+
+    def __init__(self, data: bytes, grid_cvt):
+        self.raw = memoryview(data).cast(ArrayTypecode.A_STAR_OUT_BUFFER.value)
+        # 格子數 (每幀都會讀，先存起來)
+        self.steps = len(self.raw) // 2
+        self.pixels = array.array(PIXEL_TYPECODE)
+        self.rescale(grid_cvt)
+
+    def __len__(self) -> int:
+        return self.steps
+
+    def cell(self, index: int) -> GridPoint:
+        return GridPoint(self.raw[index * 2], self.raw[index * 2 + 1])
+
+    def cells(self, start: int = 0, stop: int | None = None) -> list[GridPoint]:
+        """ 轉回 GridPoint (只給重新規劃等少量使用) """
+        coords = iter(self.raw[start * 2:None if stop is None else stop * 2])
+        return [GridPoint(col, row) for col, row in zip(coords, coords)]
+
+    def pixel(self, index: int) -> tuple[float, float]:
+        return self.pixels[index * 2], self.pixels[index * 2 + 1]
+
+    def rescale(self, grid_cvt):
+        """ 依目前的網格參數重算每格的像素中心點 """
+        # 與 GridConverter.get_pixel_center 相同的算式
+        ox, oy = grid_cvt.origin_x, grid_cvt.origin_y
+        cw, ch = grid_cvt.cell_w, grid_cvt.cell_h
+
+        coords = iter(self.raw)
+        self.pixels = array.array(
+            PIXEL_TYPECODE,
+            [v for col, row in zip(coords, coords) for v in (ox + col * cw + cw / 2, oy + row * ch + ch / 2)]
+        )
+
+
+class JellyPathStore:
+    """
+    [路徑池] 相同內容的路徑只存一份 (以逐格路徑壓縮後的 bytes 為 Key)
+    建築間路線另外以 (來源建築, 目標建築) 記住上一次的來源 list，同一條路線再次出兵時不必重新壓縮
+    路線表 / building_paths 重算後來源 list 會換成新的物件，比對 identity 就知道要重建
+    simplify 開啟時存的是化簡後的直線路徑點：
+    拉直的線段會經過原路徑以外的格子，所以新增牆壁後 (下一次取用前) 把被擋住的路徑移出路徑池重建
+    切換關卡時清空
+    """
+    def __init__(self, simplify: bool = False):
+        self.simplify = simplify
+        self._paths: dict[bytes, JellyPath] = {}
+        self._routes: dict[tuple[RouteKey, RouteKey], tuple[list[GridPoint], JellyPath]] = {}
+        self._world_map = None
+        self._wall_added = False
+
+    def __len__(self) -> int:
+        return len(self._paths)
+
+    def bind_world_map(self, world_map):
+        """ 化簡需要碰撞地圖 (由 ArmyManager.bind_world_map 一併註冊編輯監聽) """
+        self._world_map = world_map
+
+    def on_map_edit(self, start_grid: GridPoint, size: Size, marking: int):
+        if marking == GridMapMarking.WALL:
+            self._wall_added = True
+
+    def intern(self, cells: list[GridPoint], grid_cvt) -> JellyPath:
+        """ 取得與 cells 內容相同的共用路徑 (沒有就建立) """
+        if self._wall_added: self._drop_blocked()
+
+        raw = array.array(ArrayTypecode.A_STAR_OUT_BUFFER.value, [v for p in cells for v in (p.col, p.row)])
+        data = raw.tobytes()
+
+        path = self._paths.get(data)
+        if path is None:
+            world_map = self._world_map
+            if self.simplify and world_map is not None:
+                # 士兵從來源建築內直接走向 path[1]，前兩個路徑點保留原樣
+                path = JellyPath(simplify_raw(raw, world_map.collision_map, world_map.width, keep = 1).tobytes(), grid_cvt)
+            else:
+                path = JellyPath(data, grid_cvt)
+            self._paths[data] = path
+        return path
+
+    def for_route(self, source: RouteKey, target: RouteKey, cells: list[GridPoint], grid_cvt) -> JellyPath:
+        """ 建築間路線 (cells 為路線表 / building_paths 的共用 list) """
+        if self._wall_added: self._drop_blocked()
+
+        pair = (source, target)
+        cached = self._routes.get(pair)
+        if cached is not None and cached[0] is cells: return cached[1]
+
+        path = self.intern(cells, grid_cvt)
+        self._routes[pair] = (cells, path)
+        return path
+
+    def rescale(self, grid_cvt, in_use = ()):
+        """ 視窗縮放：所有路徑的像素座標重算一次 (in_use: 士兵手上已移出路徑池的路徑) """
+        paths = {id(path): path for path in self._paths.values()}
+        paths.update((id(path), path) for path in in_use if path is not None)
+
+        for path in paths.values():
+            path.rescale(grid_cvt)
+
+    def clear(self):
+        self._paths.clear()
+        self._routes.clear()
+        self._wall_added = False
+
+    def _drop_blocked(self):
+        """ 新增牆壁後：化簡過的路徑有線段被擋住就移出路徑池 (在途士兵由 JellyReplanner 處理) """
+        self._wall_added = False
+        if not self.simplify or self._world_map is None: return
+
+        collision_map, width = self._world_map.collision_map, self._world_map.width
+        blocked = [data for data, path in self._paths.items() if path_blocked(path.raw, 0, collision_map, width)]
+        if not blocked: return
+
+        dropped = {id(self._paths.pop(data)) for data in blocked}
+        self._routes = {pair: cached for pair, cached in self._routes.items() if id(cached[1]) not in dropped}
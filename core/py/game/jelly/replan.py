@@ -0,0 +1,126 @@
+from typing import TYPE_CHECKING
+
+from py.a_star.flow_field import FLOW_DIRS, FlowField
+from py.a_star.simplify import path_blocked
+from py.debug import dbg
+from py.game.context import GameContext
+from py.game.jelly.action import get_building_flow_field
+from py.game.map.variable import GridMapMarking
+from py.variable import GridPoint, Size
+
+if TYPE_CHECKING:
+    from py.game.jelly.entity import JellyEntity
+    from py.game.jelly.path import JellyPathStore
+
+
+class JellyReplanner:
+    """
+    [在途士兵重新規劃]
+    地圖編輯時只記下有沒有新牆壁，ArmyManager.update 開頭一次處理 (同一幀的多次編輯合併)
+    - 每個目標建築的搜尋狀態是一張反向距離場 (ManageAStar.flow_fields，與流場模式共用)
+      第一次有路線被擋時才建立，之後的地圖編輯由 ManageAStar 在 C 端局部修補
+    - 路徑模式：只有剩餘路徑 (化簡後的直線線段) 經過新牆壁 (或被切角) 的士兵換路，從目前所在格沿距離場走到目標
+    - 流場模式：場已就地修補，只處理下一格變成牆與場被整張作廢 (出入口改變) 的士兵
+    變成路不會讓既有路徑失效，路徑模式的士兵維持原路
+    暫時找不到出發格的士兵 (例如還在來源建築內) 之後每一幀重試，直到換路成功
+    """
+    def __init__(self, paths: "JellyPathStore"):
+        # 新路徑也放進共用路徑池 (同一幀從同一格換路的士兵共用)
+        self.paths = paths
+        self._wall_added = False
+        self._field_edited = False
+        # 等待重試的士兵
+        self._retry: list["JellyEntity"] = []
+
+    @property
+    def pending(self) -> bool:
+        return self._wall_added or self._field_edited or bool(self._retry)
+
+    def on_map_edit(self, start_grid: GridPoint, size: Size, marking: int):
+        if marking == GridMapMarking.WALL:
+            self._wall_added = True
+        self._field_edited = True
+
+    def reset(self):
+        self._wall_added = False
+        self._field_edited = False
+        self._retry.clear()
+
+    def apply(self, jellies: list["JellyEntity"]) -> int:
+        """ 修正受地圖編輯影響的士兵，回傳換路的士兵數量 """
+        wall_added = self._wall_added
+        retry = self._retry
+        candidates = jellies if self._field_edited else retry
+
+        self._wall_added = False
+        self._field_edited = False
+        self._retry = []
+
+        world_map = GameContext.world_map
+        collision_map, width = world_map.collision_map, world_map.width
+        retry_ids = {id(jelly) for jelly in retry}
+        rerouted = 0
+
+        for jelly in candidates:
+            if jelly.stats.is_dead or jelly.stats.target_building is None: continue
+
+            result = self._replan(jelly, wall_added or id(jelly) in retry_ids, collision_map, width)
+            if result is None:
+                if id(jelly) not in retry_ids:
+                    dbg.war(f"[Army] 在途士兵暫時無法重新規劃 (目標 {jelly.stats.target_building.stats.grid_point})")
+                self._retry.append(jelly)
+            elif result:
+                rerouted += 1
+
+        return rerouted
+
+    def _replan(self, jelly: "JellyEntity", check_path: bool, collision_map, width: int) -> bool | None:
+        """ 需要時替士兵換路：True = 已換路，False = 不需要換，None = 找不到可走的新路 """
+        stats = jelly.stats
+        move_comp = jelly.move_comp
+
+        if stats.flow_field is not None:
+            target_cell = move_comp.flow_target
+            blocked = target_cell is not None and collision_map[target_cell.row * width + target_cell.col] != 0
+            if not stats.flow_field.stale and not blocked: return False
+
+            field = get_building_flow_field(stats.target_building) if stats.flow_field.stale else stats.flow_field
+            start = self._resume_cell(jelly, field, stats.path.cells(0, 1))
+            if start is None: return None
+
+            move_comp.follow_flow(field, start)
+            return True
+
+        if not check_path: return False
+
+        index = max(move_comp.current_path_index - 1, 0)
+        if not path_blocked(stats.path.raw, index, collision_map, width): return False
+
+        field = get_building_flow_field(stats.target_building)
+        start = self._resume_cell(jelly, field, stats.path.cells(index, index + 2))
+        path = field.trace(start) if start is not None else []
+        if not path: return None
+
+        move_comp.reroute(self.paths.intern(path, GameContext.grid_cvt))
+        return True
+
+    @staticmethod
+    def _resume_cell(jelly: "JellyEntity", field: FlowField | None, waypoints: list[GridPoint]) -> GridPoint | None:
+        """
+        換路的出發格：目前所在格 -> 相鄰格中離目標最近的一格 -> 剛離開 / 正前往的路徑點
+        (剛出兵的士兵還在來源建築內，所在格與相鄰格都是牆)
+        """
+        if field is None: return None
+
+        grid = GameContext.grid_cvt.pos_to_grid(jelly.stats.pos)
+        if field.distance(grid) is not None: return grid
+
+        candidates = []
+        for i, (dc, dr) in enumerate(FLOW_DIRS):
+            cell = GridPoint(grid.col + dc, grid.row + dr)
+            dist = field.distance(cell)
+            if dist is not None:
+                candidates.append((dist, i, cell))
+
+        if candidates: return min(candidates)[2]
+        return next((cell for cell in waypoints if field.distance(cell) is not None), None)
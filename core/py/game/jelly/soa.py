@@ -0,0 +1,254 @@
+from typing import TYPE_CHECKING
+
+import numpy as np
+from py.game.context import GameContext
+from py.ui_layout.variable import PosZLayer
+from py.variable import Position
+
+if TYPE_CHECKING:
+    from py.game.jelly.entity import JellyEntity
+    from py.game.variable import GameType
+
+
+class JellyPosition(Position):
+    """
+    [士兵位置檢視] x / y 直接讀寫 JellyArrays 的陣列，z 照舊存在物件上
+    stats.pos 與 layout_ui.pos 共用同一個檢視，既有的呼叫端 (渲染、城堡索敵、重新規劃) 不需要修改
+    """
+    def __init__(self, arrays: "JellyArrays", slot: int, z: int):
+        self.arrays = arrays
+        self.slot = slot
+        self.z = z
+
+    @property
+    def x(self) -> float:
+        return float(self.arrays.x[self.slot])
+
+    @x.setter
+    def x(self, value: float):
+        self.arrays.x[self.slot] = value
+
+    @property
+    def y(self) -> float:
+        return float(self.arrays.y[self.slot])
+
+    @y.setter
+    def y(self, value: float):
+        self.arrays.y[self.slot] = value
+
+
+class JellyArrays:
+    """
+    [士兵 SoA 模擬]
+    所有在途士兵的位置 / 速度 / 路徑點索引 / 陣營存在連續的 NumPy 陣列 (順序與 ArmyManager.jellies 相同)
+    每幀一次向量化推進：所有士兵同時往目前路徑點的像素中心移動一步
+    只有本幀抵達路徑點的士兵 (少數) 回到 Python 查下一個路徑點 (路徑模式讀 JellyPath.pixels，流場模式查 next_cell)
+    JellyEntity 仍是呼叫端使用的物件：stats.pos 換成 JellyPosition，move_comp 的路徑點索引也讀寫這裡的陣列
+    """
+    def __init__(self, capacity: int = 64):
+        self.jellies: list["JellyEntity"] = []
+
+        self.x = np.zeros(capacity, dtype = np.float64)
+        self.y = np.zeros(capacity, dtype = np.float64)
+        self.speed = np.zeros(capacity, dtype = np.float64)
+        # 路徑模式：目前前往的路徑點索引 (流場模式不使用)
+        self.waypoint = np.zeros(capacity, dtype = np.int32)
+        # 陣營 (GameType.Owner 的值)
+        self.owner = np.zeros(capacity, dtype = np.int32)
+        # 目前前往的像素座標 (沒有下一個路徑點時 has_target 為 False)
+        self.target_x = np.zeros(capacity, dtype = np.float64)
+        self.target_y = np.zeros(capacity, dtype = np.float64)
+        self.has_target = np.zeros(capacity, dtype = bool)
+
+        # 所在格子 (get_jellies_in_grid 第一次查詢時才計算，位置改變後作廢)
+        self._cells: tuple[np.ndarray, np.ndarray] | None = None
+
+    def __len__(self) -> int:
+        return len(self.jellies)
+
+    # =========================================================================
+    # 加入 / 移除
+    # =========================================================================
+
+    def add(self, jelly: "JellyEntity"):
+        """ 士兵加到最後一格，stats.pos / layout_ui.pos 換成陣列的檢視 """
+        slot = len(self.jellies)
+        if slot >= len(self.x):
+            self._grow(len(self.x) * 2)
+
+        stats = jelly.stats
+        self.x[slot] = stats.pos.x
+        self.y[slot] = stats.pos.y
+        self.speed[slot] = stats.move_speed
+        self.waypoint[slot] = jelly.move_comp.current_path_index
+        self.owner[slot] = stats.owner.value
+        self.jellies.append(jelly)
+
+        view = JellyPosition(self, slot, PosZLayer.UI_ELEMENT_2)
+        stats.pos = view
+        jelly.ui.pos = view
+        jelly.move_comp.bind_arrays(self)
+
+        self.retarget(slot)
+        self._cells = None
+
+    def remove(self, slots: list[int]):
+        """ 移除多隻士兵 (其餘士兵維持原本的順序)，被移除的士兵換回一般的 Position """
+        if not slots: return
+
+        count = len(self.jellies)
+        keep = np.ones(count, dtype = bool)
+        keep[slots] = False
+
+        for slot in slots:
+            self._unbind(self.jellies[slot])
+
+        remain = int(keep.sum())
+        for column in self._columns():
+            column[:remain] = column[:count][keep]
+
+        self.jellies[:] = [jelly for jelly, alive in zip(self.jellies, keep) if alive]
+        for slot in range(min(slots), remain):
+            self.jellies[slot].stats.pos.slot = slot
+        self._cells = None
+
+    def clear(self):
+        for jelly in self.jellies:
+            self._unbind(jelly)
+        self.jellies.clear()
+        self._cells = None
+
+    # =========================================================================
+    # 每幀推進
+    # =========================================================================
+
+    def step(self, dt: float, dead: np.ndarray) -> list[int]:
+        """
+        所有活著的士兵往目前的路徑點移動一步 (與 JellyMoveComponent 相同的算式)
+        dead: 已死亡的士兵 (不移動)
+        回傳: 停止移動 (已走到終點) 的士兵 slot
+        """
+        count = len(self.jellies)
+        x, y = self.x[:count], self.y[:count]
+        target_x, target_y = self.target_x[:count], self.target_y[:count]
+        has_target = self.has_target[:count]
+
+        dx = target_x - x
+        dy = target_y - y
+        dist = np.sqrt(dx * dx + dy * dy)
+        move_step = self.speed[:count] * dt
+
+        active = has_target & ~dead
+        reached = active & (dist <= move_step)
+        moving = active & ~reached
+
+        ratio = move_step[moving] / dist[moving]
+        x[moving] += dx[moving] * ratio
+        y[moving] += dy[moving] * ratio
+
+        # 抵達當前路徑點：直接瞬移到目標點 (修正誤差)，再查下一個路徑點
+        x[reached] = target_x[reached]
+        y[reached] = target_y[reached]
+
+        stopped = ~has_target & ~dead
+        for slot in np.flatnonzero(reached).tolist():
+            if not self._advance(slot):
+                stopped[slot] = True
+
+        self._cells = None
+        return np.flatnonzero(stopped).tolist()
+
+    def retarget(self, slot: int) -> bool:
+        """ 依士兵目前的路徑 / 流場重新取得前往的像素座標，回傳是否還有下一個路徑點 """
+        jelly = self.jellies[slot]
+        stats = jelly.stats
+
+        target = None
+        if stats.flow_field:
+            cell = jelly.move_comp.flow_target
+            if cell is not None:
+                pixel = GameContext.grid_cvt.get_pixel_center(cell)
+                target = (pixel.x, pixel.y)
+        else:
+            path = stats.path
+            index = int(self.waypoint[slot])
+            if path is not None and index < path.steps:
+                target = (path.pixels[index * 2], path.pixels[index * 2 + 1])
+
+        self.has_target[slot] = target is not None
+        if target is not None:
+            self.target_x[slot], self.target_y[slot] = target
+        return target is not None
+
+    def retarget_all(self):
+        """ 網格參數改變 (路徑的像素座標已重算) 後呼叫 """
+        for slot in range(len(self.jellies)):
+            self.retarget(slot)
+
+    # =========================================================================
+    # 查詢
+    # =========================================================================
+
+    def jellies_in_cell(self, col: int, row: int) -> list["JellyEntity"]:
+        """ 位於指定格子的士兵 (與 GridConverter.pos_to_grid 相同的換算) """
+        if self._cells is None:
+            cvt = GameContext.grid_cvt
+            count = len(self.jellies)
+            self._cells = (
+                np.floor_divide(self.x[:count] - cvt.origin_x, cvt.cell_w).astype(np.int64),
+                np.floor_divide(self.y[:count] - cvt.origin_y, cvt.cell_h).astype(np.int64)
+            )
+
+        cols, rows = self._cells
+        return [self.jellies[slot] for slot in np.flatnonzero((cols == col) & (rows == row)).tolist()]
+
+    def nearest_enemy(self, x: float, y: float, range_sq: float, owner: "GameType.Owner") -> "JellyEntity | None":
+        """
+        範圍內最近的非 owner 陣營士兵 (距離相同時取順序較後面的，與逐一比較 <= 的結果相同)
+        已死亡但還沒移除的士兵 (本幀被子彈打死) 略過
+        """
+        count = len(self.jellies)
+        dx = self.x[:count] - x
+        dy = self.y[:count] - y
+        dist_sq = dx * dx + dy * dy
+
+        candidates = np.flatnonzero((self.owner[:count] != owner.value) & (dist_sq <= range_sq))
+        if not len(candidates): return None
+
+        # 距離由近到遠，距離相同時順序較後面的優先
+        for slot in candidates[np.lexsort((-candidates, dist_sq[candidates]))].tolist():
+            if not self.jellies[slot].stats.is_dead:
+                return self.jellies[slot]
+        return None
+
+    # =========================================================================
+    # 內部
+    # =========================================================================
+
+    def _advance(self, slot: int) -> bool:
+        """ 抵達目前的路徑點：前往下一個路徑點 (流場模式查下一格)，回傳是否還有下一個 """
+        jelly = self.jellies[slot]
+        if jelly.stats.flow_field:
+            move_comp = jelly.move_comp
+            move_comp.flow_target = jelly.stats.flow_field.next_cell(move_comp.flow_target)
+        else:
+            self.waypoint[slot] += 1
+        return self.retarget(slot)
+
+    def _unbind(self, jelly: "JellyEntity"):
+        """ 換回一般的 Position (移除後仍被子彈等物件引用時讀到最後的位置) """
+        view = jelly.stats.pos
+        pos = Position(view.x, view.y, view.z)
+        jelly.move_comp.unbind_arrays()
+        jelly.stats.pos = pos
+        jelly.ui.pos = pos
+
+    def _columns(self) -> tuple[np.ndarray, ...]:
+        return (self.x, self.y, self.speed, self.waypoint, self.owner, self.target_x, self.target_y, self.has_target)
+
+    def _grow(self, capacity: int):
+        for name in ("x", "y", "speed", "waypoint", "owner", "target_x", "target_y", "has_target"):
+            column = getattr(self, name)
+            grown = np.zeros(capacity, dtype = column.dtype)
+            grown[:len(column)] = column
+            setattr(self, name, grown)
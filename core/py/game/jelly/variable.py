@@ -1,12 +1,15 @@
-from dataclasses import dataclass, field
+from dataclasses import dataclass
+from enum import IntEnum
 from typing import TYPE_CHECKING
 
 from py.game.context import GameContext
 from py.game.variable import EntitySpan, GameType
 
 if TYPE_CHECKING:
+    from py.a_star.flow_field import FlowField
     from py.game.building.entity import BuildingEntity
-    from py.variable import GridPoint, Position, Size
+    from py.game.jelly.path import JellyPath
+    from py.variable import Position, Size
 
 # 定義 建築 -> 兵種 的對應關係
 ARCH_TO_JOB_MAP = {
@@ -16,6 +19,24 @@ ARCH_TO_JOB_MAP = {
     GameType.Arch.LAB:        GameType.Job.MAGICIAN,
 }
 
+class JellyRouteMode(IntEnum):
+    PATH = 0        # 每隻士兵各自帶一條 A* 路徑
+    FLOW_FIELD = 1  # 同一目標建築的士兵共用一張流場
+
+class ArmyBackend(IntEnum):
+    OBJECT = 0      # 每隻士兵各自 update (Position 純量計算)
+    SOA = 1         # 位置 / 速度 / 路徑點 / 陣營存成 NumPy 陣列，每幀一次向量化推進
+
+# 出兵時使用的尋路方式
+JELLY_ROUTE_MODE = JellyRouteMode.PATH
+# 士兵的模擬方式 (兩者的移動結果相同)
+ARMY_BACKEND = ArmyBackend.SOA
+# 路徑模式：把逐格路徑化簡成直線路徑點 (同 A* 的防切角規則)，移動時切換路徑點的次數與路徑記憶體都大幅減少
+JELLY_PATH_SIMPLIFY = True
+# 多對一派遣時，需要尋路的來源建築達到此數量才改用一次反向搜尋
+# (反向搜尋會擴散到最遠的來源建築，來源太少時各自 A* 反而比較快)
+MULTI_DISPATCH_MIN_SOURCES = 8
+
 @dataclass
 class JellyBaseData:
     """ [士兵體質設定檔] 定義職業的基礎能力 """
@@ -30,7 +51,10 @@ class JellyStats:
 
     pos: "Position"
     grid_size: "Size" = EntitySpan.JELLY
-    path: list["GridPoint"] = field(default_factory = list)
+    # 與同路線的士兵共用 (唯讀)
+    path: "JellyPath | None" = None
+    # 流場模式：沿著目標建築的流場前進 (此時 path 只有起點)
+    flow_field: "FlowField | None" = None
 
     # 戰鬥數值
     army: float = 0.0
@@ -49,8 +73,9 @@ class SpawnContext:
     """
     source: "BuildingEntity"       # 來源建築
     target: any                  # 目標建築
-    path: list["GridPoint"]        # 移動路徑
+    path: "JellyPath"              # 移動路徑
     amount: int                  # 生產數量
+    flow_field: "FlowField | None" = None  # 流場模式時使用
 
     @property
     def owner(self):
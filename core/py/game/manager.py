@@ -1,4 +1,6 @@
 from py.a_star.manage import a_star_mg
+from py.a_star.route_table import route_key
+from py.a_star.service import path_service
 from py.font.manager import font_mg
 from py.font.preset import TextID
 from py.game.ai.manager import AIManager
@@ -8,6 +10,7 @@ from py.game.building.logic.variable import (LabConfig, LabConfigKey,
 from py.game.building.manager import BuildingManager
 from py.game.building.preset import GAME_OBJ_CONFIG
 from py.game.bullet.manager import BulletManager
+from py.game.bundle.manager import level_bundle_mg
 from py.game.context import GameContext
 from py.game.faction.manager import FactionManager
 from py.game.jelly.manager import ArmyManager
@@ -44,11 +47,17 @@ class GameManager:
         cols = ScreenConfig.width // ScaleMapGrid.cell_w
         rows = ScreenConfig.height // ScaleMapGrid.cell_h
         self.world_map = GameWorldMap(cols, rows)
+        # A* 的 C 端地圖副本跟著 world_map 的編輯增量更新
+        a_star_mg.bind_world_map(self.world_map)
+        # 背景尋路 (換關卡清空地圖時丟棄還沒交付的請求)
+        path_service.bind_world_map(self.world_map)
 
         self.faction_mg = FactionManager()
         self.building_mg = BuildingManager()
         self.obstacle_mg = ObstacleManager(self.world_map)
         self.army_mg = ArmyManager()
+        # 地圖編輯後修正在途士兵的路徑 (延到 army_mg.update 處理，此時流場已由 a_star_mg 修補完)
+        self.army_mg.bind_world_map(self.world_map)
         self.bullet_mg = BulletManager()
         self.ai_mg = AIManager()
 
@@ -62,9 +71,15 @@ class GameManager:
         self.current_level = level_id
         # 讀取關卡資料
         level_data = GAME_OBJ_CONFIG.get(level_id, {})
-
-        # 清理環境
-        self.world_map.clear()
+        # 編譯好的關卡包 (沒有或已過期時照原流程載入，載入完成後再編譯)
+        fingerprint = level_bundle_mg.fingerprint(self.current_page, level_id, self.world_map, self.grid_cvt, self.obstacle_mg)
+        bundle = level_bundle_mg.load(self.current_page, level_id, fingerprint)
+
+        # 清理環境 (關卡包直接換上整張地圖)
+        if bundle is None:
+            self.world_map.clear()
+        else:
+            level_bundle_mg.restore_map(bundle, self.world_map)
         selection_mg.deselect()
         a_star_mg.clear_cache()
         self.faction_mg.setup_level(level_data)
@@ -74,10 +89,33 @@ class GameManager:
         self.ai_mg.setup_level()
         self.bullet_mg.clear_all()
         self.army_mg.load_level()
-        self.obstacle_mg.load_level(level_id)
-        self.building_mg.load_level()
+        if bundle is None:
+            self.obstacle_mg.load_level(level_id)
+            self.building_mg.load_level()
+        else:
+            self.obstacle_mg.load_bundle(level_id, bundle.obstacles)
+            self.building_mg.load_level(bundle.buildings)
+
+        # 地圖擺設完成後建立階層式尋路的抽象圖 (大地圖才會啟用)
+        a_star_mg.build_hierarchy(self.world_map, GameContext.map_tag())
+        # 地標距離表在路線表之前建立 (路線表的搜尋就會用到)
+        if bundle is None or not level_bundle_mg.apply_landmarks(bundle, self.world_map, GameContext.map_tag()):
+            a_star_mg.build_landmarks(self.world_map, GameContext.map_tag())
+        # 建築不會移動，出兵 / AI 評估用的建築間路線在這裡一次算完
+        if bundle is None or not level_bundle_mg.apply_routes(bundle, self.world_map, GameContext.map_tag()):
+            a_star_mg.build_route_table(
+                self.world_map,
+                [route_key(b.stats.grid_point, b.stats.grid_size) for b in self.building_mg.get_all_buildings()],
+                GameContext.map_tag()
+            )
+
+        if bundle is None:
+            level_bundle_mg.save(self.current_page, level_id, fingerprint, self.world_map, self.building_mg, self.obstacle_mg)
 
     def update(self, dt):
+        # 上一幀之後背景算完的路徑統一在這裡交付 (寫入快取、觸發等待中的出兵)
+        path_service.deliver()
+
         self.ai_mg.update(dt)
         self.building_mg.update(dt)
         self.army_mg.update(dt)
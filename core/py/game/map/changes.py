@@ -0,0 +1,94 @@
+from collections import deque
+from dataclasses import dataclass, field
+
+import numpy as np
+from py.game.map.variable import WorldMapVar
+from py.variable import GridPoint, Size
+
+# (epoch, version)：地圖清空時 epoch 遞增 (version 會歸零，兩者一起才能代表一張地圖)
+ChangeToken = tuple[int, int]
+
+
+@dataclass(frozen = True)
+class DirtyRect:
+    """ 一次編輯的範圍 (version 為編輯後的地圖版本) """
+    version: int
+    col: int
+    row: int
+    width: int
+    height: int
+    marking: int
+
+    @property
+    def area(self) -> tuple[int, int, int, int]:
+        """ (col, row, width, height) """
+        return (self.col, self.row, self.width, self.height)
+
+
+@dataclass
+class MapChanges:
+    """
+    changes_since 的結果
+    full 為 True 代表無法列出 (換了地圖或紀錄已被丟棄)，呼叫端必須全部作廢
+    """
+    token: ChangeToken
+    rects: list[DirtyRect] = field(default_factory = list)
+    full: bool = False
+
+    @property
+    def empty(self) -> bool:
+        return not self.full and not self.rects
+
+
+class MapChangeLog:
+    """
+    [地圖編輯紀錄]
+    - 最近 CHANGE_LOG_LIMIT 次編輯的範圍 (DirtyRect)，依版本排列
+    - 每個 BLOCK_SIZE x BLOCK_SIZE 區塊最後一次被編輯時的版本：
+      紀錄被丟棄後仍能判斷某個範圍有沒有被編輯過 (以區塊為單位，可能多報不會漏報)
+    """
+    def __init__(self, width: int, height: int, block: int = WorldMapVar.BLOCK_SIZE, limit: int = WorldMapVar.CHANGE_LOG_LIMIT):
+        self.block = block
+        self.limit = limit
+        self.reset(width, height)
+
+    def reset(self, width: int, height: int, version: int = 0):
+        """ 清空紀錄 (version 為目前的地圖版本) """
+        self.width = width
+        self.height = height
+        block = self.block
+        self.blocks = np.zeros(((height + block - 1) // block, (width + block - 1) // block), dtype = np.int64)
+        self._rects: deque[DirtyRect] = deque(maxlen = self.limit)
+        self._version = version
+
+    def record(self, version: int, start_grid: GridPoint, size: Size, marking: int):
+        """ 每次編輯 (version 遞增 1) 後呼叫 """
+        col, row = int(start_grid.col), int(start_grid.row)
+        self._rects.append(DirtyRect(version, col, row, size.width, size.height, int(marking)))
+        self._version = version
+
+        window = self._block_window(col, row, size.width, size.height)
+        if window is not None:
+            self.blocks[window] = version
+
+    def since(self, version: int) -> list[DirtyRect] | None:
+        """ version 之後的編輯 (依序)，紀錄不足時回傳 None """
+        count = self._version - version
+        if count <= 0: return []
+        if count > len(self._rects): return None
+        return list(self._rects)[-count:]
+
+    def region_version(self, col: int, row: int, width: int, height: int) -> int:
+        """ 矩形涵蓋的區塊中最新的編輯版本 (沒有被編輯過為 0) """
+        window = self._block_window(col, row, width, height)
+        if window is None: return 0
+        return int(self.blocks[window].max())
+
+    def _block_window(self, col: int, row: int, width: int, height: int) -> tuple[slice, slice] | None:
+        """ 矩形 (裁切到地圖內) 涵蓋的區塊切片 """
+        left, top = max(0, col), max(0, row)
+        right, bottom = min(self.width, col + width), min(self.height, row + height)
+        if left >= right or top >= bottom: return None
+
+        block = self.block
+        return slice(top // block, (bottom - 1) // block + 1), slice(left // block, (right - 1) // block + 1)
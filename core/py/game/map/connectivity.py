@@ -0,0 +1,197 @@
+import array
+
+from py.variable import GridPoint, Size
+
+# 4 方向鄰居 (防切角規則下斜走必須兩個直向鄰居都是路，所以 8 方向連通等同 4 方向連通)
+NEIGHBORS_4 = ((0, -1), (0, 1), (-1, 0), (1, 0))
+# 牆壁 / 地圖外的區塊編號
+NO_COMPONENT = 0
+
+
+class ComponentLabels:
+    """
+    [連通區塊標記]
+    每個可走的格子記錄所屬的連通區塊編號，兩格編號不同就一定走不到 (不需要進 C 端搜尋)
+    - 變成路：新格子併入相鄰區塊 (Union-Find 合併編號)，O(編輯範圍)
+    - 變成牆：外圍一圈的空格仍連成一段時不可能切斷區塊；
+      否則記下外圍的空格，查詢前只重新標記這些格子所在的區塊
+    """
+    def __init__(self, width: int, height: int, collision_map: array.array):
+        self.reset(width, height, collision_map)
+
+    def reset(self, width: int, height: int, collision_map: array.array):
+        """ 整張地圖重新標記 (地圖清空 / 尺寸改變時) """
+        self.width = width
+        self.height = height
+        self.collision_map = collision_map
+        self.labels = array.array('i', [NO_COMPONENT]) * (width * height)
+
+        # 區塊合併 / 切斷時遞增 (外部快取可據此判斷連通關係是否改變)
+        self.generation = 0
+        # 被合併的編號 -> 合併到的編號
+        self._parent: dict[int, int] = {}
+        self._next_label = 1
+        # 等待重新標記的格子 (1D 索引)
+        self._pending: list[int] = []
+
+        for idx, value in enumerate(collision_map):
+            if value == 0 and self.labels[idx] == NO_COMPONENT:
+                self._flood(idx, self._new_label())
+
+    def restore(self, width: int, height: int, collision_map: array.array, labels: array.array):
+        """ 直接使用已標記好的編號 (關卡包載入時，不需要整張地圖重新 flood) """
+        self.width = width
+        self.height = height
+        self.collision_map = collision_map
+        self.labels = labels
+
+        self.generation = 0
+        self._parent = {}
+        self._next_label = max(labels, default = NO_COMPONENT) + 1
+        self._pending = []
+
+    def resolved_labels(self) -> array.array:
+        """ 合併後的最終編號 (寫入關卡包，載入後不需要 Union-Find 的紀錄) """
+        self.flush()
+        return array.array('i', [self._find(label) if label != NO_COMPONENT else NO_COMPONENT for label in self.labels])
+
+    def component_of(self, grid: GridPoint) -> int:
+        """ 格子所屬的區塊編號 (牆壁或地圖外為 NO_COMPONENT) """
+        col, row = int(grid.col), int(grid.row)
+        if not (0 <= col < self.width and 0 <= row < self.height): return NO_COMPONENT
+
+        self.flush()
+        label = self.labels[row * self.width + col]
+        return self._find(label) if label != NO_COMPONENT else NO_COMPONENT
+
+    def is_connected(self, start: GridPoint, end: GridPoint) -> bool:
+        """
+        start 是否可能走到 end (False = 一定走不到)
+        起點是牆壁時 (A* 允許從牆內出發) 無法判斷，回傳 True 交給 A*
+        """
+        end_label = self.component_of(end)
+        if end_label == NO_COMPONENT: return False
+
+        col, row = int(start.col), int(start.row)
+        if not (0 <= col < self.width and 0 <= row < self.height): return False
+        if self.collision_map[row * self.width + col] != 0: return True
+
+        return self.component_of(start) == end_label
+
+    def mark_free(self, start_grid: GridPoint, size: Size):
+        """
+        矩形變成路：給一個新編號，再與外圍一圈 4 方向相鄰的區塊合併
+        外圍的四個角只與矩形斜向相鄰 (防切角規則下要經過旁邊的格子才走得到)，不能直接合併
+        """
+        label = self._new_label()
+        for idx in self._rect_cells(start_grid, size):
+            if self.collision_map[idx] == 0:
+                self.labels[idx] = label
+
+        for idx in self._ring_cells(start_grid, size, corners = False):
+            if idx is None: continue
+            neighbor = self.labels[idx]
+            if neighbor != NO_COMPONENT:
+                self._union(label, neighbor)
+
+    def mark_wall(self, start_grid: GridPoint, size: Size):
+        """ 矩形變成牆：外圍的空格斷成兩段以上時才可能切斷區塊，記下來等查詢前重新標記 """
+        for idx in self._rect_cells(start_grid, size):
+            self.labels[idx] = NO_COMPONENT
+
+        ring = self._ring_cells(start_grid, size)
+        walkable = [idx is not None and self.collision_map[idx] == 0 for idx in ring]
+
+        # 繞外圍一圈，計算連續空格的段數
+        runs = sum(1 for i in range(len(ring)) if walkable[i] and not walkable[i - 1])
+        if runs <= 1: return
+
+        self._pending.extend(idx for idx, free in zip(ring, walkable) if free)
+
+    def flush(self):
+        """ 重新標記等待中的格子所在的區塊 (每個區塊只 flood 一次) """
+        if not self._pending: return
+
+        fresh = set()
+        for idx in self._pending:
+            if self.collision_map[idx] != 0 or self.labels[idx] in fresh: continue
+
+            label = self._new_label()
+            fresh.add(label)
+            self._flood(idx, label)
+
+        self._pending.clear()
+        self.generation += 1
+
+    def _flood(self, seed: int, label: int):
+        """ 從 seed 開始把整個 4 方向連通的區塊標成 label """
+        width, height = self.width, self.height
+        labels, collision_map = self.labels, self.collision_map
+
+        labels[seed] = label
+        stack = [seed]
+        while stack:
+            idx = stack.pop()
+            col, row = idx % width, idx // width
+
+            for dc, dr in NEIGHBORS_4:
+                n_col, n_row = col + dc, row + dr
+                if not (0 <= n_col < width and 0 <= n_row < height): continue
+
+                n_idx = n_row * width + n_col
+                if collision_map[n_idx] == 0 and labels[n_idx] != label:
+                    labels[n_idx] = label
+                    stack.append(n_idx)
+
+    def _new_label(self) -> int:
+        label = self._next_label
+        self._next_label += 1
+        return label
+
+    def _find(self, label: int) -> int:
+        root = label
+        while root in self._parent:
+            root = self._parent[root]
+
+        # 路徑壓縮
+        while label != root:
+            next_label = self._parent[label]
+            self._parent[label] = root
+            label = next_label
+        return root
+
+    def _union(self, a: int, b: int):
+        root_a, root_b = self._find(a), self._find(b)
+        if root_a != root_b:
+            self._parent[root_b] = root_a
+            self.generation += 1
+
+    def _rect_cells(self, start_grid: GridPoint, size: Size) -> list[int]:
+        """ 矩形內 (地圖範圍內) 的格子索引 """
+        col, row = int(start_grid.col), int(start_grid.row)
+        return [
+            r * self.width + c
+            for r in range(max(0, row), min(self.height, row + size.height))
+            for c in range(max(0, col), min(self.width, col + size.width))
+        ]
+
+    def _ring_cells(self, start_grid: GridPoint, size: Size, corners: bool = True) -> list[int | None]:
+        """
+        矩形外圍一圈，依順時針排列 (相鄰兩格 4 方向相連)，地圖外為 None
+        corners = False 時不含四個角 (只留與矩形 4 方向相鄰的格子)
+        """
+        col, row = int(start_grid.col), int(start_grid.row)
+        left, top = col - 1, row - 1
+        right, bottom = col + size.width, row + size.height
+
+        coords = [(c, top) for c in range(left, right + 1)]
+        coords += [(right, r) for r in range(top + 1, bottom + 1)]
+        coords += [(c, bottom) for c in range(right - 1, left - 1, -1)]
+        coords += [(left, r) for r in range(bottom - 1, top, -1)]
+        if not corners:
+            coords = [(c, r) for c, r in coords if c not in (left, right) or r not in (top, bottom)]
+
+        return [
+            r * self.width + c if 0 <= c < self.width and 0 <= r < self.height else None
+            for c, r in coords
+        ]
@@ -4,3 +4,9 @@ class GridMapMarking(IntEnum):
     VACUITY = 0
     WALL = 1
 
+
+class WorldMapVar(IntEnum):
+    # 區塊版本的區塊邊長 (格)
+    BLOCK_SIZE = 16
+    # 保留最近幾次編輯的範圍 (changes_since 查詢更早的 token 時視為全部改變)
+    CHANGE_LOG_LIMIT = 256
@@ -1,80 +1,218 @@
 import array
-from typing import Iterator
+from typing import Callable
 
+import numpy as np
+from py.game.map.changes import ChangeToken, MapChangeLog, MapChanges
+from py.game.map.connectivity import NO_COMPONENT, ComponentLabels
 from py.game.map.variable import GridMapMarking
 from py.variable import GridPoint, Size
 
 
+# 沒有物件佔用的格子
+NO_OWNER = 0
+
+
 class GameWorldMap:
+    """
+    [世界地圖]
+    兩層以 [row, col] 存取的 NumPy 格子，矩形的填入 / 清除 / 檢查都是一次切片操作
+    - owners (int32)：佔用該格的物件編號 (邏輯層，編號對應的物件記在 _objects)
+    - collision (int8)：collision_map 的零複製檢視 (物理層)
+      collision_map 仍是 array('b')，A* 的 ctypes 橋接透過 buffer protocol 直接使用，
+      逐格存取 (連通區塊、視線檢查) 也維持 array 的速度
+    每次編輯記錄範圍與區塊版本：快取以 change_token 記下當時的地圖，
+    之後用 changes_since / region_changed_since 只作廢被編輯碰到的部分
+    """
     def __init__(self, cols: int, rows: int):
         self.width: int = cols
         self.height: int = rows
 
         # 佔用該格的物件(給 Python 用，邏輯層)
-        self.occupation: dict[GridPoint, object] = {}
+        self.owners: np.ndarray = None
         # 佔用該格的物件(給 C 用，物理層)
         # 使用 array ('b' 代表 有號 1 byte 整數)，極省記憶體且連續
-        self.collision_map = array.array('b', [0] * (cols * rows))
+        self.collision_map: array.array = None
+        self.collision: np.ndarray = None
+        self._allocate(cols, rows)
+
+        # 物件編號 -> 物件 / id(物件) -> 物件編號
+        self._objects: dict[int, object] = {}
+        self._owner_ids: dict[int, int] = {}
+        self._next_owner = NO_OWNER + 1
+
+        # 連通區塊標記 (不同區塊一定走不到，尋路前先擋掉)
+        self.components = ComponentLabels(cols, rows, self.collision_map)
+        # 建築周圍一圈的出入口快取 (col, row, width, height) -> 空格，編輯到這一圈時作廢
+        self._perimeters: dict[tuple[int, int, int, int], list[GridPoint]] = {}
 
         self.version: int = 0
+        # 地圖清空 / 尺寸改變時遞增 (version 會歸零，兩者一起才能代表一張地圖)
+        self.epoch: int = 0
+        # 編輯範圍與區塊版本
+        self.changes = MapChangeLog(cols, rows)
+
+        # 格子編輯監聽者 (例如 A* 的 C 端地圖副本)
+        # on_edit(start_grid, size, marking) / on_reset()
+        self._edit_listeners: list[tuple[Callable, Callable | None]] = []
+
+    def restore(self, collision, owners: np.ndarray, labels: array.array, version: int):
+        """
+        [關卡包] 整張地圖直接換成編譯好的格子 (取代 clear + 逐一註冊)
+        佔用格子的物件之後以 bind_owner 補上，監聽者收到的是 on_reset (與 clear 相同)
+        """
+        self._release_all()
+        self.owners = np.array(owners, dtype = np.int32).reshape(self.height, self.width)
+        self.collision_map = array.array('b', np.ascontiguousarray(collision, dtype = np.int8).tobytes())
+        self.collision = np.frombuffer(self.collision_map, dtype = np.int8).reshape(self.height, self.width)
+        self.components.restore(self.width, self.height, self.collision_map, labels)
+        self._perimeters.clear()
+
+        self.version = version
+        self._reset_changes()
+        self._notify_reset()
+
+    def bind_owner(self, owner: int, obj: object):
+        """ [關卡包] 物件編號 owner 對應到 obj (格子已在 restore 時寫入) """
+        self._objects[owner] = obj
+        self._owner_ids[id(obj)] = owner
+        self._next_owner = max(self._next_owner, owner + 1)
+
+    def owner_id_of(self, obj: object) -> int:
+        """ 物件的編號 (沒有佔用任何格子為 NO_OWNER) """
+        return self._owner_ids.get(id(obj), NO_OWNER)
 
     def reload_setup(self, cols: int, rows: int):
         self.width = cols
         self.height = rows
-        self.occupation.clear()
-        self.collision_map = array.array('b', [0] * (cols * rows))
+        self._allocate(cols, rows)
+        self._release_all()
+        self.components.reset(cols, rows, self.collision_map)
+        self._perimeters.clear()
+        self._reset_changes()
+        self._notify_reset()
+
+    def add_edit_listener(self, on_edit: Callable[[GridPoint, Size, int], None], on_reset: Callable[[], None] = None):
+        """ 註冊監聽：物件註冊/移除時通知受影響的矩形，清空地圖時通知 on_reset """
+        self._edit_listeners.append((on_edit, on_reset))
+
+    @property
+    def change_token(self) -> ChangeToken:
+        """ 目前的地圖 (之後交給 changes_since / region_changed_since 查詢) """
+        return (self.epoch, self.version)
+
+    def changes_since(self, token: ChangeToken) -> MapChanges:
+        """
+        token 之後的所有編輯範圍
+        換了地圖或紀錄已被丟棄時 full 為 True (呼叫端全部作廢)
+        """
+        epoch, version = token
+        rects = self.changes.since(version) if epoch == self.epoch else None
+        if rects is None:
+            return MapChanges(self.change_token, full = True)
+        return MapChanges(self.change_token, rects)
+
+    def region_changed_since(self, token: ChangeToken, start_grid: GridPoint, size: Size) -> bool:
+        """ [區塊版本] token 之後矩形所在的區塊是否被編輯過 (以區塊為單位，可能多報不會漏報) """
+        epoch, version = token
+        if epoch != self.epoch: return True
+        return self.changes.region_version(int(start_grid.col), int(start_grid.row), size.width, size.height) > version
 
     def is_area_free(self, start_grid: GridPoint, size: Size, ignore_obj = None) -> bool:
         """
-        檢查一塊區域是否完全沒被佔用
+        檢查一塊區域是否完全沒被佔用 (超出地圖範圍視為被佔用)
         ignore_obj: 移動建築時，忽略自己原本佔用的格子
         """
-        # 這裡使用 generator，迴圈跑到一半發現不行就會立刻停，不會浪費時間算後面的格子
-        for cell in self._iter_cells(start_grid, size):
-            if not self._is_within_bounds(cell):
-                return False
-
-            obj = self.occupation.get((cell.col, cell.row))
+        col, row = int(start_grid.col), int(start_grid.row)
+        if col < 0 or row < 0 or col + size.width > self.width or row + size.height > self.height:
+            return False
 
-            if obj is not None and obj != ignore_obj:
-                return False
-        return True
+        region = self.owners[row:row + size.height, col:col + size.width]
+        ignore_id = self._owner_ids.get(id(ignore_obj), NO_OWNER) if ignore_obj is not None else NO_OWNER
+        if ignore_id == NO_OWNER:
+            return not region.any()
+        return not ((region != NO_OWNER) & (region != ignore_id)).any()
 
     def register_object(self, obj: object, start_grid: GridPoint, size: Size):
-        """ 註冊物件：同時更新 Dict 和 List """
-        for cell in self._iter_cells(start_grid, size):
-            if self._is_within_bounds(cell):
-                # 邏輯層
-                self.occupation[(cell.col, cell.row)] = obj
-                # 物理層
-                idx = self._get_idx(cell)
-                self.collision_map[idx] = GridMapMarking.WALL
-
-        self.version += 1
+        """ 註冊物件：同時更新兩層 (超出地圖的部分忽略) """
+        window = self._clip(start_grid, size)
+        if window is not None:
+            replaced = self._owners_in(window)
+            # 邏輯層
+            self.owners[window] = self._owner_id(obj)
+            # 物理層
+            self.collision[window] = GridMapMarking.WALL
+            self._release(replaced)
+
+        self.components.mark_wall(start_grid, size)
+        self._invalidate_perimeters(start_grid, size)
+        self._record_edit(start_grid, size, GridMapMarking.WALL)
 
     def unregister_object(self, start_grid: GridPoint, size: Size):
-        """ 移除物件：同時更新 Dict 和 List """
-        for cell in self._iter_cells(start_grid, size):
-            if self._is_within_bounds(cell):
-                # 邏輯層 (使用 pop 安全移除，若 key 不在也不會報錯)
-                self.occupation.pop((cell.col, cell.row), None)
-
-                # 物理層
-                idx = self._get_idx(cell)
-                self.collision_map[idx] = GridMapMarking.VACUITY
-
-        self.version += 1
+        """ 移除物件：同時清除兩層 (超出地圖的部分忽略) """
+        window = self._clip(start_grid, size)
+        if window is not None:
+            removed = self._owners_in(window)
+            # 邏輯層
+            self.owners[window] = NO_OWNER
+            # 物理層
+            self.collision[window] = GridMapMarking.VACUITY
+            self._release(removed)
+
+        self.components.mark_free(start_grid, size)
+        self._invalidate_perimeters(start_grid, size)
+        self._record_edit(start_grid, size, GridMapMarking.VACUITY)
 
     def get_object_at(self, grid: GridPoint) -> object | None:
         """ 查詢該格子上是誰 """
-        return self.occupation.get((grid.col, grid.row))
+        col, row = int(grid.col), int(grid.row)
+        if not (0 <= col < self.width and 0 <= row < self.height): return None
+        return self._objects.get(int(self.owners[row, col]))
 
-    def get_access_point(self, building_grid: GridPoint, size: Size, target_grid: GridPoint) -> GridPoint | None:
+    def get_objects_in_area(self, start_grid: GridPoint, size: Size) -> list[object]:
+        """ 矩形內 (地圖範圍內) 所有佔用格子的物件，不重複，依物件編號排序 """
+        window = self._clip(start_grid, size)
+        if window is None: return []
+        return [self._objects[owner] for owner in self._owners_in(window)]
+
+    def are_cells_free(self, cols, rows) -> np.ndarray:
         """
-        [取得出入口]
-        尋找建築物 "周圍一圈" 的空格，並回傳距離目標最近的那一格。
-        解決建築物體積導致 A* 起點被牆壁包圍的問題。
+        [批次查詢] 多個格子是否為路 (地圖外視為牆)
+        cols / rows: 等長的整數序列，回傳對齊的 bool 陣列
+        """
+        cols = np.asarray(cols, dtype = np.intp)
+        rows = np.asarray(rows, dtype = np.intp)
+        inside = (cols >= 0) & (cols < self.width) & (rows >= 0) & (rows < self.height)
+
+        free = np.zeros(cols.shape, dtype = bool)
+        free[inside] = self.collision[rows[inside], cols[inside]] == GridMapMarking.VACUITY
+        return free
+
+    def are_areas_free(self, areas: list[tuple[GridPoint, Size]]) -> list[bool]:
+        """ [批次查詢] 多個矩形是否完全沒被佔用 (以前綴和一次算完，每個矩形 O(1)) """
+        occupied = np.zeros((self.height + 1, self.width + 1), dtype = np.int32)
+        np.cumsum(np.cumsum(self.owners != NO_OWNER, axis = 0), axis = 1, out = occupied[1:, 1:])
+
+        result = []
+        for start_grid, size in areas:
+            col, row = int(start_grid.col), int(start_grid.row)
+            right, bottom = col + size.width, row + size.height
+            if col < 0 or row < 0 or right > self.width or bottom > self.height:
+                result.append(False)
+                continue
+
+            count = occupied[bottom, right] - occupied[row, right] - occupied[bottom, col] + occupied[row, col]
+            result.append(bool(count == 0))
+        return result
+
+    def get_access_points(self, building_grid: GridPoint, size: Size) -> list[GridPoint]:
         """
+        [取得所有出入口]
+        建築物 "周圍一圈" 的所有空格 (流場 / 多起點尋路以這一圈作為起終點)
+        結果會快取到這一圈被編輯為止，呼叫端不可修改回傳的 list
+        """
+        key = (int(building_grid.col), int(building_grid.row), size.width, size.height)
+        cached = self._perimeters.get(key)
+        if cached is not None: return cached
 
         # 找出建築物邊緣的所有候選格子
         candidates = []
@@ -103,14 +241,50 @@ class GameWorldMap:
             if self.collision_map[idx] == 0: # 0 代表路
                 valid_points.append(p)
 
-        if not valid_points:
+        self._perimeters[key] = valid_points
+        return valid_points
+
+    def get_access_point(self, building_grid: GridPoint, size: Size, target_grid: GridPoint, target_size: Size | None = None) -> GridPoint | None:
+        """
+        [取得出入口]
+        尋找建築物 "周圍一圈" 的空格，並回傳距離目標最近的那一格。
+        解決建築物體積導致 A* 起點被牆壁包圍的問題。
+        target_size: 目標是建築時傳入，只挑選與目標出入口相連的格子 (完全不相連直接回傳 None)
+        """
+        candidates = self.get_access_candidates(building_grid, size)
+
+        if not candidates:
             return None # 建築物被完全包圍了
 
-        # 找出距離目標最近的那個點 (曼哈頓距離)
+        if target_size is not None:
+            target_components = {component for _, component in self.get_access_candidates(target_grid, target_size)}
+        else:
+            component = self.components.component_of(target_grid)
+            # 目標是牆壁且不知道大小時無法判斷連通
+            target_components = {component} if component != NO_COMPONENT else None
+
+        return self.pick_access_point(candidates, target_grid, target_components)
+
+    def get_access_candidates(self, building_grid: GridPoint, size: Size) -> list[tuple[GridPoint, int]]:
+        """ 所有出入口與所在的連通區塊 (批次挑選出入口時先算好重複使用) """
+        return [(p, self.components.component_of(p)) for p in self.get_access_points(building_grid, size)]
+
+    @staticmethod
+    def pick_access_point(
+        candidates: list[tuple[GridPoint, int]],
+        target_grid: GridPoint,
+        target_components: set[int] | None
+    ) -> GridPoint | None:
+        """
+        從出入口中挑出離目標最近的那一格 (曼哈頓距離)
+        target_components 不為 None 時只挑與目標相連的格子 (被圍住的角落不會被選成起點)
+        """
         best_point = None
         min_dist = float('inf')
 
-        for p in valid_points:
+        for p, component in candidates:
+            if target_components is not None and component not in target_components: continue
+
             dist = abs(p.col - target_grid.col) + abs(p.row - target_grid.row)
             if dist < min_dist:
                 min_dist = dist
@@ -118,30 +292,94 @@ class GameWorldMap:
 
         return best_point
 
+    def is_connected(self, start: GridPoint, end: GridPoint) -> bool:
+        """ start 是否可能走到 end (False = 一定走不到，不需要尋路) """
+        return self.components.is_connected(start, end)
+
     def clear(self):
-        self.occupation.clear()
-        self.collision_map = array.array('b', [0] * (self.width * self.height))
+        self._allocate(self.width, self.height)
+        self._release_all()
+        self.components.reset(self.width, self.height, self.collision_map)
+        self._perimeters.clear()
 
         self.version = 0
+        self._reset_changes()
+        self._notify_reset()
+
+    def _invalidate_perimeters(self, start_grid: GridPoint, size: Size):
+        """ 外圍一圈與編輯範圍重疊的出入口快取作廢 """
+        col, row = int(start_grid.col), int(start_grid.row)
+        max_c, max_r = col + size.width - 1, row + size.height - 1
+
+        stale = [
+            key for key in self._perimeters
+            if key[0] - 1 <= max_c and key[0] + key[2] >= col
+            and key[1] - 1 <= max_r and key[1] + key[3] >= row
+        ]
+        for key in stale:
+            del self._perimeters[key]
+
+    def _record_edit(self, start_grid: GridPoint, size: Size, marking: GridMapMarking):
+        self.version += 1
+        self.changes.record(self.version, start_grid, size, marking)
+        self._notify_edit(start_grid, size, marking)
+
+    def _reset_changes(self):
+        self.epoch += 1
+        self.changes.reset(self.width, self.height, self.version)
+
+    def _notify_edit(self, start_grid: GridPoint, size: Size, marking: GridMapMarking):
+        for on_edit, _ in self._edit_listeners:
+            on_edit(start_grid, size, marking)
+
+    def _notify_reset(self):
+        for _, on_reset in self._edit_listeners:
+            if on_reset: on_reset()
+
+    def _allocate(self, cols: int, rows: int):
+        """ 建立兩層格子 (collision 與 collision_map 共用同一塊記憶體) """
+        self.owners = np.zeros((rows, cols), dtype = np.int32)
+        self.collision_map = array.array('b', [0]) * (cols * rows)
+        self.collision = np.frombuffer(self.collision_map, dtype = np.int8).reshape(rows, cols)
+
+    def _clip(self, start_grid: GridPoint, size: Size) -> tuple[slice, slice] | None:
+        """ 矩形與地圖的交集，以 [row, col] 切片表示 (沒有交集回傳 None) """
+        col, row = int(start_grid.col), int(start_grid.row)
+        left, top = max(0, col), max(0, row)
+        right, bottom = min(self.width, col + size.width), min(self.height, row + size.height)
+        if left >= right or top >= bottom: return None
+        return slice(top, bottom), slice(left, right)
+
+    def _owners_in(self, window: tuple[slice, slice]) -> list[int]:
+        """ 切片內出現的物件編號 (不含 NO_OWNER) """
+        owners = np.unique(self.owners[window])
+        return [int(owner) for owner in owners if owner != NO_OWNER]
+
+    def _owner_id(self, obj: object) -> int:
+        owner = self._owner_ids.get(id(obj))
+        if owner is None:
+            owner = self._next_owner
+            self._next_owner += 1
+            self._owner_ids[id(obj)] = owner
+            self._objects[owner] = obj
+        return owner
+
+    def _release(self, owners: list[int]):
+        """ 不再佔用任何格子的物件釋放編號 (不留著物件的參考) """
+        for owner in owners:
+            if (self.owners == owner).any(): continue
+            obj = self._objects.pop(owner)
+            del self._owner_ids[id(obj)]
+
+    def _release_all(self):
+        self._objects.clear()
+        self._owner_ids.clear()
+        self._next_owner = NO_OWNER + 1
 
     def _is_within_bounds(self, grid: GridPoint) -> bool:
         """ 檢查座標是否在地圖範圍內 """
         return 0 <= grid.col < self.width and 0 <= grid.row < self.height
 
-    def _iter_cells(self, start: GridPoint, size: Size) -> Iterator[GridPoint]:
-        """ 使用 yield 產生器，避免建立大量暫存 list """
-        for c in range(size.width):
-            for r in range(size.height):
-                yield GridPoint(start.col + c, start.row + r)
-
-    def _get_cells(self, start: GridPoint, size: Size) -> list[GridPoint]:
-        """ 取得矩形範圍內的所有格子 """
-        cells = []
-        for c in range(size.width):
-            for r in range(size.height):
-                cells.append(GridPoint(start.col + c, start.row + r))
-        return cells
-
     def _get_idx(self, grid: GridPoint) -> int:
         """ 將 2D 座標轉為 1D 索引 """
         return grid.row * self.width + grid.col
@@ -1,17 +1,22 @@
+import hashlib
+from dataclasses import replace
 from typing import TYPE_CHECKING, List
 
+import numpy as np
 import pygame
 from py.debug import dbg
 from py.game.context import GameContext
 from py.game.obstacle.preset import LEVEL_CONFIG_MAP
-from py.game.obstacle.variable import ObstacleEntity, ObstacleSpawnData
+from py.game.obstacle.raster import cover_rects, mask_cell_hits
+from py.game.obstacle.variable import ObstacleEntity, ObstacleFootprint, ObstacleSpawnData
 from py.screen.image.manager.core import img_mg
 from py.screen.image.preset import IMAGE_RESOURCE_MAP
 from py.ui_layout.main import layout_mg
 from py.ui_layout.variable import PosZLayer
-from py.variable import GridPoint, Position, Size
+from py.variable import GridPoint, PageTable, Position, Size
 
 if TYPE_CHECKING:
+    from py.game.bundle.variable import BundleObstacle
     from py.game.map.world_map import GameWorldMap
 
 
@@ -24,7 +29,9 @@ class ObstacleManager:
         self.obstacles: List[ObstacleEntity] = []
 
         self.cvt = None
-        self.cell_mask = None
+        # (頁面, 關卡, 版面名稱, 網格位置, 圖片大小, 網格參數) -> 佔用的格子
+        # 同一個關卡 / 視窗比例再次載入時不需要重新掃描圖片
+        self._footprints: dict[tuple, ObstacleFootprint] = {}
 
     # =========================================================================
     # 公開介面：關卡載入與卸載
@@ -34,12 +41,6 @@ class ObstacleManager:
         """ 確保依賴資源已初始化 (Lazy Load) """
         self.cvt = GameContext.grid_cvt
 
-        # 建立格子 Mask
-        if self.cell_mask is None and self.cvt is not None:
-            cell_w, cell_h = int(self.cvt.cell_w), int(self.cvt.cell_h)
-            self.cell_mask = pygame.mask.Mask((cell_w, cell_h))
-            self.cell_mask.fill()
-
     def load_level(self, level: int):
         """ 載入指定關卡的所有障礙物 """
         self._ensure_resources()
@@ -57,8 +58,57 @@ class ObstacleManager:
 
         dbg.log(f"[Obstacle] Loading page {GameContext.page} level: {level} with {len(config_level.obstacles)} obstacles.")
 
-        for spawn_data in config_level.obstacles:
-            self._create_obstacle_instance(spawn_data)
+        for spawn_index, spawn_data in enumerate(config_level.obstacles):
+            self._create_obstacle_instance(level, spawn_data, spawn_index)
+
+    def load_bundle(self, level: int, records: List["BundleObstacle"]):
+        """ [關卡包] 格子已由 world_map.restore 寫入，只重新建立實體並綁定物件編號 """
+        self._ensure_resources()
+        # 舊障礙物的格子已隨地圖整張換掉，不需要逐一解除
+        self.obstacles.clear()
+        if not records: return
+
+        config_level = LEVEL_CONFIG_MAP[GameContext.page][level]
+        for record in records:
+            data = config_level.obstacles[record.spawn_index]
+            obstacle_entity = ObstacleEntity(
+                layout_item = layout_mg.get_item(GameContext.page, data.layout_name),
+                grid_origin = data.grid_pos,
+                occupied_cells = [GridPoint(col, row) for col, row in record.cells],
+                occupied_rects = [(GridPoint(col, row), Size(width, height)) for col, row, width, height in record.rects],
+                spawn_index = record.spawn_index
+            )
+            self.world_map.bind_owner(record.owner, obstacle_entity)
+            self.obstacles.append(obstacle_entity)
+
+        dbg.log(f"[Obstacle] Page {GameContext.page} level {level}: {len(self.obstacles)} obstacles from bundle.")
+
+    def bundle_inputs(self, page: PageTable, level: int) -> list[tuple]:
+        """
+        [關卡包指紋] 影響障礙物佔用格子的所有輸入
+        (生成資料、版面大小、圖片設定與圖片內容，任何一個改變關卡包就需要重新編譯)
+        """
+        config_level = LEVEL_CONFIG_MAP.get(page, {}).get(level)
+        if not config_level: return []
+
+        inputs = []
+        for data in config_level.obstacles:
+            item = layout_mg.get_item(page, data.layout_name)
+            profile = self._find_profile(item, data.layout_name) if item else None
+
+            image_digest = None
+            if profile:
+                paths = profile.path if isinstance(profile.path, list) else [profile.path]
+                try:
+                    image_digest = hashlib.sha256(b"".join(path.read_bytes() for path in paths)).hexdigest()
+                except OSError:
+                    pass
+                # 路徑換成圖片內容的雜湊 (關卡包不綁定專案的絕對路徑)
+                profile = replace(profile, path = None)
+
+            size = (item.size.width, item.size.height) if item else None
+            inputs.append((repr(data), size, repr(profile), image_digest))
+        return inputs
 
     def render(self):
         for obs in self.obstacles:
@@ -74,11 +124,9 @@ class ObstacleManager:
         """ 清除所有障礙物 """
         if not self.obstacles: return
 
-        count = 0
         for obs in self.obstacles:
-            for grid in obs.occupied_cells:
-                self.world_map.unregister_object(grid, Size(1, 1))
-            count += len(obs.occupied_cells)
+            for grid, size in obs.occupied_rects:
+                self.world_map.unregister_object(grid, size)
 
         self.obstacles.clear()
 
@@ -86,7 +134,7 @@ class ObstacleManager:
     # 內部邏輯：實例化與像素掃描
     # =========================================================================
 
-    def _create_obstacle_instance(self, data: ObstacleSpawnData):
+    def _create_obstacle_instance(self, level: int, data: ObstacleSpawnData, spawn_index: int):
         """ 根據生成資料 (位置 + 種類) 創建實體 """
         layout_name = data.layout_name
 
@@ -95,16 +143,46 @@ class ObstacleManager:
             dbg.war(f"[Obstacle] LayoutItem '{layout_name}' not found in {GameContext.page}.")
             return
 
-        profile = IMAGE_RESOURCE_MAP.get(layout_name)
-        if not profile:
-            key = item.name if item.name in IMAGE_RESOURCE_MAP else item.img_id
-            profile = IMAGE_RESOURCE_MAP.get(key)
+        cvt = self.cvt
+        key = (
+            GameContext.page, level, layout_name, data.grid_pos, (item.size.width, item.size.height),
+            (cvt.origin_x, cvt.origin_y, cvt.cell_w, cvt.cell_h, self.world_map.width, self.world_map.height)
+        )
+        footprint = self._footprints.get(key)
+        if footprint is None:
+            footprint = self._scan_footprint(item, data)
+            if footprint is None: return
+            self._footprints[key] = footprint
+
+        if not footprint.cells:
+            dbg.war(f"[Obstacle] No cells occupied for {layout_name} (Mask Miss).")
+            return
+
+        # 註冊實體
+        obstacle_entity = ObstacleEntity(
+            layout_item = item,
+            grid_origin = data.grid_pos,
+            occupied_cells = list(footprint.cells),
+            occupied_rects = list(footprint.rects),
+            spawn_index = spawn_index
+        )
+
+        for grid, size in footprint.rects:
+            self.world_map.register_object(obstacle_entity, grid, size)
+
+        self.obstacles.append(obstacle_entity)
+
+    def _scan_footprint(self, item, data: ObstacleSpawnData) -> ObstacleFootprint | None:
+        """ 圖片的 Mask 一次降採樣到格子 (圖片範圍內的每一格是否碰到不透明像素) """
+        layout_name = data.layout_name
+
+        profile = self._find_profile(item, layout_name)
         if not profile:
             dbg.war(f"[Obstacle] ImageProfile not found for '{layout_name}'")
-            return
+            return None
 
         surface = img_mg.get_processed_surface(profile, item.size)
-        if not surface: return
+        if not surface: return None
 
         obs_mask = pygame.mask.from_surface(surface)
 
@@ -128,35 +206,24 @@ class ObstacleManager:
         end_col = min(self.world_map.width, end_col)
         end_row = min(self.world_map.height, end_row)
 
-        occupied_cells = []
-
-        # 掃描
-        for c in range(start_col, end_col):
-            for r in range(start_row, end_row):
-                grid = GridPoint(c, r)
+        if start_col >= end_col or start_row >= end_row:
+            return ObstacleFootprint((), ())
 
-                cell_top_left = self.cvt.grid_to_pos(grid)
-
-                # 計算相對偏移量: 格子相對於圖片的位置
-                offset_x = int(cell_top_left.x - img_rect.left)
-                offset_y = int(cell_top_left.y - img_rect.top)
-
-                # 檢查重疊
-                if obs_mask.overlap(self.cell_mask, (offset_x, offset_y)):
-                    occupied_cells.append(grid)
-
-        if not occupied_cells:
-            dbg.war(f"[Obstacle] No cells occupied for {layout_name} (Mask Miss).")
-            return
-
-        # 註冊實體
-        obstacle_entity = ObstacleEntity(
-            layout_item = item,
-            grid_origin = data.grid_pos,
-            occupied_cells = occupied_cells
+        # [col, row] 是否與圖片重疊
+        occupied = mask_cell_hits(
+            obs_mask, img_rect.left, img_rect.top,
+            np.arange(start_col, end_col), np.arange(start_row, end_row),
+            ox, oy, self.cvt.cell_w, self.cvt.cell_h
         )
 
-        for grid in occupied_cells:
-            self.world_map.register_object(obstacle_entity, grid, Size(1, 1))
+        cells = tuple(GridPoint(start_col + int(c), start_row + int(r)) for c, r in np.argwhere(occupied))
+        return ObstacleFootprint(cells, tuple(cover_rects(occupied, start_col, start_row)))
 
-        self.obstacles.append(obstacle_entity)
+    @staticmethod
+    def _find_profile(item, layout_name):
+        """ 障礙物使用的圖片設定 (版面名稱 -> 物件名稱 -> 圖片 ID) """
+        profile = IMAGE_RESOURCE_MAP.get(layout_name)
+        if not profile:
+            key = item.name if item.name in IMAGE_RESOURCE_MAP else item.img_id
+            profile = IMAGE_RESOURCE_MAP.get(key)
+        return profile
@@ -0,0 +1,77 @@
+import numpy as np
+import pygame
+from py.variable import GridPoint, Size
+
+
+def mask_cell_hits(
+    mask: pygame.mask.Mask, left: int, top: int,
+    cols: np.ndarray, rows: np.ndarray,
+    origin_x: float, origin_y: float, cell_w: float, cell_h: float
+) -> np.ndarray:
+    """
+    [一次降採樣] 每個格子是否與 mask 的任一像素重疊 (與逐格 Mask.overlap 實心格子的結果相同)
+    mask 的左上角在螢幕像素 (left, top)，cols / rows 為要檢查的格子座標
+    先沿 x 再沿 y 對每格的像素範圍做 OR，回傳 [len(cols), len(rows)] 的 bool 陣列
+    """
+    width, height = mask.get_size()
+    # Mask -> [x, y] 的 bool 陣列 (設定的像素畫成白色，直接讀 Surface 的紅色通道)
+    surface = mask.to_surface()
+    red = pygame.surfarray.pixels_red(surface)
+    bits = red > 0
+    del red
+
+    # 格子左上角相對於圖片的偏移 (與 int() 相同，往 0 截斷)
+    offset_x = np.trunc(origin_x + cols * cell_w - left).astype(np.intp)
+    offset_y = np.trunc(origin_y + rows * cell_h - top).astype(np.intp)
+
+    bits = _any_in_ranges(bits, offset_x, offset_x + int(cell_w), axis = 0)
+    return _any_in_ranges(bits, offset_y, offset_y + int(cell_h), axis = 1)
+
+def _any_in_ranges(bits: np.ndarray, starts: np.ndarray, ends: np.ndarray, axis: int) -> np.ndarray:
+    """ 沿 axis 對每個 [start, end) 範圍做 OR (範圍會裁切到陣列內，空範圍為 False) """
+    size = bits.shape[axis]
+    starts, ends = np.clip(starts, 0, size), np.clip(ends, 0, size)
+
+    # reduceat 的索引必須小於長度：尾端補一格，讓 end == size 也是合法索引
+    pad = [(0, 0), (0, 0)]
+    pad[axis] = (0, 1)
+    padded = np.pad(bits, pad)
+
+    indices = np.empty(len(starts) * 2, dtype = np.intp)
+    indices[0::2], indices[1::2] = starts, ends
+    # 偶數位置是 [start, end)；start >= end 時 reduceat 會回傳單一元素，以 ends > starts 遮掉
+    reduced = np.logical_or.reduceat(padded, indices, axis = axis)
+    reduced = reduced[::2] if axis == 0 else reduced[:, ::2]
+
+    nonempty = ends > starts
+    return reduced & (nonempty[:, None] if axis == 0 else nonempty[None, :])
+
+def cover_rects(occupied: np.ndarray, start_col: int, start_row: int) -> list[tuple[GridPoint, Size]]:
+    """
+    把 [col, row] 的 bool 陣列拆成不重疊的矩形 (每列的連續段，上下相同的段合併)
+    障礙物以矩形註冊，地圖編輯次數從格子數降到矩形數
+    """
+    rects = []
+    # (起始欄, 結束欄) -> 目前往下延伸中的矩形 [起始列, 高度]
+    open_runs: dict[tuple[int, int], list[int]] = {}
+
+    for r in range(occupied.shape[1] + 1):
+        runs = set()
+        if r < occupied.shape[1]:
+            line = np.concatenate(([False], occupied[:, r], [False]))
+            edges = np.flatnonzero(line[1:] != line[:-1])
+            runs = set(zip(edges[0::2].tolist(), edges[1::2].tolist()))
+
+        for run in list(open_runs):
+            if run in runs: continue
+            row, height = open_runs.pop(run)
+            rects.append((GridPoint(start_col + run[0], start_row + row), Size(run[1] - run[0], height)))
+
+        for run in runs:
+            if run in open_runs:
+                open_runs[run][1] += 1
+            else:
+                open_runs[run] = [r, 1]
+
+    rects.sort(key = lambda rect: (rect[0].row, rect[0].col))
+    return rects
@@ -1,16 +1,25 @@
 from dataclasses import dataclass
-from typing import TYPE_CHECKING, List
+from typing import TYPE_CHECKING, List, Tuple
 
 if TYPE_CHECKING:
     from py.ui_layout.name.identifiers import LayoutName
     from py.ui_layout.variable import LayoutItem
-    from py.variable import GridPoint
+    from py.variable import GridPoint, Size
+
+@dataclass(frozen = True)
+class ObstacleFootprint:
+    """ 障礙物圖片降採樣到格子的結果 (依關卡 / 版面 / 格子大小快取) """
+    cells: Tuple["GridPoint", ...]
+    # 覆蓋 cells 的不重疊矩形 (註冊 / 移除以矩形為單位)
+    rects: Tuple[Tuple["GridPoint", "Size"], ...]
 
 @dataclass
 class ObstacleEntity:
     layout_item: "LayoutItem"
     grid_origin: "GridPoint" # 紀錄生成時的網格原點
     occupied_cells: List["GridPoint"]
+    occupied_rects: List[Tuple["GridPoint", "Size"]]
+    spawn_index: int = -1    # 關卡設定中的第幾個障礙物 (關卡包依此重新建立)
 
 @dataclass
 class ObstacleSpawnData:
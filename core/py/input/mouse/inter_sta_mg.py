@@ -1,6 +1,6 @@
 from typing import TYPE_CHECKING, Any, Callable
 
-from py.game.jelly.action import execute_dispatch_army
+from py.game.jelly.action import execute_dispatch_army, plan_multi_dispatch
 from py.game.slection import selection_mg
 from py.game.variable import GameType
 from py.input.mouse.variable import InterState
@@ -82,6 +82,9 @@ class InteractionStateManager:
 
         if not sources or not target_building: return
 
+        # 所有來源建築的路線一次規劃 (一次反向搜尋取代每棟各自 A*)
+        plan_multi_dispatch(sources, target_building)
+
         # 讓所有選取的建築都對目標建築出兵
         for source in sources:
             # 執行派遣邏輯
@@ -1,3 +1,4 @@
+import os
 import sys
 from dataclasses import dataclass
 from pathlib import Path
@@ -20,6 +21,22 @@ def resource_path(*paths):
 
     return base_path.joinpath(*paths)
 
+def user_cache_path(*paths):
+    """
+    取得使用者快取路徑 (執行時產生的檔案，不寫進安裝目錄)：
+    - Windows：%LOCALAPPDATA%
+    - macOS：~/Library/Caches
+    - 其他：$XDG_CACHE_HOME (預設 ~/.cache)
+    """
+    if sys.platform == "win32":
+        base_path = Path(os.environ.get("LOCALAPPDATA") or Path.home() / "AppData" / "Local")
+    elif sys.platform == "darwin":
+        base_path = Path.home() / "Library" / "Caches"
+    else:
+        base_path = Path(os.environ.get("XDG_CACHE_HOME") or Path.home() / ".cache")
+
+    return base_path.joinpath("GeometryWar", *paths)
+
 @dataclass(frozen = True)
 class PathBase:
     background = resource_path("background")
@@ -34,6 +51,7 @@ class PathBase:
     song       = resource_path("song")
     font       = resource_path("font")
     core       = resource_path("core")
+    cache      = user_cache_path()
 
 
 
@@ -96,7 +114,18 @@ class PathConfig:
 
     json_save       = (PathBase.json / JsonFileID.SAVE).with_suffix(".json")
     json_display    = (PathBase.json / JsonFileID.DISPLAY).with_suffix(".json")
+    # 編譯好的關卡包 (第一次載入關卡時產生)
+    level_bundle    = PathBase.cache / "bundle"
     a_star          = MixPath(
-        (PathBase.core / "c_src" / "a_star" / "main.c", PathBase.core / "c_src" / "a_star" / "base.c"),
+        (
+            PathBase.core / "c_src" / "a_star" / "main.c",
+            PathBase.core / "c_src" / "a_star" / "base.c",
+            PathBase.core / "c_src" / "a_star" / "heap.c",
+            PathBase.core / "c_src" / "a_star" / "context.c",
+            PathBase.core / "c_src" / "a_star" / "flow.c",
+            PathBase.core / "c_src" / "a_star" / "graph.c",
+            PathBase.core / "c_src" / "a_star" / "jps.c",
+            PathBase.core / "c_src" / "a_star" / "landmark.c"
+        ),
         PathBase.core / "dll" / "a_star.dll"
     )
@@ -1,40 +1,412 @@
+import array
 import ctypes
 
+from py.compile_dll import locate_shared_library
+from py.debug import dbg
 from py.path.manager import PathConfig
+from py.trans.a_star_py import DIST_UNREACHABLE, PyAStarInterface
 from py.trans.base import CInterfaceBase
-from py.trans.variable import FunctionName, VarConfig
+from py.trans.variable import ArrayTypecode, FunctionName, SearchAlgorithm, VarConfig
 from py.variable import GridPoint
 
 
 class AStarInterface(CInterfaceBase):
-    def __init__(self):
-        super().__init__(PathConfig.a_star.dll, FunctionName.SOLVE_A_STAR.value)
+    def __init__(self, algorithm: SearchAlgorithm = SearchAlgorithm.A_STAR, lib_path = None):
+        # solve_astar 是每個版本都有的函式，先以它載入，再檢查其餘的函式
+        super().__init__(str(lib_path or PathConfig.a_star.dll), FunctionName.SOLVE_A_STAR.value)
+
+        # 比原始碼舊的函式庫 (例如沒有重新編譯的 a_star.dll) 會缺少新的函式，一次列出全部
+        missing = [name.value for name in FunctionName if not hasattr(self.lib, name.value)]
+        if missing:
+            raise AttributeError(f"缺少函式 {', '.join(missing)} (函式庫比原始碼舊，需要重新編譯)")
+        self.c_func = getattr(self.lib, FunctionName.A_STAR_SOLVE.value)
+
+        # 之後建立的 Context 都使用此演算法 (可用 set_algorithm 個別切換)
+        self.algorithm = algorithm
+
+        ctx = VarConfig.A_STAR_CTX.value
+        w_h = VarConfig.A_STAR_W_H.value
+        point = VarConfig.A_STAR_POINT.value
 
         # --- 設定 A* 函式傳入/回傳參數規格 ---
         self.c_func.argtypes = [
-            ctypes.POINTER(VarConfig.A_STAR_MAP.value),
-            VarConfig.A_STAR_W_H.value, VarConfig.A_STAR_W_H.value,
-            VarConfig.A_STAR_POINT.value, VarConfig.A_STAR_POINT.value,
-            VarConfig.A_STAR_POINT.value, VarConfig.A_STAR_POINT.value,
+            ctx,
+            point, point,
+            point, point,
             ctypes.POINTER(VarConfig.A_STAR_OUT_BUFFER.value),
         ]
         self.c_func.restype = VarConfig.A_STAR_REBACK.value
 
+        # --- 常駐 Context 相關函式 ---
+        self.c_create = self.bind(FunctionName.A_STAR_CREATE.value, [w_h, w_h], ctx)
+        self.c_destroy = self.bind(FunctionName.A_STAR_DESTROY.value, [ctx])
+        self.c_load_map = self.bind(
+            FunctionName.A_STAR_LOAD_MAP.value,
+            [ctx, ctypes.POINTER(VarConfig.A_STAR_MAP.value)]
+        )
+        self.c_set_cell = self.bind(
+            FunctionName.A_STAR_SET_CELL.value,
+            [ctx, point, point, VarConfig.A_STAR_MAP.value]
+        )
+        self.c_set_rect = self.bind(
+            FunctionName.A_STAR_SET_RECT.value,
+            [ctx, point, point, w_h, w_h, VarConfig.A_STAR_MAP.value]
+        )
+        batch_args = [
+            ctx,
+            ctypes.POINTER(VarConfig.A_STAR_QUERY.value), ctypes.c_int,
+            ctypes.POINTER(VarConfig.A_STAR_OUT_BUFFER.value), VarConfig.A_STAR_CAPACITY.value,
+            ctypes.POINTER(VarConfig.A_STAR_LENGTH.value),
+        ]
+        self.c_solve_batch = self.bind(
+            FunctionName.A_STAR_SOLVE_BATCH.value, batch_args, VarConfig.A_STAR_REBACK.value
+        )
+        self.c_solve_batch_bounded = self.bind(
+            FunctionName.A_STAR_SOLVE_BATCH_BOUNDED.value, batch_args, VarConfig.A_STAR_REBACK.value
+        )
+        self.c_solve_multi_batch = self.bind(
+            FunctionName.A_STAR_SOLVE_MULTI_BATCH.value,
+            [
+                ctx,
+                ctypes.POINTER(VarConfig.A_STAR_QUERY.value),
+                ctypes.POINTER(VarConfig.A_STAR_QUERY.value), ctypes.c_int,
+                ctypes.POINTER(VarConfig.A_STAR_OUT_BUFFER.value), VarConfig.A_STAR_CAPACITY.value,
+                ctypes.POINTER(VarConfig.A_STAR_LENGTH.value),
+            ],
+            VarConfig.A_STAR_REBACK.value
+        )
+        self.c_solve_multi_cost = self.bind(
+            FunctionName.A_STAR_SOLVE_MULTI_COST.value,
+            [
+                ctx,
+                ctypes.POINTER(VarConfig.A_STAR_QUERY.value),
+                ctypes.POINTER(VarConfig.A_STAR_QUERY.value), ctypes.c_int,
+                VarConfig.A_STAR_DIST.value,
+                ctypes.POINTER(VarConfig.A_STAR_DIST.value),
+            ],
+            VarConfig.A_STAR_REBACK.value
+        )
+        self.c_flow_field = self.bind(
+            FunctionName.A_STAR_FLOW_FIELD.value,
+            [
+                ctx,
+                ctypes.POINTER(VarConfig.A_STAR_QUERY.value), ctypes.c_int,
+                ctypes.POINTER(VarConfig.A_STAR_DIST.value),
+                ctypes.POINTER(VarConfig.A_STAR_DIR.value),
+            ],
+            VarConfig.A_STAR_REBACK.value
+        )
+        self.c_flow_field_until = self.bind(
+            FunctionName.A_STAR_FLOW_FIELD_UNTIL.value,
+            [
+                ctx,
+                ctypes.POINTER(VarConfig.A_STAR_QUERY.value), ctypes.c_int,
+                ctypes.POINTER(VarConfig.A_STAR_QUERY.value), ctypes.c_int,
+                ctypes.POINTER(VarConfig.A_STAR_DIST.value),
+                ctypes.POINTER(VarConfig.A_STAR_DIR.value),
+            ],
+            VarConfig.A_STAR_REBACK.value
+        )
+        self.c_flow_field_repair = self.bind(
+            FunctionName.A_STAR_FLOW_FIELD_REPAIR.value,
+            [
+                ctx,
+                point, point,
+                w_h, w_h,
+                ctypes.POINTER(VarConfig.A_STAR_DIST.value),
+                ctypes.POINTER(VarConfig.A_STAR_DIR.value),
+            ],
+            VarConfig.A_STAR_REBACK.value
+        )
+
+        self.c_set_algorithm = self.bind(FunctionName.A_STAR_SET_ALGORITHM.value, [ctx, ctypes.c_int])
+        self.c_get_expanded = self.bind(
+            FunctionName.A_STAR_GET_EXPANDED.value, [ctx], VarConfig.A_STAR_CAPACITY.value
+        )
+        self.c_set_landmarks = self.bind(
+            FunctionName.A_STAR_SET_LANDMARKS.value,
+            [ctx, ctypes.POINTER(VarConfig.A_STAR_DIST.value), ctypes.c_int],
+            VarConfig.A_STAR_REBACK.value
+        )
+
+        graph = ctypes.POINTER(VarConfig.A_STAR_GRAPH.value)
+        self.c_graph_search = self.bind(
+            FunctionName.A_STAR_GRAPH_SEARCH.value,
+            [
+                ctypes.POINTER(VarConfig.A_STAR_POINT.value), ctypes.c_int,
+                graph, graph, graph,
+                graph, ctypes.c_int,
+                graph, ctypes.c_int,
+                point, point,
+                graph, ctypes.c_int,
+            ],
+            VarConfig.A_STAR_REBACK.value
+        )
+
+    def create(self, width: int, height: int):
+        """ 建立 C 端常駐 Context (保存節點池與地圖)，失敗回傳 None """
+        ctx = self.c_create(width, height)
+        if ctx: self.c_set_algorithm(ctx, self.algorithm)
+        return ctx
+
+    def set_algorithm(self, ctx, algorithm: SearchAlgorithm):
+        """ 切換搜尋演算法 (ctx 為 None 時只改變之後建立的 Context) """
+        self.algorithm = algorithm
+        if ctx: self.c_set_algorithm(ctx, algorithm)
+
+    def get_expanded(self, ctx) -> int:
+        """ 上一次搜尋展開的節點數 (效能分析用) """
+        return self.c_get_expanded(ctx)
+
+    def set_landmarks(self, a_star_mg, tables: array.array | None) -> int:
+        """
+        設定地標距離表 (ALT heuristic)：tables 為數張 flow_field 的 dist 依序相接 (None 代表不使用)
+        整張地圖覆寫 (load_map) 後會自動停用
+        回傳實際使用的地標數量 (失敗為 -1)
+        """
+        if not tables:
+            return self.c_set_landmarks(a_star_mg.ctx, None, 0)
+
+        count = len(tables) // (a_star_mg.width * a_star_mg.height)
+        return self.c_set_landmarks(
+            a_star_mg.ctx, CInterfaceBase.buffer_to_c_array(tables, VarConfig.A_STAR_DIST.value), count
+        )
+
+    def destroy(self, ctx):
+        self.c_destroy(ctx)
+
+    def load_map(self, ctx, map_buffer):
+        """ 整張地圖覆寫 (map_buffer 為 array('b') 等 buffer，None 代表全部清成路) """
+        if map_buffer is None:
+            self.c_load_map(ctx, None)
+            return
+
+        # 透過 buffer protocol 直接把 collision_map 交給 C (不逐格轉換)
+        self.c_load_map(ctx, CInterfaceBase.buffer_to_c_array(map_buffer, VarConfig.A_STAR_MAP.value))
+
+    def set_cell(self, ctx, col: int, row: int, value: int):
+        self.c_set_cell(ctx, col, row, value)
+
+    def set_rect(self, ctx, col: int, row: int, width: int, height: int, value: int):
+        self.c_set_rect(ctx, col, row, width, height, value)
+
     def find_path(self, a_star_mg, start: GridPoint, end: GridPoint):
-        # 呼叫前請確保 a_star_mg.c_map 與 out_buffer 已初始化
+        """
+        回傳 array('h')：[x0, y0, x1, y1...] (從 out_buffer 整段切出的副本，不逐格轉換)
+        找不到路徑回傳空 array
+        單組查詢 (正確性檢查 / 效能量測用)；遊戲內的尋路走批次介面 (find_paths / find_paths_multi)，共用同一塊 out_buffer
+        """
+        # 呼叫前請確保 a_star_mg.ctx 與 out_buffer 已初始化
         steps = self.c_func(
-            ctypes.cast(a_star_mg.c_map, ctypes.POINTER(VarConfig.A_STAR_MAP.value)),
-            a_star_mg.width, a_star_mg.height,
+            a_star_mg.ctx,
             start.col, start.row,
             end.col, end.row,
-            ctypes.cast(a_star_mg.out_buffer, ctypes.POINTER(VarConfig.A_STAR_OUT_BUFFER.value)),
+            a_star_mg.c_out_buffer,
+        )
+
+        if steps < 0: return a_star_mg.out_buffer[:0]
+
+        # C 直接寫入 out_buffer 的記憶體，這裡只做一次切片
+        return a_star_mg.out_buffer[:steps * 2]
+
+    def find_paths(self, a_star_mg, pairs: list[tuple[GridPoint, GridPoint]]) -> list:
+        """
+        批次尋路：一次 C 呼叫解完所有 (起點, 終點)
+        回傳與 pairs 對齊的 array('h') 列表 (找不到路徑為空 array)
+        """
+        queries = array.array(ArrayTypecode.A_STAR_QUERY.value)
+        for start, end in pairs:
+            queries.extend((start.col, start.row, end.col, end.row))
+
+        return self._solve_batch(a_star_mg, self.c_solve_batch, queries, 4)
+
+    def find_paths_bounded(self, a_star_mg, queries: list[tuple[GridPoint, GridPoint, tuple[int, int, int, int]]]) -> list:
+        """
+        限定範圍的批次尋路：每組 (起點, 終點, (x, y, w, h)) 只在自己的矩形內搜尋
+        回傳與 queries 對齊的 array('h') 列表 (找不到路徑為空 array)
+        """
+        buffer = array.array(ArrayTypecode.A_STAR_QUERY.value)
+        for start, end, bounds in queries:
+            buffer.extend((start.col, start.row, end.col, end.row))
+            buffer.extend(bounds)
+
+        return self._solve_batch(a_star_mg, self.c_solve_batch_bounded, buffer, 8)
+
+    def find_paths_multi(self, a_star_mg, queries: list[tuple[list[GridPoint], list[GridPoint]]]) -> list:
+        """
+        多起點 / 多終點批次尋路：每組查詢為 (起點格子們, 終點格子們)，抵達任一終點即完成
+        同一個 list 物件 (例如快取的建築周圍一圈) 只會放進 cells 一次
+        回傳與 queries 對齊的 array('h') 列表 (找不到路徑為空 array)
+        """
+        cells, query_buffer = self._pack_multi(queries)
+        c_cells = CInterfaceBase.buffer_to_c_array(cells, VarConfig.A_STAR_QUERY.value)
+
+        def c_func(ctx, c_queries, count, c_out_buffer, capacity, c_lengths):
+            return self.c_solve_multi_batch(ctx, c_cells, c_queries, count, c_out_buffer, capacity, c_lengths)
+
+        return self._solve_batch(a_star_mg, c_func, query_buffer, 4)
+
+    def find_costs_multi(
+        self, a_star_mg, queries: list[tuple[list[GridPoint], list[GridPoint]]], max_cost: int | None = None
+    ) -> list[int | None]:
+        """
+        與 find_paths_multi 相同的查詢，但只回傳代價 (不回溯路徑，也不寫 out_buffer)
+        max_cost: 代價上限，搜尋超過就停止 (None 代表不限)
+        回傳與 queries 對齊的代價列表 (找不到或超過上限為 None)
+        """
+        if not queries: return []
+
+        cells, query_buffer = self._pack_multi(queries)
+        costs = array.array(ArrayTypecode.A_STAR_DIST.value, [DIST_UNREACHABLE]) * len(queries)
+
+        self.c_solve_multi_cost(
+            a_star_mg.ctx,
+            CInterfaceBase.buffer_to_c_array(cells, VarConfig.A_STAR_QUERY.value),
+            CInterfaceBase.buffer_to_c_array(query_buffer, VarConfig.A_STAR_QUERY.value), len(queries),
+            DIST_UNREACHABLE if max_cost is None else max_cost,
+            CInterfaceBase.buffer_to_c_array(costs, VarConfig.A_STAR_DIST.value),
+        )
+        return [None if cost == DIST_UNREACHABLE else cost for cost in costs]
+
+    @staticmethod
+    def _pack_multi(queries: list[tuple[list[GridPoint], list[GridPoint]]]) -> tuple[array.array, array.array]:
+        """ 多起點 / 多終點查詢 -> (cells, [start_offset, start_count, goal_offset, goal_count, ...]) """
+        cells = array.array(ArrayTypecode.A_STAR_QUERY.value)
+        offsets: dict[int, int] = {}
+        query_buffer = array.array(ArrayTypecode.A_STAR_QUERY.value)
+
+        for starts, goals in queries:
+            for group in (starts, goals):
+                offset = offsets.get(id(group))
+                if offset is None:
+                    offset = offsets[id(group)] = len(cells) // 2
+                    for p in group:
+                        cells.extend((p.col, p.row))
+                query_buffer.extend((offset, len(group)))
+
+        # cells 為空時仍需要合法的指標
+        if not cells: cells.extend((0, 0))
+        return cells, query_buffer
+
+    def _solve_batch(self, a_star_mg, c_func, queries: array.array, stride: int) -> list:
+        """ 呼叫批次函式，依 lengths 把緊密排列的輸出切回各自的路徑 """
+        total = len(queries) // stride
+        paths = []
+        capacity = len(a_star_mg.out_buffer) // 2
+
+        # out_buffer 放不下全部路徑時，C 端會提早返回，剩下的再送一次
+        while len(paths) < total:
+            remaining = queries[len(paths) * stride:]
+            count = len(remaining) // stride
+            lengths = array.array(ArrayTypecode.A_STAR_LENGTH.value, [0]) * count
+
+            solved = c_func(
+                a_star_mg.ctx,
+                CInterfaceBase.buffer_to_c_array(remaining, VarConfig.A_STAR_QUERY.value), count,
+                a_star_mg.c_out_buffer, capacity,
+                CInterfaceBase.buffer_to_c_array(lengths, VarConfig.A_STAR_LENGTH.value),
+            )
+            if solved <= 0: break
+
+            offset = 0
+            for steps in lengths[:solved]:
+                if steps < 0:
+                    paths.append(a_star_mg.out_buffer[:0])
+                    continue
+                paths.append(a_star_mg.out_buffer[offset * 2:(offset + steps) * 2])
+                offset += steps
+
+        # 異常中斷時，剩下的視為找不到路徑
+        while len(paths) < total:
+            paths.append(a_star_mg.out_buffer[:0])
+
+        return paths
+
+    def flow_field(self, a_star_mg, goals: list[GridPoint], stops: list[GridPoint] | None = None) -> tuple[array.array, array.array]:
+        """
+        從 goals 同時擴散的流場
+        stops: 不為 None 時，這些格子都確定距離後就提早停止 (其餘格子可能為無法抵達)
+        回傳 (dist array('I'), dir array('b'))，長度皆為 width * height
+        """
+        goal_buffer = array.array(ArrayTypecode.A_STAR_QUERY.value)
+        for goal in goals:
+            goal_buffer.extend((goal.col, goal.row))
+
+        total = a_star_mg.width * a_star_mg.height
+        dist = array.array(ArrayTypecode.A_STAR_DIST.value, [0]) * total
+        dirs = array.array(ArrayTypecode.A_STAR_DIR.value, [0]) * total
+        c_goals = CInterfaceBase.buffer_to_c_array(goal_buffer, VarConfig.A_STAR_QUERY.value)
+        c_dist = CInterfaceBase.buffer_to_c_array(dist, VarConfig.A_STAR_DIST.value)
+        c_dirs = CInterfaceBase.buffer_to_c_array(dirs, VarConfig.A_STAR_DIR.value)
+
+        if stops is None:
+            self.c_flow_field(a_star_mg.ctx, c_goals, len(goals), c_dist, c_dirs)
+            return dist, dirs
+
+        stop_buffer = array.array(ArrayTypecode.A_STAR_QUERY.value)
+        for stop in stops:
+            stop_buffer.extend((stop.col, stop.row))
+
+        self.c_flow_field_until(
+            a_star_mg.ctx, c_goals, len(goals),
+            CInterfaceBase.buffer_to_c_array(stop_buffer, VarConfig.A_STAR_QUERY.value), len(stops),
+            c_dist, c_dirs,
         )
+        return dist, dirs
+
+    def flow_field_repair(self, a_star_mg, dist: array.array, dirs: array.array, col: int, row: int, width: int, height: int) -> int:
+        """
+        地圖矩形被編輯後，就地修補 flow_field 回傳的 dist / dirs (呼叫前 Context 的地圖必須已更新)
+        回傳重新確定距離的格子數量
+        """
+        return self.c_flow_field_repair(
+            a_star_mg.ctx, col, row, width, height,
+            CInterfaceBase.buffer_to_c_array(dist, VarConfig.A_STAR_DIST.value),
+            CInterfaceBase.buffer_to_c_array(dirs, VarConfig.A_STAR_DIR.value),
+        )
+
+    def graph_search(self, graph, start_edges: list[tuple[int, int]], goal_edges: list[tuple[int, int]], goal: GridPoint) -> list[int] | None:
+        """
+        抽象圖 A*：graph 為 CSR 格式 (node_xy / offsets / targets / costs 皆為 array)
+        start_edges / goal_edges: [(節點索引, 代價)] 起點與終點的暫時邊
+        回傳經過的節點索引 (不含起終點)，找不到回傳 None
+        """
+        if not start_edges or not goal_edges or not graph.node_count: return None
+
+        typecode = ArrayTypecode.A_STAR_GRAPH.value
+        c_graph = VarConfig.A_STAR_GRAPH.value
+
+        starts = array.array(typecode, [v for edge in start_edges for v in edge])
+        goals = array.array(typecode, [v for edge in goal_edges for v in edge])
+        out_nodes = array.array(typecode, [0]) * graph.node_count
+
+        steps = self.c_graph_search(
+            CInterfaceBase.buffer_to_c_array(graph.node_xy, VarConfig.A_STAR_POINT.value), graph.node_count,
+            CInterfaceBase.buffer_to_c_array(graph.offsets, c_graph),
+            CInterfaceBase.buffer_to_c_array(graph.targets, c_graph),
+            CInterfaceBase.buffer_to_c_array(graph.costs, c_graph),
+            CInterfaceBase.buffer_to_c_array(starts, c_graph), len(start_edges),
+            CInterfaceBase.buffer_to_c_array(goals, c_graph), len(goal_edges),
+            goal.col, goal.row,
+            CInterfaceBase.buffer_to_c_array(out_nodes, c_graph), len(out_nodes),
+        )
+
+        if steps < 0: return None
+        return out_nodes[:steps].tolist()
+
 
-        if steps < 0: return []
+def load_a_star_interface(algorithm: SearchAlgorithm = SearchAlgorithm.A_STAR):
+    """
+    依序嘗試：與原始碼一致的編譯結果 -> 隨附的 DLL -> 純 Python 版本
+    無法使用的函式庫 (DLL 過舊、平台不符) 直接略過，全部不能用時遊戲仍可運作，只是尋路較慢
+    """
+    failures = []
+    for lib_path in locate_shared_library(PathConfig.a_star):
+        try:
+            return AStarInterface(algorithm, lib_path)
+        except (OSError, AttributeError) as e:
+            failures.append(f"{lib_path.name}: {e}")
 
-        # 解析回傳
-        path = []
-        for i in range(steps):
-            # C 回傳格式: [x0, y0, x1, y1...]
-            path.append((a_star_mg.out_buffer[i * 2], a_star_mg.out_buffer[i * 2 + 1]))
-        return path
+    reason = "; ".join(failures) if failures else "找不到 C 編譯器也沒有隨附的函式庫"
+    dbg.war(f"[A*] C 模組無法使用 ({reason})，改用純 Python 尋路 (結果相同，速度較慢)")
+    return PyAStarInterface(algorithm)
@@ -0,0 +1,647 @@
+import array
+from heapq import heappop, heappush
+
+from py.a_star.variable import COST_DIAGONAL, COST_STRAIGHT
+from py.trans.variable import ArrayTypecode, SearchAlgorithm
+from py.variable import GridPoint
+
+# 與 C 端 dirs / opposite 相同順序 (展開順序一致，結果才會完全相同)
+DIRS = (
+    (0, -1), (0, 1), (-1, 0), (1, 0),
+    (-1, -1), (1, -1), (-1, 1), (1, 1),
+)
+OPPOSITE = (1, 0, 3, 2, 7, 6, 5, 4)
+
+DIST_UNREACHABLE = 0xFFFFFFFF
+DIR_NONE = -1
+NO_PARENT = -1
+LANDMARK_MAX = 16
+
+
+def calc_h(x0: int, y0: int, x1: int, y1: int) -> int:
+    """ 與 C 端 calc_h 相同的八方向距離 """
+    dx, dy = abs(x0 - x1), abs(y0 - y1)
+    if dx > dy:
+        return COST_DIAGONAL * dy + COST_STRAIGHT * (dx - dy)
+    return COST_DIAGONAL * dx + COST_STRAIGHT * (dy - dx)
+
+
+class PyAStarContext:
+    """ 對應 C 端 AStarContext (地圖副本 + 搜尋設定) """
+    __slots__ = ("width", "height", "map", "algorithm", "expanded", "landmarks")
+
+    def __init__(self, width: int, height: int, algorithm: SearchAlgorithm):
+        self.width = width
+        self.height = height
+        self.map = bytearray(width * height)
+        self.algorithm = algorithm
+        self.expanded = 0
+        # 地標距離表：每格一個 tuple (各地標到該格的距離)，None 代表不使用
+        self.landmarks: list[tuple[int, ...]] | None = None
+
+    def landmark_goal(self, goals) -> list[tuple[int, int]]:
+        """ 對應 C 端 landmark_goal_reset / add：終點集合在每張距離表上的 (lo, hi)，lo > hi 代表不使用 """
+        ranges = [(DIST_UNREACHABLE, 0)] * len(self.landmarks[0])
+        for idx in goals:
+            ranges = [
+                r if d == DIST_UNREACHABLE else (min(r[0], d), max(r[1], d))
+                for r, d in zip(ranges, self.landmarks[idx])
+            ]
+        return ranges
+
+    def landmark_h(self, ranges: list[tuple[int, int]], idx: int) -> int:
+        """ 對應 C 端 landmark_h：idx 到終點的地標下界 """
+        best = 0
+        for d, (lo, hi) in zip(self.landmarks[idx], ranges):
+            if d == DIST_UNREACHABLE or lo > hi: continue
+            bound = lo - d if d < lo else (d - hi if d > hi else 0)
+            if bound > best: best = bound
+        return best
+
+    def full_bounds(self) -> tuple[int, int, int, int]:
+        return (0, 0, self.width, self.height)
+
+
+class PyAStarInterface:
+    """
+    [純 Python 尋路] 找不到可用的 C 模組時使用
+    介面與 AStarInterface 相同，演算法逐行對應 C 端 (相同的展開順序與 (F, H, 索引) 比較)，
+    所以回傳的路徑與 C 版本完全一致，只是比較慢
+    Open List 使用 heapq，更新節點時直接推入新的項目，舊項目在取出時略過
+    """
+    def __init__(self, algorithm: SearchAlgorithm = SearchAlgorithm.A_STAR):
+        self.algorithm = algorithm
+
+    # =========================================================================
+    # [Context] 與 AStarInterface 相同的介面
+    # =========================================================================
+
+    def create(self, width: int, height: int):
+        if width <= 0 or height <= 0: return None
+        return PyAStarContext(width, height, self.algorithm)
+
+    def destroy(self, ctx):
+        pass
+
+    def load_map(self, ctx, map_buffer):
+        """ 整張地圖覆寫 (map_buffer 為 None 代表全部清成路)，地標距離表一併停用 """
+        ctx.landmarks = None
+        if map_buffer is None:
+            ctx.map = bytearray(ctx.width * ctx.height)
+        else:
+            ctx.map = bytearray(v & 0xFF for v in map_buffer)
+
+    def set_cell(self, ctx, col: int, row: int, value: int):
+        if 0 <= col < ctx.width and 0 <= row < ctx.height:
+            ctx.map[row * ctx.width + col] = value & 0xFF
+
+    def set_rect(self, ctx, col: int, row: int, width: int, height: int, value: int):
+        x0, y0 = max(0, col), max(0, row)
+        x1, y1 = min(ctx.width, col + width), min(ctx.height, row + height)
+        for y in range(y0, y1):
+            for x in range(x0, x1):
+                ctx.map[y * ctx.width + x] = value & 0xFF
+
+    def set_algorithm(self, ctx, algorithm: SearchAlgorithm):
+        self.algorithm = algorithm
+        if ctx: ctx.algorithm = algorithm
+
+    def get_expanded(self, ctx) -> int:
+        return ctx.expanded
+
+    def set_landmarks(self, a_star_mg, tables: array.array | None) -> int:
+        ctx = a_star_mg.ctx
+        total = ctx.width * ctx.height
+        count = min(len(tables) // total, LANDMARK_MAX) if tables else 0
+        if not count:
+            ctx.landmarks = None
+            return 0
+
+        ctx.landmarks = list(zip(*(tables[k * total:(k + 1) * total] for k in range(count))))
+        return count
+
+    # =========================================================================
+    # [Query] 尋路
+    # =========================================================================
+
+    def find_path(self, a_star_mg, start: GridPoint, end: GridPoint) -> array.array:
+        ctx = a_star_mg.ctx
+        return self._solve(ctx, start.col, start.row, end.col, end.row, ctx.full_bounds())
+
+    def find_paths(self, a_star_mg, pairs: list[tuple[GridPoint, GridPoint]]) -> list:
+        ctx = a_star_mg.ctx
+        bounds = ctx.full_bounds()
+        return [self._solve(ctx, s.col, s.row, e.col, e.row, bounds) for s, e in pairs]
+
+    def find_paths_bounded(self, a_star_mg, queries: list[tuple[GridPoint, GridPoint, tuple[int, int, int, int]]]) -> list:
+        ctx = a_star_mg.ctx
+        paths = []
+        for start, end, (bx, by, bw, bh) in queries:
+            bounds = (max(0, bx), max(0, by), min(ctx.width, bx + bw), min(ctx.height, by + bh))
+            paths.append(self._solve(ctx, start.col, start.row, end.col, end.row, bounds))
+        return paths
+
+    def find_paths_multi(self, a_star_mg, queries: list[tuple[list[GridPoint], list[GridPoint]]]) -> list:
+        ctx = a_star_mg.ctx
+        return [self._solve_multi(ctx, starts, goals) for starts, goals in queries]
+
+    def find_costs_multi(
+        self, a_star_mg, queries: list[tuple[list[GridPoint], list[GridPoint]]], max_cost: int | None = None
+    ) -> list[int | None]:
+        """ 對應 astar_solve_multi_cost：只回傳代價 (找不到或超過上限為 None) """
+        ctx = a_star_mg.ctx
+        bound = DIST_UNREACHABLE if max_cost is None else max_cost
+        results = []
+        for starts, goals in queries:
+            found = self._search_multi(ctx, starts, goals, bound)
+            results.append(None if found is None else found[2])
+        return results
+
+    def flow_field(self, a_star_mg, goals: list[GridPoint], stops: list[GridPoint] | None = None) -> tuple[array.array, array.array]:
+        """ 對應 astar_flow_field / astar_flow_field_until：多起點 Dijkstra (stops 全部確定後提早停止) """
+        ctx = a_star_mg.ctx
+        w, h, m = ctx.width, ctx.height, ctx.map
+        total = w * h
+
+        dist = array.array(ArrayTypecode.A_STAR_DIST.value, [DIST_UNREACHABLE]) * total
+        dirs = array.array(ArrayTypecode.A_STAR_DIR.value, [DIR_NONE]) * total
+
+        g: dict[int, int] = {}
+        closed = set()
+        heap = []
+        for goal in goals:
+            x, y = goal.col, goal.row
+            if not (0 <= x < w and 0 <= y < h) or m[y * w + x]: continue
+            idx = y * w + x
+            if idx in g: continue
+            g[idx] = 0
+            heappush(heap, (0, idx))
+
+        pending = set()
+        for stop in stops or ():
+            x, y = stop.col, stop.row
+            if 0 <= x < w and 0 <= y < h and not m[y * w + x]:
+                pending.add(y * w + x)
+
+        while heap:
+            cost, cur = heappop(heap)
+            if cur in closed or cost != g[cur]: continue
+            closed.add(cur)
+            dist[cur] = cost
+
+            pending.discard(cur)
+            if stops is not None and not pending: break
+
+            cx, cy = cur % w, cur // w
+            for i, (dx, dy) in enumerate(DIRS):
+                nx, ny = cx + dx, cy + dy
+                if not (0 <= nx < w and 0 <= ny < h): continue
+                n = ny * w + nx
+                if m[n] or n in closed: continue
+
+                if dx and dy:
+                    if m[cy * w + nx] or m[ny * w + cx]: continue
+                    new_g = cost + COST_DIAGONAL
+                else:
+                    new_g = cost + COST_STRAIGHT
+
+                old = g.get(n)
+                if old is not None and new_g >= old: continue
+
+                g[n] = new_g
+                dirs[n] = OPPOSITE[i]
+                heappush(heap, (new_g, n))
+
+        return dist, dirs
+
+    def flow_field_repair(self, a_star_mg, dist: array.array, dirs: array.array, col: int, row: int, width: int, height: int) -> int:
+        """ 對應 astar_flow_field_repair：作廢受影響的子樹，再從相鄰格子重新擴散 (就地修改) """
+        ctx = a_star_mg.ctx
+        w, h, m = ctx.width, ctx.height, ctx.map
+
+        x0, y0 = max(col - 1, 0), max(row - 1, 0)
+        x1, y1 = min(col + width, w - 1), min(row + height, h - 1)
+        if x0 > x1 or y0 > y1: return 0
+
+        def can_step(x: int, y: int, i: int) -> bool:
+            dx, dy = DIRS[i]
+            nx, ny = x + dx, y + dy
+            if not (0 <= nx < w and 0 <= ny < h) or m[ny * w + nx]: return False
+            return not (dx and dy) or (not m[y * w + nx] and not m[ny * w + x])
+
+        invalid = []
+        for y in range(y0, y1 + 1):
+            for x in range(x0, x1 + 1):
+                idx = y * w + x
+                if dist[idx] == DIST_UNREACHABLE: continue
+                if not m[idx] and (dirs[idx] == DIR_NONE or can_step(x, y, dirs[idx])): continue
+
+                dist[idx] = DIST_UNREACHABLE
+                dirs[idx] = DIR_NONE
+                invalid.append(idx)
+
+        # invalid 邊走邊加 (子樹)
+        for idx in invalid:
+            px, py = idx % w, idx // w
+            for i, (dx, dy) in enumerate(DIRS):
+                nx, ny = px + dx, py + dy
+                if not (0 <= nx < w and 0 <= ny < h): continue
+                n = ny * w + nx
+                if dirs[n] != OPPOSITE[i]: continue
+
+                dist[n] = DIST_UNREACHABLE
+                dirs[n] = DIR_NONE
+                invalid.append(n)
+
+        heap = []
+        closed = set()
+
+        def seed(idx: int):
+            if m[idx]: return
+            x, y = idx % w, idx // w
+            best, best_dir = dist[idx], DIR_NONE
+            for i, (dx, dy) in enumerate(DIRS):
+                if not can_step(x, y, i): continue
+                n_dist = dist[(y + dy) * w + x + dx]
+                if n_dist == DIST_UNREACHABLE: continue
+                cost = n_dist + (COST_DIAGONAL if dx and dy else COST_STRAIGHT)
+                if cost < best:
+                    best, best_dir = cost, i
+
+            if best_dir == DIR_NONE: return
+            dist[idx] = best
+            dirs[idx] = best_dir
+            heappush(heap, (best, idx))
+
+        for y in range(y0, y1 + 1):
+            for x in range(x0, x1 + 1):
+                seed(y * w + x)
+        for idx in invalid:
+            seed(idx)
+
+        settled = 0
+        while heap:
+            cost, cur = heappop(heap)
+            if cur in closed or cost != dist[cur]: continue
+            closed.add(cur)
+            settled += 1
+
+            cx, cy = cur % w, cur // w
+            for i, (dx, dy) in enumerate(DIRS):
+                if not can_step(cx, cy, i): continue
+                n = (cy + dy) * w + cx + dx
+                new_g = cost + (COST_DIAGONAL if dx and dy else COST_STRAIGHT)
+                if new_g >= dist[n] or n in closed: continue
+
+                dist[n] = new_g
+                dirs[n] = OPPOSITE[i]
+                heappush(heap, (new_g, n))
+
+        return settled
+
+    def graph_search(self, graph, start_edges: list[tuple[int, int]], goal_edges: list[tuple[int, int]], goal: GridPoint) -> list[int] | None:
+        """ 對應 astar_graph_search：CSR 抽象圖上的 A* """
+        node_count = graph.node_count
+        if not start_edges or not goal_edges or not node_count: return None
+
+        xy, offsets, targets, costs = graph.node_xy, graph.offsets, graph.targets, graph.costs
+        goal_idx = node_count
+        gx, gy = goal.col, goal.row
+
+        goal_cost = {node: cost for node, cost in goal_edges if node < goal_idx}
+
+        g: dict[int, int] = {}
+        h: dict[int, int] = {}
+        parent: dict[int, int] = {}
+        closed = set()
+        heap = []
+
+        def heuristic(idx: int) -> int:
+            if idx == goal_idx: return 0
+            return calc_h(xy[idx * 2], xy[idx * 2 + 1], gx, gy)
+
+        for idx, cost in start_edges:
+            if idx >= goal_idx: continue
+            if idx in g and cost >= g[idx]: continue
+            g[idx] = cost
+            h[idx] = heuristic(idx)
+            parent[idx] = NO_PARENT
+            heappush(heap, (cost + h[idx], h[idx], idx))
+
+        while heap:
+            f, hh, cur = heappop(heap)
+            if cur in closed or f - hh != g[cur]: continue
+
+            if cur == goal_idx:
+                nodes = []
+                idx = parent[goal_idx]
+                while idx != NO_PARENT:
+                    nodes.append(idx)
+                    idx = parent[idx]
+                return nodes[::-1]
+            closed.add(cur)
+
+            edges = [(targets[e], costs[e]) for e in range(offsets[cur], offsets[cur + 1])]
+            if cur in goal_cost: edges.append((goal_idx, goal_cost[cur]))
+
+            for n, cost in edges:
+                if n in closed: continue
+                new_g = g[cur] + cost
+
+                if n not in g:
+                    h[n] = heuristic(n)
+                elif new_g >= g[n]:
+                    continue
+
+                g[n] = new_g
+                parent[n] = cur
+                heappush(heap, (new_g + h[n], h[n], n))
+
+        return None
+
+    # =========================================================================
+    # [Core] 對應 C 端 search_astar / search_jps / ctx_write_path
+    # =========================================================================
+
+    def _solve(self, ctx: PyAStarContext, sx: int, sy: int, ex: int, ey: int, bounds) -> array.array:
+        x0, y0, x1, y1 = bounds
+        empty = array.array(ArrayTypecode.A_STAR_OUT_BUFFER.value)
+
+        # 起點超出範圍 / 終點不可走，不需要搜尋
+        if not (x0 <= sx < x1 and y0 <= sy < y1 and x0 <= ex < x1 and y0 <= ey < y1): return empty
+        if ctx.map[ey * ctx.width + ex]: return empty
+
+        ctx.expanded = 0
+        if ctx.algorithm == SearchAlgorithm.JPS:
+            parent = self._search_jps(ctx, sx, sy, ex, ey, bounds)
+        else:
+            parent = self._search_astar(ctx, sx, sy, ex, ey, bounds)
+
+        if parent is None: return empty
+        return self._write_path(ctx.width, parent, ey * ctx.width + ex)
+
+    def _solve_multi(self, ctx: PyAStarContext, starts: list[GridPoint], goals: list[GridPoint]) -> array.array:
+        found = self._search_multi(ctx, starts, goals, DIST_UNREACHABLE)
+        if found is None: return array.array(ArrayTypecode.A_STAR_OUT_BUFFER.value)
+        return self._write_path(ctx.width, found[0], found[1])
+
+    def _search_multi(
+        self, ctx: PyAStarContext, starts: list[GridPoint], goals: list[GridPoint], max_cost: int
+    ) -> tuple[dict[int, int], int, int] | None:
+        """
+        對應 C 端 search_multi：多起點 / 多終點 A* (heuristic 為到終點包圍盒的距離)
+        回傳 (parent, 抵達的終點, 代價)，找不到或超過 max_cost 回傳 None
+        """
+        w, h_, m = ctx.width, ctx.height, ctx.map
+        ctx.expanded = 0
+
+        goal_set = set()
+        bx0, by0, bx1, by1 = w, h_, -1, -1
+        for p in goals:
+            x, y = p.col, p.row
+            if not (0 <= x < w and 0 <= y < h_) or m[y * w + x]: continue
+            goal_set.add(y * w + x)
+            bx0, by0, bx1, by1 = min(bx0, x), min(by0, y), max(bx1, x), max(by1, y)
+        if not goal_set: return None
+
+        ranges = ctx.landmark_goal(goal_set) if ctx.landmarks else None
+
+        def box_h(x: int, y: int) -> int:
+            h0 = calc_h(x, y, min(max(x, bx0), bx1), min(max(y, by0), by1))
+            if ranges is None: return h0
+            return max(h0, ctx.landmark_h(ranges, y * w + x))
+
+        g: dict[int, int] = {}
+        h: dict[int, int] = {}
+        parent: dict[int, int] = {}
+        closed = set()
+        heap = []
+        for p in starts:
+            x, y = p.col, p.row
+            if not (0 <= x < w and 0 <= y < h_) or m[y * w + x]: continue
+            idx = y * w + x
+            if idx in g: continue
+            g[idx], h[idx], parent[idx] = 0, box_h(x, y), NO_PARENT
+            heappush(heap, (h[idx], h[idx], idx))
+
+        while heap:
+            f, hh, cur = heappop(heap)
+            if cur in closed or f - hh != g[cur]: continue
+
+            # F 是路徑代價的下界，超過上限代表上限內不可能有路徑
+            if f > max_cost: break
+
+            ctx.expanded += 1
+            if cur in goal_set:
+                return parent, cur, g[cur]
+            closed.add(cur)
+
+            cx, cy = cur % w, cur // w
+            gc = g[cur]
+            for dx, dy in DIRS:
+                nx, ny = cx + dx, cy + dy
+                if not (0 <= nx < w and 0 <= ny < h_): continue
+                n = ny * w + nx
+                if m[n] or n in closed: continue
+
+                if dx and dy:
+                    if m[cy * w + nx] or m[ny * w + cx]: continue
+                    new_g = gc + COST_DIAGONAL
+                else:
+                    new_g = gc + COST_STRAIGHT
+
+                old = g.get(n)
+                if old is None:
+                    h[n] = box_h(nx, ny)
+                elif new_g >= old:
+                    continue
+
+                g[n] = new_g
+                parent[n] = cur
+                heappush(heap, (new_g + h[n], h[n], n))
+
+        return None
+
+    def _search_astar(self, ctx, sx, sy, ex, ey, bounds) -> dict[int, int] | None:
+        x0, y0, x1, y1 = bounds
+        w, m = ctx.width, ctx.map
+        start, end = sy * w + sx, ey * w + ex
+
+        # 有地標時 heuristic 取 calc_h 與地標下界的較大值
+        ranges = ctx.landmark_goal((end,)) if ctx.landmarks else None
+
+        def heuristic(x: int, y: int) -> int:
+            h0 = calc_h(x, y, ex, ey)
+            if ranges is None: return h0
+            return max(h0, ctx.landmark_h(ranges, y * w + x))
+
+        h0 = heuristic(sx, sy)
+        g = {start: 0}
+        h = {start: h0}
+        parent = {start: NO_PARENT}
+        closed = set()
+        heap = [(h0, h0, start)]
+
+        while heap:
+            f, hh, cur = heappop(heap)
+            if cur in closed or f - hh != g[cur]: continue
+
+            ctx.expanded += 1
+            if cur == end: return parent
+            closed.add(cur)
+
+            cx, cy = cur % w, cur // w
+            gc = g[cur]
+            for dx, dy in DIRS:
+                nx, ny = cx + dx, cy + dy
+                if not (x0 <= nx < x1 and y0 <= ny < y1): continue
+                n = ny * w + nx
+                if m[n] or n in closed: continue
+
+                # 防切角檢查
+                if dx and dy:
+                    if m[cy * w + nx] or m[ny * w + cx]: continue
+                    new_g = gc + COST_DIAGONAL
+                else:
+                    new_g = gc + COST_STRAIGHT
+
+                old = g.get(n)
+                if old is None:
+                    h[n] = heuristic(nx, ny)
+                elif new_g >= old:
+                    continue
+
+                g[n] = new_g
+                parent[n] = cur
+                heappush(heap, (new_g + h[n], h[n], n))
+
+        return None
+
+    def _search_jps(self, ctx, sx, sy, ex, ey, bounds) -> dict[int, int] | None:
+        x0, y0, x1, y1 = bounds
+        w, m = ctx.width, ctx.map
+        start, end = sy * w + sx, ey * w + ex
+
+        def walkable(x: int, y: int) -> bool:
+            return x0 <= x < x1 and y0 <= y < y1 and m[y * w + x] == 0
+
+        def jump_horizontal(x: int, y: int, dx: int) -> int:
+            if not (y0 <= y < y1): return -1
+            while walkable(x, y):
+                if x == ex and y == ey: return y * w + x
+                if walkable(x, y - 1) and not walkable(x - dx, y - 1): return y * w + x
+                if walkable(x, y + 1) and not walkable(x - dx, y + 1): return y * w + x
+                x += dx
+            return -1
+
+        def jump_vertical(x: int, y: int, dy: int) -> int:
+            if not (x0 <= x < x1): return -1
+            while walkable(x, y):
+                if x == ex and y == ey: return y * w + x
+                if walkable(x - 1, y) and not walkable(x - 1, y - dy): return y * w + x
+                if walkable(x + 1, y) and not walkable(x + 1, y - dy): return y * w + x
+                y += dy
+            return -1
+
+        def jump(x: int, y: int, dx: int, dy: int) -> int:
+            if dy == 0: return jump_horizontal(x, y, dx)
+            if dx == 0: return jump_vertical(x, y, dy)
+
+            while walkable(x, y):
+                if x == ex and y == ey: return y * w + x
+                if jump_horizontal(x + dx, y, dx) != -1 or jump_vertical(x, y + dy, dy) != -1:
+                    return y * w + x
+                if not walkable(x + dx, y) or not walkable(x, y + dy): return -1
+                x += dx
+                y += dy
+            return -1
+
+        def prune_dirs(x: int, y: int, par: int) -> list[tuple[int, int]]:
+            if par == NO_PARENT:
+                return [
+                    (dx, dy) for dx, dy in DIRS
+                    if not (dx and dy) or (walkable(x + dx, y) and walkable(x, y + dy))
+                ]
+
+            px, py = par % w, par // w
+            dx = (x > px) - (x < px)
+            dy = (y > py) - (y < py)
+            out = []
+
+            if dx and dy:
+                vertical, horizontal = walkable(x, y + dy), walkable(x + dx, y)
+                if vertical: out.append((0, dy))
+                if horizontal: out.append((dx, 0))
+                if vertical and horizontal: out.append((dx, dy))
+            elif dx:
+                nxt, up, down = walkable(x + dx, y), walkable(x, y - 1), walkable(x, y + 1)
+                if nxt:
+                    out.append((dx, 0))
+                    if up: out.append((dx, -1))
+                    if down: out.append((dx, 1))
+                if up: out.append((0, -1))
+                if down: out.append((0, 1))
+            else:
+                nxt, left, right = walkable(x, y + dy), walkable(x - 1, y), walkable(x + 1, y)
+                if nxt:
+                    out.append((0, dy))
+                    if left: out.append((-1, dy))
+                    if right: out.append((1, dy))
+                if left: out.append((-1, 0))
+                if right: out.append((1, 0))
+            return out
+
+        h0 = calc_h(sx, sy, ex, ey)
+        g = {start: 0}
+        h = {start: h0}
+        parent = {start: NO_PARENT}
+        closed = set()
+        heap = [(h0, h0, start)]
+
+        while heap:
+            f, hh, cur = heappop(heap)
+            if cur in closed or f - hh != g[cur]: continue
+
+            ctx.expanded += 1
+            if cur == end: return parent
+            closed.add(cur)
+
+            x, y = cur % w, cur // w
+            for dx, dy in prune_dirs(x, y, parent[cur]):
+                jp = jump(x + dx, y + dy, dx, dy)
+                if jp == -1 or jp in closed: continue
+
+                jx, jy = jp % w, jp // w
+                new_g = g[cur] + calc_h(x, y, jx, jy)
+
+                old = g.get(jp)
+                if old is None:
+                    h[jp] = calc_h(jx, jy, ex, ey)
+                elif new_g >= old:
+                    continue
+
+                g[jp] = new_g
+                parent[jp] = cur
+                heappush(heap, (new_g + h[jp], h[jp], jp))
+
+        return None
+
+    @staticmethod
+    def _write_path(width: int, parent: dict[int, int], end: int) -> array.array:
+        """ 從終點回溯，相鄰節點之間以直線 / 斜線逐格補齊 (Start -> End) """
+        x, y = end % width, end // width
+        cells = [(x, y)]
+
+        idx = end
+        while parent[idx] != NO_PARENT:
+            idx = parent[idx]
+            px, py = idx % width, idx // width
+            while x != px or y != py:
+                x += (px > x) - (px < x)
+                y += (py > y) - (py < y)
+                cells.append((x, y))
+
+        path = array.array(ArrayTypecode.A_STAR_OUT_BUFFER.value)
+        for col, row in reversed(cells):
+            path.extend((col, row))
+        return path
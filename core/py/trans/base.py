@@ -19,6 +19,15 @@ class CInterfaceBase:
             dbg.error(f"無法載入路徑", e)
             raise
 
+    def bind(self, func_name, argtypes: list, restype = None):
+        """
+        取出同一個 Library 內的其他 C 函式，並設定傳入/回傳參數規格
+        """
+        c_func = getattr(self.lib, func_name)
+        c_func.argtypes = argtypes
+        c_func.restype = restype
+        return c_func
+
     @staticmethod
     def list_to_c_array(py_list, data_form = VarConfig.BASE):
         """
@@ -26,3 +35,11 @@ class CInterfaceBase:
         先分配需要的記憶體大小，在將指標內的資料輸入
         """
         return (data_form * len(py_list))(*py_list)
+
+    @staticmethod
+    def buffer_to_c_array(py_buffer, data_form = VarConfig.BASE):
+        """
+        零複製：直接把支援 buffer protocol 的物件 (array / bytearray) 包成 C Array
+        兩邊共用同一塊記憶體，data_form 的大小必須與 buffer 元素大小一致
+        """
+        return (data_form * len(py_buffer)).from_buffer(py_buffer)
@@ -1,15 +1,55 @@
 import ctypes
-from enum import Enum
+from enum import Enum, IntEnum
 
 
 class VarConfig(Enum):
     BASE = ctypes.c_int
 
-    A_STAR_MAP         = ctypes.c_int
+    A_STAR_CTX         = ctypes.c_void_p
+    # 需與 Python 端 array 的 typecode 對應，才能透過 buffer protocol 直接傳給 C
+    A_STAR_MAP         = ctypes.c_int8      # array('b')
     A_STAR_W_H         = ctypes.c_int
     A_STAR_POINT       = ctypes.c_int
-    A_STAR_OUT_BUFFER  = ctypes.c_int
+    A_STAR_OUT_BUFFER  = ctypes.c_int16     # array('h')
+    A_STAR_QUERY       = ctypes.c_int       # array('i')
+    A_STAR_LENGTH      = ctypes.c_int32     # array('i')
+    A_STAR_CAPACITY    = ctypes.c_uint32
+    A_STAR_DIST        = ctypes.c_uint32    # array('I')
+    A_STAR_DIR         = ctypes.c_int8      # array('b')
+    A_STAR_GRAPH       = ctypes.c_uint32    # array('I')
     A_STAR_REBACK      = ctypes.c_int
 
+class ArrayTypecode(str, Enum):
+    A_STAR_MAP         = 'b'
+    A_STAR_OUT_BUFFER  = 'h'
+    A_STAR_QUERY       = 'i'
+    A_STAR_LENGTH      = 'i'
+    A_STAR_DIST        = 'I'
+    A_STAR_DIR         = 'b'
+    A_STAR_GRAPH       = 'I'
+
 class FunctionName(Enum):
     SOLVE_A_STAR = 'solve_astar'
+
+    A_STAR_CREATE   = 'astar_create'
+    A_STAR_DESTROY  = 'astar_destroy'
+    A_STAR_LOAD_MAP = 'astar_load_map'
+    A_STAR_SET_CELL = 'astar_set_cell'
+    A_STAR_SET_RECT = 'astar_set_rect'
+    A_STAR_SOLVE    = 'astar_solve'
+    A_STAR_SOLVE_BATCH = 'astar_solve_batch'
+    A_STAR_SOLVE_BATCH_BOUNDED = 'astar_solve_batch_bounded'
+    A_STAR_SOLVE_MULTI_BATCH   = 'astar_solve_multi_batch'
+    A_STAR_SOLVE_MULTI_COST    = 'astar_solve_multi_cost'
+    A_STAR_FLOW_FIELD  = 'astar_flow_field'
+    A_STAR_FLOW_FIELD_UNTIL = 'astar_flow_field_until'
+    A_STAR_FLOW_FIELD_REPAIR = 'astar_flow_field_repair'
+    A_STAR_GRAPH_SEARCH = 'astar_graph_search'
+    A_STAR_SET_ALGORITHM = 'astar_set_algorithm'
+    A_STAR_GET_EXPANDED  = 'astar_get_expanded'
+    A_STAR_SET_LANDMARKS = 'astar_set_landmarks'
+
+class SearchAlgorithm(IntEnum):
+    """ 需與 C 端 ALGO_A_STAR / ALGO_JPS 一致 """
+    A_STAR = 0
+    JPS = 1     # Jump Point Search：空曠地圖展開的節點少很多，結果代價與 A* 相同
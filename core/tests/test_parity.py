@@ -0,0 +1,30 @@
+"""
+[尋路正確性測試] py.a_star.parity 的自動化版本 (地圖數較少，固定亂數種子)
+執行方式 (於 core 目錄):
+    python -m unittest discover -s tests
+"""
+import unittest
+
+from py.a_star.parity import REPORT_LIMIT, backend_errors, backends, component_errors
+
+# 每個後端檢查的隨機地圖數量與亂數種子 (完整檢查請用 python -m py.a_star.parity)
+MAPS = 40
+SEED = 0
+
+
+class PathfindingParityTest(unittest.TestCase):
+    def test_backends_match_dijkstra(self):
+        """ 每個尋路後端 (C / 純 Python 的 A*、JPS) 的路徑合法且代價與 Dijkstra 相同 """
+        for name, inf in backends():
+            with self.subTest(backend = name):
+                _, errors = backend_errors(inf, MAPS, SEED)
+                self.assertFalse(errors, "\n".join(errors[:REPORT_LIMIT]))
+
+    def test_component_labels_match_dijkstra(self):
+        """ 增量維護的連通區塊與 Dijkstra 的可達性一致 """
+        _, _, errors = component_errors(MAPS, SEED)
+        self.assertFalse(errors, "\n".join(errors[:REPORT_LIMIT]))
+
+
+if __name__ == "__main__":
+    unittest.main()